@@ -61,12 +61,17 @@ static PyObject * py_get_reducible_collision_matrix(PyObject *self,
                                                     PyObject *args);
 static PyObject * py_symmetrize_collision_matrix(PyObject *self,
                                                  PyObject *args);
+static PyObject *
+py_average_collision_matrix_by_degeneracy(PyObject *self, PyObject *args);
 static PyObject * py_expand_collision_matrix(PyObject *self, PyObject *args);
+static PyObject * py_expand_local_values(PyObject *self, PyObject *args);
 static PyObject * py_distribute_fc3(PyObject *self, PyObject *args);
 static PyObject * py_rotate_delta_fc2s(PyObject *self, PyObject *args);
 static PyObject * py_get_isotope_strength(PyObject *self, PyObject *args);
 static PyObject * py_get_thm_isotope_strength(PyObject *self, PyObject *args);
 static PyObject *
+py_get_isotope_strength_at_grid_points(PyObject *self, PyObject *args);
+static PyObject *
 py_set_permutation_symmetry_fc3(PyObject *self, PyObject *args);
 static PyObject *
 py_set_permutation_symmetry_compact_fc3(PyObject *self, PyObject *args);
@@ -83,6 +88,13 @@ py_set_triplets_integration_weights(PyObject *self, PyObject *args);
 static PyObject *
 py_set_triplets_integration_weights_with_sigma(PyObject *self, PyObject *args);
 static PyObject *
+py_get_triplets_sorted_freq_vertices(PyObject *self, PyObject *args);
+static PyObject * py_get_joint_dos(PyObject *self, PyObject *args);
+static PyObject * py_get_joint_dos_with_sigma(PyObject *self, PyObject *args);
+static PyObject *
+py_set_triplets_integration_weights_at_sorted_freq_vertices(PyObject *self,
+                                                            PyObject *args);
+static PyObject *
 py_get_grid_index_from_address(PyObject *self, PyObject *args);
 static PyObject *
 py_get_gr_grid_addresses(PyObject *self, PyObject *args);
@@ -172,10 +184,18 @@ static PyMethodDef _phono3py_methods[] = {
    (PyCFunction)py_symmetrize_collision_matrix,
    METH_VARARGS,
    "Symmetrize collision matrix"},
+  {"average_collision_matrix_by_degeneracy",
+   (PyCFunction)py_average_collision_matrix_by_degeneracy,
+   METH_VARARGS,
+   "Average collision matrix elements of degenerate bands"},
   {"expand_collision_matrix",
    (PyCFunction)py_expand_collision_matrix,
    METH_VARARGS,
    "Expand collision matrix"},
+  {"expand_local_values",
+   (PyCFunction)py_expand_local_values,
+   METH_VARARGS,
+   "Expand values at ir-grid-points to all grid points"},
   {"distribute_fc3",
    (PyCFunction)py_distribute_fc3,
    METH_VARARGS,
@@ -192,6 +212,10 @@ static PyMethodDef _phono3py_methods[] = {
    (PyCFunction)py_get_thm_isotope_strength,
    METH_VARARGS,
    "Isotope scattering strength for tetrahedron_method"},
+  {"isotope_strength_at_grid_points",
+   (PyCFunction)py_get_isotope_strength_at_grid_points,
+   METH_VARARGS,
+   "Isotope scattering strength at many grid points"},
   {"permutation_symmetry_fc3",
    (PyCFunction)py_set_permutation_symmetry_fc3,
    METH_VARARGS,
@@ -228,6 +252,22 @@ static PyMethodDef _phono3py_methods[] = {
    (PyCFunction)py_set_triplets_integration_weights_with_sigma,
    METH_VARARGS,
    "Integration weights of smearing method for triplets"},
+  {"triplets_sorted_freq_vertices",
+   (PyCFunction)py_get_triplets_sorted_freq_vertices,
+   METH_VARARGS,
+   "Sorted frequencies at tetrahedra vertices for triplets"},
+  {"triplets_integration_weights_at_sorted_freq_vertices",
+   (PyCFunction)py_set_triplets_integration_weights_at_sorted_freq_vertices,
+   METH_VARARGS,
+   "Integration weights of tetrahedron method from sorted frequencies"},
+  {"joint_dos",
+   (PyCFunction)py_get_joint_dos,
+   METH_VARARGS,
+   "Joint density of states at grid points by tetrahedron method"},
+  {"joint_dos_with_sigma",
+   (PyCFunction)py_get_joint_dos_with_sigma,
+   METH_VARARGS,
+   "Joint density of states at grid points by smearing method"},
   {"grid_index_from_address",
    (PyCFunction)py_get_grid_index_from_address,
    METH_VARARGS,
@@ -414,6 +454,7 @@ static PyObject * py_get_interaction(PyObject *self, PyObject *args)
   s2p = (long*)PyArray_DATA(py_s2p_map);
   band_indices = (long*)PyArray_DATA(py_band_indices);
 
+  Py_BEGIN_ALLOW_THREADS
   ph3py_get_interaction(fc3_normal_squared,
                         g_zero,
                         freqs,
@@ -434,6 +475,7 @@ static PyObject * py_get_interaction(PyObject *self, PyObject *args)
                         band_indices,
                         symmetrize_fc3_q,
                         cutoff_frequency);
+  Py_END_ALLOW_THREADS
 
   free(fc3_normal_squared);
   fc3_normal_squared = NULL;
@@ -463,8 +505,11 @@ static PyObject * py_get_pp_collision(PyObject *self, PyObject *args)
   PyArrayObject *py_s2p_map;
   PyArrayObject *py_band_indices;
   PyArrayObject *py_temperatures;
+  PyObject *py_frequency_points;
   double cutoff_frequency;
   long is_NU;
+  long is_per_triplet;
+  long scattering_event_class;
   long symmetrize_fc3_q;
   long bz_grid_type;
 
@@ -487,11 +532,13 @@ static PyObject * py_get_pp_collision(PyObject *self, PyObject *args)
   long *s2p;
   Larray *band_indices;
   Darray *temperatures;
+  Darray *frequency_points;
   long svecs_dims[3];
   long i;
   long is_compact_fc3;
 
-  if (!PyArg_ParseTuple(args, "OOOOOOOOlOOOOOOOOOOlld",
+  is_per_triplet = 0;
+  if (!PyArg_ParseTuple(args, "OOOOOOOOlOOOOOOOOOOOllld|l",
                         &py_gamma,
                         &py_relative_grid_address,
                         &py_frequencies,
@@ -511,9 +558,12 @@ static PyObject * py_get_pp_collision(PyObject *self, PyObject *args)
                         &py_s2p_map,
                         &py_band_indices,
                         &py_temperatures,
+                        &py_frequency_points,
                         &is_NU,
+                        &scattering_event_class,
                         &symmetrize_fc3_q,
-                        &cutoff_frequency)) {
+                        &cutoff_frequency,
+                        &is_per_triplet)) {
     return NULL;
   }
 
@@ -544,7 +594,14 @@ static PyObject * py_get_pp_collision(PyObject *self, PyObject *args)
   s2p = (long*)PyArray_DATA(py_s2p_map);
   band_indices = convert_to_larray(py_band_indices);
   temperatures = convert_to_darray(py_temperatures);
+  if (py_frequency_points == Py_None) {
+    frequency_points = NULL;
+  } else {
+    frequency_points = convert_to_darray(
+      (PyArrayObject*)py_frequency_points);
+  }
 
+  Py_BEGIN_ALLOW_THREADS
   ph3py_get_pp_collision(gamma,
                          relative_grid_address,
                          frequencies,
@@ -567,14 +624,22 @@ static PyObject * py_get_pp_collision(PyObject *self, PyObject *args)
                          s2p,
                          band_indices,
                          temperatures,
+                         frequency_points,
                          is_NU,
+                         is_per_triplet,
+                         scattering_event_class,
                          symmetrize_fc3_q,
                          cutoff_frequency);
+  Py_END_ALLOW_THREADS
 
   free(band_indices);
   band_indices = NULL;
   free(temperatures);
   temperatures = NULL;
+  if (frequency_points != NULL) {
+    free(frequency_points);
+    frequency_points = NULL;
+  }
 
   Py_RETURN_NONE;
 }
@@ -597,7 +662,11 @@ static PyObject * py_get_pp_collision_with_sigma(PyObject *self, PyObject *args)
   PyArrayObject *py_s2p_map;
   PyArrayObject *py_band_indices;
   PyArrayObject *py_temperatures;
+  PyObject *py_frequency_points;
+  PyObject *py_adaptive_sigmas;
   long is_NU;
+  long is_per_triplet;
+  long scattering_event_class;
   long symmetrize_fc3_q;
   double sigma;
   double sigma_cutoff;
@@ -620,11 +689,15 @@ static PyObject * py_get_pp_collision_with_sigma(PyObject *self, PyObject *args)
   long *s2p;
   Larray *band_indices;
   Darray *temperatures;
+  Darray *frequency_points;
+  double *adaptive_sigmas;
   long svecs_dims[3];
   long i;
   long is_compact_fc3;
 
-  if (!PyArg_ParseTuple(args, "OddOOOOOOOOOOOOOOOlld",
+  py_adaptive_sigmas = Py_None;
+  is_per_triplet = 0;
+  if (!PyArg_ParseTuple(args, "OddOOOOOOOOOOOOOOOOllld|Ol",
                         &py_gamma,
                         &sigma,
                         &sigma_cutoff,
@@ -643,9 +716,13 @@ static PyObject * py_get_pp_collision_with_sigma(PyObject *self, PyObject *args)
                         &py_s2p_map,
                         &py_band_indices,
                         &py_temperatures,
+                        &py_frequency_points,
                         &is_NU,
+                        &scattering_event_class,
                         &symmetrize_fc3_q,
-                        &cutoff_frequency)) {
+                        &cutoff_frequency,
+                        &py_adaptive_sigmas,
+                        &is_per_triplet)) {
     return NULL;
   }
 
@@ -674,10 +751,24 @@ static PyObject * py_get_pp_collision_with_sigma(PyObject *self, PyObject *args)
   s2p = (long*)PyArray_DATA(py_s2p_map);
   band_indices = convert_to_larray(py_band_indices);
   temperatures = convert_to_darray(py_temperatures);
+  if (py_frequency_points == Py_None) {
+    frequency_points = NULL;
+  } else {
+    frequency_points = convert_to_darray(
+      (PyArrayObject*)py_frequency_points);
+  }
+  if (py_adaptive_sigmas == Py_None) {
+    adaptive_sigmas = NULL;
+  } else {
+    adaptive_sigmas = (double*)PyArray_DATA(
+      (PyArrayObject*)py_adaptive_sigmas);
+  }
 
+  Py_BEGIN_ALLOW_THREADS
   ph3py_get_pp_collision_with_sigma(gamma,
                                     sigma,
                                     sigma_cutoff,
+                                    adaptive_sigmas,
                                     frequencies,
                                     eigenvectors,
                                     triplets,
@@ -696,14 +787,22 @@ static PyObject * py_get_pp_collision_with_sigma(PyObject *self, PyObject *args)
                                     s2p,
                                     band_indices,
                                     temperatures,
+                                    frequency_points,
                                     is_NU,
+                                    is_per_triplet,
+                                    scattering_event_class,
                                     symmetrize_fc3_q,
                                     cutoff_frequency);
+  Py_END_ALLOW_THREADS
 
   free(band_indices);
   band_indices = NULL;
   free(temperatures);
   temperatures = NULL;
+  if (frequency_points != NULL) {
+    free(frequency_points);
+    frequency_points = NULL;
+  }
 
   Py_RETURN_NONE;
 }
@@ -752,6 +851,7 @@ static PyObject * py_get_imag_self_energy_with_g(PyObject *self, PyObject *args)
   triplet_weights = (long*)PyArray_DATA(py_triplet_weights);
   num_frequency_points = (long)PyArray_DIMS(py_g)[2];
 
+  Py_BEGIN_ALLOW_THREADS
   ph3py_get_imag_self_energy_at_bands_with_g(gamma,
                                              fc3_normal_squared,
                                              frequencies,
@@ -763,6 +863,7 @@ static PyObject * py_get_imag_self_energy_with_g(PyObject *self, PyObject *args)
                                              cutoff_frequency,
                                              num_frequency_points,
                                              frequency_point_index);
+  Py_END_ALLOW_THREADS
 
   free(fc3_normal_squared);
   fc3_normal_squared = NULL;
@@ -823,6 +924,7 @@ py_get_detailed_imag_self_energy_with_g(PyObject *self, PyObject *args)
   triplet_weights = (long*)PyArray_DATA(py_triplet_weights);
   bz_grid_addresses = (long(*)[3])PyArray_DATA(py_bz_grid_addresses);
 
+  Py_BEGIN_ALLOW_THREADS
   ph3py_get_detailed_imag_self_energy_at_bands_with_g(gamma_detail,
                                                       gamma_N,
                                                       gamma_U,
@@ -835,6 +937,7 @@ py_get_detailed_imag_self_energy_with_g(PyObject *self, PyObject *args)
                                                       g_zero,
                                                       temperature,
                                                       cutoff_frequency);
+  Py_END_ALLOW_THREADS
 
   free(fc3_normal_squared);
   fc3_normal_squared = NULL;
@@ -1015,6 +1118,7 @@ static PyObject * py_get_collision_matrix(PyObject *self, PyObject *args)
   assert(num_rot == PyArray_DIMS(py_rotations_cartesian)[0]);
   assert(num_gp == PyArray_DIMS(py_frequencies)[0]);
 
+  Py_BEGIN_ALLOW_THREADS
   ph3py_get_collision_matrix(collision_matrix,
                              fc3_normal_squared,
                              frequencies,
@@ -1030,6 +1134,7 @@ static PyObject * py_get_collision_matrix(PyObject *self, PyObject *args)
                              temperature,
                              unit_conversion_factor,
                              cutoff_frequency);
+  Py_END_ALLOW_THREADS
 
   free(fc3_normal_squared);
   fc3_normal_squared = NULL;
@@ -1080,6 +1185,7 @@ static PyObject * py_get_reducible_collision_matrix(PyObject *self, PyObject *ar
   num_gp = (long)PyArray_DIMS(py_triplets_map)[0];
   map_q = (long*)PyArray_DATA(py_map_q);
 
+  Py_BEGIN_ALLOW_THREADS
   ph3py_get_reducible_collision_matrix(collision_matrix,
                                        fc3_normal_squared,
                                        frequencies,
@@ -1091,6 +1197,7 @@ static PyObject * py_get_reducible_collision_matrix(PyObject *self, PyObject *ar
                                        temperature,
                                        unit_conversion_factor,
                                        cutoff_frequency);
+  Py_END_ALLOW_THREADS
 
   free(fc3_normal_squared);
   fc3_normal_squared = NULL;
@@ -1111,7 +1218,6 @@ static PyObject * py_symmetrize_collision_matrix(PyObject *self, PyObject *args)
     return NULL;
   }
 
-  collision_matrix = (double*)PyArray_DATA(py_collision_matrix);
   num_sigma = (long)PyArray_DIMS(py_collision_matrix)[0];
   num_temp = (long)PyArray_DIMS(py_collision_matrix)[1];
   num_grid_points = (long)PyArray_DIMS(py_collision_matrix)[2];
@@ -1123,10 +1229,81 @@ static PyObject * py_symmetrize_collision_matrix(PyObject *self, PyObject *args)
     num_column = num_grid_points * num_band;
   }
 
-  ph3py_symmetrize_collision_matrix(collision_matrix,
-                                    num_column,
-                                    num_temp,
-                                    num_sigma);
+  /* Collision matrix in mixed precision mode is stored in float. */
+  if (PyArray_TYPE(py_collision_matrix) == NPY_FLOAT) {
+    ph3py_symmetrize_collision_matrix_single(
+      (float*)PyArray_DATA(py_collision_matrix),
+      num_column,
+      num_temp,
+      num_sigma);
+  } else {
+    collision_matrix = (double*)PyArray_DATA(py_collision_matrix);
+    ph3py_symmetrize_collision_matrix(collision_matrix,
+                                      num_column,
+                                      num_temp,
+                                      num_sigma);
+  }
+
+  Py_RETURN_NONE;
+}
+
+static PyObject *
+py_average_collision_matrix_by_degeneracy(PyObject *self, PyObject *args)
+{
+  PyArrayObject *py_collision_matrix;
+  PyArrayObject *py_degenerate_bands;
+
+  double *collision_matrix;
+  long *degenerate_bands;
+  long num_band, num_row_grid_points, num_grid_points, num_temp, num_sigma,
+    num_elem, row_grid_point_offset;
+
+  row_grid_point_offset = 0;
+  if (!PyArg_ParseTuple(args, "OO|l",
+                        &py_collision_matrix,
+                        &py_degenerate_bands,
+                        &row_grid_point_offset)) {
+    return NULL;
+  }
+
+  degenerate_bands = (long*)PyArray_DATA(py_degenerate_bands);
+  num_sigma = (long)PyArray_DIMS(py_collision_matrix)[0];
+  num_temp = (long)PyArray_DIMS(py_collision_matrix)[1];
+  num_row_grid_points = (long)PyArray_DIMS(py_collision_matrix)[2];
+  num_band = (long)PyArray_DIMS(py_collision_matrix)[3];
+
+  if (PyArray_NDIM(py_collision_matrix) == 8) {
+    num_elem = 3;
+    num_grid_points = (long)PyArray_DIMS(py_collision_matrix)[5];
+  } else {
+    num_elem = 1;
+    num_grid_points = (long)PyArray_DIMS(py_collision_matrix)[4];
+  }
+
+  /* Collision matrix in mixed precision mode is stored in float. */
+  if (PyArray_TYPE(py_collision_matrix) == NPY_FLOAT) {
+    ph3py_average_collision_matrix_by_degeneracy_single(
+      (float*)PyArray_DATA(py_collision_matrix),
+      degenerate_bands,
+      num_row_grid_points,
+      row_grid_point_offset,
+      num_grid_points,
+      num_band,
+      num_elem,
+      num_temp,
+      num_sigma);
+  } else {
+    collision_matrix = (double*)PyArray_DATA(py_collision_matrix);
+    ph3py_average_collision_matrix_by_degeneracy(collision_matrix,
+                                                 degenerate_bands,
+                                                 num_row_grid_points,
+                                                 row_grid_point_offset,
+                                                 num_grid_points,
+                                                 num_band,
+                                                 num_elem,
+                                                 num_temp,
+                                                 num_sigma);
+  }
 
   Py_RETURN_NONE;
 }
@@ -1159,6 +1336,7 @@ static PyObject * py_expand_collision_matrix(PyObject *self, PyObject *args)
   num_rot = (long)PyArray_DIMS(py_rot_grid_points)[0];
   num_ir_gp = (long)PyArray_DIMS(py_ir_grid_points)[0];
 
+  Py_BEGIN_ALLOW_THREADS
   ph3py_expand_collision_matrix(collision_matrix,
                                 rot_grid_points,
                                 ir_grid_points,
@@ -1168,6 +1346,57 @@ static PyObject * py_expand_collision_matrix(PyObject *self, PyObject *args)
                                 num_sigma,
                                 num_temp,
                                 num_band);
+  Py_END_ALLOW_THREADS
+
+  Py_RETURN_NONE;
+}
+
+static PyObject * py_expand_local_values(PyObject *self, PyObject *args)
+{
+  PyArrayObject *py_values;
+  PyObject *py_rotations;
+  PyArrayObject *py_ir_grid_points;
+  PyArrayObject *py_rot_grid_points;
+
+  double *values;
+  double *rotations;
+  long *rot_grid_points;
+  long *ir_grid_points;
+  long num_slice, num_grid_points, num_elem, num_rot, num_ir_gp;
+
+  if (!PyArg_ParseTuple(args, "OOOO",
+                        &py_values,
+                        &py_rotations,
+                        &py_ir_grid_points,
+                        &py_rot_grid_points)) {
+    return NULL;
+  }
+
+  values = (double*)PyArray_DATA(py_values);
+  if (py_rotations == Py_None) {
+    rotations = NULL;
+  } else {
+    rotations = (double*)PyArray_DATA((PyArrayObject*)py_rotations);
+  }
+  rot_grid_points = (long*)PyArray_DATA(py_rot_grid_points);
+  ir_grid_points = (long*)PyArray_DATA(py_ir_grid_points);
+  num_slice = (long)PyArray_DIMS(py_values)[0];
+  num_grid_points = (long)PyArray_DIMS(py_values)[1];
+  num_elem = (long)PyArray_DIMS(py_values)[2];
+  num_rot = (long)PyArray_DIMS(py_rot_grid_points)[0];
+  num_ir_gp = (long)PyArray_DIMS(py_ir_grid_points)[0];
+
+  Py_BEGIN_ALLOW_THREADS
+  ph3py_expand_local_values(values,
+                            rotations,
+                            rot_grid_points,
+                            ir_grid_points,
+                            num_ir_gp,
+                            num_grid_points,
+                            num_rot,
+                            num_slice,
+                            num_elem);
+  Py_END_ALLOW_THREADS
 
   Py_RETURN_NONE;
 }
@@ -1295,6 +1524,108 @@ static PyObject * py_get_thm_isotope_strength(PyObject *self, PyObject *args)
   Py_RETURN_NONE;
 }
 
+static PyObject *
+py_get_isotope_strength_at_grid_points(PyObject *self, PyObject *args)
+{
+  PyArrayObject *py_gamma;
+  PyArrayObject *py_target_grid_points;
+  PyArrayObject *py_grid_points;
+  PyArrayObject *py_weights;
+  PyArrayObject *py_sigmas;
+  PyObject *py_relative_grid_address;
+  PyArrayObject *py_D_diag;
+  PyArrayObject *py_bz_grid_addresses;
+  PyArrayObject *py_bz_map;
+  PyArrayObject *py_mass_variances;
+  PyArrayObject *py_frequencies;
+  PyArrayObject *py_eigenvectors;
+  PyArrayObject *py_band_indices;
+  long bz_grid_type;
+  double cutoff_frequency;
+
+  double *gamma;
+  long *target_grid_points;
+  long *grid_points;
+  long *weights;
+  double *sigmas;
+  long (*relative_grid_address)[4][3];
+  long *D_diag;
+  long (*bz_grid_addresses)[3];
+  long *bz_map;
+  double *mass_variances;
+  double *frequencies;
+  lapack_complex_double *eigenvectors;
+  long *band_indices;
+  long num_target_grid_points, num_grid_points, num_sigmas;
+  long num_band, num_band0;
+
+  if (!PyArg_ParseTuple(args, "OOOOOOOOOlOOOOd",
+                        &py_gamma,
+                        &py_target_grid_points,
+                        &py_grid_points,
+                        &py_weights,
+                        &py_sigmas,
+                        &py_relative_grid_address,
+                        &py_D_diag,
+                        &py_bz_grid_addresses,
+                        &py_bz_map,
+                        &bz_grid_type,
+                        &py_mass_variances,
+                        &py_frequencies,
+                        &py_eigenvectors,
+                        &py_band_indices,
+                        &cutoff_frequency)) {
+    return NULL;
+  }
+
+  gamma = (double*)PyArray_DATA(py_gamma);
+  target_grid_points = (long*)PyArray_DATA(py_target_grid_points);
+  num_target_grid_points = (long)PyArray_DIMS(py_target_grid_points)[0];
+  grid_points = (long*)PyArray_DATA(py_grid_points);
+  num_grid_points = (long)PyArray_DIMS(py_grid_points)[0];
+  weights = (long*)PyArray_DATA(py_weights);
+  sigmas = (double*)PyArray_DATA(py_sigmas);
+  num_sigmas = (long)PyArray_DIMS(py_sigmas)[0];
+  if (py_relative_grid_address == Py_None) {
+    relative_grid_address = NULL;
+  } else {
+    relative_grid_address = (long(*)[4][3])PyArray_DATA(
+      (PyArrayObject*)py_relative_grid_address);
+  }
+  D_diag = (long*)PyArray_DATA(py_D_diag);
+  bz_grid_addresses = (long(*)[3])PyArray_DATA(py_bz_grid_addresses);
+  bz_map = (long*)PyArray_DATA(py_bz_map);
+  mass_variances = (double*)PyArray_DATA(py_mass_variances);
+  frequencies = (double*)PyArray_DATA(py_frequencies);
+  eigenvectors = (lapack_complex_double*)PyArray_DATA(py_eigenvectors);
+  band_indices = (long*)PyArray_DATA(py_band_indices);
+  num_band = (long)PyArray_DIMS(py_frequencies)[1];
+  num_band0 = (long)PyArray_DIMS(py_band_indices)[0];
+
+  ph3py_get_isotope_scattering_strength_at_grid_points(gamma,
+                                                       target_grid_points,
+                                                       num_target_grid_points,
+                                                       grid_points,
+                                                       weights,
+                                                       num_grid_points,
+                                                       sigmas,
+                                                       num_sigmas,
+                                                       relative_grid_address,
+                                                       D_diag,
+                                                       bz_grid_addresses,
+                                                       bz_map,
+                                                       bz_grid_type,
+                                                       mass_variances,
+                                                       frequencies,
+                                                       eigenvectors,
+                                                       band_indices,
+                                                       num_band,
+                                                       num_band0,
+                                                       cutoff_frequency);
+
+  Py_RETURN_NONE;
+}
+
 static PyObject * py_distribute_fc3(PyObject *self, PyObject *args)
 {
   PyArrayObject *force_constants_third;
@@ -1555,6 +1886,7 @@ static PyObject * py_set_integration_weights(PyObject *self, PyObject *args)
   PyArrayObject *py_bz_grid_address;
   PyArrayObject *py_bz_map;
   long bz_grid_type;
+  int function;
 
   double *iw;
   double *frequency_points;
@@ -1566,7 +1898,8 @@ static PyObject * py_set_integration_weights(PyObject *self, PyObject *args)
   long *bz_map;
   double *frequencies;
 
-  if (!PyArg_ParseTuple(args, "OOOOOOOOl",
+  function = 'I';
+  if (!PyArg_ParseTuple(args, "OOOOOOOOl|C",
                         &py_iw,
                         &py_frequency_points,
                         &py_relative_grid_address,
@@ -1575,7 +1908,8 @@ static PyObject * py_set_integration_weights(PyObject *self, PyObject *args)
                         &py_frequencies,
                         &py_bz_grid_address,
                         &py_bz_map,
-                        &bz_grid_type)) {
+                        &bz_grid_type,
+                        &function)) {
     return NULL;
   }
 
@@ -1602,7 +1936,8 @@ static PyObject * py_set_integration_weights(PyObject *self, PyObject *args)
                                 bz_grid_address,
                                 bz_map,
                                 bz_grid_type,
-                                frequencies);
+                                frequencies,
+                                (char)function);
 
   Py_RETURN_NONE;
 }
@@ -1794,6 +2129,7 @@ py_set_triplets_integration_weights_with_sigma(PyObject *self, PyObject *args)
   PyArrayObject *py_frequency_points;
   PyArrayObject *py_triplets;
   PyArrayObject *py_frequencies;
+  PyObject *py_adaptive_sigmas;
   double sigma, sigma_cutoff;
 
   double *iw;
@@ -1801,16 +2137,19 @@ py_set_triplets_integration_weights_with_sigma(PyObject *self, PyObject *args)
   double *frequency_points;
   long (*triplets)[3];
   double *frequencies;
+  double *adaptive_sigmas;
   long num_band0, num_band, num_iw, num_triplets;
 
-  if (!PyArg_ParseTuple(args, "OOOOOdd",
+  py_adaptive_sigmas = Py_None;
+  if (!PyArg_ParseTuple(args, "OOOOOdd|O",
                         &py_iw,
                         &py_iw_zero,
                         &py_frequency_points,
                         &py_triplets,
                         &py_frequencies,
                         &sigma,
-                        &sigma_cutoff)) {
+                        &sigma_cutoff,
+                        &py_adaptive_sigmas)) {
     return NULL;
   }
 
@@ -1823,11 +2162,18 @@ py_set_triplets_integration_weights_with_sigma(PyObject *self, PyObject *args)
   frequencies = (double*)PyArray_DATA(py_frequencies);
   num_band = (long)PyArray_DIMS(py_frequencies)[1];
   num_iw = (long)PyArray_DIMS(py_iw)[0];
+  if (py_adaptive_sigmas == Py_None) {
+    adaptive_sigmas = NULL;
+  } else {
+    adaptive_sigmas = (double*)PyArray_DATA(
+      (PyArrayObject*)py_adaptive_sigmas);
+  }
 
   ph3py_get_integration_weight_with_sigma(iw,
                                           iw_zero,
                                           sigma,
                                           sigma_cutoff,
+                                          adaptive_sigmas,
                                           frequency_points,
                                           num_band0,
                                           triplets,
@@ -1839,6 +2185,290 @@ py_set_triplets_integration_weights_with_sigma(PyObject *self, PyObject *args)
   Py_RETURN_NONE;
 }
 
+static PyObject * py_get_joint_dos(PyObject *self, PyObject *args)
+{
+  PyArrayObject *py_jdos;
+  PyArrayObject *py_frequency_points;
+  PyArrayObject *py_temperatures;
+  PyArrayObject *py_relative_grid_address;
+  PyArrayObject *py_triplets;
+  PyArrayObject *py_triplet_weights;
+  PyArrayObject *py_triplets_offsets;
+  PyArrayObject *py_bz_grid_addresses;
+  PyArrayObject *py_bz_map;
+  PyArrayObject *py_D_diag;
+  PyArrayObject *py_frequencies;
+  long bz_grid_type;
+  double cutoff_frequency;
+
+  double *jdos;
+  double *frequency_points;
+  double *temperatures;
+  long (*relative_grid_address)[4][3];
+  long (*triplets)[3];
+  long *triplet_weights;
+  long *triplets_offsets;
+  long (*bz_grid_addresses)[3];
+  long *bz_map;
+  long *D_diag;
+  double *frequencies;
+  long num_frequency_points, num_temps, num_grid_points, num_band;
+
+  if (!PyArg_ParseTuple(args, "OOOOOOOOOlOOd",
+                        &py_jdos,
+                        &py_frequency_points,
+                        &py_temperatures,
+                        &py_relative_grid_address,
+                        &py_triplets,
+                        &py_triplet_weights,
+                        &py_triplets_offsets,
+                        &py_bz_grid_addresses,
+                        &py_bz_map,
+                        &bz_grid_type,
+                        &py_D_diag,
+                        &py_frequencies,
+                        &cutoff_frequency)) {
+    return NULL;
+  }
+
+  jdos = (double*)PyArray_DATA(py_jdos);
+  frequency_points = (double*)PyArray_DATA(py_frequency_points);
+  num_frequency_points = (long)PyArray_DIMS(py_frequency_points)[0];
+  temperatures = (double*)PyArray_DATA(py_temperatures);
+  num_temps = (long)PyArray_DIMS(py_temperatures)[0];
+  relative_grid_address = (long(*)[4][3])PyArray_DATA(py_relative_grid_address);
+  triplets = (long(*)[3])PyArray_DATA(py_triplets);
+  triplet_weights = (long*)PyArray_DATA(py_triplet_weights);
+  triplets_offsets = (long*)PyArray_DATA(py_triplets_offsets);
+  num_grid_points = (long)PyArray_DIMS(py_triplets_offsets)[0] - 1;
+  bz_grid_addresses = (long(*)[3])PyArray_DATA(py_bz_grid_addresses);
+  bz_map = (long*)PyArray_DATA(py_bz_map);
+  D_diag = (long*)PyArray_DATA(py_D_diag);
+  frequencies = (double*)PyArray_DATA(py_frequencies);
+  num_band = (long)PyArray_DIMS(py_frequencies)[1];
+
+  ph3py_get_joint_dos(jdos,
+                      frequency_points,
+                      num_frequency_points,
+                      temperatures,
+                      num_temps,
+                      relative_grid_address,
+                      triplets,
+                      triplet_weights,
+                      triplets_offsets,
+                      num_grid_points,
+                      bz_grid_addresses,
+                      bz_map,
+                      bz_grid_type,
+                      D_diag,
+                      frequencies,
+                      num_band,
+                      cutoff_frequency);
+
+  Py_RETURN_NONE;
+}
+
+static PyObject * py_get_joint_dos_with_sigma(PyObject *self, PyObject *args)
+{
+  PyArrayObject *py_jdos;
+  PyArrayObject *py_frequency_points;
+  PyArrayObject *py_temperatures;
+  PyArrayObject *py_triplets;
+  PyArrayObject *py_triplet_weights;
+  PyArrayObject *py_triplets_offsets;
+  PyArrayObject *py_frequencies;
+  double sigma, sigma_cutoff, cutoff_frequency;
+
+  double *jdos;
+  double *frequency_points;
+  double *temperatures;
+  long (*triplets)[3];
+  long *triplet_weights;
+  long *triplets_offsets;
+  double *frequencies;
+  long num_frequency_points, num_temps, num_grid_points, num_band;
+
+  if (!PyArg_ParseTuple(args, "OddOOOOOOd",
+                        &py_jdos,
+                        &sigma,
+                        &sigma_cutoff,
+                        &py_frequency_points,
+                        &py_temperatures,
+                        &py_triplets,
+                        &py_triplet_weights,
+                        &py_triplets_offsets,
+                        &py_frequencies,
+                        &cutoff_frequency)) {
+    return NULL;
+  }
+
+  jdos = (double*)PyArray_DATA(py_jdos);
+  frequency_points = (double*)PyArray_DATA(py_frequency_points);
+  num_frequency_points = (long)PyArray_DIMS(py_frequency_points)[0];
+  temperatures = (double*)PyArray_DATA(py_temperatures);
+  num_temps = (long)PyArray_DIMS(py_temperatures)[0];
+  triplets = (long(*)[3])PyArray_DATA(py_triplets);
+  triplet_weights = (long*)PyArray_DATA(py_triplet_weights);
+  triplets_offsets = (long*)PyArray_DATA(py_triplets_offsets);
+  num_grid_points = (long)PyArray_DIMS(py_triplets_offsets)[0] - 1;
+  frequencies = (double*)PyArray_DATA(py_frequencies);
+  num_band = (long)PyArray_DIMS(py_frequencies)[1];
+
+  ph3py_get_joint_dos_with_sigma(jdos,
+                                 sigma,
+                                 sigma_cutoff,
+                                 frequency_points,
+                                 num_frequency_points,
+                                 temperatures,
+                                 num_temps,
+                                 triplets,
+                                 triplet_weights,
+                                 triplets_offsets,
+                                 num_grid_points,
+                                 frequencies,
+                                 num_band,
+                                 cutoff_frequency);
+
+  Py_RETURN_NONE;
+}
+
+static PyObject *
+py_get_triplets_sorted_freq_vertices(PyObject *self, PyObject *args)
+{
+  PyArrayObject *py_sorted_freq_vertices;
+  PyArrayObject *py_vertex_indices;
+  PyArrayObject *py_freq_spans;
+  PyArrayObject *py_relative_grid_address;
+  PyArrayObject *py_D_diag;
+  PyArrayObject *py_triplets;
+  PyArrayObject *py_frequencies1;
+  PyArrayObject *py_frequencies2;
+  PyArrayObject *py_bz_grid_addresses;
+  PyArrayObject *py_bz_map;
+  long bz_grid_type;
+  long tp_type;
+
+  double *sorted_freq_vertices;
+  char *vertex_indices;
+  double *freq_spans;
+  long (*relative_grid_address)[4][3];
+  long *D_diag;
+  long (*triplets)[3];
+  long (*bz_grid_addresses)[3];
+  long *bz_map;
+  double *frequencies1, *frequencies2;
+  long num_band1, num_band2, num_triplets;
+
+  if (!PyArg_ParseTuple(args, "OOOOOOOOOOll",
+                        &py_sorted_freq_vertices,
+                        &py_vertex_indices,
+                        &py_freq_spans,
+                        &py_relative_grid_address,
+                        &py_D_diag,
+                        &py_triplets,
+                        &py_frequencies1,
+                        &py_frequencies2,
+                        &py_bz_grid_addresses,
+                        &py_bz_map,
+                        &bz_grid_type,
+                        &tp_type)) {
+    return NULL;
+  }
+
+  sorted_freq_vertices = (double*)PyArray_DATA(py_sorted_freq_vertices);
+  vertex_indices = (char*)PyArray_DATA(py_vertex_indices);
+  freq_spans = (double*)PyArray_DATA(py_freq_spans);
+  relative_grid_address = (long(*)[4][3])PyArray_DATA(py_relative_grid_address);
+  D_diag = (long*)PyArray_DATA(py_D_diag);
+  triplets = (long(*)[3])PyArray_DATA(py_triplets);
+  num_triplets = (long)PyArray_DIMS(py_triplets)[0];
+  bz_grid_addresses = (long(*)[3])PyArray_DATA(py_bz_grid_addresses);
+  bz_map = (long*)PyArray_DATA(py_bz_map);
+  frequencies1 = (double*)PyArray_DATA(py_frequencies1);
+  frequencies2 = (double*)PyArray_DATA(py_frequencies2);
+  num_band1 = (long)PyArray_DIMS(py_frequencies1)[1];
+  num_band2 = (long)PyArray_DIMS(py_frequencies2)[1];
+
+  ph3py_get_sorted_freq_vertices(sorted_freq_vertices,
+                                 vertex_indices,
+                                 freq_spans,
+                                 relative_grid_address,
+                                 D_diag,
+                                 triplets,
+                                 num_triplets,
+                                 bz_grid_addresses,
+                                 bz_map,
+                                 bz_grid_type,
+                                 frequencies1,
+                                 num_band1,
+                                 frequencies2,
+                                 num_band2,
+                                 tp_type,
+                                 1,
+                                 0);
+
+  Py_RETURN_NONE;
+}
+
+static PyObject *
+py_set_triplets_integration_weights_at_sorted_freq_vertices(PyObject *self,
+                                                            PyObject *args)
+{
+  PyArrayObject *py_iw;
+  PyArrayObject *py_iw_zero;
+  PyArrayObject *py_frequency_points;
+  PyArrayObject *py_sorted_freq_vertices;
+  PyArrayObject *py_vertex_indices;
+  PyArrayObject *py_freq_spans;
+  long tp_type;
+
+  double *iw;
+  char *iw_zero;
+  double *frequency_points;
+  double *sorted_freq_vertices;
+  char *vertex_indices;
+  double *freq_spans;
+  long num_band0, num_band1, num_band2, num_triplets;
+
+  if (!PyArg_ParseTuple(args, "OOOOOOl",
+                        &py_iw,
+                        &py_iw_zero,
+                        &py_frequency_points,
+                        &py_sorted_freq_vertices,
+                        &py_vertex_indices,
+                        &py_freq_spans,
+                        &tp_type)) {
+    return NULL;
+  }
+
+  iw = (double*)PyArray_DATA(py_iw);
+  iw_zero = (char*)PyArray_DATA(py_iw_zero);
+  frequency_points = (double*)PyArray_DATA(py_frequency_points);
+  num_band0 = (long)PyArray_DIMS(py_frequency_points)[0];
+  sorted_freq_vertices = (double*)PyArray_DATA(py_sorted_freq_vertices);
+  vertex_indices = (char*)PyArray_DATA(py_vertex_indices);
+  freq_spans = (double*)PyArray_DATA(py_freq_spans);
+  num_triplets = (long)PyArray_DIMS(py_sorted_freq_vertices)[0];
+  num_band1 = (long)PyArray_DIMS(py_sorted_freq_vertices)[1];
+  num_band2 = (long)PyArray_DIMS(py_sorted_freq_vertices)[2];
+
+  ph3py_get_integration_weight_at_sorted_freq_vertices(iw,
+                                                       iw_zero,
+                                                       frequency_points,
+                                                       num_band0,
+                                                       sorted_freq_vertices,
+                                                       vertex_indices,
+                                                       freq_spans,
+                                                       num_triplets,
+                                                       num_band1,
+                                                       num_band2,
+                                                       tp_type,
+                                                       1,
+                                                       0);
+
+  Py_RETURN_NONE;
+}
+
 static PyObject *
 py_get_grid_index_from_address(PyObject *self, PyObject *args)
 {
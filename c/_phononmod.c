@@ -39,6 +39,8 @@
 
 
 static PyObject * py_get_phonons_at_gridpoints(PyObject *self, PyObject *args);
+static PyObject *
+py_get_group_velocities_at_gridpoints(PyObject *self, PyObject *args);
 
 struct module_state {
   PyObject *error;
@@ -64,6 +66,10 @@ static PyMethodDef _phononmod_methods[] = {
     py_get_phonons_at_gridpoints,
     METH_VARARGS,
    "Set phonons at grid points"},
+   {"group_velocities_at_gridpoints",
+    py_get_group_velocities_at_gridpoints,
+    METH_VARARGS,
+   "Group velocities at grid points by analytical derivative of DM"},
   {NULL, NULL, 0, NULL}
 };
 
@@ -285,3 +291,119 @@ static PyObject * py_get_phonons_at_gridpoints(PyObject *self, PyObject *args)
 
   Py_RETURN_NONE;
 }
+
+static PyObject *
+py_get_group_velocities_at_gridpoints(PyObject *self, PyObject *args)
+{
+  PyArrayObject* py_group_velocities;
+  PyArrayObject* py_frequencies;
+  PyArrayObject* py_eigenvectors;
+  PyArrayObject* py_grid_points;
+  PyArrayObject* py_grid_address;
+  PyArrayObject* py_QDinv;
+  PyArrayObject* py_fc2;
+  PyArrayObject* py_shortest_vectors_fc2;
+  PyArrayObject* py_multiplicity_fc2;
+  PyArrayObject* py_masses_fc2;
+  PyArrayObject* py_p2s_map_fc2;
+  PyArrayObject* py_s2p_map_fc2;
+  PyArrayObject* py_lattice;
+  PyArrayObject* py_reciprocal_lattice;
+  PyArrayObject* py_born_effective_charge;
+  PyArrayObject* py_dielectric_constant;
+  double nac_factor, unit_conversion_factor, cutoff_frequency;
+
+  double (*gv)[3];
+  double* freqs;
+  lapack_complex_double* eigvecs;
+  long* grid_points;
+  long (*grid_address)[3];
+  double (*QDinv)[3];
+  double* fc2;
+  double(*svecs_fc2)[27][3];
+  long* multi_fc2;
+  double* masses_fc2;
+  long* p2s_fc2;
+  long* s2p_fc2;
+  double (*lattice)[3];
+  double (*rec_lat)[3];
+  double (*born)[3][3];
+  double (*dielectric)[3];
+  long num_patom, num_satom, num_grid_points;
+
+  if (!PyArg_ParseTuple(args, "OOOOOOOOOOOOdOOOOdd",
+                        &py_group_velocities,
+                        &py_frequencies,
+                        &py_eigenvectors,
+                        &py_grid_points,
+                        &py_grid_address,
+                        &py_QDinv,
+                        &py_fc2,
+                        &py_shortest_vectors_fc2,
+                        &py_multiplicity_fc2,
+                        &py_masses_fc2,
+                        &py_p2s_map_fc2,
+                        &py_s2p_map_fc2,
+                        &unit_conversion_factor,
+                        &py_lattice,
+                        &py_born_effective_charge,
+                        &py_dielectric_constant,
+                        &py_reciprocal_lattice,
+                        &nac_factor,
+                        &cutoff_frequency)) {
+    return NULL;
+  }
+
+  gv = (double(*)[3])PyArray_DATA(py_group_velocities);
+  freqs = (double*)PyArray_DATA(py_frequencies);
+  eigvecs = (lapack_complex_double*)PyArray_DATA(py_eigenvectors);
+  grid_points = (long*)PyArray_DATA(py_grid_points);
+  grid_address = (long(*)[3])PyArray_DATA(py_grid_address);
+  QDinv = (double(*)[3])PyArray_DATA(py_QDinv);
+  fc2 = (double*)PyArray_DATA(py_fc2);
+  svecs_fc2 = (double(*)[27][3])PyArray_DATA(py_shortest_vectors_fc2);
+  multi_fc2 = (long*)PyArray_DATA(py_multiplicity_fc2);
+  masses_fc2 = (double*)PyArray_DATA(py_masses_fc2);
+  p2s_fc2 = (long*)PyArray_DATA(py_p2s_map_fc2);
+  s2p_fc2 = (long*)PyArray_DATA(py_s2p_map_fc2);
+  lattice = (double(*)[3])PyArray_DATA(py_lattice);
+  rec_lat = (double(*)[3])PyArray_DATA(py_reciprocal_lattice);
+  num_patom = (long)PyArray_DIMS(py_multiplicity_fc2)[1];
+  num_satom = (long)PyArray_DIMS(py_multiplicity_fc2)[0];
+  num_grid_points = (long)PyArray_DIMS(py_grid_points)[0];
+  if ((PyObject*)py_born_effective_charge == Py_None) {
+    born = NULL;
+  } else {
+    born = (double(*)[3][3])PyArray_DATA(py_born_effective_charge);
+  }
+  if ((PyObject*)py_dielectric_constant == Py_None) {
+    dielectric = NULL;
+  } else {
+    dielectric = (double(*)[3])PyArray_DATA(py_dielectric_constant);
+  }
+
+  phmod_get_group_velocities_at_gridpoints(gv,
+                                           grid_points,
+                                           num_grid_points,
+                                           grid_address,
+                                           QDinv,
+                                           freqs,
+                                           eigvecs,
+                                           fc2,
+                                           svecs_fc2,
+                                           multi_fc2,
+                                           num_patom,
+                                           num_satom,
+                                           masses_fc2,
+                                           p2s_fc2,
+                                           s2p_fc2,
+                                           lattice,
+                                           unit_conversion_factor,
+                                           born,
+                                           dielectric,
+                                           rec_lat,
+                                           nac_factor,
+                                           cutoff_frequency);
+
+  Py_RETURN_NONE;
+}
@@ -330,6 +330,152 @@ void dym_get_charge_sum(double (*charge_sum)[3][3],
   q_born = NULL;
 }
 
+/* Derivative of dynamical matrix with respect to q in Cartesian */
+/* coordinates. ddm[3, num_patom * 3, num_patom * 3, (real,imag)]. */
+/* Wang's NAC is included unless born is NULL. */
+void dym_get_derivative_dynmat_at_q(double *derivative_dynmat,
+                                    const long num_patom,
+                                    const long num_satom,
+                                    const double *fc,
+                                    const double q[3],
+                                    const double lattice[3][3], /* column vectors */
+                                    const double (*svecs)[27][3],
+                                    const long *multi,
+                                    const double *mass,
+                                    const long *s2p_map,
+                                    const long *p2s_map,
+                                    const double nac_factor,
+                                    const double (*born)[3][3],
+                                    const double dielectric[3][3],
+                                    const double reciprocal_lattice[3][3])
+{
+  long i, j, k, l, m, a, b, adrs, num_band, is_nac;
+  double mass_sqrt, phase, cos_phase, sin_phase, factor, B, fc_elem;
+  double q_cart[3], eps_q[3], A_i[3], A_j[3], r_cart[3];
+  double s0[2], s1[3][2], fc_nac[3][3], d_nac[3][3][3];
+
+  num_band = num_patom * 3;
+
+  for (i = 0; i < 3 * num_band * num_band * 2; i++) {
+    derivative_dynmat[i] = 0;
+  }
+
+  is_nac = 0;
+  B = 0;
+  if (born) {
+    if (fabs(q[0]) > 1e-5 || fabs(q[1]) > 1e-5 || fabs(q[2]) > 1e-5) {
+      is_nac = 1;
+      for (i = 0; i < 3; i++) {
+        q_cart[i] = 0;
+        for (j = 0; j < 3; j++) {
+          q_cart[i] += reciprocal_lattice[i][j] * q[j];
+        }
+      }
+      for (i = 0; i < 3; i++) {
+        eps_q[i] = 0;
+        for (j = 0; j < 3; j++) {
+          eps_q[i] += dielectric[i][j] * q_cart[j];
+        }
+        B += q_cart[i] * eps_q[i];
+      }
+    }
+  }
+  /* N = num_satom / num_patom = number of prim-cell in supercell */
+  factor = nac_factor / num_satom * num_patom;
+
+  for (i = 0; i < num_patom; i++) {
+    for (j = 0; j < num_patom; j++) {
+      mass_sqrt = sqrt(mass[i] * mass[j]);
+
+      for (a = 0; a < 3; a++) {
+        for (b = 0; b < 3; b++) {
+          fc_nac[a][b] = 0;
+          for (l = 0; l < 3; l++) {
+            d_nac[l][a][b] = 0;
+          }
+        }
+      }
+
+      if (is_nac) {
+        for (a = 0; a < 3; a++) {
+          A_i[a] = 0;
+          A_j[a] = 0;
+          for (b = 0; b < 3; b++) {
+            A_i[a] += q_cart[b] * born[i][b][a];
+            A_j[a] += q_cart[b] * born[j][b][a];
+          }
+        }
+        for (a = 0; a < 3; a++) {
+          for (b = 0; b < 3; b++) {
+            fc_nac[a][b] = A_i[a] * A_j[b] / B * factor;
+            for (l = 0; l < 3; l++) {
+              d_nac[l][a][b] = ((born[i][l][a] * A_j[b] +
+                                 A_i[a] * born[j][l][b]) / B -
+                                A_i[a] * A_j[b] * 2 * eps_q[l] / B / B)
+                * factor;
+            }
+          }
+        }
+      }
+
+      for (k = 0; k < num_satom; k++) {
+        if (s2p_map[k] != p2s_map[j]) {
+          continue;
+        }
+
+        s0[0] = 0;
+        s0[1] = 0;
+        for (l = 0; l < 3; l++) {
+          s1[l][0] = 0;
+          s1[l][1] = 0;
+        }
+        for (m = 0; m < multi[k * num_patom + i]; m++) {
+          phase = 0;
+          for (l = 0; l < 3; l++) {
+            phase += q[l] * svecs[k * num_patom + i][m][l];
+          }
+          cos_phase = cos(phase * 2 * PI);
+          sin_phase = sin(phase * 2 * PI);
+          for (l = 0; l < 3; l++) {
+            r_cart[l] = 0;
+            for (a = 0; a < 3; a++) {
+              r_cart[l] += lattice[l][a] * svecs[k * num_patom + i][m][a];
+            }
+          }
+          s0[0] += cos_phase;
+          s0[1] += sin_phase;
+          /* d/dq exp(2pi i q.r) = 2pi i r exp(2pi i q.r) */
+          for (l = 0; l < 3; l++) {
+            s1[l][0] -= 2 * PI * r_cart[l] * sin_phase;
+            s1[l][1] += 2 * PI * r_cart[l] * cos_phase;
+          }
+        }
+
+        for (l = 0; l < 3; l++) {
+          for (a = 0; a < 3; a++) {
+            for (b = 0; b < 3; b++) {
+              fc_elem = fc[p2s_map[i] * num_satom * 9 + k * 9 + a * 3 + b] +
+                fc_nac[a][b];
+              adrs = l * num_band * num_band +
+                (i * 3 + a) * num_band + j * 3 + b;
+              derivative_dynmat[adrs * 2] +=
+                (fc_elem * s1[l][0] + d_nac[l][a][b] * s0[0]) /
+                mass_sqrt / multi[k * num_patom + i];
+              derivative_dynmat[adrs * 2 + 1] +=
+                (fc_elem * s1[l][1] + d_nac[l][a][b] * s0[1]) /
+                mass_sqrt / multi[k * num_patom + i];
+            }
+          }
+        }
+      }
+    }
+  }
+
+  for (l = 0; l < 3; l++) {
+    make_Hermitian(derivative_dynmat + l * num_band * num_band * 2, num_band);
+  }
+}
+
 /* fc[num_patom, num_satom, 3, 3] */
 /* dm[num_comm_points, num_patom * 3, num_patom *3] */
 /* comm_points[num_satom, num_patom, 27, 3] */
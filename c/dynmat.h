@@ -74,6 +74,21 @@ void dym_get_charge_sum(double (*charge_sum)[3][3],
                         const double factor,
                         const double q_cart[3],
                         const double (*born)[3][3]);
+void dym_get_derivative_dynmat_at_q(double *derivative_dynmat,
+                                    const long num_patom,
+                                    const long num_satom,
+                                    const double *fc,
+                                    const double q[3],
+                                    const double lattice[3][3], /* column vectors */
+                                    const double (*svecs)[27][3],
+                                    const long *multi,
+                                    const double *mass,
+                                    const long *s2p_map,
+                                    const long *p2s_map,
+                                    const double nac_factor,
+                                    const double (*born)[3][3],
+                                    const double dielectric[3][3],
+                                    const double reciprocal_lattice[3][3]);
 /* fc[num_patom, num_satom, 3, 3] */
 /* dm[num_comm_points, num_patom * 3, num_patom *3] */
 /* comm_points[num_satom, num_patom, 27, 3] */
@@ -179,6 +179,7 @@ void gridsys_get_integration_weight_with_sigma(double *iw,
                                         iw_zero,
                                         sigma,
                                         sigma_cutoff,
+                                        NULL,
                                         frequency_points,
                                         num_band0,
                                         triplets,
@@ -41,10 +41,6 @@
 #include "imag_self_energy_with_g.h"
 #include "triplet.h"
 
-static long ise_set_g_pos_frequency_point(long (*g_pos)[4],
-                                          const long num_band0,
-                                          const long num_band,
-                                          const char *g_zero);
 static void
 detailed_imag_self_energy_at_triplet(double *detailed_imag_self_energy,
                                      double *imag_self_energy,
@@ -354,10 +350,10 @@ long ise_set_g_pos(long (*g_pos)[4],
   return num_g_pos;
 }
 
-static long ise_set_g_pos_frequency_point(long (*g_pos)[4],
-                                          const long num_band0,
-                                          const long num_band,
-                                          const char *g_zero)
+long ise_set_g_pos_frequency_point(long (*g_pos)[4],
+                                   const long num_band0,
+                                   const long num_band,
+                                   const char *g_zero)
 {
   long num_g_pos, j, k, l, kl, jkl;
 
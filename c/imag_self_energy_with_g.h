@@ -82,5 +82,11 @@ long ise_set_g_pos(long (*g_pos)[4],
                    const long num_band0,
                    const long num_band,
                    const char *g_zero);
+/* g_zero of shape (num_band, num_band) at a frequency point is applied */
+/* to all num_band0. */
+long ise_set_g_pos_frequency_point(long (*g_pos)[4],
+                                   const long num_band0,
+                                   const long num_band,
+                                   const char *g_zero);
 
 #endif
@@ -37,6 +37,25 @@
 #include "phonoc_utils.h"
 #include "isotope.h"
 #include "lapack_wrapper.h"
+#include "tetrahedron_method.h"
+
+static void
+get_strength_at_grid_point(double *gamma,
+                           const long target_grid_point,
+                           const long *grid_points,
+                           const long *weights,
+                           const long num_grid_points,
+                           const double *sigmas,
+                           const long num_sigmas,
+                           const long (*tetrahedra_vertices)[24][4],
+                           const double *mass_variances,
+                           const double *frequencies,
+                           const lapack_complex_double *eigenvectors,
+                           const long *band_indices,
+                           const long num_band,
+                           const long num_band0,
+                           const double cutoff_frequency,
+                           const long openmp_per_grid_points);
 
 void
 iso_get_isotope_scattering_strength(double *gamma,
@@ -231,3 +250,229 @@ void iso_get_thm_isotope_scattering_strength
   free(e0_i);
   e0_i = NULL;
 }
+
+void iso_get_isotope_scattering_strength_at_grid_points
+(double *gamma,
+ const long *target_grid_points,
+ const long num_target_grid_points,
+ const long *grid_points,
+ const long *weights,
+ const long num_grid_points,
+ const double *sigmas,
+ const long num_sigmas,
+ const long (*tetrahedra_vertices)[24][4],
+ const double *mass_variances,
+ const double *frequencies,
+ const lapack_complex_double *eigenvectors,
+ const long *band_indices,
+ const long num_band,
+ const long num_band0,
+ const double cutoff_frequency)
+{
+  long i, j, k, num_methods;
+  double *gamma_gp;
+
+  num_methods = num_sigmas;
+  if (tetrahedra_vertices != NULL) {
+    num_methods++;
+  }
+
+  if (num_target_grid_points > num_band) {
+#pragma omp parallel for private(j, k, gamma_gp)
+    for (i = 0; i < num_target_grid_points; i++) {
+      gamma_gp = (double*)malloc(sizeof(double) * num_methods * num_band0);
+      get_strength_at_grid_point(gamma_gp,
+                                 target_grid_points[i],
+                                 grid_points,
+                                 weights,
+                                 num_grid_points,
+                                 sigmas,
+                                 num_sigmas,
+                                 tetrahedra_vertices,
+                                 mass_variances,
+                                 frequencies,
+                                 eigenvectors,
+                                 band_indices,
+                                 num_band,
+                                 num_band0,
+                                 cutoff_frequency,
+                                 0);
+      for (j = 0; j < num_methods; j++) {
+        for (k = 0; k < num_band0; k++) {
+          gamma[j * num_target_grid_points * num_band0 + i * num_band0 + k] =
+            gamma_gp[j * num_band0 + k];
+        }
+      }
+      free(gamma_gp);
+      gamma_gp = NULL;
+    }
+  } else {
+    gamma_gp = (double*)malloc(sizeof(double) * num_methods * num_band0);
+    for (i = 0; i < num_target_grid_points; i++) {
+      get_strength_at_grid_point(gamma_gp,
+                                 target_grid_points[i],
+                                 grid_points,
+                                 weights,
+                                 num_grid_points,
+                                 sigmas,
+                                 num_sigmas,
+                                 tetrahedra_vertices,
+                                 mass_variances,
+                                 frequencies,
+                                 eigenvectors,
+                                 band_indices,
+                                 num_band,
+                                 num_band0,
+                                 cutoff_frequency,
+                                 1);
+      for (j = 0; j < num_methods; j++) {
+        for (k = 0; k < num_band0; k++) {
+          gamma[j * num_target_grid_points * num_band0 + i * num_band0 + k] =
+            gamma_gp[j * num_band0 + k];
+        }
+      }
+    }
+    free(gamma_gp);
+    gamma_gp = NULL;
+  }
+}
+
+/* The squared overlaps of eigenvectors weighted by mass variances are */
+/* computed once per (q', band) and shared by all the methods. */
+static void
+get_strength_at_grid_point(double *gamma,
+                           const long target_grid_point,
+                           const long *grid_points,
+                           const long *weights,
+                           const long num_grid_points,
+                           const double *sigmas,
+                           const long num_sigmas,
+                           const long (*tetrahedra_vertices)[24][4],
+                           const double *mass_variances,
+                           const double *frequencies,
+                           const lapack_complex_double *eigenvectors,
+                           const long *band_indices,
+                           const long num_band,
+                           const long num_band0,
+                           const double cutoff_frequency,
+                           const long openmp_per_grid_points)
+{
+  long i, j, k, l, m, n, gp, num_methods, is_thm;
+  double *e0_r, *e0_i, *f0, *gamma_ij, *strength;
+  double e1_r, e1_i, a, b, f, freq_vertices[24][4], sorted_omegas[24][4];
+  char vertex_indices[24];
+
+  is_thm = (tetrahedra_vertices != NULL);
+  num_methods = num_sigmas + is_thm;
+
+  e0_r = (double*)malloc(sizeof(double) * num_band * num_band0);
+  e0_i = (double*)malloc(sizeof(double) * num_band * num_band0);
+  f0 = (double*)malloc(sizeof(double) * num_band0);
+
+  for (i = 0; i < num_band0; i++) {
+    f0[i] = frequencies[target_grid_point * num_band + band_indices[i]];
+    for (j = 0; j < num_band; j++) {
+      e0_r[i * num_band + j] = lapack_complex_double_real
+        (eigenvectors[target_grid_point * num_band * num_band +
+                      j * num_band + band_indices[i]]);
+      e0_i[i * num_band + j] = lapack_complex_double_imag
+        (eigenvectors[target_grid_point * num_band * num_band +
+                      j * num_band + band_indices[i]]);
+    }
+  }
+
+  gamma_ij = (double*)malloc(sizeof(double) * num_grid_points *
+                             num_methods * num_band0);
+
+#pragma omp parallel for private(j, k, l, m, n, gp, f, e1_r, e1_i, a, b, strength, freq_vertices, sorted_omegas, vertex_indices) if (openmp_per_grid_points)
+  for (i = 0; i < num_grid_points; i++) {
+    gp = grid_points[i];
+    strength = (double*)malloc(sizeof(double) * num_band0);
+    for (j = 0; j < num_methods * num_band0; j++) {
+      gamma_ij[i * num_methods * num_band0 + j] = 0;
+    }
+    for (k = 0; k < num_band; k++) { /* band index */
+      f = frequencies[gp * num_band + k];
+      if (f < cutoff_frequency) {
+        continue;
+      }
+      for (j = 0; j < num_band0; j++) { /* band index0 */
+        strength[j] = 0;
+        if (f0[j] < cutoff_frequency) {
+          continue;
+        }
+        for (l = 0; l < num_band / 3; l++) { /* elements */
+          a = 0;
+          b = 0;
+          for (m = 0; m < 3; m++) {
+            e1_r = lapack_complex_double_real
+              (eigenvectors
+               [gp * num_band * num_band + (l * 3 + m) * num_band + k]);
+            e1_i = lapack_complex_double_imag
+              (eigenvectors
+               [gp * num_band * num_band + (l * 3 + m) * num_band + k]);
+            a += (e0_r[j * num_band + l * 3 + m] * e1_r +
+                  e0_i[j * num_band + l * 3 + m] * e1_i);
+            b += (e0_i[j * num_band + l * 3 + m] * e1_r -
+                  e0_r[j * num_band + l * 3 + m] * e1_i);
+          }
+          strength[j] += (a * a + b * b) * mass_variances[l];
+        }
+        strength[j] *= weights[i];
+      }
+
+      if (is_thm) {
+        for (l = 0; l < 24; l++) {
+          for (m = 0; m < 4; m++) {
+            freq_vertices[l][m] =
+              frequencies[tetrahedra_vertices[i][l][m] * num_band + k];
+          }
+        }
+        thm_get_sorted_tetrahedra_omegas(sorted_omegas,
+                                         vertex_indices,
+                                         freq_vertices);
+        for (j = 0; j < num_band0; j++) {
+          gamma_ij[i * num_methods * num_band0 + j] +=
+            strength[j] * thm_get_integration_weight_at_sorted_omegas(
+              f0[j], sorted_omegas, vertex_indices, 'I');
+        }
+      }
+      for (n = 0; n < num_sigmas; n++) {
+        for (j = 0; j < num_band0; j++) {
+          gamma_ij[i * num_methods * num_band0 +
+                   (n + is_thm) * num_band0 + j] +=
+            strength[j] * phonoc_gaussian(f - f0[j], sigmas[n]);
+        }
+      }
+    }
+    free(strength);
+    strength = NULL;
+  }
+
+  for (i = 0; i < num_methods * num_band0; i++) {
+    gamma[i] = 0;
+  }
+  for (i = 0; i < num_grid_points; i++) {
+    for (j = 0; j < num_methods * num_band0; j++) {
+      gamma[j] += gamma_ij[i * num_methods * num_band0 + j];
+    }
+  }
+
+  for (i = 0; i < num_methods; i++) {
+    for (j = 0; j < num_band0; j++) {
+      /* Frequency unit to ang-freq: *(2pi)**2/(2pi) */
+      /* Ang-freq to freq unit (for lifetime): /2pi */
+      /* gamma = 1/2t */
+      gamma[i * num_band0 + j] *= M_2PI / 4 * f0[j] * f0[j] / 2;
+    }
+  }
+
+  free(gamma_ij);
+  gamma_ij = NULL;
+  free(f0);
+  f0 = NULL;
+  free(e0_r);
+  e0_r = NULL;
+  free(e0_i);
+  e0_i = NULL;
+}
@@ -63,4 +63,24 @@ void iso_get_thm_isotope_scattering_strength
  const long num_band0,
  const double *integration_weights,
  const double cutoff_frequency);
+/* gamma[num_methods][num_target_grid_points][num_band0] where the */
+/* methods are the tetrahedron method (only if tetrahedra_vertices[num_grid_points] is */
+/* not NULL) followed by smearing methods with sigmas. */
+void iso_get_isotope_scattering_strength_at_grid_points
+(double *gamma,
+ const long *target_grid_points,
+ const long num_target_grid_points,
+ const long *grid_points,
+ const long *weights,
+ const long num_grid_points,
+ const double *sigmas,
+ const long num_sigmas,
+ const long (*tetrahedra_vertices)[24][4],
+ const double *mass_variances,
+ const double *frequencies,
+ const lapack_complex_double *eigenvectors,
+ const long *band_indices,
+ const long num_band,
+ const long num_band0,
+ const double cutoff_frequency);
 #endif
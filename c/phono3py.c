@@ -138,7 +138,10 @@ long ph3py_get_pp_collision(double *imag_self_energy,
                             const long *s2p_map,
                             const Larray *band_indices,
                             const Darray *temperatures,
+                            const Darray *frequency_points,
                             const long is_NU,
+                            const long is_per_triplet,
+                            const long scattering_event_class,
                             const long symmetrize_fc3_q,
                             const double cutoff_frequency)
 {
@@ -179,7 +182,10 @@ long ph3py_get_pp_collision(double *imag_self_energy,
                        s2p_map,
                        band_indices,
                        temperatures,
+                       frequency_points,
                        is_NU,
+                       is_per_triplet,
+                       scattering_event_class,
                        symmetrize_fc3_q,
                        cutoff_frequency);
 
@@ -194,6 +200,7 @@ long ph3py_get_pp_collision_with_sigma(
   double *imag_self_energy,
   const double sigma,
   const double sigma_cutoff,
+  const double *adaptive_sigmas,
   const double *frequencies,
   const lapack_complex_double *eigenvectors,
   const long (*triplets)[3],
@@ -212,7 +219,10 @@ long ph3py_get_pp_collision_with_sigma(
   const long *s2p_map,
   const Larray *band_indices,
   const Darray *temperatures,
+  const Darray *frequency_points,
   const long is_NU,
+  const long is_per_triplet,
+  const long scattering_event_class,
   const long symmetrize_fc3_q,
   const double cutoff_frequency)
 {
@@ -236,6 +246,7 @@ long ph3py_get_pp_collision_with_sigma(
   ppc_get_pp_collision_with_sigma(imag_self_energy,
                                   sigma,
                                   sigma_cutoff,
+                                  adaptive_sigmas,
                                   frequencies,
                                   eigenvectors,
                                   triplets,
@@ -252,7 +263,10 @@ long ph3py_get_pp_collision_with_sigma(
                                   s2p_map,
                                   band_indices,
                                   temperatures,
+                                  frequency_points,
                                   is_NU,
+                                  is_per_triplet,
+                                  scattering_event_class,
                                   symmetrize_fc3_q,
                                   cutoff_frequency);
 
@@ -487,6 +501,95 @@ void ph3py_get_thm_isotope_scattering_strength
                                           cutoff_frequency);
 }
 
+
+long ph3py_get_isotope_scattering_strength_at_grid_points(
+  double *gamma,
+  const long *target_grid_points,
+  const long num_target_grid_points,
+  const long *grid_points,
+  const long *weights,
+  const long num_grid_points,
+  const double *sigmas,
+  const long num_sigmas,
+  const long (*relative_grid_address)[4][3],
+  const long D_diag[3],
+  const long (*bz_grid_addresses)[3],
+  const long *bz_map,
+  const long bz_grid_type,
+  const double *mass_variances,
+  const double *frequencies,
+  const lapack_complex_double *eigenvectors,
+  const long *band_indices,
+  const long num_band,
+  const long num_band0,
+  const double cutoff_frequency)
+{
+  long i, j;
+  long (*tetrahedra_vertices)[24][4];
+  ConstBZGrid *bzgrid;
+
+  tetrahedra_vertices = NULL;
+
+  if (relative_grid_address != NULL) {
+    if ((bzgrid = (ConstBZGrid*) malloc(sizeof(ConstBZGrid))) == NULL) {
+      warning_print("Memory could not be allocated.");
+      return 0;
+    }
+    if ((tetrahedra_vertices = (long(*)[24][4])
+         malloc(sizeof(long[24][4]) * num_grid_points)) == NULL) {
+      warning_print("Memory could not be allocated.");
+      free(bzgrid);
+      bzgrid = NULL;
+      return 0;
+    }
+
+    bzgrid->addresses = bz_grid_addresses;
+    bzgrid->gp_map = bz_map;
+    bzgrid->type = bz_grid_type;
+    for (i = 0; i < 3; i++) {
+      bzgrid->D_diag[i] = D_diag[i];
+    }
+
+#pragma omp parallel for private(j)
+    for (i = 0; i < num_grid_points; i++) {
+      for (j = 0; j < 24; j++) {
+        tpi_get_neighboring_grid_points(tetrahedra_vertices[i][j],
+                                        grid_points[i],
+                                        relative_grid_address[j],
+                                        4,
+                                        bzgrid);
+      }
+    }
+
+    free(bzgrid);
+    bzgrid = NULL;
+  }
+
+  iso_get_isotope_scattering_strength_at_grid_points(gamma,
+                                                     target_grid_points,
+                                                     num_target_grid_points,
+                                                     grid_points,
+                                                     weights,
+                                                     num_grid_points,
+                                                     sigmas,
+                                                     num_sigmas,
+                                                     tetrahedra_vertices,
+                                                     mass_variances,
+                                                     frequencies,
+                                                     eigenvectors,
+                                                     band_indices,
+                                                     num_band,
+                                                     num_band0,
+                                                     cutoff_frequency);
+
+  if (tetrahedra_vertices != NULL) {
+    free(tetrahedra_vertices);
+    tetrahedra_vertices = NULL;
+  }
+
+  return 1;
+}
+
 void ph3py_distribute_fc3(double *fc3,
                           const long target,
                           const long source,
@@ -684,10 +787,95 @@ long ph3py_get_integration_weight(double *iw,
   return 1;
 }
 
+long ph3py_get_sorted_freq_vertices(
+  double *sorted_freq_vertices,
+  char *vertex_indices,
+  double *freq_spans,
+  const long relative_grid_address[24][4][3],
+  const long D_diag[3],
+  const long (*triplets)[3],
+  const long num_triplets,
+  const long (*bz_grid_addresses)[3],
+  const long *bz_map,
+  const long bz_grid_type,
+  const double *frequencies1,
+  const long num_band1,
+  const double *frequencies2,
+  const long num_band2,
+  const long tp_type,
+  const long openmp_per_triplets,
+  const long openmp_per_bands)
+{
+  ConstBZGrid *bzgrid;
+  long i;
+
+  if ((bzgrid = (ConstBZGrid*) malloc(sizeof(ConstBZGrid))) == NULL) {
+    warning_print("Memory could not be allocated.");
+    return 0;
+  }
+
+  bzgrid->addresses = bz_grid_addresses;
+  bzgrid->gp_map = bz_map;
+  bzgrid->type = bz_grid_type;
+  for (i = 0; i < 3; i++) {
+    bzgrid->D_diag[i] = D_diag[i];
+  }
+
+  tpl_get_sorted_freq_vertices(sorted_freq_vertices,
+                               vertex_indices,
+                               freq_spans,
+                               relative_grid_address,
+                               triplets,
+                               num_triplets,
+                               bzgrid,
+                               frequencies1,
+                               num_band1,
+                               frequencies2,
+                               num_band2,
+                               tp_type,
+                               openmp_per_triplets,
+                               openmp_per_bands);
+  free(bzgrid);
+  bzgrid = NULL;
+
+  return 1;
+}
+
+void ph3py_get_integration_weight_at_sorted_freq_vertices(
+  double *iw,
+  char *iw_zero,
+  const double *frequency_points,
+  const long num_band0,
+  const double *sorted_freq_vertices,
+  const char *vertex_indices,
+  const double *freq_spans,
+  const long num_triplets,
+  const long num_band1,
+  const long num_band2,
+  const long tp_type,
+  const long openmp_per_triplets,
+  const long openmp_per_bands)
+{
+  tpl_get_integration_weight_at_sorted_freq_vertices(iw,
+                                                     iw_zero,
+                                                     frequency_points,
+                                                     num_band0,
+                                                     sorted_freq_vertices,
+                                                     vertex_indices,
+                                                     freq_spans,
+                                                     num_triplets,
+                                                     num_band1,
+                                                     num_band2,
+                                                     tp_type,
+                                                     openmp_per_triplets,
+                                                     openmp_per_bands);
+}
+
 void ph3py_get_integration_weight_with_sigma(double *iw,
                                              char *iw_zero,
                                              const double sigma,
                                              const double sigma_cutoff,
+                                             const double *adaptive_sigmas,
                                              const double *frequency_points,
                                              const long num_band0,
                                              const long (*triplets)[3],
@@ -700,6 +888,7 @@ void ph3py_get_integration_weight_with_sigma(double *iw,
                                         iw_zero,
                                         sigma,
                                         sigma_cutoff,
+                                        adaptive_sigmas,
                                         frequency_points,
                                         num_band0,
                                         triplets,
@@ -710,6 +899,92 @@ void ph3py_get_integration_weight_with_sigma(double *iw,
 }
 
 
+long ph3py_get_joint_dos(double *jdos,
+                         const double *frequency_points,
+                         const long num_frequency_points,
+                         const double *temperatures,
+                         const long num_temps,
+                         const long relative_grid_address[24][4][3],
+                         const long (*triplets)[3],
+                         const long *triplet_weights,
+                         const long *triplets_offsets,
+                         const long num_grid_points,
+                         const long (*bz_grid_addresses)[3],
+                         const long *bz_map,
+                         const long bz_grid_type,
+                         const long D_diag[3],
+                         const double *frequencies,
+                         const long num_band,
+                         const double cutoff_frequency)
+{
+  ConstBZGrid *bzgrid;
+  long i;
+
+  if ((bzgrid = (ConstBZGrid*) malloc(sizeof(ConstBZGrid))) == NULL) {
+    warning_print("Memory could not be allocated.");
+    return 0;
+  }
+
+  bzgrid->addresses = bz_grid_addresses;
+  bzgrid->gp_map = bz_map;
+  bzgrid->type = bz_grid_type;
+  for (i = 0; i < 3; i++) {
+    bzgrid->D_diag[i] = D_diag[i];
+  }
+
+  tpl_get_joint_dos(jdos,
+                    frequency_points,
+                    num_frequency_points,
+                    temperatures,
+                    num_temps,
+                    relative_grid_address,
+                    triplets,
+                    triplet_weights,
+                    triplets_offsets,
+                    num_grid_points,
+                    bzgrid,
+                    frequencies,
+                    num_band,
+                    cutoff_frequency);
+  free(bzgrid);
+  bzgrid = NULL;
+
+  return 1;
+}
+
+
+void ph3py_get_joint_dos_with_sigma(double *jdos,
+                                    const double sigma,
+                                    const double sigma_cutoff,
+                                    const double *frequency_points,
+                                    const long num_frequency_points,
+                                    const double *temperatures,
+                                    const long num_temps,
+                                    const long (*triplets)[3],
+                                    const long *triplet_weights,
+                                    const long *triplets_offsets,
+                                    const long num_grid_points,
+                                    const double *frequencies,
+                                    const long num_band,
+                                    const double cutoff_frequency)
+{
+  tpl_get_joint_dos_with_sigma(jdos,
+                               sigma,
+                               sigma_cutoff,
+                               frequency_points,
+                               num_frequency_points,
+                               temperatures,
+                               num_temps,
+                               triplets,
+                               triplet_weights,
+                               triplets_offsets,
+                               num_grid_points,
+                               frequencies,
+                               num_band,
+                               cutoff_frequency);
+}
+
+
 /* From single address to grid index */
 long ph3py_get_grid_index_from_address(const long address[3],
                                        const long D_diag[3])
@@ -836,6 +1111,245 @@ void ph3py_symmetrize_collision_matrix(double *collision_matrix,
   }
 }
 
+void ph3py_symmetrize_collision_matrix_single(float *collision_matrix,
+                                              const long num_column,
+                                              const long num_temp,
+                                              const long num_sigma)
+{
+  double val;
+  long i, j, k, l, adrs_shift;
+
+  for (i = 0; i < num_sigma; i++) {
+    for (j = 0; j < num_temp; j++) {
+      adrs_shift = (i * num_column * num_column * num_temp +
+                    j * num_column * num_column);
+#pragma omp parallel for schedule(guided) private(l, val)
+      for (k = 0; k < num_column; k++) {
+        for (l = k + 1; l < num_column; l++) {
+          val = ((double)collision_matrix[adrs_shift + k * num_column + l] +
+                 collision_matrix[adrs_shift + l * num_column + k]) / 2;
+          collision_matrix[adrs_shift + k * num_column + l] = (float)val;
+          collision_matrix[adrs_shift + l * num_column + k] = (float)val;
+        }
+      }
+    }
+  }
+}
+
+
+/* Degenerate sets having more than one band are listed by their */
+/* members' (grid point, band) indices. set_members[set_first[i]] to */
+/* set_members[set_first[i + 1] - 1] belong to i-th set. set_first and */
+/* set_members have to be allocated for num_grid_points * num_band + 1 */
+/* and num_grid_points * num_band elements. Number of sets is returned. */
+static long get_degenerate_sets(long *set_first,
+                                long *set_members,
+                                const long *degenerate_bands,
+                                const long num_grid_points,
+                                const long num_band)
+{
+  long i, j, k, num_sets, num_deg;
+
+  num_sets = 0;
+  set_first[0] = 0;
+  for (i = 0; i < num_grid_points; i++) {
+    for (j = 0; j < num_band; j++) {
+      if (degenerate_bands[i * num_band + j] != j) {
+        continue;
+      }
+      num_deg = 0;
+      for (k = j; k < num_band; k++) {
+        if (degenerate_bands[i * num_band + k] == j) {
+          set_members[set_first[num_sets] + num_deg] = i * num_band + k;
+          num_deg++;
+        }
+      }
+      if (num_deg > 1) {
+        set_first[num_sets + 1] = set_first[num_sets] + num_deg;
+        num_sets++;
+      }
+    }
+  }
+
+  return num_sets;
+}
+
+
+/* degenerate_bands[num_grid_points][num_band] gives the smallest band */
+/* index of the degenerate set that each band belongs to. Rows and */
+/* columns of collision matrix of degenerate bands are averaged in-place. */
+/* The shape of collision matrix is [num_sigma][num_temp] */
+/* [num_row_grid_points][num_band][num_elem] */
+/* [num_grid_points][num_band][num_elem] */
+/* where num_elem is 3 for ir-grid-points and 1 for reducible grid. Rows */
+/* may be a block of grid points starting at row_grid_point_offset. */
+void ph3py_average_collision_matrix_by_degeneracy(
+  double *collision_matrix,
+  const long *degenerate_bands,
+  const long num_row_grid_points,
+  const long row_grid_point_offset,
+  const long num_grid_points,
+  const long num_band,
+  const long num_elem,
+  const long num_temp,
+  const long num_sigma)
+{
+  long i, j, k, l, m, num_column, num_row, num_sets, adrs_shift, row,
+    num_deg, row_shift;
+  long *set_first, *set_members;
+  double sum;
+
+  num_column = num_grid_points * num_band * num_elem;
+  num_row = num_row_grid_points * num_band * num_elem;
+  row_shift = row_grid_point_offset * num_band;
+
+  set_first = (long*)malloc(sizeof(long) * (num_grid_points * num_band + 1));
+  set_members = (long*)malloc(sizeof(long) * num_grid_points * num_band);
+  num_sets = get_degenerate_sets(set_first,
+                                 set_members,
+                                 degenerate_bands,
+                                 num_grid_points,
+                                 num_band);
+
+  for (i = 0; i < num_sigma * num_temp; i++) {
+    adrs_shift = i * num_row * num_column;
+
+    /* Rows */
+#pragma omp parallel for schedule(guided) private(k, l, m, num_deg, sum, row)
+    for (j = 0; j < num_sets; j++) {
+      /* Sets at grid points out of the row block are skipped. */
+      if (set_members[set_first[j]] < row_shift ||
+          set_members[set_first[j]] >=
+          row_shift + num_row_grid_points * num_band) {
+        continue;
+      }
+      num_deg = set_first[j + 1] - set_first[j];
+      for (k = 0; k < num_elem; k++) {
+        for (l = 0; l < num_column; l++) {
+          sum = 0;
+          for (m = set_first[j]; m < set_first[j + 1]; m++) {
+            row = (set_members[m] - row_shift) * num_elem + k;
+            sum += collision_matrix[adrs_shift + row * num_column + l];
+          }
+          sum /= num_deg;
+          for (m = set_first[j]; m < set_first[j + 1]; m++) {
+            row = (set_members[m] - row_shift) * num_elem + k;
+            collision_matrix[adrs_shift + row * num_column + l] = sum;
+          }
+        }
+      }
+    }
+
+    /* Columns */
+#pragma omp parallel for schedule(guided) private(row, k, l, m, num_deg, sum)
+    for (j = 0; j < num_row; j++) {
+      row = adrs_shift + j * num_column;
+      for (k = 0; k < num_sets; k++) {
+        num_deg = set_first[k + 1] - set_first[k];
+        for (l = 0; l < num_elem; l++) {
+          sum = 0;
+          for (m = set_first[k]; m < set_first[k + 1]; m++) {
+            sum += collision_matrix[row + set_members[m] * num_elem + l];
+          }
+          sum /= num_deg;
+          for (m = set_first[k]; m < set_first[k + 1]; m++) {
+            collision_matrix[row + set_members[m] * num_elem + l] = sum;
+          }
+        }
+      }
+    }
+  }
+
+  free(set_first);
+  set_first = NULL;
+  free(set_members);
+  set_members = NULL;
+}
+
+/* Same as ph3py_average_collision_matrix_by_degeneracy for collision */
+/* matrix in single precision. Sums are taken in double precision. */
+void ph3py_average_collision_matrix_by_degeneracy_single(
+  float *collision_matrix,
+  const long *degenerate_bands,
+  const long num_row_grid_points,
+  const long row_grid_point_offset,
+  const long num_grid_points,
+  const long num_band,
+  const long num_elem,
+  const long num_temp,
+  const long num_sigma)
+{
+  long i, j, k, l, m, num_column, num_row, num_sets, adrs_shift, row,
+    num_deg, row_shift;
+  long *set_first, *set_members;
+  double sum;
+
+  num_column = num_grid_points * num_band * num_elem;
+  num_row = num_row_grid_points * num_band * num_elem;
+  row_shift = row_grid_point_offset * num_band;
+
+  set_first = (long*)malloc(sizeof(long) * (num_grid_points * num_band + 1));
+  set_members = (long*)malloc(sizeof(long) * num_grid_points * num_band);
+  num_sets = get_degenerate_sets(set_first,
+                                 set_members,
+                                 degenerate_bands,
+                                 num_grid_points,
+                                 num_band);
+
+  for (i = 0; i < num_sigma * num_temp; i++) {
+    adrs_shift = i * num_row * num_column;
+
+    /* Rows */
+#pragma omp parallel for schedule(guided) private(k, l, m, num_deg, sum, row)
+    for (j = 0; j < num_sets; j++) {
+      /* Sets at grid points out of the row block are skipped. */
+      if (set_members[set_first[j]] < row_shift ||
+          set_members[set_first[j]] >=
+          row_shift + num_row_grid_points * num_band) {
+        continue;
+      }
+      num_deg = set_first[j + 1] - set_first[j];
+      for (k = 0; k < num_elem; k++) {
+        for (l = 0; l < num_column; l++) {
+          sum = 0;
+          for (m = set_first[j]; m < set_first[j + 1]; m++) {
+            row = (set_members[m] - row_shift) * num_elem + k;
+            sum += collision_matrix[adrs_shift + row * num_column + l];
+          }
+          sum /= num_deg;
+          for (m = set_first[j]; m < set_first[j + 1]; m++) {
+            row = (set_members[m] - row_shift) * num_elem + k;
+            collision_matrix[adrs_shift + row * num_column + l] = (float)sum;
+          }
+        }
+      }
+    }
+
+    /* Columns */
+#pragma omp parallel for schedule(guided) private(row, k, l, m, num_deg, sum)
+    for (j = 0; j < num_row; j++) {
+      row = adrs_shift + j * num_column;
+      for (k = 0; k < num_sets; k++) {
+        num_deg = set_first[k + 1] - set_first[k];
+        for (l = 0; l < num_elem; l++) {
+          sum = 0;
+          for (m = set_first[k]; m < set_first[k + 1]; m++) {
+            sum += collision_matrix[row + set_members[m] * num_elem + l];
+          }
+          sum /= num_deg;
+          for (m = set_first[k]; m < set_first[k + 1]; m++) {
+            collision_matrix[row + set_members[m] * num_elem + l] = (float)sum;
+          }
+        }
+      }
+    }
+  }
+
+  free(set_first);
+  set_first = NULL;
+  free(set_members);
+  set_members = NULL;
+}
 
 void ph3py_expand_collision_matrix(double *collision_matrix,
                                    const long *rot_grid_points,
@@ -848,62 +1362,113 @@ void ph3py_expand_collision_matrix(double *collision_matrix,
                                    const long num_band)
 
 {
-  long i, j, k, l, m, n, p, adrs_shift, adrs_shift_plus, ir_gp, gp_r;
+  long i, j, l, m, n, p, adrs_shift, ir_gp, gp_r, multi;
   long num_column, num_bgb;
-  long *multi;
-  double *colmat_copy;
-
-  multi = (long*)malloc(sizeof(long) * num_ir_gp);
-  colmat_copy = NULL;
+  double *colmat_copy, *colmat_row;
 
   num_column = num_grid_points * num_band;
   num_bgb = num_band * num_grid_points * num_band;
 
-#pragma omp parallel for schedule(guided) private(j, ir_gp)
-  for (i = 0; i < num_ir_gp; i++) {
-    ir_gp = ir_grid_points[i];
-    multi[i] = 0;
-    for (j = 0; j < num_rot; j++) {
-      if (rot_grid_points[j * num_grid_points + ir_gp] == ir_gp) {
-        multi[i]++;
+  /* Rows in the star of an ir-grid-point are written only by the thread */
+  /* of the ir-grid-point. Row buffer is allocated once per thread. */
+#pragma omp parallel private(j, l, m, n, p, adrs_shift, ir_gp, gp_r, multi, colmat_copy, colmat_row)
+  {
+    colmat_copy = (double*)malloc(sizeof(double) * num_bgb);
+#pragma omp for schedule(guided)
+    for (i = 0; i < num_ir_gp; i++) {
+      ir_gp = ir_grid_points[i];
+      multi = 0;
+      for (l = 0; l < num_rot; l++) {
+        if (rot_grid_points[l * num_grid_points + ir_gp] == ir_gp) {
+          multi++;
+        }
       }
-    }
-  }
-
-  for (i = 0; i < num_sigma; i++) {
-    for (j = 0; j < num_temp; j++) {
-      adrs_shift = (i * num_column * num_column * num_temp +
-                    j * num_column * num_column);
-#pragma omp parallel for private(ir_gp, adrs_shift_plus, colmat_copy, l, gp_r, m, n, p)
-      for (k = 0; k < num_ir_gp; k++) {
-        ir_gp = ir_grid_points[k];
-        adrs_shift_plus = adrs_shift + ir_gp * num_bgb;
-        colmat_copy = (double*)malloc(sizeof(double) * num_bgb);
+      for (j = 0; j < num_sigma * num_temp; j++) {
+        adrs_shift = j * num_column * num_column;
+        colmat_row = collision_matrix + adrs_shift + ir_gp * num_bgb;
         for (l = 0; l < num_bgb; l++) {
-          colmat_copy[l] = collision_matrix[adrs_shift_plus + l] / multi[k];
-          collision_matrix[adrs_shift_plus + l] = 0;
+          colmat_copy[l] = colmat_row[l] / multi;
+          colmat_row[l] = 0;
         }
         for (l = 0; l < num_rot; l++) {
           gp_r = rot_grid_points[l * num_grid_points + ir_gp];
+          colmat_row = collision_matrix + adrs_shift + gp_r * num_bgb;
           for (m = 0; m < num_band; m++) {
             for (n = 0; n < num_grid_points; n++) {
               for (p = 0; p < num_band; p++) {
-                collision_matrix[
-                  adrs_shift + gp_r * num_bgb + m * num_grid_points * num_band
-                  + rot_grid_points[l * num_grid_points + n] * num_band + p] +=
-                  colmat_copy[m * num_grid_points * num_band + n * num_band + p];
+                colmat_row[m * num_column +
+                           rot_grid_points[l * num_grid_points + n] * num_band
+                           + p] += colmat_copy[m * num_column + n * num_band + p];
               }
             }
           }
         }
-        free(colmat_copy);
-        colmat_copy = NULL;
       }
     }
+    free(colmat_copy);
+    colmat_copy = NULL;
   }
+}
+
 
-  free(multi);
-  multi = NULL;
+/* values[num_slice][num_grid_points][num_elem] at ir-grid-points are */
+/* distributed to the grid points in their stars. With rotations, values */
+/* at a grid point are num_elem / 3 Cartesian vectors to be rotated. */
+void ph3py_expand_local_values(double *values,
+                               const double *rotations,
+                               const long *rot_grid_points,
+                               const long *ir_grid_points,
+                               const long num_ir_gp,
+                               const long num_grid_points,
+                               const long num_rot,
+                               const long num_slice,
+                               const long num_elem)
+{
+  long i, j, k, l, m, ir_gp, gp_r, multi;
+  double *values_copy, *v, *v_r;
+  const double *r;
+
+#pragma omp parallel private(j, k, l, m, ir_gp, gp_r, multi, values_copy, v, v_r, r)
+  {
+    values_copy = (double*)malloc(sizeof(double) * num_elem);
+#pragma omp for schedule(guided)
+    for (i = 0; i < num_ir_gp; i++) {
+      ir_gp = ir_grid_points[i];
+      multi = 0;
+      for (l = 0; l < num_rot; l++) {
+        if (rot_grid_points[l * num_grid_points + ir_gp] == ir_gp) {
+          multi++;
+        }
+      }
+      for (j = 0; j < num_slice; j++) {
+        v = values + (j * num_grid_points + ir_gp) * num_elem;
+        for (k = 0; k < num_elem; k++) {
+          values_copy[k] = v[k] / multi;
+          v[k] = 0;
+        }
+        for (l = 0; l < num_rot; l++) {
+          gp_r = rot_grid_points[l * num_grid_points + ir_gp];
+          v_r = values + (j * num_grid_points + gp_r) * num_elem;
+          if (rotations == NULL) {
+            for (k = 0; k < num_elem; k++) {
+              v_r[k] += values_copy[k];
+            }
+          } else {
+            r = rotations + l * 9;
+            for (k = 0; k < num_elem; k += 3) {
+              for (m = 0; m < 3; m++) {
+                v_r[k + m] += (r[m * 3] * values_copy[k] +
+                               r[m * 3 + 1] * values_copy[k + 1] +
+                               r[m * 3 + 2] * values_copy[k + 2]);
+              }
+            }
+          }
+        }
+      }
+    }
+    free(values_copy);
+    values_copy = NULL;
+  }
 }
 
 
@@ -966,7 +1531,8 @@ long ph3py_set_integration_weights(double *iw,
                                    const long (*bz_grid_addresses)[3],
                                    const long *bz_map,
                                    const long bz_grid_type,
-                                   const double *frequencies)
+                                   const double *frequencies,
+                                   const char function)
 {
   long i, j, k, bi;
   long vertices[24][4];
@@ -1002,7 +1568,8 @@ long ph3py_set_integration_weights(double *iw,
       }
       for (j = 0; j < num_band0; j++) {
         iw[i * num_band0 * num_band + j * num_band + bi] =
-          thm_get_integration_weight(frequency_points[j], freq_vertices, 'I');
+          thm_get_integration_weight(frequency_points[j], freq_vertices,
+                                     function);
       }
     }
   }
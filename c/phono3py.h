@@ -84,13 +84,17 @@ long ph3py_get_pp_collision(double *imag_self_energy,
                             const long *s2p_map,
                             const Larray *band_indices,
                             const Darray *temperatures,
+                            const Darray *frequency_points,
                             const long is_NU,
+                            const long is_per_triplet,
+                            const long scattering_event_class,
                             const long symmetrize_fc3_q,
                             const double cutoff_frequency);
 long ph3py_get_pp_collision_with_sigma(
   double *imag_self_energy,
   const double sigma,
   const double sigma_cutoff,
+  const double *adaptive_sigmas,
   const double *frequencies,
   const lapack_complex_double *eigenvectors,
   const long (*triplets)[3],
@@ -109,7 +113,10 @@ long ph3py_get_pp_collision_with_sigma(
   const long *s2p_map,
   const Larray *band_indices,
   const Darray *temperatures,
+  const Darray *frequency_points,
   const long is_NU,
+  const long is_per_triplet,
+  const long scattering_event_class,
   const long symmetrize_fc3_q,
   const double cutoff_frequency);
 void ph3py_get_imag_self_energy_at_bands_with_g(
@@ -211,6 +218,27 @@ void ph3py_get_thm_isotope_scattering_strength(
   const long num_band0,
   const double *integration_weights,
   const double cutoff_frequency);
+long ph3py_get_isotope_scattering_strength_at_grid_points(
+  double *gamma,
+  const long *target_grid_points,
+  const long num_target_grid_points,
+  const long *grid_points,
+  const long *weights,
+  const long num_grid_points,
+  const double *sigmas,
+  const long num_sigmas,
+  const long (*relative_grid_address)[4][3],
+  const long D_diag[3],
+  const long (*bz_grid_addresses)[3],
+  const long *bz_map,
+  const long bz_grid_type,
+  const double *mass_variances,
+  const double *frequencies,
+  const lapack_complex_double *eigenvectors,
+  const long *band_indices,
+  const long num_band,
+  const long num_band0,
+  const double cutoff_frequency);
 void ph3py_distribute_fc3(double *fc3,
                           const long target,
                           const long source,
@@ -276,10 +304,43 @@ long ph3py_get_integration_weight(double *iw,
                                   const long tp_type,
                                   const long openmp_per_triplets,
                                   const long openmp_per_bands);
+long ph3py_get_sorted_freq_vertices(
+  double *sorted_freq_vertices,
+  char *vertex_indices,
+  double *freq_spans,
+  const long relative_grid_address[24][4][3],
+  const long D_diag[3],
+  const long (*triplets)[3],
+  const long num_triplets,
+  const long (*bz_grid_addresses)[3],
+  const long *bz_map,
+  const long bz_grid_type,
+  const double *frequencies1,
+  const long num_band1,
+  const double *frequencies2,
+  const long num_band2,
+  const long tp_type,
+  const long openmp_per_triplets,
+  const long openmp_per_bands);
+void ph3py_get_integration_weight_at_sorted_freq_vertices(
+  double *iw,
+  char *iw_zero,
+  const double *frequency_points,
+  const long num_band0,
+  const double *sorted_freq_vertices,
+  const char *vertex_indices,
+  const double *freq_spans,
+  const long num_triplets,
+  const long num_band1,
+  const long num_band2,
+  const long tp_type,
+  const long openmp_per_triplets,
+  const long openmp_per_bands);
 void ph3py_get_integration_weight_with_sigma(double *iw,
                                              char *iw_zero,
                                              const double sigma,
                                              const double sigma_cutoff,
+                                             const double *adaptive_sigmas,
                                              const double *frequency_points,
                                              const long num_band0,
                                              const long (*triplets)[3],
@@ -287,6 +348,37 @@ void ph3py_get_integration_weight_with_sigma(double *iw,
                                              const double *frequencies,
                                              const long num_band,
                                              const long tp_type);
+long ph3py_get_joint_dos(double *jdos,
+                         const double *frequency_points,
+                         const long num_frequency_points,
+                         const double *temperatures,
+                         const long num_temps,
+                         const long relative_grid_address[24][4][3],
+                         const long (*triplets)[3],
+                         const long *triplet_weights,
+                         const long *triplets_offsets,
+                         const long num_grid_points,
+                         const long (*bz_grid_addresses)[3],
+                         const long *bz_map,
+                         const long bz_grid_type,
+                         const long D_diag[3],
+                         const double *frequencies,
+                         const long num_band,
+                         const double cutoff_frequency);
+void ph3py_get_joint_dos_with_sigma(double *jdos,
+                                    const double sigma,
+                                    const double sigma_cutoff,
+                                    const double *frequency_points,
+                                    const long num_frequency_points,
+                                    const double *temperatures,
+                                    const long num_temps,
+                                    const long (*triplets)[3],
+                                    const long *triplet_weights,
+                                    const long *triplets_offsets,
+                                    const long num_grid_points,
+                                    const double *frequencies,
+                                    const long num_band,
+                                    const double cutoff_frequency);
 long ph3py_get_grid_index_from_address(const long address[3],
                                        const long mesh[3]);
 void ph3py_get_gr_grid_addresses(long gr_grid_addresses[][3],
@@ -325,6 +417,30 @@ void ph3py_symmetrize_collision_matrix(double *collision_matrix,
                                        const long num_column,
                                        const long num_temp,
                                        const long num_sigma);
+void ph3py_symmetrize_collision_matrix_single(float *collision_matrix,
+                                              const long num_column,
+                                              const long num_temp,
+                                              const long num_sigma);
+void ph3py_average_collision_matrix_by_degeneracy(
+  double *collision_matrix,
+  const long *degenerate_bands,
+  const long num_row_grid_points,
+  const long row_grid_point_offset,
+  const long num_grid_points,
+  const long num_band,
+  const long num_elem,
+  const long num_temp,
+  const long num_sigma);
+void ph3py_average_collision_matrix_by_degeneracy_single(
+  float *collision_matrix,
+  const long *degenerate_bands,
+  const long num_row_grid_points,
+  const long row_grid_point_offset,
+  const long num_grid_points,
+  const long num_band,
+  const long num_elem,
+  const long num_temp,
+  const long num_sigma);
 void ph3py_expand_collision_matrix(double *collision_matrix,
                                    const long *rot_grid_points,
                                    const long *ir_grid_points,
@@ -334,6 +450,15 @@ void ph3py_expand_collision_matrix(double *collision_matrix,
                                    const long num_sigma,
                                    const long num_temp,
                                    const long num_band);
+void ph3py_expand_local_values(double *values,
+                               const double *rotations,
+                               const long *rot_grid_points,
+                               const long *ir_grid_points,
+                               const long num_ir_gp,
+                               const long num_grid_points,
+                               const long num_rot,
+                               const long num_slice,
+                               const long num_elem);
 long ph3py_get_neighboring_gird_points(long *relative_grid_points,
                                        const long *grid_points,
                                        const long (*relative_grid_address)[3],
@@ -354,6 +479,7 @@ long ph3py_set_integration_weights(double *iw,
                                    const long (*bz_grid_addresses)[3],
                                    const long *bz_map,
                                    const long bz_grid_type,
-                                   const double *frequencies);
+                                   const double *frequencies,
+                                   const char function);
 
 #endif
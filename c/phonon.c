@@ -158,6 +158,19 @@ static long needs_nac(const double (*born)[3][3],
                       const long (*grid_address)[3],
                       const long gp,
                       const double *q_direction);
+static void get_group_velocity(double (*gv)[3],
+                               const double *freqs,
+                               const lapack_complex_double *eigvecs,
+                               const double *ddm,
+                               const long num_band,
+                               const double unit_conversion_factor,
+                               const double cutoff_frequency);
+static void get_projected_ddm(double *ddm_deg,
+                              const double *ddm,
+                              const lapack_complex_double *eigvecs,
+                              const long num_band,
+                              const long band_start,
+                              const long num_deg);
 
 void
 phn_get_phonons_at_gridpoints(double *frequencies,
@@ -289,6 +302,74 @@ phn_get_gonze_phonons_at_gridpoints(double *frequencies,
   undone = NULL;
 }
 
+/* Group velocities are computed from analytical derivative of */
+/* dynamical matrix at grid points where phonons are already solved. */
+void
+phn_get_group_velocities_at_gridpoints(double (*group_velocities)[3],
+                                       const long *grid_points,
+                                       const long num_grid_points,
+                                       const long (*grid_address)[3],
+                                       const double QDinv[3][3],
+                                       const double *frequencies,
+                                       const lapack_complex_double *eigenvectors,
+                                       const double *fc2,
+                                       const double(*svecs_fc2)[27][3],
+                                       const long *multi_fc2,
+                                       const long num_patom,
+                                       const long num_satom,
+                                       const double *masses_fc2,
+                                       const long *p2s_fc2,
+                                       const long *s2p_fc2,
+                                       const double lattice[3][3],
+                                       const double unit_conversion_factor,
+                                       const double (*born)[3][3],
+                                       const double dielectric[3][3],
+                                       const double reciprocal_lattice[3][3],
+                                       const double nac_factor,
+                                       const double cutoff_frequency)
+{
+  long i, j, gp, num_band;
+  double q[3];
+  double *ddm;
+
+  num_band = num_patom * 3;
+
+#pragma omp parallel for private(j, gp, q, ddm)
+  for (i = 0; i < num_grid_points; i++) {
+    gp = grid_points[i];
+    for (j = 0; j < 3; j++) {
+      q[j] = QDinv[j][0] * grid_address[gp][0]
+        + QDinv[j][1] * grid_address[gp][1]
+        + QDinv[j][2] * grid_address[gp][2];
+    }
+    ddm = (double*)malloc(sizeof(double) * 3 * num_band * num_band * 2);
+    dym_get_derivative_dynmat_at_q(ddm,
+                                   num_patom,
+                                   num_satom,
+                                   fc2,
+                                   q,
+                                   lattice,
+                                   svecs_fc2,
+                                   multi_fc2,
+                                   masses_fc2,
+                                   s2p_fc2,
+                                   p2s_fc2,
+                                   nac_factor,
+                                   born,
+                                   dielectric,
+                                   reciprocal_lattice);
+    get_group_velocity(group_velocities + i * num_band,
+                       frequencies + gp * num_band,
+                       eigenvectors + gp * num_band * num_band,
+                       ddm,
+                       num_band,
+                       unit_conversion_factor,
+                       cutoff_frequency);
+    free(ddm);
+    ddm = NULL;
+  }
+}
+
 static long collect_undone_grid_points(long *undone,
                                        char *phonon_done,
                                        const long num_grid_points,
@@ -743,3 +824,140 @@ static long needs_nac(const double (*born)[3][3],
 
   return is_nac;
 }
+
+/* Degeneracy is resolved by diagonalizing derivative of dynamical */
+/* matrix along a general direction in degenerate subspace. */
+static void get_group_velocity(double (*gv)[3],
+                               const double *freqs,
+                               const lapack_complex_double *eigvecs,
+                               const double *ddm,
+                               const long num_band,
+                               const double unit_conversion_factor,
+                               const double cutoff_frequency)
+{
+  long i, j, k, l, num_deg, info;
+  double dir[3], val[2], *ddm_deg, *w;
+  lapack_complex_double *mat;
+
+  dir[0] = 1 / sqrt(14);
+  dir[1] = 2 / sqrt(14);
+  dir[2] = 3 / sqrt(14);
+
+  ddm_deg = (double*)malloc(sizeof(double) * 3 * num_band * num_band * 2);
+  mat = (lapack_complex_double*)
+    malloc(sizeof(lapack_complex_double) * num_band * num_band);
+  w = (double*)malloc(sizeof(double) * num_band);
+
+  i = 0;
+  while (i < num_band) {
+    num_deg = 1;
+    while (i + num_deg < num_band &&
+           fabs(freqs[i + num_deg] - freqs[i + num_deg - 1]) < 1e-4) {
+      num_deg++;
+    }
+    get_projected_ddm(ddm_deg, ddm, eigvecs, num_band, i, num_deg);
+
+    if (num_deg == 1) {
+      for (j = 0; j < 3; j++) {
+        gv[i][j] = ddm_deg[j * 2];
+      }
+    } else {
+      for (j = 0; j < num_deg * num_deg; j++) {
+        val[0] = 0;
+        val[1] = 0;
+        for (k = 0; k < 3; k++) {
+          val[0] += dir[k] * ddm_deg[(k * num_deg * num_deg + j) * 2];
+          val[1] += dir[k] * ddm_deg[(k * num_deg * num_deg + j) * 2 + 1];
+        }
+        mat[j] = lapack_make_complex_double(val[0], val[1]);
+      }
+      info = phonopy_zheev(w, mat, num_deg, 'L');
+      /* <u_j|ddm_k|u_j> where u_j is j-th eigenvector in subspace. */
+      for (j = 0; j < num_deg; j++) {
+        for (k = 0; k < 3; k++) {
+          gv[i + j][k] = 0;
+          for (l = 0; l < num_deg * num_deg; l++) {
+            /* l = row * num_deg + col, Re(conj(u[row]) M[row][col] u[col]) */
+            val[0] =
+              lapack_complex_double_real(mat[(l / num_deg) * num_deg + j]) *
+              lapack_complex_double_real(mat[(l % num_deg) * num_deg + j]) +
+              lapack_complex_double_imag(mat[(l / num_deg) * num_deg + j]) *
+              lapack_complex_double_imag(mat[(l % num_deg) * num_deg + j]);
+            val[1] =
+              lapack_complex_double_real(mat[(l / num_deg) * num_deg + j]) *
+              lapack_complex_double_imag(mat[(l % num_deg) * num_deg + j]) -
+              lapack_complex_double_imag(mat[(l / num_deg) * num_deg + j]) *
+              lapack_complex_double_real(mat[(l % num_deg) * num_deg + j]);
+            gv[i + j][k] +=
+              ddm_deg[(k * num_deg * num_deg + l) * 2] * val[0] -
+              ddm_deg[(k * num_deg * num_deg + l) * 2 + 1] * val[1];
+          }
+        }
+      }
+    }
+    i += num_deg;
+  }
+
+  for (i = 0; i < num_band; i++) {
+    for (j = 0; j < 3; j++) {
+      if (freqs[i] > cutoff_frequency) {
+        gv[i][j] *= unit_conversion_factor * unit_conversion_factor
+          / freqs[i] / 2;
+      } else {
+        gv[i][j] = 0;
+      }
+    }
+  }
+
+  free(w);
+  w = NULL;
+  free(mat);
+  mat = NULL;
+  free(ddm_deg);
+  ddm_deg = NULL;
+}
+
+/* ddm_deg[3, num_deg, num_deg, (real,imag)] = E^H ddm E */
+static void get_projected_ddm(double *ddm_deg,
+                              const double *ddm,
+                              const lapack_complex_double *eigvecs,
+                              const long num_band,
+                              const long band_start,
+                              const long num_deg)
+{
+  long i, j, k, a, b, adrs;
+  double e_a[2], e_b[2], d[2], de[2];
+
+  for (i = 0; i < 3 * num_deg * num_deg * 2; i++) {
+    ddm_deg[i] = 0;
+  }
+
+  for (i = 0; i < 3; i++) {
+    for (j = 0; j < num_deg; j++) {
+      for (k = 0; k < num_deg; k++) {
+        adrs = (i * num_deg * num_deg + j * num_deg + k) * 2;
+        for (a = 0; a < num_band; a++) {
+          /* (ddm E)[a][k] */
+          de[0] = 0;
+          de[1] = 0;
+          for (b = 0; b < num_band; b++) {
+            d[0] = ddm[(i * num_band * num_band + a * num_band + b) * 2];
+            d[1] = ddm[(i * num_band * num_band + a * num_band + b) * 2 + 1];
+            e_b[0] = lapack_complex_double_real(
+              eigvecs[b * num_band + band_start + k]);
+            e_b[1] = lapack_complex_double_imag(
+              eigvecs[b * num_band + band_start + k]);
+            de[0] += d[0] * e_b[0] - d[1] * e_b[1];
+            de[1] += d[0] * e_b[1] + d[1] * e_b[0];
+          }
+          e_a[0] = lapack_complex_double_real(
+            eigvecs[a * num_band + band_start + j]);
+          e_a[1] = lapack_complex_double_imag(
+            eigvecs[a * num_band + band_start + j]);
+          ddm_deg[adrs] += e_a[0] * de[0] + e_a[1] * de[1];
+          ddm_deg[adrs + 1] += e_a[0] * de[1] - e_a[1] * de[0];
+        }
+      }
+    }
+  }
+}
@@ -91,4 +91,28 @@ phn_get_gonze_phonons_at_gridpoints(double *frequencies,
                                     const long num_G_points,
                                     const double lambda,
                                     const char uplo);
+void
+phn_get_group_velocities_at_gridpoints(double (*group_velocities)[3],
+                                       const long *grid_points,
+                                       const long num_grid_points,
+                                       const long (*grid_address)[3],
+                                       const double QDinv[3][3],
+                                       const double *frequencies,
+                                       const lapack_complex_double *eigenvectors,
+                                       const double *fc2,
+                                       const double(*svecs_fc2)[27][3],
+                                       const long *multi_fc2,
+                                       const long num_patom,
+                                       const long num_satom,
+                                       const double *masses_fc2,
+                                       const long *p2s_fc2,
+                                       const long *s2p_fc2,
+                                       const double lattice[3][3],
+                                       const double unit_conversion_factor,
+                                       const double (*born)[3][3],
+                                       const double dielectric[3][3],
+                                       const double reciprocal_lattice[3][3],
+                                       const double nac_factor,
+                                       const double cutoff_frequency);
+
 #endif
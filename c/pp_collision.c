@@ -67,6 +67,36 @@ static void get_collision(double *ise,
                           const long symmetrize_fc3_q,
                           const double cutoff_frequency,
                           const long openmp_per_triplets);
+static void
+get_collision_at_frequency_points(double *ise,
+                                  const long num_frequency_points,
+                                  const long num_band0,
+                                  const long num_band,
+                                  const long num_temps,
+                                  const double *temperatures,
+                                  const double *g,
+                                  const char *g_zero,
+                                  const double *frequencies,
+                                  const lapack_complex_double *eigenvectors,
+                                  const long triplet[3],
+                                  const long triplet_weight,
+                                  const ConstBZGrid *bzgrid,
+                                  const double *fc3,
+                                  const long is_compact_fc3,
+                                  const double *shortest_vectors,
+                                  const long svecs_dims[3],
+                                  const long *multiplicity,
+                                  const double *masses,
+                                  const long *p2s_map,
+                                  const long *s2p_map,
+                                  const long *band_indices,
+                                  const long symmetrize_fc3_q,
+                                  const double cutoff_frequency,
+                                  const long openmp_per_triplets);
+static void set_scattering_event_class(double *g,
+                                       char *g_zero,
+                                       const long num_g_elems,
+                                       const long scattering_event_class);
 static void finalize_ise(double *imag_self_energy,
                          const double *ise,
                          const long (*bz_grid_address)[3],
@@ -74,8 +104,19 @@ static void finalize_ise(double *imag_self_energy,
                          const long num_triplets,
                          const long num_temps,
                          const long num_band0,
-                         const long is_NU);
-
+                         const long is_NU,
+                         const long is_per_triplet);
+
+/* With frequency_points == NULL, imaginary parts of self energies are */
+/* computed at phonon frequencies of band_indices and stored in */
+/* imag_self_energy[num_temps][num_band0]. Otherwise they are computed */
+/* at frequency points and stored in */
+/* imag_self_energy[num_temps][num_frequency_points][num_band0]. */
+/* With is_NU, these are doubled as [2][...] for N and U processes. */
+/* With is_per_triplet, those of triplets multiplied by triplet weights */
+/* are stored separately as [num_triplets][...] and is_NU is ignored. */
+/* scattering_event_class = 1 or 2 removes the other class of scattering */
+/* events. Otherwise (e.g., 0), both are included. */
 void ppc_get_pp_collision(double *imag_self_energy,
                           const long relative_grid_address[24][4][3], /* thm */
                           const double *frequencies,
@@ -94,14 +135,18 @@ void ppc_get_pp_collision(double *imag_self_energy,
                           const long *s2p_map,
                           const Larray *band_indices,
                           const Darray *temperatures,
+                          const Darray *frequency_points,
                           const long is_NU,
+                          const long is_per_triplet,
+                          const long scattering_event_class,
                           const long symmetrize_fc3_q,
                           const double cutoff_frequency)
 {
   long i;
-  long num_band, num_band0, num_band_prod, num_temps;
+  long num_band, num_band0, num_temps, num_fpoints, num_g_elems, num_ise_elems;
   long openmp_per_triplets;
   double *ise, *freqs_at_gp, *g;
+  const double *fpoints;
   char *g_zero;
   long tp_relative_grid_address[2][24][4][3];
 
@@ -112,15 +157,25 @@ void ppc_get_pp_collision(double *imag_self_energy,
 
   num_band0 = band_indices->dims[0];
   num_band = svecs_dims[1] * 3;
-  num_band_prod = num_band0 * num_band * num_band;
   num_temps = temperatures->dims[0];
-  ise = (double*)malloc(sizeof(double) * num_triplets * num_temps * num_band0);
   freqs_at_gp = (double*)malloc(sizeof(double) * num_band0);
   for (i = 0; i < num_band0; i++) {
     freqs_at_gp[i] = frequencies[triplets[0][0] * num_band
                                  + band_indices->data[i]];
   }
 
+  if (frequency_points == NULL) {
+    fpoints = freqs_at_gp;
+    num_fpoints = num_band0;
+    num_ise_elems = num_temps * num_band0;
+  } else {
+    fpoints = frequency_points->data;
+    num_fpoints = frequency_points->dims[0];
+    num_ise_elems = num_temps * num_fpoints * num_band0;
+  }
+  num_g_elems = num_fpoints * num_band * num_band;
+  ise = (double*)malloc(sizeof(double) * num_triplets * num_ise_elems);
+
   if (num_triplets > num_band) {
     openmp_per_triplets = 1;
   } else {
@@ -133,12 +188,12 @@ void ppc_get_pp_collision(double *imag_self_energy,
 
 #pragma omp parallel for schedule(guided) private(g, g_zero) if (openmp_per_triplets)
   for (i = 0; i < num_triplets; i++) {
-    g = (double*)malloc(sizeof(double) * 2 * num_band_prod);
-    g_zero = (char*)malloc(sizeof(char) * num_band_prod);
+    g = (double*)malloc(sizeof(double) * 2 * num_g_elems);
+    g_zero = (char*)malloc(sizeof(char) * num_g_elems);
     tpi_get_integration_weight(g,
                                g_zero,
-                               freqs_at_gp,  /* used as f0 */
-                               num_band0,
+                               fpoints,  /* used as f0 */
+                               num_fpoints,
                                tp_relative_grid_address,
                                triplets[i],
                                1,
@@ -149,31 +204,60 @@ void ppc_get_pp_collision(double *imag_self_energy,
                                num_band,
                                2,
                                1 - openmp_per_triplets);
-
-    get_collision(ise + i * num_temps * num_band0,
-                  num_band0,
-                  num_band,
-                  num_temps,
-                  temperatures->data,
-                  g,
-                  g_zero,
-                  frequencies,
-                  eigenvectors,
-                  triplets[i],
-                  triplet_weights[i],
-                  bzgrid,
-                  fc3,
-                  is_compact_fc3,
-                  shortest_vectors,
-                  svecs_dims,
-                  multiplicity,
-                  masses,
-                  p2s_map,
-                  s2p_map,
-                  band_indices->data,
-                  symmetrize_fc3_q,
-                  cutoff_frequency,
-                  openmp_per_triplets);
+    set_scattering_event_class(g, g_zero, num_g_elems, scattering_event_class);
+
+    if (frequency_points == NULL) {
+      get_collision(ise + i * num_ise_elems,
+                    num_band0,
+                    num_band,
+                    num_temps,
+                    temperatures->data,
+                    g,
+                    g_zero,
+                    frequencies,
+                    eigenvectors,
+                    triplets[i],
+                    triplet_weights[i],
+                    bzgrid,
+                    fc3,
+                    is_compact_fc3,
+                    shortest_vectors,
+                    svecs_dims,
+                    multiplicity,
+                    masses,
+                    p2s_map,
+                    s2p_map,
+                    band_indices->data,
+                    symmetrize_fc3_q,
+                    cutoff_frequency,
+                    openmp_per_triplets);
+    } else {
+      get_collision_at_frequency_points(ise + i * num_ise_elems,
+                                        num_fpoints,
+                                        num_band0,
+                                        num_band,
+                                        num_temps,
+                                        temperatures->data,
+                                        g,
+                                        g_zero,
+                                        frequencies,
+                                        eigenvectors,
+                                        triplets[i],
+                                        triplet_weights[i],
+                                        bzgrid,
+                                        fc3,
+                                        is_compact_fc3,
+                                        shortest_vectors,
+                                        svecs_dims,
+                                        multiplicity,
+                                        masses,
+                                        p2s_map,
+                                        s2p_map,
+                                        band_indices->data,
+                                        symmetrize_fc3_q,
+                                        cutoff_frequency,
+                                        openmp_per_triplets);
+    }
 
     free(g_zero);
     g_zero = NULL;
@@ -187,8 +271,9 @@ void ppc_get_pp_collision(double *imag_self_energy,
                triplets,
                num_triplets,
                num_temps,
-               num_band0,
-               is_NU);
+               num_ise_elems / num_temps,
+               is_NU,
+               is_per_triplet);
 
   free(freqs_at_gp);
   freqs_at_gp = NULL;
@@ -200,6 +285,7 @@ void ppc_get_pp_collision_with_sigma(
   double *imag_self_energy,
   const double sigma,
   const double sigma_cutoff,
+  const double *adaptive_sigmas,
   const double *frequencies,
   const lapack_complex_double *eigenvectors,
   const long (*triplets)[3],
@@ -216,15 +302,19 @@ void ppc_get_pp_collision_with_sigma(
   const long *s2p_map,
   const Larray *band_indices,
   const Darray *temperatures,
+  const Darray *frequency_points,
   const long is_NU,
+  const long is_per_triplet,
+  const long scattering_event_class,
   const long symmetrize_fc3_q,
   const double cutoff_frequency)
 {
   long i;
-  long num_band, num_band0, num_band_prod, num_temps;
+  long num_band, num_band0, num_temps, num_fpoints, num_g_elems, num_ise_elems;
   long openmp_per_triplets, const_adrs_shift;
   double cutoff;
   double *ise, *freqs_at_gp, *g;
+  const double *fpoints;
   char *g_zero;
 
   ise = NULL;
@@ -234,17 +324,26 @@ void ppc_get_pp_collision_with_sigma(
 
   num_band0 = band_indices->dims[0];
   num_band = svecs_dims[1] * 3;
-  num_band_prod = num_band0 * num_band * num_band;
   num_temps = temperatures->dims[0];
-  const_adrs_shift = num_band_prod;
-
-  ise = (double*)malloc(sizeof(double) * num_triplets * num_temps * num_band0);
   freqs_at_gp = (double*)malloc(sizeof(double) * num_band0);
   for (i = 0; i < num_band0; i++) {
     freqs_at_gp[i] = frequencies[triplets[0][0] * num_band +
                                  band_indices->data[i]];
   }
 
+  if (frequency_points == NULL) {
+    fpoints = freqs_at_gp;
+    num_fpoints = num_band0;
+    num_ise_elems = num_temps * num_band0;
+  } else {
+    fpoints = frequency_points->data;
+    num_fpoints = frequency_points->dims[0];
+    num_ise_elems = num_temps * num_fpoints * num_band0;
+  }
+  num_g_elems = num_fpoints * num_band * num_band;
+  const_adrs_shift = num_g_elems;
+  ise = (double*)malloc(sizeof(double) * num_triplets * num_ise_elems);
+
   if (num_triplets > num_band) {
     openmp_per_triplets = 1;
   } else {
@@ -255,45 +354,77 @@ void ppc_get_pp_collision_with_sigma(
 
 #pragma omp parallel for schedule(guided) private(g, g_zero) if (openmp_per_triplets)
   for (i = 0; i < num_triplets; i++) {
-    g = (double*)malloc(sizeof(double) * 2 * num_band_prod);
-    g_zero = (char*)malloc(sizeof(char) * num_band_prod);
+    g = (double*)malloc(sizeof(double) * 2 * num_g_elems);
+    g_zero = (char*)malloc(sizeof(char) * num_g_elems);
     tpi_get_integration_weight_with_sigma(g,
                                           g_zero,
                                           sigma,
                                           cutoff,
-                                          freqs_at_gp,
-                                          num_band0,
+                                          (adaptive_sigmas == NULL) ?
+                                          NULL : (adaptive_sigmas +
+                                                  i * num_band * num_band * 2),
+                                          fpoints,
+                                          num_fpoints,
                                           triplets[i],
                                           const_adrs_shift,
                                           frequencies,
                                           num_band,
                                           2,
                                           0);
-
-    get_collision(ise + i * num_temps * num_band0,
-                  num_band0,
-                  num_band,
-                  num_temps,
-                  temperatures->data,
-                  g,
-                  g_zero,
-                  frequencies,
-                  eigenvectors,
-                  triplets[i],
-                  triplet_weights[i],
-                  bzgrid,
-                  fc3,
-                  is_compact_fc3,
-                  shortest_vectors,
-                  svecs_dims,
-                  multiplicity,
-                  masses,
-                  p2s_map,
-                  s2p_map,
-                  band_indices->data,
-                  symmetrize_fc3_q,
-                  cutoff_frequency,
-                  openmp_per_triplets);
+    set_scattering_event_class(g, g_zero, num_g_elems, scattering_event_class);
+
+    if (frequency_points == NULL) {
+      get_collision(ise + i * num_ise_elems,
+                    num_band0,
+                    num_band,
+                    num_temps,
+                    temperatures->data,
+                    g,
+                    g_zero,
+                    frequencies,
+                    eigenvectors,
+                    triplets[i],
+                    triplet_weights[i],
+                    bzgrid,
+                    fc3,
+                    is_compact_fc3,
+                    shortest_vectors,
+                    svecs_dims,
+                    multiplicity,
+                    masses,
+                    p2s_map,
+                    s2p_map,
+                    band_indices->data,
+                    symmetrize_fc3_q,
+                    cutoff_frequency,
+                    openmp_per_triplets);
+    } else {
+      get_collision_at_frequency_points(ise + i * num_ise_elems,
+                                        num_fpoints,
+                                        num_band0,
+                                        num_band,
+                                        num_temps,
+                                        temperatures->data,
+                                        g,
+                                        g_zero,
+                                        frequencies,
+                                        eigenvectors,
+                                        triplets[i],
+                                        triplet_weights[i],
+                                        bzgrid,
+                                        fc3,
+                                        is_compact_fc3,
+                                        shortest_vectors,
+                                        svecs_dims,
+                                        multiplicity,
+                                        masses,
+                                        p2s_map,
+                                        s2p_map,
+                                        band_indices->data,
+                                        symmetrize_fc3_q,
+                                        cutoff_frequency,
+                                        openmp_per_triplets);
+    }
 
     free(g_zero);
     g_zero = NULL;
@@ -307,8 +438,9 @@ void ppc_get_pp_collision_with_sigma(
                triplets,
                num_triplets,
                num_temps,
-               num_band0,
-               is_NU);
+               num_ise_elems / num_temps,
+               is_NU,
+               is_per_triplet);
 
   free(freqs_at_gp);
   freqs_at_gp = NULL;
@@ -411,6 +543,167 @@ static void get_collision(double *ise,
   g_pos = NULL;
 }
 
+/* Interaction strength is computed only once per triplet for all */
+/* frequency points. Elements are skipped where g_zero is true at all */
+/* the frequency points. */
+static void
+get_collision_at_frequency_points(double *ise,
+                                  const long num_frequency_points,
+                                  const long num_band0,
+                                  const long num_band,
+                                  const long num_temps,
+                                  const double *temperatures,
+                                  const double *g,
+                                  const char *g_zero,
+                                  const double *frequencies,
+                                  const lapack_complex_double *eigenvectors,
+                                  const long triplet[3],
+                                  const long triplet_weight,
+                                  const ConstBZGrid *bzgrid,
+                                  const double *fc3,
+                                  const long is_compact_fc3,
+                                  const double *shortest_vectors,
+                                  const long svecs_dims[3],
+                                  const long *multiplicity,
+                                  const double *masses,
+                                  const long *p2s_map,
+                                  const long *s2p_map,
+                                  const long *band_indices,
+                                  const long symmetrize_fc3_q,
+                                  const double cutoff_frequency,
+                                  const long openmp_per_triplets)
+{
+  long i, j, k;
+  long num_band_prod, num_g_elems, num_g_pos;
+  double *fc3_normal_squared, *ise_at_f;
+  char *pp_zero;
+  long (*g_pos)[4];
+
+  fc3_normal_squared = NULL;
+  ise_at_f = NULL;
+  pp_zero = NULL;
+  g_pos = NULL;
+
+  num_band_prod = num_band0 * num_band * num_band;
+  num_g_elems = num_band * num_band;
+  fc3_normal_squared = (double*)malloc(sizeof(double) * num_band_prod);
+  ise_at_f = (double*)malloc(sizeof(double) * num_temps * num_band0);
+  pp_zero = (char*)malloc(sizeof(char) * num_g_elems);
+  g_pos = (long(*)[4])malloc(sizeof(long[4]) * num_band_prod);
+
+  for (i = 0; i < num_band_prod; i++) {
+    fc3_normal_squared[i] = 0;
+  }
+
+  for (i = 0; i < num_g_elems; i++) {
+    pp_zero[i] = 1;
+    for (j = 0; j < num_frequency_points; j++) {
+      if (!g_zero[j * num_g_elems + i]) {
+        pp_zero[i] = 0;
+        break;
+      }
+    }
+  }
+
+  num_g_pos = ise_set_g_pos_frequency_point(g_pos,
+                                            num_band0,
+                                            num_band,
+                                            pp_zero);
+
+  itr_get_interaction_at_triplet(
+    fc3_normal_squared,
+    num_band0,
+    num_band,
+    g_pos,
+    num_g_pos,
+    frequencies,
+    eigenvectors,
+    triplet,
+    bzgrid,
+    fc3,
+    is_compact_fc3,
+    shortest_vectors,
+    svecs_dims,
+    multiplicity,
+    masses,
+    p2s_map,
+    s2p_map,
+    band_indices,
+    symmetrize_fc3_q,
+    cutoff_frequency,
+    0,
+    0,
+    1 - openmp_per_triplets);
+
+  for (i = 0; i < num_frequency_points; i++) {
+    num_g_pos = ise_set_g_pos_frequency_point(g_pos,
+                                              num_band0,
+                                              num_band,
+                                              g_zero + i * num_g_elems);
+    ise_imag_self_energy_at_triplet(
+      ise_at_f,
+      num_band0,
+      num_band,
+      fc3_normal_squared,
+      frequencies,
+      triplet,
+      triplet_weight,
+      g + i * num_g_elems,
+      g + (num_frequency_points + i) * num_g_elems,
+      g_pos,
+      num_g_pos,
+      temperatures,
+      num_temps,
+      cutoff_frequency,
+      1 - openmp_per_triplets,
+      1);
+    for (j = 0; j < num_temps; j++) {
+      for (k = 0; k < num_band0; k++) {
+        ise[(j * num_frequency_points + i) * num_band0 + k] =
+          ise_at_f[j * num_band0 + k];
+      }
+    }
+  }
+
+  free(fc3_normal_squared);
+  fc3_normal_squared = NULL;
+  free(ise_at_f);
+  ise_at_f = NULL;
+  free(pp_zero);
+  pp_zero = NULL;
+  free(g_pos);
+  g_pos = NULL;
+}
+
+/* g[0] and g[1] correspond to class 1 and class 2 scattering events, */
+/* respectively. Elements of the removed class are set zero, and g_zero */
+/* is updated to skip computing unnecessary interaction strength. */
+static void set_scattering_event_class(double *g,
+                                       char *g_zero,
+                                       const long num_g_elems,
+                                       const long scattering_event_class)
+{
+  long i;
+  double *g_removed, *g_kept;
+
+  if (scattering_event_class == 1) {
+    g_removed = g;
+    g_kept = g + num_g_elems;
+  } else if (scattering_event_class == 2) {
+    g_removed = g + num_g_elems;
+    g_kept = g;
+  } else {
+    return;
+  }
+
+  for (i = 0; i < num_g_elems; i++) {
+    g_removed[i] = 0;
+    if (g_kept[i] == 0) {
+      g_zero[i] = 1;
+    }
+  }
+}
+
 static void finalize_ise(double *imag_self_energy,
                          const double *ise,
                          const long (*bz_grid_addresses)[3],
@@ -418,12 +711,17 @@ static void finalize_ise(double *imag_self_energy,
                          const long num_triplets,
                          const long num_temps,
                          const long num_band0,
-                         const long is_NU)
+                         const long is_NU,
+                         const long is_per_triplet)
 {
   long i, j, k;
   long is_N;
 
-  if (is_NU) {
+  if (is_per_triplet) {
+    for (i = 0; i < num_triplets * num_temps * num_band0; i++) {
+      imag_self_energy[i] = ise[i];
+    }
+  } else if (is_NU) {
     for (i = 0; i < 2 * num_temps * num_band0; i++) {
       imag_self_energy[i] = 0;
     }
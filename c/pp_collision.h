@@ -57,13 +57,17 @@ void ppc_get_pp_collision(double *imag_self_energy,
                           const long *s2p_map,
                           const Larray *band_indices,
                           const Darray *temperatures,
+                          const Darray *frequency_points,
                           const long is_NU,
+                          const long is_per_triplet,
+                          const long scattering_event_class,
                           const long symmetrize_fc3_q,
                           const double cutoff_frequency);
 void ppc_get_pp_collision_with_sigma(
   double *imag_self_energy,
   const double sigma,
   const double sigma_cutoff,
+  const double *adaptive_sigmas,
   const double *frequencies,
   const lapack_complex_double *eigenvectors,
   const long (*triplets)[3],
@@ -80,7 +84,10 @@ void ppc_get_pp_collision_with_sigma(
   const long *s2p_map,
   const Larray *band_indices,
   const Darray *temperatures,
+  const Darray *frequency_points,
   const long is_NU,
+  const long is_per_triplet,
+  const long scattering_event_class,
   const long symmetrize_fc3_q,
   const double cutoff_frequency);
 
@@ -186,6 +186,29 @@ get_integration_weight(const double omega,
                                     const long,
                                     const double,
                                     const double[4]));
+static double
+get_integration_weight_at_sorted_omegas(
+  const double omega,
+  const double sorted_omegas[24][4],
+  const char vertex_indices[24],
+  double (*gn)(const long,
+               const double,
+               const double[4]),
+  double (*IJ)(const long,
+               const long,
+               const double,
+               const double[4]),
+  const long skip_outside);
+static double sum_integration_weight(const double omega,
+                                     const double v[4],
+                                     const long ci,
+                                     double (*gn)(const long,
+                                                  const double,
+                                                  const double[4]),
+                                     double (*IJ)(const long,
+                                                  const long,
+                                                  const double,
+                                                  const double[4]));
 static long get_main_diagonal(const double rec_lattice[3][3]);
 static long sort_omegas(double v[4]);
 static double norm_squared_d3(const double a[3]);
@@ -328,6 +351,48 @@ double thm_get_integration_weight(const double omega,
   }
 }
 
+/* Vertices of each tetrahedron are sorted in ascending order of */
+/* omega. vertex_indices[i] is the position of the first vertex of */
+/* i-th tetrahedron after the sorting, which is needed to evaluate */
+/* integration weight. Sorting once and evaluating integration */
+/* weights at many omegas by */
+/* thm_get_integration_weight_at_sorted_omegas is faster than calling */
+/* thm_get_integration_weight many times. */
+void thm_get_sorted_tetrahedra_omegas(double sorted_omegas[24][4],
+                                      char vertex_indices[24],
+                                      const double tetrahedra_omegas[24][4])
+{
+  long i, j;
+
+  for (i = 0; i < 24; i++) {
+    for (j = 0; j < 4; j++) {
+      sorted_omegas[i][j] = tetrahedra_omegas[i][j];
+    }
+    vertex_indices[i] = sort_omegas(sorted_omegas[i]);
+  }
+}
+
+double
+thm_get_integration_weight_at_sorted_omegas(const double omega,
+                                            const double sorted_omegas[24][4],
+                                            const char vertex_indices[24],
+                                            const char function)
+{
+  /* For 'I', tetrahedra whose omega span doesn't contain omega */
+  /* are skipped since their contributions are zero. */
+  if (function == 'I') {
+    return get_integration_weight_at_sorted_omegas(omega,
+                                                   sorted_omegas,
+                                                   vertex_indices,
+                                                   _g, _I, 1);
+  } else {
+    return get_integration_weight_at_sorted_omegas(omega,
+                                                   sorted_omegas,
+                                                   vertex_indices,
+                                                   _n, _J, 0);
+  }
+}
+
 static double
 get_integration_weight(const double omega,
                        const double tetrahedra_omegas[24][4],
@@ -349,27 +414,73 @@ get_integration_weight(const double omega,
       v[j] = tetrahedra_omegas[i][j];
     }
     ci = sort_omegas(v);
-    if (omega < v[0]) {
-      sum += IJ(0, ci, omega, v) * gn(0, omega, v);
+    sum += sum_integration_weight(omega, v, ci, gn, IJ);
+  }
+  return sum / 6;
+}
+
+static double
+get_integration_weight_at_sorted_omegas(
+  const double omega,
+  const double sorted_omegas[24][4],
+  const char vertex_indices[24],
+  double (*gn)(const long,
+               const double,
+               const double[4]),
+  double (*IJ)(const long,
+               const long,
+               const double,
+               const double[4]),
+  const long skip_outside)
+{
+  long i;
+  double sum;
+
+  sum = 0;
+  for (i = 0; i < 24; i++) {
+    if (skip_outside &&
+        (omega < sorted_omegas[i][0] || sorted_omegas[i][3] < omega)) {
+      continue;
+    }
+    sum += sum_integration_weight(omega,
+                                  sorted_omegas[i],
+                                  vertex_indices[i],
+                                  gn, IJ);
+  }
+  return sum / 6;
+}
+
+static double sum_integration_weight(const double omega,
+                                     const double v[4],
+                                     const long ci,
+                                     double (*gn)(const long,
+                                                  const double,
+                                                  const double[4]),
+                                     double (*IJ)(const long,
+                                                  const long,
+                                                  const double,
+                                                  const double[4]))
+{
+  if (omega < v[0]) {
+    return IJ(0, ci, omega, v) * gn(0, omega, v);
+  } else {
+    if (v[0] < omega && omega < v[1]) {
+      return IJ(1, ci, omega, v) * gn(1, omega, v);
     } else {
-      if (v[0] < omega && omega < v[1]) {
-        sum += IJ(1, ci, omega, v) * gn(1, omega, v);
+      if (v[1] < omega && omega < v[2]) {
+        return IJ(2, ci, omega, v) * gn(2, omega, v);
       } else {
-        if (v[1] < omega && omega < v[2]) {
-          sum += IJ(2, ci, omega, v) * gn(2, omega, v);
+        if (v[2] < omega && omega < v[3]) {
+          return IJ(3, ci, omega, v) * gn(3, omega, v);
         } else {
-          if (v[2] < omega && omega < v[3]) {
-            sum += IJ(3, ci, omega, v) * gn(3, omega, v);
-          } else {
-            if (v[3] < omega) {
-              sum += IJ(4, ci, omega, v) * gn(4, omega, v);
-            }
+          if (v[3] < omega) {
+            return IJ(4, ci, omega, v) * gn(4, omega, v);
           }
         }
       }
     }
   }
-  return sum / 6;
+  return 0;
 }
 
 static long sort_omegas(double v[4])
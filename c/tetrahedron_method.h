@@ -43,5 +43,13 @@ void thm_get_all_relative_grid_address(long relative_grid_address[4][24][4][3]);
 double thm_get_integration_weight(const double omega,
                                   const double tetrahedra_omegas[24][4],
                                   const char function);
+void thm_get_sorted_tetrahedra_omegas(double sorted_omegas[24][4],
+                                      char vertex_indices[24],
+                                      const double tetrahedra_omegas[24][4]);
+double
+thm_get_integration_weight_at_sorted_omegas(const double omega,
+                                            const double sorted_omegas[24][4],
+                                            const char vertex_indices[24],
+                                            const char function);
 
 #endif
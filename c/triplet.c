@@ -34,11 +34,47 @@
 /* ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE */
 /* POSSIBILITY OF SUCH DAMAGE. */
 
+#include <stdlib.h>
 #include "bzgrid.h"
+#include "phonoc_utils.h"
 #include "triplet.h"
 #include "triplet_iw.h"
 #include "triplet_grid.h"
 
+static void get_joint_dos(double *jdos,
+                          const double *frequency_points,
+                          const long num_frequency_points,
+                          const double *temperatures,
+                          const long num_temps,
+                          const long (*tp_relative_grid_address)[24][4][3],
+                          const double sigma,
+                          const double sigma_cutoff,
+                          const long (*triplets)[3],
+                          const long *triplet_weights,
+                          const long *triplets_offsets,
+                          const long num_grid_points,
+                          const ConstBZGrid *bzgrid,
+                          const double *frequencies,
+                          const long num_band,
+                          const double cutoff_frequency);
+static void set_occupations(double *n1,
+                            double *n2,
+                            const long triplet[3],
+                            const double *frequencies,
+                            const long num_band,
+                            const double *temperatures,
+                            const long num_temps,
+                            const double cutoff_frequency);
+static void add_joint_dos_at_triplet(double *jdos,
+                                     const double *g,
+                                     const char *g_zero,
+                                     const double *n1,
+                                     const double *n2,
+                                     const long triplet_weight,
+                                     const long num_frequency_points,
+                                     const long num_band,
+                                     const long num_temps);
+
 long tpl_get_BZ_triplets_at_q(long (*triplets)[3],
                               const long grid_point,
                               const ConstBZGrid *bzgrid,
@@ -116,10 +152,101 @@ void tpl_get_integration_weight(double *iw,
 }
 
 
+void tpl_get_sorted_freq_vertices(double *sorted_freq_vertices,
+                                  char *vertex_indices,
+                                  double *freq_spans,
+                                  const long relative_grid_address[24][4][3],
+                                  const long (*triplets)[3],
+                                  const long num_triplets,
+                                  const ConstBZGrid *bzgrid,
+                                  const double *frequencies1,
+                                  const long num_band1,
+                                  const double *frequencies2,
+                                  const long num_band2,
+                                  const long tp_type,
+                                  const long openmp_per_triplets,
+                                  const long openmp_per_bands)
+{
+  long i, max_i, num_band_prod;
+  long tp_relative_grid_address[2][24][4][3];
+
+  tpl_set_relative_grid_address(tp_relative_grid_address,
+                                relative_grid_address,
+                                tp_type);
+  if (tp_type == 4) {
+    max_i = 1;
+  } else {
+    max_i = 3;
+  }
+  num_band_prod = num_band1 * num_band2 * max_i;
+
+#pragma omp parallel for if (openmp_per_triplets)
+  for (i = 0; i < num_triplets; i++) {
+    tpi_get_sorted_freq_vertices(sorted_freq_vertices + i * num_band_prod * 96,
+                                 vertex_indices + i * num_band_prod * 24,
+                                 freq_spans + i * num_band_prod * 2,
+                                 tp_relative_grid_address,
+                                 triplets[i],
+                                 bzgrid,
+                                 frequencies1,
+                                 num_band1,
+                                 frequencies2,
+                                 num_band2,
+                                 tp_type,
+                                 openmp_per_bands);
+  }
+}
+
+
+void tpl_get_integration_weight_at_sorted_freq_vertices(
+  double *iw,
+  char *iw_zero,
+  const double *frequency_points,
+  const long num_band0,
+  const double *sorted_freq_vertices,
+  const char *vertex_indices,
+  const double *freq_spans,
+  const long num_triplets,
+  const long num_band1,
+  const long num_band2,
+  const long tp_type,
+  const long openmp_per_triplets,
+  const long openmp_per_bands)
+{
+  long i, max_i, num_band_prod, num_vert_prod;
+
+  if (tp_type == 4) {
+    max_i = 1;
+  } else {
+    max_i = 3;
+  }
+  num_band_prod = num_band0 * num_band1 * num_band2;
+  num_vert_prod = num_band1 * num_band2 * max_i;
+
+#pragma omp parallel for if (openmp_per_triplets)
+  for (i = 0; i < num_triplets; i++) {
+    tpi_get_integration_weight_at_sorted_freq_vertices(
+      iw + i * num_band_prod,
+      iw_zero + i * num_band_prod,
+      frequency_points,
+      num_band0,
+      sorted_freq_vertices + i * num_vert_prod * 96,
+      vertex_indices + i * num_vert_prod * 24,
+      freq_spans + i * num_vert_prod * 2,
+      num_band1,
+      num_band2,
+      num_triplets,
+      tp_type,
+      openmp_per_bands);
+  }
+}
+
+
 void tpl_get_integration_weight_with_sigma(double *iw,
                                            char *iw_zero,
                                            const double sigma,
                                            const double sigma_cutoff,
+                                           const double *adaptive_sigmas,
                                            const double *frequency_points,
                                            const long num_band0,
                                            const long (*triplets)[3],
@@ -142,6 +269,8 @@ void tpl_get_integration_weight_with_sigma(double *iw,
       iw_zero + i * num_band_prod,
       sigma,
       cutoff,
+      (adaptive_sigmas == NULL) ?
+      NULL : adaptive_sigmas + i * num_band * num_band * 2,
       frequency_points,
       num_band0,
       triplets[i],
@@ -154,6 +283,79 @@ void tpl_get_integration_weight_with_sigma(double *iw,
 }
 
 
+void tpl_get_joint_dos(double *jdos,
+                       const double *frequency_points,
+                       const long num_frequency_points,
+                       const double *temperatures,
+                       const long num_temps,
+                       const long relative_grid_address[24][4][3],
+                       const long (*triplets)[3],
+                       const long *triplet_weights,
+                       const long *triplets_offsets,
+                       const long num_grid_points,
+                       const ConstBZGrid *bzgrid,
+                       const double *frequencies,
+                       const long num_band,
+                       const double cutoff_frequency)
+{
+  long tp_relative_grid_address[2][24][4][3];
+
+  tpl_set_relative_grid_address(tp_relative_grid_address,
+                                relative_grid_address,
+                                3);
+  get_joint_dos(jdos,
+                frequency_points,
+                num_frequency_points,
+                temperatures,
+                num_temps,
+                tp_relative_grid_address,
+                0,
+                0,
+                triplets,
+                triplet_weights,
+                triplets_offsets,
+                num_grid_points,
+                bzgrid,
+                frequencies,
+                num_band,
+                cutoff_frequency);
+}
+
+
+void tpl_get_joint_dos_with_sigma(double *jdos,
+                                  const double sigma,
+                                  const double sigma_cutoff,
+                                  const double *frequency_points,
+                                  const long num_frequency_points,
+                                  const double *temperatures,
+                                  const long num_temps,
+                                  const long (*triplets)[3],
+                                  const long *triplet_weights,
+                                  const long *triplets_offsets,
+                                  const long num_grid_points,
+                                  const double *frequencies,
+                                  const long num_band,
+                                  const double cutoff_frequency)
+{
+  get_joint_dos(jdos,
+                frequency_points,
+                num_frequency_points,
+                temperatures,
+                num_temps,
+                NULL,
+                sigma,
+                sigma_cutoff,
+                triplets,
+                triplet_weights,
+                triplets_offsets,
+                num_grid_points,
+                NULL,
+                frequencies,
+                num_band,
+                cutoff_frequency);
+}
+
+
 long tpl_is_N(const long triplet[3], const long (*bz_grid_addresses)[3])
 {
   long i, j, sum_q, is_N;
@@ -200,3 +402,190 @@ void tpl_set_relative_grid_address(
     }
   }
 }
+
+/* tp_relative_grid_address == NULL means smearing method. */
+static void get_joint_dos(double *jdos,
+                          const double *frequency_points,
+                          const long num_frequency_points,
+                          const double *temperatures,
+                          const long num_temps,
+                          const long (*tp_relative_grid_address)[24][4][3],
+                          const double sigma,
+                          const double sigma_cutoff,
+                          const long (*triplets)[3],
+                          const long *triplet_weights,
+                          const long *triplets_offsets,
+                          const long num_grid_points,
+                          const ConstBZGrid *bzgrid,
+                          const double *frequencies,
+                          const long num_band,
+                          const double cutoff_frequency)
+{
+  long i, j, num_g_elems, num_jdos_elems, openmp_per_grid_points;
+  double cutoff;
+  double *g, *n1, *n2;
+  char *g_zero;
+
+  g = NULL;
+  n1 = NULL;
+  n2 = NULL;
+  g_zero = NULL;
+
+  num_g_elems = num_frequency_points * num_band * num_band;
+  if (num_temps > 0) {
+    num_jdos_elems = num_temps * num_frequency_points * 2;
+  } else {
+    num_jdos_elems = num_frequency_points * 2;
+  }
+  if (sigma_cutoff > 0) {
+    cutoff = sigma * sigma_cutoff;
+  } else {
+    cutoff = -1;
+  }
+
+  if (num_grid_points > num_band) {
+    openmp_per_grid_points = 1;
+  } else {
+    openmp_per_grid_points = 0;
+  }
+
+#pragma omp parallel for schedule(dynamic) private(j, g, g_zero, n1, n2) if (openmp_per_grid_points)
+  for (i = 0; i < num_grid_points; i++) {
+    g = (double*)malloc(sizeof(double) * 3 * num_g_elems);
+    g_zero = (char*)malloc(sizeof(char) * num_g_elems);
+    n1 = (double*)malloc(sizeof(double) * num_band * (num_temps + 1));
+    n2 = (double*)malloc(sizeof(double) * num_band * (num_temps + 1));
+    for (j = 0; j < num_jdos_elems; j++) {
+      jdos[i * num_jdos_elems + j] = 0;
+    }
+
+    for (j = triplets_offsets[i]; j < triplets_offsets[i + 1]; j++) {
+      if (tp_relative_grid_address == NULL) {
+        tpi_get_integration_weight_with_sigma(g,
+                                              g_zero,
+                                              sigma,
+                                              cutoff,
+                                              NULL,
+                                              frequency_points,
+                                              num_frequency_points,
+                                              triplets[j],
+                                              num_g_elems,
+                                              frequencies,
+                                              num_band,
+                                              3,
+                                              1 - openmp_per_grid_points);
+      } else {
+        tpi_get_integration_weight(g,
+                                   g_zero,
+                                   frequency_points,
+                                   num_frequency_points,
+                                   tp_relative_grid_address,
+                                   triplets[j],
+                                   1,
+                                   bzgrid,
+                                   frequencies,
+                                   num_band,
+                                   frequencies,
+                                   num_band,
+                                   3,
+                                   1 - openmp_per_grid_points);
+      }
+      set_occupations(n1, n2, triplets[j], frequencies, num_band,
+                      temperatures, num_temps, cutoff_frequency);
+      add_joint_dos_at_triplet(jdos + i * num_jdos_elems,
+                               g,
+                               g_zero,
+                               n1,
+                               n2,
+                               triplet_weights[j],
+                               num_frequency_points,
+                               num_band,
+                               num_temps);
+    }
+
+    free(n2);
+    n2 = NULL;
+    free(n1);
+    n1 = NULL;
+    free(g_zero);
+    g_zero = NULL;
+    free(g);
+    g = NULL;
+  }
+}
+
+/* n1[num_temps][num_band] and n2[num_temps][num_band] */
+static void set_occupations(double *n1,
+                            double *n2,
+                            const long triplet[3],
+                            const double *frequencies,
+                            const long num_band,
+                            const double *temperatures,
+                            const long num_temps,
+                            const double cutoff_frequency)
+{
+  long i, j;
+  double f1, f2;
+
+  for (i = 0; i < num_temps; i++) {
+    for (j = 0; j < num_band; j++) {
+      f1 = frequencies[triplet[1] * num_band + j];
+      f2 = frequencies[triplet[2] * num_band + j];
+      if (f1 > cutoff_frequency) {
+        n1[i * num_band + j] = phonoc_bose_einstein(f1, temperatures[i]);
+      } else {
+        n1[i * num_band + j] = 0;
+      }
+      if (f2 > cutoff_frequency) {
+        n2[i * num_band + j] = phonoc_bose_einstein(f2, temperatures[i]);
+      } else {
+        n2[i * num_band + j] = 0;
+      }
+    }
+  }
+}
+
+/* Without temperatures: */
+/*   jdos[f][0] += (g[2] - g[0]) * weight, jdos[f][1] += g[0] * weight */
+/* With temperatures: */
+/*   jdos[t][f][0] += (n1 - n2) * g[1] * weight */
+/*   jdos[t][f][1] += (n1 + n2 + 1) * g[0] * weight */
+static void add_joint_dos_at_triplet(double *jdos,
+                                     const double *g,
+                                     const char *g_zero,
+                                     const double *n1,
+                                     const double *n2,
+                                     const long triplet_weight,
+                                     const long num_frequency_points,
+                                     const long num_band,
+                                     const long num_temps)
+{
+  long i, j, k, b1, b2, num_g_elems, adrs;
+
+  num_g_elems = num_frequency_points * num_band * num_band;
+
+  for (i = 0; i < num_frequency_points; i++) {
+    for (j = 0; j < num_band * num_band; j++) {
+      adrs = i * num_band * num_band + j;
+      if (g_zero[adrs]) {
+        continue;
+      }
+      if (num_temps > 0) {
+        b1 = j / num_band;
+        b2 = j % num_band;
+        for (k = 0; k < num_temps; k++) {
+          jdos[(k * num_frequency_points + i) * 2] +=
+            (n1[k * num_band + b1] - n2[k * num_band + b2])
+            * g[num_g_elems + adrs] * triplet_weight;
+          jdos[(k * num_frequency_points + i) * 2 + 1] +=
+            (n1[k * num_band + b1] + n2[k * num_band + b2] + 1)
+            * g[adrs] * triplet_weight;
+        }
+      } else {
+        jdos[i * 2] +=
+          (g[2 * num_g_elems + adrs] - g[adrs]) * triplet_weight;
+        jdos[i * 2 + 1] += g[adrs] * triplet_weight;
+      }
+    }
+  }
+}
@@ -79,10 +79,44 @@ void tpl_get_integration_weight(double *iw,
                                 const long tp_type,
                                 const long openmp_per_triplets,
                                 const long openmp_per_bands);
+/* Frequencies at vertices of tetrahedra are sorted and stored to */
+/* compute integration weights at many frequency points by */
+/* tpl_get_integration_weight_at_sorted_freq_vertices. */
+void tpl_get_sorted_freq_vertices(double *sorted_freq_vertices,
+                                  char *vertex_indices,
+                                  double *freq_spans,
+                                  const long relative_grid_address[24][4][3],
+                                  const long (*triplets)[3],
+                                  const long num_triplets,
+                                  const ConstBZGrid *bzgrid,
+                                  const double *frequencies1,
+                                  const long num_band1,
+                                  const double *frequencies2,
+                                  const long num_band2,
+                                  const long tp_type,
+                                  const long openmp_per_triplets,
+                                  const long openmp_per_bands);
+void tpl_get_integration_weight_at_sorted_freq_vertices(
+  double *iw,
+  char *iw_zero,
+  const double *frequency_points,
+  const long num_band0,
+  const double *sorted_freq_vertices,
+  const char *vertex_indices,
+  const double *freq_spans,
+  const long num_triplets,
+  const long num_band1,
+  const long num_band2,
+  const long tp_type,
+  const long openmp_per_triplets,
+  const long openmp_per_bands);
+/* adaptive_sigmas[num_triplets][num_band][num_band][2] or NULL. */
+/* See tpi_get_integration_weight_with_sigma. */
 void tpl_get_integration_weight_with_sigma(double *iw,
                                            char *iw_zero,
                                            const double sigma,
                                            const double sigma_cutoff,
+                                           const double *adaptive_sigmas,
                                            const double *frequency_points,
                                            const long num_band0,
                                            const long (*triplets)[3],
@@ -91,6 +125,40 @@ void tpl_get_integration_weight_with_sigma(double *iw,
                                            const long num_band,
                                            const long tp_type);
 
+/* Joint density of states at grid points. Triplets of i-th grid point */
+/* are triplets[triplets_offsets[i]:triplets_offsets[i + 1]]. */
+/* With num_temps == 0, jdos[num_grid_points][num_frequency_points][2], */
+/* otherwise jdos[num_grid_points][num_temps][num_frequency_points][2] */
+/* weighted by phonon occupation numbers are computed. */
+void tpl_get_joint_dos(double *jdos,
+                       const double *frequency_points,
+                       const long num_frequency_points,
+                       const double *temperatures,
+                       const long num_temps,
+                       const long relative_grid_address[24][4][3],
+                       const long (*triplets)[3],
+                       const long *triplet_weights,
+                       const long *triplets_offsets,
+                       const long num_grid_points,
+                       const ConstBZGrid *bzgrid,
+                       const double *frequencies,
+                       const long num_band,
+                       const double cutoff_frequency);
+void tpl_get_joint_dos_with_sigma(double *jdos,
+                                  const double sigma,
+                                  const double sigma_cutoff,
+                                  const double *frequency_points,
+                                  const long num_frequency_points,
+                                  const double *temperatures,
+                                  const long num_temps,
+                                  const long (*triplets)[3],
+                                  const long *triplet_weights,
+                                  const long *triplets_offsets,
+                                  const long num_grid_points,
+                                  const double *frequencies,
+                                  const long num_band,
+                                  const double cutoff_frequency);
+
 long tpl_is_N(const long triplet[3], const long (*bz_grid_addresses)[3]);
 void tpl_set_relative_grid_address(
   long tp_relative_grid_address[2][24][4][3],
@@ -52,6 +52,12 @@ static long set_g(double g[3],
                   const double f0,
                   const double freq_vertices[3][24][4],
                   const long max_i);
+static long set_g_at_sorted_freq_vertices(double g[3],
+                                          const double f0,
+                                          const double *sorted_freq_vertices,
+                                          const char *vertex_indices,
+                                          const double *freq_spans,
+                                          const long max_i);
 static long in_tetrahedra(const double f0, const double freq_vertices[24][4]);
 static void get_triplet_tetrahedra_vertices(
   long vertices[2][24][4],
@@ -149,6 +155,7 @@ void tpi_get_integration_weight_with_sigma(double *iw,
                                            char *iw_zero,
                                            const double sigma,
                                            const double cutoff,
+                                           const double *adaptive_sigmas,
                                            const double *frequency_points,
                                            const long num_band0,
                                            const long triplet[3],
@@ -160,31 +167,44 @@ void tpi_get_integration_weight_with_sigma(double *iw,
 {
   long j, b12, b1, b2, adrs_shift;
   double f0, f1, f2, g0, g1, g2;
+  double sigma_1, sigma_2, cutoff_1, cutoff_2;
 
-#pragma omp parallel for private(j, b1, b2, f0, f1, f2, g0, g1, g2, adrs_shift) if (openmp_per_bands)
+#pragma omp parallel for private(j, b1, b2, f0, f1, f2, g0, g1, g2, adrs_shift, sigma_1, sigma_2, cutoff_1, cutoff_2) if (openmp_per_bands)
   for (b12 = 0; b12 < num_band * num_band; b12++) {
     b1 = b12 / num_band;
     b2 = b12 % num_band;
     f1 = frequencies[triplet[1] * num_band + b1];
     f2 = frequencies[triplet[2] * num_band + b2];
+    /* sigma_1 for f0 - f1 - f2 and sigma_2 for f0 +- (f1 - f2) */
+    if (adaptive_sigmas == NULL) {
+      sigma_1 = sigma;
+      sigma_2 = sigma;
+      cutoff_1 = cutoff;
+      cutoff_2 = cutoff;
+    } else {
+      sigma_1 = adaptive_sigmas[b12 * 2];
+      sigma_2 = adaptive_sigmas[b12 * 2 + 1];
+      cutoff_1 = cutoff / sigma * sigma_1;
+      cutoff_2 = cutoff / sigma * sigma_2;
+    }
     for (j = 0; j < num_band0; j++) {
       f0 = frequency_points[j];
       adrs_shift = j * num_band * num_band + b1 * num_band + b2;
 
       if ((tp_type == 2) || (tp_type == 3)) {
         if (cutoff > 0 &&
-            fabs(f0 + f1 - f2) > cutoff &&
-            fabs(f0 - f1 + f2) > cutoff &&
-            fabs(f0 - f1 - f2) > cutoff) {
+            fabs(f0 + f1 - f2) > cutoff_2 &&
+            fabs(f0 - f1 + f2) > cutoff_2 &&
+            fabs(f0 - f1 - f2) > cutoff_1) {
           iw_zero[adrs_shift] = 1;
           g0 = 0;
           g1 = 0;
           g2 = 0;
         } else {
           iw_zero[adrs_shift] = 0;
-          g0 = phonoc_gaussian(f0 + f1 - f2, sigma);
-          g1 = phonoc_gaussian(f0 - f1 + f2, sigma);
-          g2 = phonoc_gaussian(f0 - f1 - f2, sigma);
+          g0 = phonoc_gaussian(f0 + f1 - f2, sigma_2);
+          g1 = phonoc_gaussian(f0 - f1 + f2, sigma_2);
+          g2 = phonoc_gaussian(f0 - f1 - f2, sigma_1);
         }
         if (tp_type == 2) {
           iw[adrs_shift] = g2;
@@ -200,19 +220,140 @@ void tpi_get_integration_weight_with_sigma(double *iw,
         }
       }
       if (tp_type == 4) {
-        if (cutoff > 0 && fabs(f0 + f1 - f2) > cutoff) {
+        if (cutoff > 0 && fabs(f0 + f1 - f2) > cutoff_2) {
           iw_zero[adrs_shift] = 1;
           iw[adrs_shift] = 0;
         } else {
           iw_zero[adrs_shift] = 0;
-          iw[adrs_shift] = phonoc_gaussian(f0 + f1 - f2, sigma);
+          iw[adrs_shift] = phonoc_gaussian(f0 + f1 - f2, sigma_2);
+        }
+      }
+    }
+  }
+}
+
+
+/* Frequencies at tetrahedra vertices are sorted and stored for */
+/* the reuse at many frequency points. */
+/* sorted_freq_vertices[num_band1 * num_band2][max_i][24][4] */
+/* vertex_indices[num_band1 * num_band2][max_i][24] */
+/* freq_spans[num_band1 * num_band2][max_i][2] */
+/* max_i = 3 for tp_type = 2 or 3, and max_i = 1 for tp_type = 4. */
+void
+tpi_get_sorted_freq_vertices(double *sorted_freq_vertices,
+                             char *vertex_indices,
+                             double *freq_spans,
+                             const long tp_relative_grid_address[2][24][4][3],
+                             const long triplet[3],
+                             const ConstBZGrid *bzgrid,
+                             const double *frequencies1,
+                             const long num_band1,
+                             const double *frequencies2,
+                             const long num_band2,
+                             const long tp_type,
+                             const long openmp_per_bands)
+{
+  long i, j, b1, b2, b12, max_i, adrs_shift;
+  long vertices[2][24][4];
+  double freq_vertices[3][24][4];
+  double (*sorted)[4];
+
+  get_triplet_tetrahedra_vertices(vertices,
+                                  tp_relative_grid_address,
+                                  triplet,
+                                  bzgrid);
+
+  if (tp_type == 4) {
+    max_i = 1;
+  } else {
+    max_i = 3;
+  }
+
+#pragma omp parallel for private(i, j, b1, b2, adrs_shift, freq_vertices, sorted) if (openmp_per_bands)
+  for (b12 = 0; b12 < num_band1 * num_band2; b12++) {
+    b1 = b12 / num_band2;
+    b2 = b12 % num_band2;
+    set_freq_vertices(freq_vertices, frequencies1, frequencies2,
+                      vertices, num_band1, num_band2, b1, b2, tp_type);
+    for (i = 0; i < max_i; i++) {
+      adrs_shift = b12 * max_i + i;
+      sorted = (double(*)[4])(sorted_freq_vertices + adrs_shift * 96);
+      thm_get_sorted_tetrahedra_omegas(sorted,
+                                       vertex_indices + adrs_shift * 24,
+                                       freq_vertices[i]);
+      freq_spans[adrs_shift * 2] = sorted[0][0];
+      freq_spans[adrs_shift * 2 + 1] = sorted[0][3];
+      for (j = 1; j < 24; j++) {
+        if (freq_spans[adrs_shift * 2] > sorted[j][0]) {
+          freq_spans[adrs_shift * 2] = sorted[j][0];
+        }
+        if (freq_spans[adrs_shift * 2 + 1] < sorted[j][3]) {
+          freq_spans[adrs_shift * 2 + 1] = sorted[j][3];
         }
       }
     }
   }
 }
 
+/* Integration weights are computed from the data prepared by */
+/* tpi_get_sorted_freq_vertices. The results are equivalent to those */
+/* of tpi_get_integration_weight. */
+void
+tpi_get_integration_weight_at_sorted_freq_vertices(
+  double *iw,
+  char *iw_zero,
+  const double *frequency_points,
+  const long num_band0,
+  const double *sorted_freq_vertices,
+  const char *vertex_indices,
+  const double *freq_spans,
+  const long num_band1,
+  const long num_band2,
+  const long num_triplets,
+  const long tp_type,
+  const long openmp_per_bands)
+{
+  long max_i, j, b12, num_band_prod, adrs_shift, vert_shift;
+  double g[3];
+
+  num_band_prod = num_triplets * num_band0 * num_band1 * num_band2;
+
+  if (tp_type == 4) {
+    max_i = 1;
+  } else {
+    max_i = 3;
+  }
 
+#pragma omp parallel for private(j, adrs_shift, vert_shift, g) if (openmp_per_bands)
+  for (b12 = 0; b12 < num_band1 * num_band2; b12++) {
+    vert_shift = b12 * max_i;
+    for (j = 0; j < num_band0; j++) {
+      adrs_shift = j * num_band1 * num_band2 + b12;
+      iw_zero[adrs_shift] = set_g_at_sorted_freq_vertices(
+        g,
+        frequency_points[j],
+        sorted_freq_vertices + vert_shift * 96,
+        vertex_indices + vert_shift * 24,
+        freq_spans + vert_shift * 2,
+        max_i);
+      if (tp_type == 2) {
+        iw[adrs_shift] = g[2];
+        adrs_shift += num_band_prod;
+        iw[adrs_shift] = g[0] - g[1];
+      }
+      if (tp_type == 3) {
+        iw[adrs_shift] = g[2];
+        adrs_shift += num_band_prod;
+        iw[adrs_shift] = g[0] - g[1];
+        adrs_shift += num_band_prod;
+        iw[adrs_shift] = g[0] + g[1] + g[2];
+      }
+      if (tp_type == 4) {
+        iw[adrs_shift] = g[0];
+      }
+    }
+  }
+}
 
 void
 tpi_get_neighboring_grid_points(long *neighboring_grid_points,
@@ -296,6 +437,33 @@ static long set_g(double g[3],
   return iw_zero;
 }
 
+static long set_g_at_sorted_freq_vertices(double g[3],
+                                          const double f0,
+                                          const double *sorted_freq_vertices,
+                                          const char *vertex_indices,
+                                          const double *freq_spans,
+                                          const long max_i)
+{
+  long i, iw_zero;
+
+  iw_zero = 1;
+
+  for (i = 0; i < max_i; i++) {
+    if (freq_spans[i * 2] > f0 || freq_spans[i * 2 + 1] < f0) {
+      g[i] = 0;
+    } else {
+      g[i] = thm_get_integration_weight_at_sorted_omegas(
+        f0,
+        (double(*)[4])(sorted_freq_vertices + i * 96),
+        vertex_indices + i * 24,
+        'I');
+      iw_zero = 0;
+    }
+  }
+
+  return iw_zero;
+}
+
 static long in_tetrahedra(const double f0, const double freq_vertices[24][4])
 {
   long i, j;
@@ -50,10 +50,15 @@ tpi_get_integration_weight(double *iw,
                            const long num_band2,
                            const long tp_type,
                            const long openmp_per_bands);
+/* When adaptive_sigmas[num_band * num_band][2] is given, smearing widths */
+/* of delta(f0 - f1 - f2) and delta(f0 +- (f1 - f2)) of each band pair */
+/* are taken from it, and cutoff is scaled by the ratio of each width to */
+/* sigma. */
 void tpi_get_integration_weight_with_sigma(double *iw,
                                            char *iw_zero,
                                            const double sigma,
                                            const double cutoff,
+                                           const double *adaptive_sigmas,
                                            const double *frequency_points,
                                            const long num_band0,
                                            const long triplet[3],
@@ -63,6 +68,33 @@ void tpi_get_integration_weight_with_sigma(double *iw,
                                            const long tp_type,
                                            const long openmp_per_bands);
 void
+tpi_get_sorted_freq_vertices(double *sorted_freq_vertices,
+                             char *vertex_indices,
+                             double *freq_spans,
+                             const long tp_relative_grid_address[2][24][4][3],
+                             const long triplet[3],
+                             const ConstBZGrid *bzgrid,
+                             const double *frequencies1,
+                             const long num_band1,
+                             const double *frequencies2,
+                             const long num_band2,
+                             const long tp_type,
+                             const long openmp_per_bands);
+void
+tpi_get_integration_weight_at_sorted_freq_vertices(
+  double *iw,
+  char *iw_zero,
+  const double *frequency_points,
+  const long num_band0,
+  const double *sorted_freq_vertices,
+  const char *vertex_indices,
+  const double *freq_spans,
+  const long num_band1,
+  const long num_band2,
+  const long num_triplets,
+  const long tp_type,
+  const long openmp_per_bands);
+void
 tpi_get_neighboring_grid_points(long *neighboring_grid_points,
                                 const long grid_point,
                                 const long (*relative_grid_address)[3],
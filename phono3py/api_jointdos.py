@@ -36,9 +36,9 @@ import numpy as np
 from phonopy.units import VaspToTHz
 from phonopy.structure.symmetry import Symmetry
 from phono3py.phonon3.joint_dos import JointDos
-from phono3py.phonon.grid import BZGrid
+from phono3py.phonon.grid import BZGrid, get_ir_grid_points
 
-from phono3py.file_IO import write_joint_dos
+from phono3py.file_IO import write_joint_dos, write_joint_dos_to_hdf5
 
 
 class Phono3pyJointDos(object):
@@ -96,12 +96,18 @@ class Phono3pyJointDos(object):
             log_level=self._log_level)
 
         self._joint_dos = None
+        self._grid_points = None
 
     @property
     def grid(self):
         return self._bz_grid
 
+    @property
+    def grid_points(self):
+        return self._grid_points
+
     def run(self, grid_points, write_jdos=False):
+        self._grid_points = grid_points
         if self._log_level:
             print("--------------------------------- Joint DOS "
                   "---------------------------------")
@@ -141,6 +147,58 @@ class Phono3pyJointDos(object):
                     if self._log_level:
                         print("JDOS is written into \"%s\"." % filename)
 
+    def run_at_grid_points(self, grid_points=None, write_jdos=False):
+        """Calculate joint-DOS at many grid points in one sweep
+
+        Parameters
+        ----------
+        grid_points : array_like, optional
+            Grid point indices in BZ grid. Default is None, which gives
+            the irreducible grid points.
+        write_jdos : bool, optional
+            With True, joint-DOS at all grid points is written into one
+            hdf5 file for each sigma. Default is False.
+
+        """
+        if grid_points is None:
+            ir_grid_points, _, _ = get_ir_grid_points(self._bz_grid)
+            _grid_points = np.array(self._bz_grid.grg2bzg[ir_grid_points],
+                                    dtype='int_')
+        else:
+            _grid_points = np.array(grid_points, dtype='int_')
+        self._grid_points = _grid_points
+
+        if self._log_level:
+            print("--------------------------------- Joint DOS "
+                  "---------------------------------")
+            print("Sampling mesh: [ %d %d %d ]" % tuple(self._bz_grid.D_diag))
+            print("Number of grid points: %d" % len(_grid_points))
+
+        if not self._sigmas:
+            raise RuntimeError("sigma or tetrahedron method has to be set.")
+
+        for sigma in self._sigmas:
+            if self._log_level:
+                if sigma is None:
+                    print("Tetrahedron method is used.")
+                else:
+                    print("Smearing method with sigma=%s is used." % sigma)
+            self._jdos.set_sigma(sigma)
+            self._jdos.run_at_grid_points(_grid_points)
+
+            if write_jdos:
+                filename = write_joint_dos_to_hdf5(
+                    _grid_points,
+                    self._bz_grid.D_diag,
+                    self._jdos.frequency_points,
+                    self._jdos.joint_dos,
+                    sigma=sigma,
+                    temperatures=self._temperatures,
+                    filename=self._filename,
+                    is_mesh_symmetry=self._is_mesh_symmetry)
+                if self._log_level:
+                    print("JDOS is written into \"%s\"." % filename)
+
     @property
     def dynamical_matrix(self):
         return self._jdos.dynamical_matrix
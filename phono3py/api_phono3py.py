@@ -32,6 +32,7 @@
 # ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
 # POSSIBILITY OF SUCH DAMAGE.
 
+import time
 import warnings
 import numpy as np
 from phonopy.structure.symmetry import Symmetry
@@ -45,7 +46,8 @@ from phonopy.harmonic.force_constants import (
     symmetrize_force_constants,
     symmetrize_compact_force_constants,
     set_translational_invariance,
-    set_permutation_symmetry)
+    set_permutation_symmetry,
+    similarity_transformation)
 from phonopy.harmonic.force_constants import get_fc2 as get_phonopy_fc2
 from phonopy.interface.fc_calculator import get_fc2
 from phonopy.harmonic.displacement import (
@@ -59,7 +61,11 @@ from phono3py.phonon3.real_self_energy import (
 from phono3py.phonon3.spectral_function import run_spectral_function
 from phono3py.phonon3.interaction import Interaction
 from phono3py.phonon3.conductivity_RTA import get_thermal_conductivity_RTA
-from phono3py.phonon3.conductivity_LBTE import get_thermal_conductivity_LBTE
+from phono3py.phonon3.conductivity_LBTE import (
+    get_thermal_conductivity_LBTE, get_thermal_conductivity_at_pinv_cutoffs)
+from phono3py.phonon3.mesh_convergence import (
+    copy_phonons_on_shared_grid_points, get_kappa_relative_change,
+    get_extrapolated_kappa)
 from phono3py.phonon3.displacement_fc3 import (get_third_order_displacements,
                                                direction_to_displacement)
 from phono3py.phonon3.fc3 import (
@@ -954,6 +960,16 @@ class Phono3py(object):
 
         """
 
+        self._init_phph_interaction(
+            nac_q_direction=nac_q_direction,
+            constant_averaged_interaction=constant_averaged_interaction,
+            frequency_scale_factor=frequency_scale_factor)
+
+    def _init_phph_interaction(self,
+                               nac_q_direction=None,
+                               constant_averaged_interaction=None,
+                               frequency_scale_factor=None,
+                               dynamical_matrix=None):
         if self.mesh_numbers is None:
             msg = "Phono3py.mesh_numbers of instance has to be set."
             raise RuntimeError(msg)
@@ -977,7 +993,7 @@ class Phono3py(object):
             symmetrize_fc3q=self._symmetrize_fc3q,
             lapack_zheev_uplo=self._lapack_zheev_uplo)
         self._interaction.set_nac_q_direction(nac_q_direction=nac_q_direction)
-        self._init_dynamical_matrix()
+        self._init_dynamical_matrix(dynamical_matrix=dynamical_matrix)
 
     def set_phph_interaction(self,
                              nac_params=None,
@@ -1423,6 +1439,7 @@ class Phono3py(object):
                              num_frequency_points=None,
                              frequency_points_at_bands=False,
                              scattering_event_class=None,
+                             is_lowmem=False,
                              write_txt=False,
                              write_gamma_detail=False,
                              keep_gamma_detail=False,
@@ -1461,6 +1478,11 @@ class Phono3py(object):
             1 or 2, respectively. The result is stored in gammas. Therefore
             usual gammas are not stored in the variable. Default is None, which
             doesn't specify scattering_event_class.
+        is_lowmem : bool, optional
+            With True, ph-ph interaction strength is not stored but
+            computed together with imaginary part of self-energies triplet
+            by triplet to save memory. This is disabled when detailed gammas
+            are requested. Default is False.
         write_txt : bool, optional
             Frequency points and imaginary part of self-energies are written
             into text files.
@@ -1494,6 +1516,7 @@ class Phono3py(object):
             frequency_points_at_bands=frequency_points_at_bands,
             num_frequency_points=num_frequency_points,
             scattering_event_class=scattering_event_class,
+            is_lowmem=is_lowmem,
             write_gamma_detail=write_gamma_detail,
             return_gamma_detail=keep_gamma_detail,
             output_filename=output_filename,
@@ -1715,6 +1738,11 @@ class Phono3py(object):
             is_full_pp=False,
             pinv_cutoff=1.0e-8,  # for pseudo-inversion of collision matrix
             pinv_solver=0,  # solver of pseudo-inversion of collision matrix
+            is_symmetry_adapted_basis=False,
+            mpi_comm=None,
+            num_processes=None,
+            is_mixed_precision=False,
+            num_relaxons=None,
             write_gamma=False,
             read_gamma=False,
             is_N_U=False,
@@ -1722,17 +1750,128 @@ class Phono3py(object):
             write_gamma_detail=False,
             write_collision=False,
             read_collision=False,
+            use_collision_store=False,
             write_pp=False,
             read_pp=False,
             write_LBTE_solution=False,
+            gamma_interpolation_mesh=None,
+            num_sampled_triplets=None,
+            kappa_target_error=None,
+            random_seed=None,
+            num_collision_kernel_bins=None,
+            adaptive_sigma_scale=None,
             compression="gzip",
             input_filename=None,
             output_filename=None):
+        """Run thermal conductivity calculation
+
+        Parameters
+        ----------
+        is_symmetry_adapted_basis : bool, optional
+            Only for LBTE with ir collision matrix. With True, collision
+            matrix is diagonalized only in the block that couples to group
+            velocities in the basis adapted to site-symmetries of
+            ir-grid-points. Default is False.
+        mpi_comm : mpi4py.MPI.Comm, optional
+            Only for LBTE with ir collision matrix at all grid points. When
+            given, rows of collision matrix are distributed over MPI ranks,
+            and LBTE is solved by conjugate gradient method without
+            diagonalization. Collision eigenvalues are not computed. Reading
+            and writing collision, ph-ph interaction strength, and LBTE
+            solution are not supported. Default is None.
+        num_processes : int, optional
+            Only for LBTE at all grid points. When given, collision matrix
+            rows are computed by this number of spawned processes that
+            write into memory-mapped temporary files. Writing ph-ph
+            interaction strength is not supported. Default is None.
+        is_mixed_precision : bool, optional
+            Only for LBTE with ir collision matrix without MPI. With True,
+            collision matrix is stored in single precision, and LBTE is
+            solved by its eigensolution in single precision refined by
+            residuals in double precision. Writing LBTE solution is not
+            supported. Default is False.
+        num_relaxons : int, optional
+            Only for LBTE with solve_collective_phonon. When given, only
+            this number of relaxons of the smallest non-zero eigenvalues of
+            collision matrix are computed by LOBPCG instead of full
+            diagonalization, and the rest is approximated by diagonal part
+            of collision matrix. Default is None.
+        use_collision_store : bool, optional
+            Only for LBTE. With write_collision and grid_points, collisions
+            at the grid points are appended to a single collision store
+            file per sigma instead of being written into a file per grid
+            point. Collision store is read by read_collision when it exists.
+            Default is False.
+        gamma_interpolation_mesh : array_like, optional
+            Mesh numbers of sub-mesh that divide Phono3py.mesh_numbers.
+            Only for RTA. When given, gamma is computed only at the grid
+            points on the sub-mesh and is interpolated onto the other grid
+            points. Group velocities and heat capacities are computed at all
+            grid points. Default is None.
+        num_sampled_triplets : int, optional
+            Only for RTA. When given, gamma at each grid point is estimated
+            from this number of triplets drawn by importance sampling, and
+            standard errors of gamma and kappa are estimated. Default is
+            None.
+        kappa_target_error : float, optional
+            Only for RTA. When given, kappa is estimated from gamma at
+            importance-sampled ir-grid-points until the relative half width
+            of its 95% confidence interval becomes smaller than this value.
+            Default is None.
+        random_seed : int, optional
+            Only for RTA. Seed of random number generator used with
+            num_sampled_triplets and kappa_target_error. Default is None.
+        num_collision_kernel_bins : int, optional
+            Only for RTA. When given with write_gamma, ph-ph collisions
+            binned on this number times this number frequency bins of phonon
+            pairs are written with gamma. With read_gamma, gamma at
+            temperatures different from those in the files is computed from
+            them without ph-ph interaction calculation. Default is None.
+        adaptive_sigma_scale : float, optional
+            Only for RTA. When given, smearing widths of each triplet and
+            band pair are estimated from group velocities and grid spacing
+            scaled by this factor, and sigmas are used as their lower
+            bounds. This has no effect on tetrahedron method. Default is
+            None.
+
+        """
         if self._interaction is None:
             msg = ("Phono3py.init_phph_interaction has to be called "
                    "before running this method.")
             raise RuntimeError(msg)
 
+        if is_LBTE and gamma_interpolation_mesh is not None:
+            msg = "gamma_interpolation_mesh is not supported by LBTE."
+            raise RuntimeError(msg)
+
+        if is_LBTE and num_sampled_triplets is not None:
+            msg = "num_sampled_triplets is not supported by LBTE."
+            raise RuntimeError(msg)
+
+        if is_LBTE and kappa_target_error is not None:
+            msg = "kappa_target_error is not supported by LBTE."
+            raise RuntimeError(msg)
+
+        if is_LBTE and adaptive_sigma_scale is not None:
+            msg = "adaptive_sigma_scale is not supported by LBTE."
+            raise RuntimeError(msg)
+
+        if not is_LBTE and mpi_comm is not None:
+            msg = "mpi_comm is not supported by RTA."
+            raise RuntimeError(msg)
+
+        if not is_LBTE and num_processes is not None:
+            msg = "num_processes is not supported by RTA."
+            raise RuntimeError(msg)
+
+        if not is_LBTE and is_mixed_precision:
+            msg = "is_mixed_precision is not supported by RTA."
+            raise RuntimeError(msg)
+
+        if not is_LBTE and num_relaxons is not None:
+            msg = "num_relaxons is not supported by RTA."
+            raise RuntimeError(msg)
+
         if is_LBTE:
             if temperatures is None:
                 _temperatures = [300, ]
@@ -1754,7 +1893,13 @@ class Phono3py(object):
                 is_full_pp=is_full_pp,
                 pinv_cutoff=pinv_cutoff,
                 pinv_solver=pinv_solver,
+                is_symmetry_adapted_basis=is_symmetry_adapted_basis,
+                mpi_comm=mpi_comm,
+                num_processes=num_processes,
+                is_mixed_precision=is_mixed_precision,
+                num_relaxons=num_relaxons,
                 write_collision=write_collision,
+                use_collision_store=use_collision_store,
                 read_collision=read_collision,
                 write_kappa=write_kappa,
                 write_pp=write_pp,
@@ -1790,11 +1935,252 @@ class Phono3py(object):
                 write_pp=write_pp,
                 read_pp=read_pp,
                 write_gamma_detail=write_gamma_detail,
+                gamma_interpolation_mesh=gamma_interpolation_mesh,
+                num_sampled_triplets=num_sampled_triplets,
+                kappa_target_error=kappa_target_error,
+                random_seed=random_seed,
+                num_collision_kernel_bins=num_collision_kernel_bins,
+                adaptive_sigma_scale=adaptive_sigma_scale,
                 compression=compression,
                 input_filename=input_filename,
                 output_filename=output_filename,
                 log_level=self._log_level)
 
+    def run_thermal_conductivity_at_pinv_cutoffs(
+            self,
+            pinv_cutoffs,
+            is_reducible_collision_matrix=False,
+            is_kappa_star=True,
+            input_filename=None):
+        """Evaluate LBTE thermal conductivity at pinv cutoffs from files
+
+        kappa-*.hdf5, coleigs-*.hdf5, and unitary-*.hdf5 written by
+        run_thermal_conductivity with is_LBTE, write_kappa, and
+        write_LBTE_solution at Phono3py.mesh_numbers and Phono3py.sigmas are
+        read, and thermal conductivity is evaluated for the cutoffs of
+        eigenvalues in pseudo-inversion of collision matrix without
+        recalculating collision matrix. Eigenvectors are memory-mapped to
+        the file and read only once for all cutoffs. See
+        phono3py.phonon3.conductivity_LBTE.
+        get_thermal_conductivity_at_pinv_cutoffs.
+
+        Parameters
+        ----------
+        pinv_cutoffs : array_like
+            Cutoffs of absolute values of eigenvalues of collision matrix.
+        is_reducible_collision_matrix, is_kappa_star : bool, optional
+            Have to be the same as those used in the kappa calculation.
+        input_filename : str, optional
+            Used in the file names like that of run_thermal_conductivity.
+
+        Returns
+        -------
+        dict
+            'temperature' : ndarray
+                shape=(temperatures, )
+            'kappa' : ndarray
+                shape=(sigmas, pinv_cutoffs, temperatures, 6)
+            'mode_kappa' : ndarray
+                shape=(sigmas, pinv_cutoffs, temperatures, grid_points,
+                       num_band, 6)
+            'mean_free_path' : ndarray
+                shape=(sigmas, pinv_cutoffs, temperatures, grid_points,
+                       num_band, 3)
+            'num_eigenvalues' : ndarray
+                Numbers of eigenvalues included in pseudo-inversion.
+                shape=(sigmas, pinv_cutoffs, temperatures)
+
+        """
+        if is_kappa_star:
+            point_operations = self._primitive_symmetry.reciprocal_operations
+        else:
+            point_operations = [np.eye(3, dtype='int_')]
+        rec_lat = np.linalg.inv(self._primitive.cell)
+        rotations_cartesian = np.array(
+            [similarity_transformation(rec_lat, r)
+             for r in point_operations], dtype='double', order='C')
+
+        results = [
+            get_thermal_conductivity_at_pinv_cutoffs(
+                pinv_cutoffs,
+                self.mesh_numbers,
+                rotations_cartesian,
+                sigma=sigma,
+                sigma_cutoff=self._sigma_cutoff,
+                sigma_index=i,
+                is_reducible_collision_matrix=is_reducible_collision_matrix,
+                filename=input_filename,
+                log_level=self._log_level)
+            for i, sigma in enumerate(self._sigmas)]
+
+        data = {'temperature': results[0]['temperature']}
+        for key in ('kappa', 'mode_kappa', 'mean_free_path',
+                    'num_eigenvalues'):
+            data[key] = np.array([r[key] for r in results],
+                                 dtype=results[0][key].dtype, order='C')
+        return data
+
+    def run_mesh_convergence(self,
+                             meshes,
+                             tolerance=0.01,
+                             is_LBTE=False,
+                             temperatures=None,
+                             is_isotope=False,
+                             mass_variances=None,
+                             boundary_mfp=None,  # in micrometre
+                             is_full_pp=False,
+                             nac_q_direction=None,
+                             write_kappa=False,
+                             compression="gzip",
+                             output_filename=None):
+        """Run thermal conductivity calculations stepping through meshes
+
+        Thermal conductivity is calculated for meshes in the given order
+        until the relative change of kappa from that of the previous mesh
+        becomes smaller than tolerance. fc2, fc3, and the dynamical matrix
+        including the preparation of non-analytical term correction are
+        reused for all meshes. Phonons at the grid points of the previous
+        mesh shared with the next mesh, e.g., all grid points of 10x10x10
+        mesh on 20x20x20 mesh, are reused. Phono3py.mesh_numbers and
+        Phono3py.thermal_conductivity are those of the last mesh after
+        running this method.
+
+        Parameters
+        ----------
+        meshes : array_like
+            Mesh numbers in ascending order of density.
+            shape=(meshes, 3), dtype='int_'
+        tolerance : float, optional
+            Tolerance of relative change of diagonal elements of kappa
+            over sigmas and temperatures. Default is 0.01.
+        Other parameters are given at Phono3py.run_thermal_conductivity
+        and Phono3py.init_phph_interaction.
+
+        Returns
+        -------
+        dict
+            'mesh_numbers' : ndarray
+                Mesh numbers of the meshes calculated.
+                shape=(meshes, 3)
+            'kappa' : ndarray
+                shape=(meshes, sigmas, temperatures, 6)
+            'relative_change' : ndarray
+                Relative change of kappa from the previous mesh. The first
+                element is nan.
+                shape=(meshes, )
+            'time' : ndarray
+                Elapsed time in seconds at each mesh.
+                shape=(meshes, )
+            'peak_memory' : ndarray or None
+                Peak resident set size of the process in MB after
+                calculation at each mesh. None if it is not available on
+                the platform.
+                shape=(meshes, )
+            'num_reused_phonons' : ndarray
+                Numbers of grid points where phonons are reused.
+                shape=(meshes, )
+            'is_converged' : bool
+            'extrapolated_kappa' : ndarray or None
+                kappa extrapolated to infinitely dense mesh. See
+                phono3py.phonon3.mesh_convergence.get_extrapolated_kappa.
+                shape=(sigmas, temperatures, 6)
+
+        """
+        try:
+            import resource
+        except ImportError:
+            resource = None
+
+        _meshes = np.array(meshes, dtype='int_').reshape(-1, 3)
+        mesh_numbers = []
+        kappas = []
+        relative_changes = []
+        times = []
+        peak_memories = []
+        num_reused = []
+        is_converged = False
+        interaction_prev = None
+        for mesh in _meshes:
+            start = time.time()
+            self.mesh_numbers = mesh
+            if interaction_prev is None:
+                self._init_phph_interaction(nac_q_direction=nac_q_direction)
+                num_reused.append(0)
+            else:
+                self._init_phph_interaction(
+                    nac_q_direction=nac_q_direction,
+                    dynamical_matrix=interaction_prev.dynamical_matrix)
+                num_reused.append(copy_phonons_on_shared_grid_points(
+                    interaction_prev, self._interaction))
+            self.run_thermal_conductivity(
+                is_LBTE=is_LBTE,
+                temperatures=temperatures,
+                is_isotope=is_isotope,
+                mass_variances=mass_variances,
+                boundary_mfp=boundary_mfp,
+                is_full_pp=is_full_pp,
+                write_kappa=write_kappa,
+                compression=compression,
+                output_filename=output_filename)
+            times.append(time.time() - start)
+            if resource is not None:
+                # ru_maxrss is in kB on Linux.
+                peak_memories.append(resource.getrusage(
+                    resource.RUSAGE_SELF).ru_maxrss / 1024.0)
+
+            mesh_numbers.append(mesh)
+            kappas.append(self._thermal_conductivity.kappa.copy())
+            if len(kappas) > 1:
+                relative_changes.append(
+                    get_kappa_relative_change(kappas[-1], kappas[-2]))
+            else:
+                relative_changes.append(np.nan)
+
+            if self._log_level:
+                print("-" * 26 + " Mesh convergence " + "-" * 26)
+                print("Mesh: %s, time: %.1f s, reused phonons at %d grid "
+                      "points" % ("x".join(["%d" % m for m in mesh]),
+                                  times[-1], num_reused[-1]))
+                if peak_memories:
+                    print("Peak memory: %.1f MB" % peak_memories[-1])
+                if len(kappas) > 1:
+                    print("Relative change of kappa: %.4f" %
+                          relative_changes[-1])
+
+            interaction_prev = self._interaction
+            if len(kappas) > 1 and relative_changes[-1] < tolerance:
+                is_converged = True
+                break
+
+        mesh_numbers = np.array(mesh_numbers, dtype='int_')
+        extrapolated_kappa = get_extrapolated_kappa(mesh_numbers, kappas)
+        if self._log_level:
+            if is_converged:
+                print("kappa converged within tolerance %s at mesh %s." %
+                      (tolerance, mesh_numbers[-1]))
+            else:
+                print("kappa did not converge within tolerance %s." %
+                      tolerance)
+            if extrapolated_kappa is not None:
+                print("Extrapolated kappa (xx, yy, zz, yz, xz, xy):")
+                for kappa_at_sigma in extrapolated_kappa:
+                    for v in kappa_at_sigma:
+                        print(("%10.3f " * 6) % tuple(v))
+
+        if peak_memories:
+            _peak_memories = np.array(peak_memories, dtype='double')
+        else:
+            _peak_memories = None
+
+        return {'mesh_numbers': mesh_numbers,
+                'kappa': np.array(kappas, dtype='double', order='C'),
+                'relative_change': np.array(relative_changes, dtype='double'),
+                'time': np.array(times, dtype='double'),
+                'peak_memory': _peak_memories,
+                'num_reused_phonons': np.array(num_reused, dtype='int_'),
+                'is_converged': is_converged,
+                'extrapolated_kappa': extrapolated_kappa}
+
     def save(self,
              filename="phono3py_params.yaml",
              settings=None):
@@ -1987,11 +2373,12 @@ class Phono3py(object):
                                primitive_symmetry=self._primitive_symmetry,
                                is_dense_gp_map=self._is_dense_gp_map)
 
-    def _init_dynamical_matrix(self):
+    def _init_dynamical_matrix(self, dynamical_matrix=None):
         if self._interaction is not None:
             self._interaction.init_dynamical_matrix(
                 self._fc2,
                 self._phonon_supercell,
                 self._phonon_primitive,
                 nac_params=self._nac_params,
-                solve_dynamical_matrices=False)
+                solve_dynamical_matrices=False,
+                dynamical_matrix=dynamical_matrix)
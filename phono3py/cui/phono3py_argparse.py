@@ -236,6 +236,15 @@ def get_parser(fc_symmetry=False,
     parser.add_argument(
         "--mesh", nargs='+', dest="mesh_numbers", default=None,
         help="Mesh numbers")
+    parser.add_argument(
+        "--mesh-convergence", nargs='+', dest="mesh_convergence",
+        default=None,
+        help=("Mesh numbers of meshes stepped through until kappa converges "
+              "(three integers per mesh)"))
+    parser.add_argument(
+        "--mesh-convergence-tolerance", dest="mesh_convergence_tolerance",
+        type=float, default=None,
+        help="Tolerance of relative change of kappa in mesh convergence")
     parser.add_argument(
         "--mv", "--mass-variances", nargs='+', dest="mass_variances",
         default=None,
@@ -281,6 +290,10 @@ def get_parser(fc_symmetry=False,
         default=None,
         help=("Number of frequency points in a batch for the frequency "
               "sampling modes of imag-self-energy calculation"))
+    parser.add_argument(
+        "--num-relaxons", dest="num_relaxons", type=int, default=None,
+        help=("Number of relaxons of the smallest eigenvalues computed "
+              "with --cph instead of full diagonalization"))
     if not load_phono3py_yaml:
         parser.add_argument(
             "-o", dest="output_filename", default=None,
@@ -401,6 +414,11 @@ def get_parser(fc_symmetry=False,
         "--write-collision", dest="write_collision", action="store_true",
         default=False,
         help="Write collision matrix and Gammas to files")
+    parser.add_argument(
+        "--collision-store", dest="use_collision_store",
+        action="store_true", default=False,
+        help=("Append collisions at grid points to a single collision "
+              "store file with --write-collision"))
     parser.add_argument(
         "--write-gamma", dest="write_gamma", action="store_true",
         default=False,
@@ -1166,6 +1166,22 @@ def main(**argparse_control):
     ####################################
     # Run lattice thermal conductivity #
     ####################################
+    elif ((run_mode == "conductivity-RTA" or
+           run_mode == "conductivity-LBTE") and
+          settings.mesh_convergence is not None):
+        phono3py.run_mesh_convergence(
+            settings.mesh_convergence,
+            tolerance=settings.mesh_convergence_tolerance,
+            is_LBTE=settings.is_lbte,
+            temperatures=updated_settings['temperatures'],
+            is_isotope=settings.is_isotope,
+            mass_variances=settings.mass_variances,
+            boundary_mfp=settings.boundary_mfp,
+            is_full_pp=settings.is_full_pp,
+            nac_q_direction=settings.nac_q_direction,
+            write_kappa=True,
+            compression=settings.hdf5_compression,
+            output_filename=output_filename)
     elif run_mode == "conductivity-RTA" or run_mode == "conductivity-LBTE":
         grid_points = settings_to_grid_points(settings, phono3py.grid)
         phono3py.run_thermal_conductivity(
@@ -1176,6 +1192,7 @@ def main(**argparse_control):
             grid_points=grid_points,
             boundary_mfp=settings.boundary_mfp,
             solve_collective_phonon=settings.solve_collective_phonon,
+            num_relaxons=settings.num_relaxons,
             use_ave_pp=settings.use_ave_pp,
             gamma_unit_conversion=settings.gamma_conversion_factor,
             is_reducible_collision_matrix=settings.is_reducible_collision_matrix,
@@ -1191,6 +1208,7 @@ def main(**argparse_control):
             write_gamma_detail=settings.write_gamma_detail,
             write_collision=settings.write_collision,
             read_collision=settings.read_collision,
+            use_collision_store=settings.use_collision_store,
             write_pp=settings.write_pp,
             read_pp=settings.read_pp,
             write_LBTE_solution=settings.write_LBTE_solution,
@@ -71,7 +71,10 @@ class Phono3pySettings(Settings):
         'lapack_zheev_uplo': 'L',
         'mass_variances': None,
         'max_freepath': None,
+        'mesh_convergence': None,
+        'mesh_convergence_tolerance': 0.01,
         'num_points_in_batch': None,
+        'num_relaxons': None,
         'read_collision': None,
         'read_fc2': False,
         'read_fc3': False,
@@ -87,6 +90,7 @@ class Phono3pySettings(Settings):
         'solve_collective_phonon': False,
         'subtract_forces': None,
         'use_ave_pp': False,
+        'use_collision_store': False,
         'write_collision': False,
         'write_gamma_detail': False,
         'write_gamma': False,
@@ -194,9 +198,18 @@ class Phono3pySettings(Settings):
     def set_max_freepath(self, val):
         self._v['max_freepath'] = val
 
+    def set_mesh_convergence(self, val):
+        self._v['mesh_convergence'] = val
+
+    def set_mesh_convergence_tolerance(self, val):
+        self._v['mesh_convergence_tolerance'] = val
+
     def set_num_points_in_batch(self, val):
         self._v['num_points_in_batch'] = val
 
+    def set_num_relaxons(self, val):
+        self._v['num_relaxons'] = val
+
     def set_phonon_supercell_matrix(self, val):
         self._v['phonon_supercell_matrix'] = val
 
@@ -242,6 +255,9 @@ class Phono3pySettings(Settings):
     def set_use_ave_pp(self, val):
         self._v['use_ave_pp'] = val
 
+    def set_use_collision_store(self, val):
+        self._v['use_collision_store'] = val
+
     def set_write_collision(self, val):
         self._v['write_collision'] = val
 
@@ -421,11 +437,25 @@ class Phono3pyConfParser(ConfParser):
             if self._args.max_freepath is not None:
                 self._confs['max_freepath'] = self._args.max_freepath
 
+        if 'mesh_convergence' in self._args:
+            meshes = self._args.mesh_convergence
+            if meshes is not None:
+                self._confs['mesh_convergence'] = " ".join(meshes)
+
+        if 'mesh_convergence_tolerance' in self._args:
+            tol = self._args.mesh_convergence_tolerance
+            if tol is not None:
+                self._confs['mesh_convergence_tolerance'] = tol
+
         if 'num_points_in_batch' in self._args:
             num_points_in_batch = self._args.num_points_in_batch
             if num_points_in_batch is not None:
                 self._confs['num_points_in_batch'] = num_points_in_batch
 
+        if 'num_relaxons' in self._args:
+            if self._args.num_relaxons is not None:
+                self._confs['num_relaxons'] = self._args.num_relaxons
+
         if 'pinv_cutoff' in self._args:
             if self._args.pinv_cutoff is not None:
                 self._confs['pinv_cutoff'] = self._args.pinv_cutoff
@@ -497,6 +527,10 @@ class Phono3pyConfParser(ConfParser):
             if self._args.write_collision:
                 self._confs['write_collision'] = '.true.'
 
+        if 'use_collision_store' in self._args:
+            if self._args.use_collision_store:
+                self._confs['collision_store'] = '.true.'
+
         if 'write_phonon' in self._args:
             if self._args.write_phonon:
                 self._confs['write_phonon'] = '.true.'
@@ -518,6 +552,7 @@ class Phono3pyConfParser(ConfParser):
             if conf_key in (
                     'read_fc2', 'read_fc3', 'read_gamma', 'read_phonon',
                     'read_pp', 'use_ave_pp', 'collective_phonon',
+                    'collision_store',
                     'write_gamma_detail', 'write_gamma',
                     'write_collision', 'write_phonon', 'write_pp',
                     'write_LBTE_solution', 'full_pp', 'ion_clamped',
@@ -535,12 +570,14 @@ class Phono3pyConfParser(ConfParser):
             if conf_key in (
                     'boundary_mfp', 'cutoff_fc3_distance',
                     'cutoff_pair_distance', 'gamma_conversion_factor',
-                    'max_freepath', 'pinv_cutoff', 'pp_conversion_factor',
+                    'max_freepath', 'mesh_convergence_tolerance',
+                    'pinv_cutoff', 'pp_conversion_factor',
                     'sigma_cutoff_width'):
                 self.set_parameter(conf_key, float(confs[conf_key]))
 
             # int
-            if conf_key in ('pinv_solver', 'num_points_in_batch'):
+            if conf_key in ('pinv_solver', 'num_points_in_batch',
+                            'num_relaxons'):
                 self.set_parameter(conf_key, int(confs[conf_key]))
 
             # specials
@@ -591,6 +628,16 @@ class Phono3pyConfParser(ConfParser):
                 self.set_parameter('lapack_zheev_uplo',
                                    confs['lapack_zheev_uplo'].upper())
 
+            if conf_key == 'mesh_convergence':
+                vals = [int(x) for x in
+                        confs['mesh_convergence'].replace(',', ' ').split()]
+                if len(vals) % 3 == 0 and len(vals) > 0:
+                    self.set_parameter('mesh_convergence',
+                                       np.reshape(vals, (-1, 3)))
+                else:
+                    self.setting_error(
+                        "Meshes of mesh convergence are incorrectly set.")
+
             if conf_key == 'mass_variances':
                 vals = [fracval(x) for x in confs['mass_variances'].split()]
                 if len(vals) < 1:
@@ -719,6 +766,10 @@ class Phono3pyConfParser(ConfParser):
             self._settings.set_num_points_in_batch(
                 params['num_points_in_batch'])
 
+        # Number of relaxons computed with collective phonon solution
+        if 'num_relaxons' in params:
+            self._settings.set_num_relaxons(params['num_relaxons'])
+
         # Calculate Normal and Umklapp processes
         if 'N_U' in params:
             self._settings.set_is_N_U(params['N_U'])
@@ -748,6 +799,15 @@ class Phono3pyConfParser(ConfParser):
         if 'max_freepath' in params:
             self._settings.set_max_freepath(params['max_freepath'])
 
+        # Meshes stepped through in mesh convergence of kappa
+        if 'mesh_convergence' in params:
+            self._settings.set_mesh_convergence(params['mesh_convergence'])
+
+        # Tolerance of relative change of kappa in mesh convergence
+        if 'mesh_convergence_tolerance' in params:
+            self._settings.set_mesh_convergence_tolerance(
+                params['mesh_convergence_tolerance'])
+
         # Cutoff frequency for pseudo inversion of collision matrix
         if 'pinv_cutoff' in params:
             self._settings.set_pinv_cutoff(params['pinv_cutoff'])
@@ -827,6 +887,10 @@ class Phono3pyConfParser(ConfParser):
         if 'write_collision' in params:
             self._settings.set_write_collision(params['write_collision'])
 
+        # Append collisions at grid points to collision store
+        if 'collision_store' in params:
+            self._settings.set_use_collision_store(params['collision_store'])
+
         # Write all phonons on grid points to hdf5
         if 'write_phonon' in params:
             self._settings.set_write_phonon(params['write_phonon'])
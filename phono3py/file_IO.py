@@ -33,6 +33,8 @@
 # POSSIBILITY OF SUCH DAMAGE.
 
 import os
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 import h5py
 
@@ -480,6 +482,47 @@ def _write_joint_dos_at_t(grid_point,
         return jdos_filename
 
 
+def write_joint_dos_to_hdf5(grid_points,
+                            mesh,
+                            frequency_points,
+                            jdos,
+                            sigma=None,
+                            temperatures=None,
+                            filename=None,
+                            is_mesh_symmetry=True):
+    """Write joint-DOS at grid points in hdf5
+
+    jdos : ndarray
+        Joint-DOS at grid points.
+
+        With temperatures:
+            shape=(grid_points, temperatures, frequency_points, 2),
+        otherwise:
+            shape=(grid_points, frequency_points, 2),
+        dtype='double', order='C'
+
+    """
+    suffix = _get_filename_suffix(mesh, sigma=sigma)
+    full_filename = "jdos" + suffix
+    if not is_mesh_symmetry:
+        full_filename += ".nosym"
+    if filename is not None:
+        full_filename += ".%s" % filename
+    full_filename += ".hdf5"
+
+    with h5py.File(full_filename, 'w') as w:
+        w.create_dataset('grid_point', data=grid_points)
+        w.create_dataset('mesh', data=mesh)
+        w.create_dataset('frequency_points', data=frequency_points)
+        w.create_dataset('joint_dos', data=jdos, compression="gzip")
+        if temperatures is not None:
+            w.create_dataset('temperature', data=temperatures)
+        if sigma is not None:
+            w.create_dataset('sigma', data=sigma)
+
+    return full_filename
+
+
 def write_real_self_energy_at_grid_point(gp,
                                          band_indices,
                                          frequency_points,
@@ -685,6 +728,198 @@ def write_collision_to_hdf5(temperature,
     return full_filename
 
 
+def write_collision_to_store(temperature,
+                             mesh,
+                             gamma,
+                             collision_matrix,
+                             grid_point,
+                             band_indices,
+                             gamma_isotope=None,
+                             sigma=None,
+                             sigma_cutoff=None,
+                             compression=None,
+                             filename=None):
+    """Append collisions at a grid point to collision store
+
+    Collision store is a single hdf5 file per sigma that replaces
+    collision files of grid points and bands. Collisions at each band are
+    appended as a row of resizable chunked datasets, and the rows are
+    indexed by 'grid_point' and 'band_index' datasets. Concurrent writers
+    of different grid points are serialized by a lock file, which requires
+    flock support of the file system.
+
+    Parameters
+    ----------
+    gamma : ndarray
+        shape=(temperatures, bands), dtype='double'
+    collision_matrix : ndarray
+        shape=(temperatures, bands, ...), dtype='double'
+    band_indices : array_like
+        Band indices of the second dimension of gamma and collision
+        matrix.
+    gamma_isotope : ndarray, optional
+        shape=(bands, ), dtype='double'
+
+    """
+    suffix = _get_filename_suffix(mesh,
+                                  sigma=sigma,
+                                  sigma_cutoff=sigma_cutoff,
+                                  filename=filename)
+    full_filename = "collision_store" + suffix + ".hdf5"
+    rows = {'collision_matrix': np.moveaxis(collision_matrix, 1, 0),
+            'gamma': np.transpose(gamma),
+            'grid_point': np.full(len(band_indices), grid_point,
+                                  dtype='int_'),
+            'band_index': np.array(band_indices, dtype='int_') + 1}
+    if gamma_isotope is not None:
+        rows['gamma_isotope'] = gamma_isotope
+
+    with _lock_file(full_filename + ".lock"):
+        with h5py.File(full_filename, 'a') as w:
+            if 'temperature' in w:
+                if not np.allclose(w['temperature'][:], temperature):
+                    raise RuntimeError(
+                        "Temperatures are inconsistent with those in "
+                        "\"%s\"." % full_filename)
+            else:
+                w.create_dataset('temperature', data=temperature)
+                if sigma is not None:
+                    w.create_dataset('sigma', data=sigma)
+                if sigma_cutoff is not None:
+                    w.create_dataset('sigma_cutoff_width', data=sigma_cutoff)
+                for key, row in rows.items():
+                    # Collision matrix is chunked by band and temperature.
+                    if key == 'collision_matrix':
+                        chunks = (1, 1) + row.shape[2:]
+                    else:
+                        chunks = (256, ) + row.shape[1:]
+                    w.create_dataset(key,
+                                     shape=((0, ) + row.shape[1:]),
+                                     maxshape=((None, ) + row.shape[1:]),
+                                     chunks=chunks,
+                                     dtype=row.dtype,
+                                     compression=compression)
+            num_rows = len(w['grid_point'])
+            for key, row in rows.items():
+                w[key].resize(num_rows + len(row), axis=0)
+                w[key][num_rows:] = row
+
+    print("Collisions at grid point %d were appended to \"%s\"." %
+          (grid_point, full_filename))
+
+    return full_filename
+
+
+def read_collision_from_store(mesh,
+                              grid_point_rows,
+                              num_rows,
+                              indices='all',
+                              sigma=None,
+                              sigma_cutoff=None,
+                              filename=None,
+                              verbose=True):
+    """Read collisions from collision store
+
+    Rows of the store are read in slabs of contiguous rows and are put
+    into the collision matrix.
+
+    Parameters
+    ----------
+    grid_point_rows : ndarray
+        Indices of grid points of BZ grid in the first grid point
+        dimension of collision matrix. Rows of grid points with -1 are not
+        read. shape=(BZ grid points, ), dtype='int_'
+    num_rows : int
+        Number of grid points in the first grid point dimension of
+        collision matrix.
+    indices : str or array_like, optional
+        Indices of temperatures to be read. Default is 'all'.
+
+    Returns
+    -------
+    tuple or None
+        Collision matrix, gamma, and temperatures. Collision matrix has the
+        same shape as that of read_collision_from_hdf5 for all grid points.
+        None is returned when the store does not exist or collisions at
+        some of the grid points are missing.
+
+    """
+    suffix = _get_filename_suffix(mesh,
+                                  sigma=sigma,
+                                  sigma_cutoff=sigma_cutoff,
+                                  filename=filename)
+    full_filename = "collision_store" + suffix + ".hdf5"
+    if not os.path.exists(full_filename):
+        if verbose:
+            print("%s not found." % full_filename)
+        return None
+
+    with h5py.File(full_filename, 'r') as f:
+        if indices == 'all':
+            temp_indices = slice(None)
+        else:
+            temp_indices = list(indices)
+        temperatures = np.array(f['temperature'][temp_indices],
+                                dtype='double')
+        dset = f['collision_matrix']
+        grid_points = f['grid_point'][:]
+        band_indices = f['band_index'][:] - 1
+        row_shape = (len(temperatures), ) + dset.shape[2:]
+        if len(row_shape) == 5:  # (T, 3, irgp, b, 3)
+            num_band = row_shape[3]
+        else:  # (T, gp, b) for reducible collision matrix
+            num_band = row_shape[2]
+        collision_matrix = np.zeros(
+            (1, len(temperatures), num_rows, num_band) + row_shape[1:],
+            dtype='double', order='C')
+        gamma = np.zeros((1, len(temperatures), num_rows, num_band),
+                         dtype='double', order='C')
+        is_read = np.zeros((num_rows, num_band), dtype='bool')
+
+        slab = max(1, (1 << 25) // max(1, np.prod(dset.shape[1:])))
+        for start in range(0, len(grid_points), slab):
+            end = min(start + slab, len(grid_points))
+            colmat_rows = dset[start:end]
+            gamma_rows = f['gamma'][start:end]
+            for k in range(end - start):
+                i = grid_point_rows[grid_points[start + k]]
+                if i < 0:
+                    continue
+                j = band_indices[start + k]
+                collision_matrix[0, :, i, j] = colmat_rows[k][temp_indices]
+                gamma[0, :, i, j] = gamma_rows[k][temp_indices]
+                is_read[i, j] = True
+
+    rows = np.unique(grid_point_rows[grid_point_rows > -1])
+    if not is_read[rows].all():
+        if verbose:
+            print("Collisions at some grid points are missing in \"%s\"." %
+                  full_filename)
+        return None
+
+    if verbose:
+        print("Collisions were read from \"%s\"." % full_filename)
+
+    return collision_matrix, gamma, temperatures
+
+
+@contextmanager
+def _lock_file(filename):
+    """Exclusive lock by flock of a lock file"""
+    try:
+        import fcntl
+    except ImportError:
+        yield
+        return
+
+    with open(filename, 'w') as w:
+        fcntl.flock(w, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(w, fcntl.LOCK_UN)
+
+
 def write_full_collision_matrix(collision_matrix, filename='fcm.hdf5'):
     with h5py.File(filename, 'w') as w:
         w.create_dataset('collision_matrix', data=collision_matrix)
@@ -785,6 +1020,8 @@ def write_kappa_to_hdf5(temperature,
                         sigma=None,
                         sigma_cutoff=None,
                         kappa_unit_conversion=None,
+                        collision_kernel=None,
+                        collision_kernel_frequency_bins=None,
                         compression="gzip",
                         filename=None,
                         verbose=True):
@@ -844,6 +1081,11 @@ def write_kappa_to_hdf5(temperature,
         if averaged_pp_interaction is not None:
             w.create_dataset('ave_pp', data=averaged_pp_interaction,
                              compression=compression)
+        if collision_kernel is not None:
+            w.create_dataset('collision_kernel', data=collision_kernel,
+                             compression=compression)
+            w.create_dataset('collision_kernel_frequency_bins',
+                             data=collision_kernel_frequency_bins)
         if qpoint is not None:
             w.create_dataset('qpoint', data=qpoint,
                              compression=compression)
@@ -920,10 +1162,13 @@ def read_gamma_from_hdf5(mesh,
 
     with h5py.File(full_filename, 'r') as f:
         read_data['gamma'] = f['gamma'][:]
-        for key in ('gamma_isotope',
+        for key in ('temperature',
+                    'gamma_isotope',
                     'ave_pp',
                     'gamma_N',
-                    'gamma_U'):
+                    'gamma_U',
+                    'collision_kernel',
+                    'collision_kernel_frequency_bins'):
             if key in f.keys():
                 if len(f[key].shape) > 0:
                     read_data[key] = f[key][:]
@@ -935,6 +1180,149 @@ def read_gamma_from_hdf5(mesh,
     return read_data
 
 
+def read_kappa_from_hdf5(mesh,
+                         sigma=None,
+                         sigma_cutoff=None,
+                         filename=None,
+                         keys=None,
+                         verbose=True):
+    """Read data sets in kappa-*.hdf5 written after kappa calculation
+
+    Only the data sets of ``keys`` are read when ``keys`` is given, and
+    those not found in the file are skipped. Otherwise all data sets are
+    read.
+
+    """
+    suffix = _get_filename_suffix(mesh,
+                                  sigma=sigma,
+                                  sigma_cutoff=sigma_cutoff,
+                                  filename=filename)
+    full_filename = "kappa" + suffix + ".hdf5"
+    if not os.path.exists(full_filename):
+        if verbose:
+            print("%s not found." % full_filename)
+        return None
+
+    read_data = {}
+
+    with h5py.File(full_filename, 'r') as f:
+        if keys is None:
+            _keys = list(f.keys())
+        else:
+            _keys = [key for key in keys if key in f.keys()]
+        for key in _keys:
+            if len(f[key].shape) > 0:
+                read_data[key] = f[key][:]
+            else:
+                read_data[key] = f[key][()]
+        if verbose:
+            print("Read data from %s." % full_filename)
+
+    return read_data
+
+
+def read_unitary_matrix_from_hdf5(mesh,
+                                  sigma=None,
+                                  sigma_cutoff=None,
+                                  sigma_index=None,
+                                  filename=None,
+                                  verbose=True):
+    """Read eigenvectors of collision matrices in unitary-*.hdf5
+
+    Eigenvectors are memory-mapped to the file unless the data set is
+    chunked or compressed, in which case they are read into memory.
+
+    Files written by older versions store the eigenvectors of all sigmas
+    with the leading sigma axis. For these files, those at sigma_index
+    are returned.
+
+    Parameters
+    ----------
+    sigma_index : int, optional
+        Index of sigma in the sigmas of the calculation. This is necessary
+        only for the files having the leading sigma axis and more than one
+        sigma. Default is None.
+
+    Returns
+    -------
+    tuple
+        (unitary_matrix, solver, temperature). None if the file is not
+        found.
+
+    """
+    suffix = _get_filename_suffix(mesh,
+                                  sigma=sigma,
+                                  sigma_cutoff=sigma_cutoff,
+                                  filename=filename)
+    full_filename = "unitary" + suffix + ".hdf5"
+    if not os.path.exists(full_filename):
+        if verbose:
+            print("%s not found." % full_filename)
+        return None
+
+    with h5py.File(full_filename, 'r') as f:
+        dset = f['unitary_matrix']
+        offset = dset.id.get_offset()
+        if dset.chunks is None and offset is not None:
+            unitary_matrix = np.memmap(full_filename,
+                                       dtype=dset.dtype,
+                                       mode='r',
+                                       offset=offset,
+                                       shape=dset.shape)
+        else:
+            unitary_matrix = dset[:]
+        solver = f['solver'][()]
+        temperature = f['temperature'][:]
+
+    # Collision matrix of each sigma has odd number of dimensions,
+    # (temp, gp, band, gp, band) or (temp, gp, band, 3, gp, band, 3).
+    if unitary_matrix.ndim % 2 == 0:
+        if sigma_index is None:
+            if unitary_matrix.shape[0] > 1:
+                raise RuntimeError(
+                    "sigma_index has to be specified to read %s."
+                    % full_filename)
+            sigma_index = 0
+        unitary_matrix = unitary_matrix[sigma_index]
+    if verbose:
+        print("Read data from %s." % full_filename)
+
+    return unitary_matrix, solver, temperature
+
+
+def read_collision_eigenvalues_from_hdf5(mesh,
+                                         sigma=None,
+                                         sigma_cutoff=None,
+                                         filename=None,
+                                         verbose=True):
+    """Read eigenvalues of collision matrices in coleigs-*.hdf5
+
+    Returns
+    -------
+    tuple
+        (collision_eigenvalues, temperature). None if the file is not
+        found.
+
+    """
+    suffix = _get_filename_suffix(mesh,
+                                  sigma=sigma,
+                                  sigma_cutoff=sigma_cutoff,
+                                  filename=filename)
+    full_filename = "coleigs" + suffix + ".hdf5"
+    if not os.path.exists(full_filename):
+        if verbose:
+            print("%s not found." % full_filename)
+        return None
+
+    with h5py.File(full_filename, 'r') as f:
+        collision_eigenvalues = f['collision_eigenvalues'][:]
+        temperature = f['temperature'][:]
+        if verbose:
+            print("Read data from %s." % full_filename)
+
+    return collision_eigenvalues, temperature
+
+
 def read_collision_from_hdf5(mesh,
                              indices=None,
                              grid_point=None,
@@ -1005,6 +1393,119 @@ def read_collision_from_hdf5(mesh,
     return None
 
 
+def read_collision_into_arrays(collision_matrix,
+                               gamma,
+                               selection,
+                               mesh,
+                               indices='all',
+                               grid_point=None,
+                               band_index=None,
+                               sigma=None,
+                               sigma_cutoff=None,
+                               filename=None):
+    """Read collisions from hdf5 file directly into slices of arrays
+
+    Datasets are read by h5py's read_direct without intermediate arrays.
+
+    Parameters
+    ----------
+    collision_matrix : ndarray
+        Collision matrix to be filled. C-contiguous.
+    gamma : ndarray
+        Gamma to be filled. C-contiguous.
+    selection : tuple
+        Index of collision_matrix and gamma to be filled, e.g.,
+        np.s_[0, :, i] for i-th grid point.
+
+    Returns
+    -------
+    ndarray or None
+        Temperatures. None is returned when the file does not exist.
+
+    """
+    if band_index is None:
+        band_indices = None
+    else:
+        band_indices = [band_index]
+    suffix = _get_filename_suffix(mesh,
+                                  grid_point=grid_point,
+                                  band_indices=band_indices,
+                                  sigma=sigma,
+                                  sigma_cutoff=sigma_cutoff,
+                                  filename=filename)
+    full_filename = "collision" + suffix + ".hdf5"
+    if not os.path.exists(full_filename):
+        return None
+
+    if indices == 'all':
+        temp_indices = np.s_[:]
+    else:
+        temp_indices = np.s_[list(indices)]
+
+    with h5py.File(full_filename, 'r') as f:
+        f['collision_matrix'].read_direct(collision_matrix,
+                                          source_sel=temp_indices,
+                                          dest_sel=selection)
+        f['gamma'].read_direct(gamma,
+                               source_sel=temp_indices,
+                               dest_sel=selection)
+        return np.array(f['temperature'][temp_indices], dtype='double')
+
+
+class FilePrefetcher(object):
+    """Read files ahead by thread pool
+
+    When the result of the i-th call is requested, the following calls
+    up to num_ahead are submitted to thread pool, so that files are read
+    while the result is processed. h5py serializes calls to HDF5
+    library, but reading overlaps computations of the caller that release
+    the GIL, e.g., those in C extension. Results of calls outside the
+    window are discarded.
+
+    """
+
+    def __init__(self,
+                 read_function,
+                 kwargs_list,
+                 num_threads=4,
+                 num_ahead=8):
+        """Init method.
+
+        Parameters
+        ----------
+        read_function : callable
+            Function called with keyword arguments.
+        kwargs_list : list of dict
+            Keyword arguments of read_function of the calls.
+
+        """
+        self._read_function = read_function
+        self._kwargs_list = kwargs_list
+        self._num_ahead = num_ahead
+        self._executor = ThreadPoolExecutor(max_workers=num_threads)
+        self._futures = {}
+
+    def get(self, i):
+        """Return result of the i-th call"""
+        window = range(i, min(i + self._num_ahead + 1,
+                              len(self._kwargs_list)))
+        for k in list(self._futures):
+            if k not in window:
+                self._futures.pop(k).cancel()
+        for k in window:
+            if k not in self._futures:
+                self._futures[k] = self._executor.submit(
+                    self._read_function, **self._kwargs_list[k])
+        return self._futures.pop(i).result()
+
+    def shutdown(self):
+        """Discard results and stop threads"""
+        for future in self._futures.values():
+            future.cancel()
+        self._futures = {}
+        self._executor.shutdown(wait=True)
+
+
 def write_pp_to_hdf5(mesh,
                      pp=None,
                      g_zero=None,
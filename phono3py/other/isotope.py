@@ -121,6 +121,53 @@ class Isotope(object):
     def run(self):
         self._run_c()
 
+    def run_all(self, grid_points, sigmas=None):
+        """Compute isotope scattering rates at many grid points at once
+
+        Scattering rates at all grid points are computed for all sigmas
+        in one C function call per summation scheme. Phonons set by
+        set_phonons, e.g., those of Interaction, are reused.
+
+        Parameters
+        ----------
+        grid_points : array_like
+            BZ grid point indices.
+            shape=(grid_points, ), dtype='int_'
+        sigmas : list, optional
+            Sigma values where None means the tetrahedron method. When
+            this is given, gamma is stored with
+            shape=(sigmas, grid_points, band_indices), otherwise
+            shape=(grid_points, band_indices) with the current sigma.
+
+        """
+        if sigmas is None:
+            _sigmas = [self._sigma, ]
+        else:
+            _sigmas = sigmas
+        target_grid_points = np.array(grid_points, dtype='int_')
+        all_grid_points = np.arange(len(self._bz_grid.addresses), dtype='int_')
+        if self._phonon_done is None:
+            self._allocate_phonon()
+        self._run_phonon_solver_c(all_grid_points)
+
+        gamma = np.zeros(
+            (len(_sigmas), len(target_grid_points), len(self._band_indices)),
+            dtype='double', order='C')
+        smearing = [i for i, sigma in enumerate(_sigmas) if sigma is not None]
+        thm = [i for i, sigma in enumerate(_sigmas) if sigma is None]
+        if thm:
+            gamma[thm] = self._run_all_c(
+                target_grid_points, all_grid_points, [], True)
+        if smearing:
+            gamma[smearing] = self._run_all_c(
+                target_grid_points, all_grid_points,
+                [_sigmas[i] for i in smearing], False)
+
+        if sigmas is None:
+            self._gamma = gamma[0]
+        else:
+            self._gamma = gamma
+
     @property
     def sigma(self):
         return self._sigma
@@ -229,6 +276,46 @@ class Isotope(object):
 
         self._gamma = gamma / np.prod(self._bz_grid.D_diag)
 
+    def _run_all_c(self,
+                   target_grid_points,
+                   bz_grid_points,
+                   sigmas,
+                   is_tetrahedron_method):
+        import phono3py._phono3py as phono3c
+        if is_tetrahedron_method:
+            thm = TetrahedronMethod(self._bz_grid.microzone_lattice)
+            relative_grid_address = np.array(
+                np.dot(thm.get_tetrahedra(), self._bz_grid.P.T),
+                dtype='int_', order='C')
+            grid_points = bz_grid_points
+        else:
+            relative_grid_address = None
+            grid_points = np.arange(np.prod(self._bz_grid.D_diag),
+                                    dtype='int_')
+        num_methods = len(sigmas) + is_tetrahedron_method
+        gamma = np.zeros((num_methods,
+                          len(target_grid_points),
+                          len(self._band_indices)),
+                         dtype='double', order='C')
+        phono3c.isotope_strength_at_grid_points(
+            gamma,
+            target_grid_points,
+            grid_points,
+            np.ones(len(grid_points), dtype='int_'),
+            np.array(sigmas, dtype='double'),
+            relative_grid_address,
+            self._bz_grid.D_diag,
+            self._bz_grid.addresses,
+            self._bz_grid.gp_map,
+            self._bz_grid.is_dense_gp_map * 1 + 1,
+            self._mass_variances,
+            self._frequencies,
+            self._eigenvectors,
+            self._band_indices,
+            self._cutoff_frequency)
+
+        return gamma / np.prod(self._bz_grid.D_diag)
+
     def _set_integration_weights(self):
         thm = TetrahedronMethod(self._bz_grid.microzone_lattice)
         num_grid_points = len(self._grid_points)
@@ -0,0 +1,745 @@
+# Copyright (C) 2021 Atsushi Togo
+# All rights reserved.
+#
+# This file is part of phono3py.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in
+#   the documentation and/or other materials provided with the
+#   distribution.
+#
+# * Neither the name of the phonopy project nor the names of its
+#   contributors may be used to endorse or promote products derived
+#   from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+import numpy as np
+from phonopy.structure.tetrahedron_method import TetrahedronMethod
+from phono3py.phonon.grid import get_ir_grid_points
+
+epsilon = 1.0e-8
+
+
+class KappaDOS(object):
+    """Cumulative and spectral kappa by tetrahedron method
+
+    Mode kappa (or any mode tensor property) at ir-grid-points is
+    accumulated with respect to phonon frequency using integration
+    weights of the linear tetrahedron method on BZ grid. Mode kappa can be
+    given chunk by chunk of grid points by calling ``run`` repeatedly,
+    e.g., with slices of h5py dataset, so that whole mode kappa needs not
+    be in memory.
+
+    Attributes
+    ----------
+    kdos : ndarray
+        kdos[:, :, 0, :] is cumulative kappa and kdos[:, :, 1, :] is
+        spectral kappa (kappa per frequency).
+        shape=(temperatures, frequency_points, 2, 6), dtype='double'
+    frequency_points : ndarray
+        shape=(frequency_points,), dtype='double'
+
+    """
+
+    def __init__(self,
+                 frequencies,
+                 bz_grid,
+                 ir_grid_points=None,
+                 ir_grid_weights=None,
+                 ir_grid_map=None,
+                 frequency_points=None,
+                 num_sampling_points=100):
+        """Init method.
+
+        Parameters
+        ----------
+        frequencies : ndarray
+            Phonon frequencies at ir-grid-points.
+            shape=(ir_grid_points, num_band), dtype='double'
+        bz_grid : BZGrid
+            BZ grid used for the kappa calculation.
+        ir_grid_points : ndarray, optional
+            Ir-grid-points in generalized regular grid, and their weights and
+            mapping table given by ``get_ir_grid_points``. Default is those
+            computed from ``bz_grid``. When all grid points are given in
+            ``frequencies``, these are not used.
+        frequency_points : array_like, optional
+            Sampling frequency points. Default is None, which gives
+            ``num_sampling_points`` points from minimum to maximum frequency.
+
+        """
+        self._bz_grid = bz_grid
+        num_gr = np.prod(bz_grid.D_diag)
+
+        if len(frequencies) == num_gr:
+            self._ir_grid_points = np.arange(num_gr, dtype='int_')
+            self._ir_grid_weights = np.ones(num_gr, dtype='int_')
+            self._ir_grid_map = np.arange(num_gr, dtype='int_')
+        elif ir_grid_points is None:
+            (self._ir_grid_points,
+             self._ir_grid_weights,
+             self._ir_grid_map) = get_ir_grid_points(bz_grid)
+        else:
+            self._ir_grid_points = ir_grid_points
+            self._ir_grid_weights = ir_grid_weights
+            self._ir_grid_map = ir_grid_map
+
+        if len(self._ir_grid_points) != len(frequencies):
+            raise RuntimeError("Number of ir-grid-points is inconsistent "
+                               "with frequencies.")
+
+        self._grid_points = np.array(bz_grid.grg2bzg[self._ir_grid_points],
+                                     dtype='int_')
+        self._num_sampling_grid_points = self._ir_grid_weights.sum()
+        self._frequencies = self._get_frequencies_at_bz_grid_points(
+            frequencies)
+
+        if frequency_points is None:
+            self._frequency_points = np.linspace(
+                np.min(frequencies), np.max(frequencies) + epsilon,
+                num_sampling_points, dtype='double')
+        else:
+            self._frequency_points = np.array(frequency_points,
+                                              dtype='double')
+
+        thm = TetrahedronMethod(bz_grid.microzone_lattice)
+        self._relative_grid_address = np.array(
+            np.dot(thm.get_tetrahedra(), bz_grid.P.T),
+            dtype='int_', order='C')
+        self._kdos = None
+
+    @property
+    def kdos(self):
+        return self._kdos
+
+    @property
+    def frequency_points(self):
+        return self._frequency_points
+
+    @property
+    def ir_grid_weights(self):
+        return self._ir_grid_weights
+
+    def run(self, mode_kappa, start=0):
+        """Accumulate mode kappa at a chunk of ir-grid-points
+
+        Parameters
+        ----------
+        mode_kappa : array_like
+            Mode kappa at ir-grid-points of
+            ``ir_grid_points[start:start + len(chunk)]``.
+            shape=(temperatures, chunk, num_band, 6), dtype='double'
+        start : int, optional
+            Index of the first ir-grid-point of the chunk.
+
+        """
+        import phono3py._phono3py as phono3c
+
+        mode_kappa = np.asarray(mode_kappa, dtype='double')
+        if self._kdos is None:
+            self._kdos = np.zeros(
+                (mode_kappa.shape[0], len(self._frequency_points), 2,
+                 mode_kappa.shape[-1]), dtype='double', order='C')
+
+        num_band = self._frequencies.shape[1]
+        grid_points = self._grid_points[start:start + mode_kappa.shape[1]]
+        iw = np.zeros((len(grid_points), len(self._frequency_points),
+                       num_band), dtype='double', order='C')
+        for j, function in enumerate(('J', 'I')):
+            phono3c.integration_weights(
+                iw,
+                self._frequency_points,
+                self._relative_grid_address,
+                self._bz_grid.D_diag,
+                grid_points,
+                self._frequencies,
+                self._bz_grid.addresses,
+                self._bz_grid.gp_map,
+                self._bz_grid.is_dense_gp_map * 1 + 1,
+                function)
+            # kdos[temp, freq_points, IJ, tensor_elem]
+            # iw[ir_gp, freq_points, band]
+            # mode_kappa[temp, ir_gp, band, tensor_elem]
+            self._kdos[:, :, j] += np.einsum(
+                'gfb,tgbk->tfk', iw, mode_kappa) / (
+                    self._num_sampling_grid_points)
+
+    def _get_frequencies_at_bz_grid_points(self, frequencies):
+        ir_indices = np.zeros(np.prod(self._bz_grid.D_diag), dtype='int_')
+        ir_indices[self._ir_grid_points] = np.arange(
+            len(self._ir_grid_points))
+        gr_grid_points = self._bz_grid.bzg2grg
+        return np.array(
+            frequencies[ir_indices[self._ir_grid_map[gr_grid_points]]],
+            dtype='double', order='C')
+
+
+class KappaDOSHistogram(object):
+    """Cumulative and spectral kappa by histogram
+
+    Mode kappa is accumulated with respect to a mode scalar value such as
+    phonon frequency or mean free path using histograms. Temperature
+    dependent values such as mean free path are accepted. Mode kappa can
+    be given chunk by chunk of grid points by calling ``run`` repeatedly.
+
+    Cumulative kappa is the sum of mode kappa whose values are less than or
+    equal to each sampling point. Spectral kappa is the sum of mode kappa
+    in the bin around each sampling point, divided by the bin width, where
+    the bin edges are at the middle of neighboring sampling points.
+
+    Attributes
+    ----------
+    kdos : ndarray
+        Same as KappaDOS.kdos.
+        shape=(temperatures, sampling_points, 2, 6), dtype='double'
+    sampling_points : ndarray
+        shape=(sampling_points,), dtype='double'
+
+    """
+
+    def __init__(self, sampling_points, num_sampling_grid_points):
+        """Init method.
+
+        Parameters
+        ----------
+        sampling_points : array_like
+            Sorted sampling points of the value.
+        num_sampling_grid_points : int
+            Number of grid points in the mesh, i.e., sum of weights.
+
+        """
+        self._sampling_points = np.array(sampling_points, dtype='double')
+        self._num_sampling_grid_points = num_sampling_grid_points
+        sp = self._sampling_points
+        mid_points = (sp[1:] + sp[:-1]) / 2
+        self._bin_edges = np.hstack(
+            [[sp[0] - (mid_points[0] - sp[0])],
+             mid_points,
+             [sp[-1] + (sp[-1] - mid_points[-1])]])
+        self._kdos = None
+
+    @property
+    def kdos(self):
+        return self._kdos
+
+    @property
+    def sampling_points(self):
+        return self._sampling_points
+
+    def run(self, mode_kappa, values):
+        """Accumulate mode kappa at a chunk of grid points
+
+        Parameters
+        ----------
+        mode_kappa : array_like
+            shape=(temperatures, chunk, num_band, 6), dtype='double'
+        values : array_like
+            Values of modes with respect to which kappa is accumulated.
+            shape=(chunk, num_band) or (temperatures, chunk, num_band)
+
+        """
+        mode_kappa = np.asarray(mode_kappa, dtype='double')
+        num_temp, num_elem = mode_kappa.shape[0], mode_kappa.shape[-1]
+        num_sp = len(self._sampling_points)
+        if self._kdos is None:
+            self._kdos = np.zeros((num_temp, num_sp, 2, num_elem),
+                                  dtype='double', order='C')
+
+        values = np.broadcast_to(values, mode_kappa.shape[:3])
+        mk = mode_kappa.reshape(num_temp, -1, num_elem)
+        offsets = (np.arange(num_temp) * (num_sp + 1))[:, None]
+
+        # Index of the first sampling point that is not less than value.
+        # Values above the last point fall into the extra index num_sp.
+        cum_indices = np.searchsorted(
+            self._sampling_points, values.reshape(num_temp, -1),
+            side='left')
+        bin_indices = np.searchsorted(
+            self._bin_edges, values.reshape(num_temp, -1),
+            side='right') - 1
+        bin_indices = np.where(bin_indices < 0, num_sp, bin_indices)
+
+        for j, indices in enumerate((cum_indices, bin_indices)):
+            flat_indices = (indices + offsets).ravel()
+            for k in range(num_elem):
+                hist = np.bincount(flat_indices,
+                                   weights=mk[:, :, k].ravel(),
+                                   minlength=num_temp * (num_sp + 1))
+                hist = hist.reshape(num_temp, num_sp + 1)[:, :num_sp]
+                if j == 0:
+                    self._kdos[:, :, 0, k] += np.cumsum(hist, axis=1) / (
+                        self._num_sampling_grid_points)
+                else:
+                    self._kdos[:, :, 1, k] += hist / (
+                        np.diff(self._bin_edges)
+                        * self._num_sampling_grid_points)
+
+
+def get_mfp(gamma, group_velocity):
+    """Return mean free path in Angstrom
+
+    Parameters
+    ----------
+    gamma : array_like
+        Phonon linewidths (half width) in THz.
+        shape=(temperatures, grid_points, num_band)
+    group_velocity : array_like
+        Group velocities in THz Angstrom.
+        shape=(grid_points, num_band, 3)
+
+    """
+    g = np.where(gamma > 0, gamma, -1)
+    gv_norm = np.linalg.norm(group_velocity, axis=-1)
+    return np.where(g > 0, gv_norm / (2 * 2 * np.pi * g), 0)
+
+
+def _get_mfp_from_hdf5(f, start, end, temperature_index=None):
+    """Return mean free path at a chunk of grid points
+
+    Stored mean_free_path is used if it exists. Otherwise mean free path is
+    computed from gamma and group velocity.
+
+    """
+    if temperature_index is None:
+        t_index = slice(None)
+    else:
+        t_index = temperature_index
+    if 'mean_free_path' in f:
+        return np.linalg.norm(f['mean_free_path'][t_index, start:end],
+                              axis=-1)
+    return get_mfp(f['gamma'][t_index, start:end],
+                   f['group_velocity'][start:end])
+
+
+def run_mfp_dos_from_hdf5(f,
+                          bz_grid,
+                          temperature_indices=None,
+                          num_sampling_points=100,
+                          chunk_size=1000):
+    """Compute cumulative and spectral kappa versus mean free path
+
+    Mean free path takes the place of phonon frequency in the tetrahedron
+    method on BZ grid. Since mean free path depends on temperature, the
+    integration is performed temperature by temperature and sampling
+    points are taken from minimum to maximum mean free path at each
+    temperature. Stored mean_free_path is used if it exists in the file.
+
+    Parameters
+    ----------
+    f : h5py.File or dict
+        Opened kappa-*.hdf5 file.
+    bz_grid : BZGrid
+        BZ grid used for the kappa calculation.
+    temperature_indices : array_like, optional
+        Indices of temperatures to compute. Default is None, which means
+        all temperatures.
+    chunk_size : int, optional
+        Number of grid points read at once.
+
+    Returns
+    -------
+    tuple
+        (sampling_points, kdos). Sampling points are given per
+        temperature. shape=(temperatures, sampling_points). See
+        KappaDOS.kdos for the shape of kdos.
+
+    """
+    weights = f['weight'][:]
+    num_gp = len(weights)
+    chunks = [(i, min(i + chunk_size, num_gp))
+              for i in range(0, num_gp, chunk_size)]
+    if temperature_indices is None:
+        _temperature_indices = range(f['mode_kappa'].shape[0])
+    else:
+        _temperature_indices = temperature_indices
+
+    sampling_points = []
+    kdos = []
+    for i in _temperature_indices:
+        mfp = np.vstack([_get_mfp_from_hdf5(f, j, k, temperature_index=i)
+                         for j, k in chunks])
+        kappa_dos = KappaDOS(mfp,
+                             bz_grid,
+                             num_sampling_points=num_sampling_points)
+        if (kappa_dos.ir_grid_weights != weights).any():
+            raise RuntimeError("Grid weights in file are inconsistent with "
+                               "BZ grid.")
+        for j, k in chunks:
+            kappa_dos.run(f['mode_kappa'][i:i + 1, j:k], start=j)
+        sampling_points.append(kappa_dos.frequency_points)
+        kdos.append(kappa_dos.kdos[0])
+
+    return np.array(sampling_points), np.array(kdos)
+
+
+def run_kappa_dos_from_hdf5(f,
+                            bz_grid=None,
+                            mfp=False,
+                            sampling_points=None,
+                            num_sampling_points=100,
+                            chunk_size=1000):
+    """Compute cumulative and spectral kappa from kappa-*.hdf5
+
+    Datasets of the hdf5 file are read lazily by chunks of grid points, and
+    all temperatures are treated at once.
+
+    Parameters
+    ----------
+    f : h5py.File or dict
+        Opened kappa-*.hdf5 file.
+    bz_grid : BZGrid, optional
+        With BZ grid, kappa is accumulated with respect to frequency by
+        tetrahedron method. Otherwise histogram is used.
+    mfp : bool, optional
+        Kappa is accumulated with respect to mean free path in Angstrom
+        by histogram over common sampling points for all temperatures.
+        Stored mean_free_path is used if it exists. Default is False. See
+        run_mfp_dos_from_hdf5 for tetrahedron method.
+    sampling_points : array_like, optional
+        Sampling points of frequency or mean free path. Default is None,
+        which gives ``num_sampling_points`` points from minimum to maximum
+        values.
+    chunk_size : int, optional
+        Number of grid points read at once.
+
+    Returns
+    -------
+    tuple
+        (sampling_points, kdos). See KappaDOS.kdos for the shape of kdos.
+
+    """
+    weights = f['weight'][:]
+    frequencies = f['frequency'][:]
+    num_gp = len(weights)
+    chunks = [(i, min(i + chunk_size, num_gp))
+              for i in range(0, num_gp, chunk_size)]
+
+    if mfp:
+        if sampling_points is None:
+            max_mfp = max([_get_mfp_from_hdf5(f, i, j).max()
+                           for i, j in chunks])
+            sampling_points = np.linspace(0, max_mfp + epsilon,
+                                          num_sampling_points)
+        kappa_dos = KappaDOSHistogram(sampling_points, weights.sum())
+        for i, j in chunks:
+            kappa_dos.run(f['mode_kappa'][:, i:j],
+                          _get_mfp_from_hdf5(f, i, j))
+        return kappa_dos.sampling_points, kappa_dos.kdos
+
+    if bz_grid is None:
+        if sampling_points is None:
+            sampling_points = np.linspace(np.min(frequencies),
+                                          np.max(frequencies) + epsilon,
+                                          num_sampling_points)
+        kappa_dos = KappaDOSHistogram(sampling_points, weights.sum())
+        for i, j in chunks:
+            kappa_dos.run(f['mode_kappa'][:, i:j], frequencies[i:j])
+        return kappa_dos.sampling_points, kappa_dos.kdos
+
+    kappa_dos = KappaDOS(frequencies,
+                         bz_grid,
+                         frequency_points=sampling_points,
+                         num_sampling_points=num_sampling_points)
+    if (kappa_dos.ir_grid_weights != weights).any():
+        raise RuntimeError("Grid weights in file are inconsistent with "
+                           "BZ grid.")
+    for i, j in chunks:
+        kappa_dos.run(f['mode_kappa'][:, i:j], start=i)
+    return kappa_dos.frequency_points, kappa_dos.kdos
+
+
+def _show_tensor(kdos, temperatures, sampling_points, args):
+    for i, kdos_t in enumerate(kdos):
+        if not args.gv:
+            print("# %d K" % temperatures[i])
+
+        for f, k in zip(sampling_points[i], kdos_t):  # show kappa_xx
+            if args.average:
+                print(("%13.5f " * 3) %
+                      (f, k[0][:3].sum() / 3, k[1][:3].sum() / 3))
+            elif args.trace:
+                print(("%13.5f " * 3) % (f, k[0][:3].sum(), k[1][:3].sum()))
+            else:
+                print(("%f " * 13) % ((f,) + tuple(k[0]) + tuple(k[1])))
+
+        print('')
+        print('')
+
+
+def _show_scalar(gdos, temperatures, sampling_points, args):
+    if args.pqj or args.gruneisen or args.gv_norm:
+        for f, g in zip(sampling_points, gdos[0]):
+            print("%f %e %e" % (f, g[0], g[1]))
+    else:
+        for i, gdos_t in enumerate(gdos):
+            print("# %d K" % temperatures[i])
+            for f, g in zip(sampling_points, gdos_t):
+                print("%f %f %f" % (f, g[0], g[1]))
+            print('')
+            print('')
+
+
+def _get_parser():
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Cumulative and spectral physical properties")
+    parser.add_argument(
+        "--pa", dest="primitive_matrix", default="1 0 0 0 1 0 0 0 1",
+        help="Primitive matrix")
+    parser.add_argument(
+        "--mesh", dest="mesh", default="1 1 1",
+        help="Mesh numbers")
+    parser.add_argument(
+        "-c", "--cell", dest="cell_filename",
+        help="Unit cell filename")
+    parser.add_argument(
+        '--gv', action='store_true',
+        help='Calculate for gv_x_gv (tensor)')
+    parser.add_argument(
+        '--pqj', action='store_true',
+        help='Calculate for Pqj (scalar)')
+    parser.add_argument(
+        '--cv', action='store_true',
+        help='Calculate for Cv (scalar)')
+    parser.add_argument(
+        '--tau', action='store_true',
+        help='Calculate for lifetimes (scalar)')
+    parser.add_argument(
+        '--gamma', action='store_true',
+        help='Calculate for Gamma (scalar)')
+    parser.add_argument(
+        '--gruneisen', action='store_true',
+        help='Calculate for mode-Gruneisen parameters squared (scalar)')
+    parser.add_argument(
+        '--gv-norm', action='store_true',
+        help='Calculate for |g_v| (scalar)')
+    parser.add_argument(
+        '--mfp', action='store_true',
+        help='Mean free path is used instead of frequency')
+    parser.add_argument(
+        '--temperature', type=float, dest='temperature',
+        help='Temperature to output data at')
+    parser.add_argument(
+        '--nsp', '--num-sampling-points', type=int, dest='num_sampling_points',
+        default=100,
+        help="Number of sampling points in frequency or MFP axis")
+    parser.add_argument(
+        '--average', action='store_true',
+        help=("Output the traces of the tensors divided by 3 "
+              "rather than the unique elements"))
+    parser.add_argument(
+        '--trace', action='store_true',
+        help=("Output the traces of the tensors "
+              "rather than the unique elements"))
+    parser.add_argument(
+        '--smearing', action='store_true',
+        help='Use smearing method (only for scalar density)')
+    parser.add_argument(
+        '--qe', '--pwscf', dest="qe_mode",
+        action="store_true", help="Invoke Pwscf mode")
+    parser.add_argument(
+        '--crystal', dest="crystal_mode",
+        action="store_true", help="Invoke CRYSTAL mode")
+    parser.add_argument(
+        '--abinit', dest="abinit_mode",
+        action="store_true", help="Invoke Abinit mode")
+    parser.add_argument(
+        '--turbomole', dest="turbomole_mode",
+        action="store_true", help="Invoke TURBOMOLE mode")
+    parser.add_argument(
+        "--noks", "--no-kappa-stars",
+        dest="no_kappa_stars", action="store_true",
+        help="Deactivate summation of partial kappa at q-stars")
+    parser.add_argument('filenames', nargs='*')
+    return parser
+
+
+def _fracval(frac):
+    if frac.find('/') == -1:
+        return float(frac)
+    else:
+        x = frac.split('/')
+        return float(x[0]) / float(x[1])
+
+
+def _get_temperature_index(temperatures, temperature):
+    for i, t in enumerate(temperatures):
+        if np.abs(t - temperature) < epsilon:
+            return i
+    raise RuntimeError("Temperature %s K is not found." % temperature)
+
+
+def _get_scalar_prop(f, args):
+    if args.pqj:
+        return f['ave_pp'][:].reshape((1,) + f['ave_pp'].shape)
+    elif args.cv:
+        return f['heat_capacity'][:]
+    elif args.tau:
+        g = f['gamma'][:]
+        g = np.where(g > 0, g, -1)
+        return np.where(g > 0, 1.0 / (2 * 2 * np.pi * g), 0)  # tau
+    elif args.gv_norm:
+        gv_norm = np.linalg.norm(f['group_velocity'][:], axis=2)
+        return gv_norm.reshape((1,) + gv_norm.shape)
+    elif args.gamma:
+        return f['gamma'][:]
+    else:  # args.gruneisen
+        return f['gruneisen'][:].reshape((1,) + f['gruneisen'].shape) ** 2
+
+
+def _get_scalar_dos_by_smearing(mode_prop, frequencies, weights,
+                                frequency_points):
+    """Return spectral density of mode scalar property by smearing
+
+    Only spectral density, gdos[:, :, 1], is computed.
+
+    """
+    from phonopy.phonon.dos import NormalDistribution
+
+    sigma = (frequency_points[-1] - frequency_points[0]) / 100
+    smearing_function = NormalDistribution(sigma)
+    gdos = np.zeros((len(mode_prop), len(frequency_points), 2),
+                    dtype='double')
+    for i, fpoint in enumerate(frequency_points):
+        dos = smearing_function.calc(frequencies - fpoint)
+        gdos[:, i, 1] = np.einsum(
+            'g,tgb->t', weights, dos * mode_prop) / weights.sum()
+    return gdos
+
+
+def main():
+    """Cumulative and spectral properties from kappa-*.hdf5
+
+    This is the command line interface of phono3py-kaccum.
+
+    """
+    import sys
+    import h5py
+    from phonopy.interface.calculator import read_crystal_structure
+    from phonopy.structure.cells import get_primitive
+    from phonopy.structure.symmetry import Symmetry
+    from phono3py.phonon.grid import BZGrid
+
+    args = _get_parser().parse_args()
+
+    interface_mode = None
+    if args.qe_mode:
+        interface_mode = 'qe'
+    elif args.crystal_mode:
+        interface_mode = 'crystal'
+    elif args.abinit_mode:
+        interface_mode = 'abinit'
+    elif args.turbomole_mode:
+        interface_mode = 'turbomole'
+    if len(args.filenames) > 1:
+        cell_filename, kappa_filename = args.filenames[:2]
+    else:
+        cell_filename, kappa_filename = args.cell_filename, args.filenames[0]
+    cell, _ = read_crystal_structure(cell_filename,
+                                     interface_mode=interface_mode)
+    primitive_matrix = np.reshape(
+        [_fracval(x) for x in args.primitive_matrix.split()], (3, 3))
+    primitive = get_primitive(cell, primitive_matrix)
+
+    with h5py.File(kappa_filename, 'r') as f:
+        if 'mesh' in f:
+            mesh = np.array(f['mesh'][:], dtype='int_')
+        else:
+            mesh = np.array([int(x) for x in args.mesh.split()],
+                            dtype='int_')
+        if 'temperature' in f:
+            temperatures = f['temperature'][:]
+        else:
+            temperatures = None
+        weights = f['weight'][:]
+
+        if args.no_kappa_stars or (weights == 1).all():
+            bz_grid = BZGrid(mesh, lattice=primitive.cell)
+        else:
+            bz_grid = BZGrid(mesh,
+                             lattice=primitive.cell,
+                             primitive_symmetry=Symmetry(primitive))
+
+        frequencies = f['frequency'][:]
+        conditions = frequencies > 0
+        if np.logical_not(conditions).sum() > 3:
+            sys.stderr.write("# Imaginary frequencies are found. "
+                             "They are set to be zero.\n")
+            frequencies = np.where(conditions, frequencies, 0)
+
+        try:
+            kappa_dos = KappaDOS(frequencies,
+                                 bz_grid,
+                                 num_sampling_points=args.num_sampling_points)
+            if (kappa_dos.ir_grid_weights != weights).any():
+                raise RuntimeError("Grid weights in file are inconsistent "
+                                   "with BZ grid.")
+        except RuntimeError:
+            print("*******************************")
+            print("** Might forget --pa option? **")
+            print("*******************************")
+            raise
+
+        is_temperature_dependent = not (args.gv_norm or args.pqj or
+                                        args.gruneisen)
+        if args.temperature is None or not is_temperature_dependent:
+            temp_slice = slice(None)
+        else:
+            i = _get_temperature_index(temperatures, args.temperature)
+            temp_slice = slice(i, i + 1)
+            temperatures = temperatures[temp_slice]
+
+        if (args.gamma or args.gruneisen or args.pqj or
+            args.cv or args.tau or args.gv_norm):
+            mode_prop = _get_scalar_prop(f, args)[temp_slice]
+            if args.smearing:
+                sampling_points = kappa_dos.frequency_points
+                gdos = _get_scalar_dos_by_smearing(
+                    mode_prop, frequencies, weights, sampling_points)
+            else:
+                kappa_dos.run((mode_prop * weights[:, None])[..., None])
+                sampling_points = kappa_dos.frequency_points
+                gdos = kappa_dos.kdos[:, :, :, 0]
+            _show_scalar(gdos, temperatures, sampling_points, args)
+        elif args.gv:
+            # gv x gv is divied by primitive cell volume.
+            mode_prop = f['gv_by_gv'][:] / primitive.volume
+            kappa_dos.run(mode_prop[None, :, :, :])
+            _show_tensor(kappa_dos.kdos, temperatures,
+                         kappa_dos.frequency_points[None, :], args)
+        elif args.mfp:
+            sampling_points, kdos = run_mfp_dos_from_hdf5(
+                f,
+                bz_grid,
+                temperature_indices=np.arange(
+                    f['mode_kappa'].shape[0])[temp_slice],
+                num_sampling_points=args.num_sampling_points)
+            _show_tensor(kdos, temperatures, sampling_points, args)
+        else:
+            sampling_points, kdos = run_kappa_dos_from_hdf5(
+                f,
+                bz_grid=bz_grid,
+                num_sampling_points=args.num_sampling_points)
+            kdos = kdos[temp_slice]
+            _show_tensor(kdos, temperatures,
+                         np.tile(sampling_points, (len(kdos), 1)), args)
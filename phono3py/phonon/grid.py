@@ -427,10 +427,12 @@ def get_grid_point_from_address(address, mesh):
     if adrs_array.ndim == 1:
         return phono3c.grid_index_from_address(adrs_array, mesh_array)
 
-    gps = np.zeros(adrs_array.shape[0], dtype='int_')
-    for i, adrs in enumerate(adrs_array):
-        gps[i] = phono3c.grid_index_from_address(adrs, mesh_array)
-    return gps
+    # X runs first in XYZ, which is same as grid_index_from_address.
+    red_adrs = adrs_array % mesh_array
+    gps = (red_adrs[:, 0] +
+           red_adrs[:, 1] * mesh_array[0] +
+           red_adrs[:, 2] * mesh_array[0] * mesh_array[1])
+    return np.array(gps, dtype='int_')
 
 
 def get_ir_grid_points(bz_grid):
@@ -453,8 +455,10 @@ def get_grid_points_by_rotations(gp,
 
     Parameters
     ----------
-    gp : int
-        Grid point index defined by bz_grid.
+    gp : int or array_like
+        Grid point index defined by bz_grid. Rotation maps of many grid
+        points are obtained at once by giving an array.
+        shape=(grid_points, ), dtype='int_'
     bz_grid : BZGrid
         Data structure to represent BZ grid.
     reciprocal_rotations : array_like or None, optional
@@ -466,19 +470,26 @@ def get_grid_points_by_rotations(gp,
     -------
     rot_grid_indices : ndarray
         Grid points obtained after rotating input grid address
-        dtype='int_', shape=(rotations,)
+        dtype='int_', shape=(rotations,) or (grid_points, rotations)
 
     """
 
     if reciprocal_rotations is not None:
-        rec_rots = reciprocal_rotations
+        rec_rots = np.array(reciprocal_rotations, dtype='int_')
     else:
         rec_rots = bz_grid.rotations
 
-    rot_adrs = np.dot(rec_rots, bz_grid.addresses[gp])
+    if np.ndim(gp) == 0:
+        rot_adrs = np.dot(rec_rots, bz_grid.addresses[gp])
+        gps = bz_grid.grg2bzg[
+            get_grid_point_from_address(rot_adrs, bz_grid.D_diag)]
+        return gps
+
+    adrs = bz_grid.addresses[np.array(gp, dtype='int_')]
+    rot_adrs = np.dot(adrs, rec_rots.transpose(0, 2, 1)).reshape(-1, 3)
     gps = bz_grid.grg2bzg[
         get_grid_point_from_address(rot_adrs, bz_grid.D_diag)]
-    return gps
+    return np.array(gps.reshape(len(adrs), len(rec_rots)), dtype='int_')
 
 
 def _get_grid_address(D_diag):
@@ -44,7 +44,20 @@ def run_phonon_solver_c(dm,
                         QDinv,
                         frequency_conversion_factor,
                         nac_q_direction,  # in reduced coordinates
-                        lapack_zheev_uplo):
+                        lapack_zheev_uplo,
+                        group_velocities=None):
+    """Solve phonons at grid points by C implementation
+
+    When group_velocities is given, group velocities at grid_points are
+    computed from analytical derivative of dynamical matrix after solving
+    phonons and stored in it. Degeneracy of bands is treated in the same
+    way as phonopy's GroupVelocity without symmetrization.
+
+    group_velocities : ndarray, optional
+        shape=(grid_points, num_band, 3), dtype='double', order='C'
+
+    """
+
     import phono3py._phononmod as phononmod
 
     (svecs,
@@ -103,6 +116,32 @@ def run_phonon_solver_c(dm,
         Lambda,
         lapack_zheev_uplo)
 
+    if group_velocities is not None:
+        if dd_q0 is not None:
+            raise RuntimeError(
+                "Analytical derivative of dynamical matrix is not "
+                "implemented for NAC by Gonze et al.")
+        phononmod.group_velocities_at_gridpoints(
+            group_velocities,
+            frequencies,
+            eigenvectors,
+            grid_points,
+            grid_address,
+            np.array(QDinv, dtype='double', order='C'),
+            fc,
+            svecs,
+            multiplicity,
+            masses,
+            fc_p2s,
+            fc_s2p,
+            frequency_conversion_factor,
+            np.array(dm.primitive.cell.T, dtype='double', order='C'),
+            born,
+            dielectric,
+            rec_lattice,
+            nac_factor,
+            1e-4)
+
 
 def run_phonon_solver_py(grid_point,
                          phonon_done,
@@ -38,9 +38,11 @@ from phonopy.phonon.group_velocity import GroupVelocity
 from phonopy.harmonic.force_constants import similarity_transformation
 from phonopy.phonon.thermal_properties import mode_cv as get_mode_cv
 from phonopy.units import THzToEv, EV, THz, Angstrom
-from phono3py.file_IO import write_pp_to_hdf5
+from phono3py.file_IO import (write_pp_to_hdf5, read_pp_from_hdf5,
+                              FilePrefetcher)
 from phono3py.phonon3.triplets import get_all_triplets
 from phono3py.other.isotope import Isotope
+from phono3py.phonon.solver import run_phonon_solver_c
 from phono3py.phonon.grid import (get_ir_grid_points,
                                   get_grid_points_by_rotations)
 
@@ -149,6 +151,9 @@ class Conductivity(object):
         self._cv = None
         self._gv = None
         self._gv_sum2 = None
+        self._gv_at_grid_points = None
+        self._cv_at_grid_points = None
+        self._rotation_maps = None
         self._gamma = None
         self._gamma_iso = None
         self._num_sampling_grid_points = 0
@@ -157,6 +162,8 @@ class Conductivity(object):
         self._conversion_factor = unit_to_WmK / volume
 
         self._isotope = None
+        self._gamma_iso_at_grid_points = None
+        self._pp_prefetcher = None
         self._mass_variances = None
         self._is_isotope = is_isotope
         if mass_variances is not None:
@@ -244,6 +251,9 @@ class Conductivity(object):
 
     def set_temperatures(self, temperatures):
         self._temperatures = temperatures
+        self._gv_at_grid_points = None
+        self._cv_at_grid_points = None
+        self._rotation_maps = None
         self._allocate_values()
 
     def set_gamma(self, gamma):
@@ -332,29 +342,31 @@ class Conductivity(object):
             self._pp.run_phonon_solver()
 
     def _get_gamma_isotope_at_sigmas(self, i):
-        gamma_iso = []
-        pp_freqs, pp_eigvecs, pp_phonon_done = self._pp.get_phonons()
+        """Return gamma_iso at sigmas at the i-th grid point
 
-        for j, sigma in enumerate(self._sigmas):
-            if self._log_level:
-                text = "Calculating Gamma of ph-isotope with "
-                if sigma is None:
-                    text += "tetrahedron method"
-                else:
-                    text += "sigma=%s" % sigma
-                print(text)
+        gamma_iso at all grid points are computed at once at the first
+        call sharing phonons with Interaction.
 
-            self._isotope.sigma = sigma
+        """
+        if self._gamma_iso_at_grid_points is None:
+            pp_freqs, pp_eigvecs, pp_phonon_done = self._pp.get_phonons()
+            if self._log_level:
+                for sigma in self._sigmas:
+                    text = "Calculating Gamma of ph-isotope with "
+                    if sigma is None:
+                        text += "tetrahedron method"
+                    else:
+                        text += "sigma=%s" % sigma
+                    print(text)
             self._isotope.set_phonons(pp_freqs,
                                       pp_eigvecs,
                                       pp_phonon_done,
                                       dm=self._dm)
-            gp = self._grid_points[i]
-            self._isotope.set_grid_point(gp)
-            self._isotope.run()
-            gamma_iso.append(self._isotope.gamma)
+            self._isotope.run_all(self._grid_points, sigmas=self._sigmas)
+            self._gamma_iso_at_grid_points = self._isotope.gamma
 
-        return np.array(gamma_iso, dtype='double', order='C')
+        return np.array(self._gamma_iso_at_grid_points[:, i],
+                        dtype='double', order='C')
 
     def _get_ir_grid_points(self):
         """Find irreducible grid points"""
@@ -382,25 +394,94 @@ class Conductivity(object):
 
     def _set_harmonic_properties(self, i_irgp, i_data):
         """Set group velocity and mode heat capacity"""
-        grid_point = self._grid_points[i_irgp]
-        freqs = self._frequencies[grid_point][self._pp.band_indices]
-        self._cv[:, i_data, :] = self._get_cv(freqs)
-        self._gv_obj.run([self._qpoints[i_irgp], ])
-        gv = self._gv_obj.get_group_velocity()[0, self._pp.band_indices, :]
-        self._gv[i_data] = gv
+        if self._gv_at_grid_points is None:
+            self._set_harmonic_properties_at_grid_points()
+        self._cv[:, i_data, :] = self._cv_at_grid_points[:, i_irgp, :]
+        self._gv[i_data] = self._gv_at_grid_points[i_irgp]
+
+    def _set_harmonic_properties_at_grid_points(self):
+        """Compute harmonic properties at all grid points at once
+
+        Group velocities, mode heat capacities, and rotation maps of k-stars
+        are computed for all grid points before the loop over grid points.
+
+        """
+        band_indices = self._pp.band_indices
+        freqs = self._frequencies[self._grid_points][:, band_indices]
+        self._cv_at_grid_points = self._get_cv(freqs)
+        if self._gv_delta_q is None:
+            gv = self._get_group_velocities_by_solver()
+        else:
+            self._gv_obj.run(self._qpoints)
+            gv = self._gv_obj.get_group_velocity()
+        self._gv_at_grid_points = np.array(
+            gv[:, band_indices, :], dtype='double', order='C')
+        if self._is_kappa_star:
+            self._rotation_maps = get_grid_points_by_rotations(
+                self._grid_points,
+                self._bz_grid)
+        else:
+            self._rotation_maps = get_grid_points_by_rotations(
+                self._grid_points,
+                self._bz_grid,
+                reciprocal_rotations=self._point_operations)
+
+    def _get_group_velocities_by_solver(self):
+        """Group velocities by analytical derivative of dynamical matrix
+
+        These are computed in C at all grid points and symmetrized by
+        site-symmetries of q-points as done in GroupVelocity.
+
+        """
+        frequencies, eigenvectors, phonon_done = self._pp.get_phonons()
+        num_band = len(self._primitive) * 3
+        gv = np.zeros((len(self._grid_points), num_band, 3),
+                      dtype='double', order='C')
+        run_phonon_solver_c(self._dm,
+                            frequencies,
+                            eigenvectors,
+                            phonon_done,
+                            np.array(self._grid_points, dtype='int_'),
+                            self._bz_grid.addresses,
+                            self._bz_grid.QDinv,
+                            self._frequency_factor_to_THz,
+                            None,
+                            self._pp.lapack_zheev_uplo,
+                            group_velocities=gv)
+
+        symmetry = self._pp.primitive_symmetry
+        rotations = symmetry.reciprocal_operations
+        rec_lat = np.linalg.inv(self._primitive.cell)
+        rotations_cartesian = np.array(
+            [similarity_transformation(rec_lat, r) for r in rotations],
+            dtype='double', order='C')
+        q_in_BZ = self._qpoints - np.rint(self._qpoints)
+        diff = (q_in_BZ[:, None, :] -
+                np.einsum('rij,qj->qri', rotations, q_in_BZ))
+        is_site_sym = (np.abs(diff) < symmetry.tolerance).all(axis=2)
+        gv_sym = np.einsum('qr,rij,qbj->qbi',
+                           is_site_sym, rotations_cartesian, gv)
+        gv_sym /= is_site_sym.sum(axis=1)[:, None, None]
+
+        return gv_sym
 
     def _get_cv(self, freqs):
-        cv = np.zeros((len(self._temperatures), len(freqs)), dtype='double')
+        """Return mode heat capacities
+
+        shape=(temperatures, ) + freqs.shape
+
+        """
+        freqs = np.array(freqs, dtype='double')
+        temps = np.reshape(self._temperatures, (-1, ) + (1, ) * freqs.ndim)
         # T/freq has to be large enough to avoid divergence.
         # Otherwise just set 0.
-        for i, f in enumerate(freqs):
-            finite_t = (self._temperatures > f / 100)
-            if f > self._cutoff_frequency:
-                cv[:, i] = np.where(
-                    finite_t, get_mode_cv(
-                        np.where(finite_t, self._temperatures, 10000),
-                        f * THzToEv), 0)
-        return cv
+        is_valid = freqs > self._cutoff_frequency
+        finite_t = np.logical_and(temps > freqs / 100, is_valid)
+        cv = np.where(
+            finite_t, get_mode_cv(
+                np.where(finite_t, temps, 10000),
+                np.where(is_valid, freqs, 1) * THzToEv), 0)
+        return np.array(cv, dtype='double', order='C')
 
     def _set_gv_by_gv(self, i_irgp, i_data):
         """Outer product of group velocities.
@@ -417,25 +498,15 @@ class Conductivity(object):
             self._gv_sum2[i_data, :, j] = gv_by_gv_tensor[:, vxv[0], vxv[1]]
 
     def _get_gv_by_gv(self, i_irgp, i_data):
-        if self._is_kappa_star:
-            rotation_map = get_grid_points_by_rotations(
-                self._grid_points[i_irgp],
-                self._bz_grid)
-        else:
-            rotation_map = get_grid_points_by_rotations(
-                self._grid_points[i_irgp],
-                self._bz_grid,
-                reciprocal_rotations=self._point_operations)
+        if self._rotation_maps is None:
+            self._set_harmonic_properties_at_grid_points()
+        rotation_map = self._rotation_maps[i_irgp]
 
         gv = self._gv[i_data]
-        gv_by_gv = np.zeros((len(gv), 3, 3), dtype='double')
-
-        for r in self._rotations_cartesian:
-            gvs_rot = np.dot(gv, r.T)
-            gv_by_gv += [np.outer(r_gv, r_gv) for r_gv in gvs_rot]
+        gvs_rot = np.einsum('rij,bj->rbi', self._rotations_cartesian, gv)
+        gv_by_gv = np.einsum('rbi,rbj->bij', gvs_rot, gvs_rot)
         gv_by_gv /= len(rotation_map) // len(np.unique(rotation_map))
         order_kstar = len(np.unique(rotation_map))
-
         if self._grid_weights is not None:
             if order_kstar != self._grid_weights[i_irgp]:
                 if self._log_level:
@@ -454,6 +525,40 @@ class Conductivity(object):
 
         return gv_by_gv, order_kstar
 
+    def _read_pp_at_sigma(self, i, j):
+        """Read ph-ph interaction strength at i-th grid point and j-th sigma
+
+        Files at the following grid points are read ahead by threads.
+
+        """
+        if self._pp_prefetcher is None:
+            kwargs_list = [{'mesh': self._pp.mesh_numbers,
+                            'grid_point': gp,
+                            'sigma': sigma,
+                            'sigma_cutoff': self._sigma_cutoff,
+                            'filename': self._pp_filename,
+                            'verbose': False}
+                           for gp in self._grid_points
+                           for sigma in self._sigmas]
+            self._pp_prefetcher = FilePrefetcher(read_pp_from_hdf5,
+                                                 kwargs_list,
+                                                 num_threads=1,
+                                                 num_ahead=2)
+        index = i * len(self._sigmas) + j
+        vals = self._pp_prefetcher.get(index)
+        if index == len(self._grid_points) * len(self._sigmas) - 1:
+            self._pp_prefetcher.shutdown()
+            self._pp_prefetcher = None
+
+        if vals is None:
+            raise RuntimeError(
+                "Ph-ph interaction strength at grid point %d was not found."
+                % self._grid_points[i])
+        if self._log_level:
+            print("Ph-ph interaction strength at grid point %d was read." %
+                  self._grid_points[i])
+        return vals
+
     def _get_main_diagonal(self, i, j, k):
         main_diagonal = self._gamma[j, k, i].copy()
         if self._gamma_iso is not None:
@@ -32,21 +32,34 @@
 # ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
 # POSSIBILITY OF SUCH DAMAGE.
 
+import os
 import sys
 import time
+import copy
+import tempfile
+import multiprocessing
 import numpy as np
 from phonopy.phonon.degeneracy import degenerate_sets
 from phono3py.phonon3.conductivity import (Conductivity, all_bands_exist,
                                            unit_to_WmK)
 from phono3py.phonon3.conductivity import write_pp as _write_pp
 from phono3py.phonon3.collision_matrix import CollisionMatrix
+from phono3py.phonon3.distributed_collision_matrix import (
+    get_row_ranges, symmetrize_distributed_collision_matrix,
+    solve_distributed_collision_matrix)
 from phono3py.phonon.grid import get_grid_points_by_rotations
 from phono3py.file_IO import (write_kappa_to_hdf5,
                               write_collision_to_hdf5,
                               read_collision_from_hdf5,
+                              write_collision_to_store,
+                              read_collision_from_store,
+                              read_collision_into_arrays,
+                              FilePrefetcher,
                               write_collision_eigenvalues_to_hdf5,
                               write_unitary_matrix_to_hdf5,
-                              read_pp_from_hdf5)
+                              read_kappa_from_hdf5,
+                              read_collision_eigenvalues_from_hdf5,
+                              read_unitary_matrix_from_hdf5)
 from phonopy.units import THzToEv, Kb
 
 
@@ -66,7 +79,13 @@ def get_thermal_conductivity_LBTE(
         is_full_pp=False,
         pinv_cutoff=1.0e-8,
         pinv_solver=0,  # default: dsyev in lapacke
+        is_symmetry_adapted_basis=False,
+        mpi_comm=None,
+        num_processes=None,
+        is_mixed_precision=False,
+        num_relaxons=None,
         write_collision=False,
+        use_collision_store=False,
         read_collision=False,
         write_kappa=False,
         write_pp=False,
@@ -87,6 +106,19 @@ def get_thermal_conductivity_LBTE(
         print("Cutoff frequency of pseudo inversion of collision matrix: %s" %
               pinv_cutoff)
 
+    if mpi_comm is not None and (write_collision or read_collision or
+                                 write_pp or read_pp or write_LBTE_solution):
+        raise RuntimeError(
+            "Reading and writing collision, ph-ph interaction strength, and "
+            "LBTE solution are not supported with MPI.")
+    if num_processes is not None and write_pp:
+        raise RuntimeError(
+            "Writing ph-ph interaction strength is not supported with "
+            "num_processes.")
+    if is_mixed_precision and write_LBTE_solution:
+        raise RuntimeError(
+            "Writing LBTE solution is not supported in mixed precision.")
+
     if read_collision:
         temps = None
     else:
@@ -110,6 +142,11 @@ def get_thermal_conductivity_LBTE(
         pp_filename=input_filename,
         pinv_cutoff=pinv_cutoff,
         pinv_solver=pinv_solver,
+        is_symmetry_adapted_basis=is_symmetry_adapted_basis,
+        mpi_comm=mpi_comm,
+        num_processes=num_processes,
+        is_mixed_precision=is_mixed_precision,
+        num_relaxons=num_relaxons,
         log_level=log_level)
 
     if read_collision:
@@ -147,6 +184,7 @@ def get_thermal_conductivity_LBTE(
                 i=i,
                 is_reducible_collision_matrix=is_reducible_collision_matrix,
                 is_one_gp_colmat=(grid_points is not None),
+                use_collision_store=use_collision_store,
                 filename=output_filename)
 
         lbte.delete_gp_collision_and_pp()
@@ -162,7 +200,7 @@ def get_thermal_conductivity_LBTE(
 
     if grid_points is None and all_bands_exist(interaction):
         lbte.set_kappa_at_sigmas()
-        if write_kappa:
+        if write_kappa and (mpi_comm is None or mpi_comm.Get_rank() == 0):
             _write_kappa(
                 lbte,
                 interaction.primitive.volume,
@@ -176,11 +214,216 @@ def get_thermal_conductivity_LBTE(
     return lbte
 
 
+def get_thermal_conductivity_at_pinv_cutoffs(
+        pinv_cutoffs,
+        mesh,
+        rotations_cartesian,
+        sigma=None,
+        sigma_cutoff=None,
+        sigma_index=None,
+        is_reducible_collision_matrix=False,
+        filename=None,
+        log_level=0):
+    """Evaluate thermal conductivity at pinv cutoffs from LBTE solution
+
+    Eigensolution of collision matrix written with write_LBTE_solution in
+    unitary-*.hdf5 and coleigs-*.hdf5 is reused. X is reconstructed from
+    group velocities and mode heat capacities in kappa-*.hdf5. Eigenvectors
+    memory-mapped to the file are read block by block only once, and Y
+    for all pinv cutoffs is accumulated from each block.
+
+    Parameters
+    ----------
+    pinv_cutoffs : array_like
+        Cutoffs of absolute values of eigenvalues of collision matrix in
+        pseudo-inversion.
+    mesh : array_like
+        Mesh numbers used in the file names.
+    rotations_cartesian : array_like
+        Point group operations in Cartesian coordinates used in the kappa
+        calculation.
+        shape=(rotations, 3, 3), dtype='double'
+    sigma, sigma_cutoff, filename :
+        Used in the file names.
+    sigma_index : int, optional
+        Index of sigma in the sigmas of the calculation. This is used to
+        read unitary-*.hdf5 written by older versions, which contains
+        eigenvectors of all sigmas.
+    is_reducible_collision_matrix : bool, optional
+        Whether the LBTE solution is of reducible collision matrix.
+
+    Returns
+    -------
+    dict
+        'temperature' : ndarray
+            shape=(temperatures, )
+        'kappa' : ndarray
+            shape=(pinv_cutoffs, temperatures, 6)
+        'mode_kappa' : ndarray
+            shape=(pinv_cutoffs, temperatures, grid_points, num_band, 6)
+        'mean_free_path' : ndarray
+            shape=(pinv_cutoffs, temperatures, grid_points, num_band, 3)
+        'num_eigenvalues' : ndarray
+            Numbers of eigenvalues included in pseudo-inversion.
+            shape=(pinv_cutoffs, temperatures), dtype='int_'
+
+    """
+    kappa_data = read_kappa_from_hdf5(
+        mesh,
+        sigma=sigma,
+        sigma_cutoff=sigma_cutoff,
+        filename=filename,
+        keys=('temperature', 'weight', 'group_velocity', 'heat_capacity',
+              'kappa_unit_conversion'),
+        verbose=log_level)
+    coleigs_data = read_collision_eigenvalues_from_hdf5(
+        mesh,
+        sigma=sigma,
+        sigma_cutoff=sigma_cutoff,
+        filename=filename,
+        verbose=log_level)
+    unitary_data = read_unitary_matrix_from_hdf5(mesh,
+                                                 sigma=sigma,
+                                                 sigma_cutoff=sigma_cutoff,
+                                                 sigma_index=sigma_index,
+                                                 filename=filename,
+                                                 verbose=log_level)
+    if kappa_data is None or coleigs_data is None or unitary_data is None:
+        raise RuntimeError("LBTE solution is not found.")
+
+    temperatures = kappa_data['temperature']
+    gv = kappa_data['group_velocity']
+    cv = kappa_data['heat_capacity']
+    conversion_factor = kappa_data['kappa_unit_conversion']
+    num_grid_points, num_band = gv.shape[:2]
+    # Weights are those given by Conductivity_LBTE._get_weights.
+    if is_reducible_collision_matrix:
+        weights = np.ones(num_grid_points, dtype='double')
+        N = num_grid_points
+    else:
+        weights = np.sqrt(kappa_data['weight'] / len(rotations_cartesian))
+        N = kappa_data['weight'].sum()
+    collision_eigenvalues = coleigs_data[0]
+    unitary_matrix, solver, _ = unitary_data
+    size = collision_eigenvalues.shape[-1]
+    unitary_matrix = unitary_matrix.reshape(len(temperatures), size, size)
+
+    _pinv_cutoffs = np.array(pinv_cutoffs, dtype='double').ravel()
+    shape = (len(_pinv_cutoffs), len(temperatures))
+    kappa = np.zeros(shape + (6, ), dtype='double', order='C')
+    mode_kappa = np.zeros(shape + (num_grid_points, num_band, 6),
+                          dtype='double', order='C')
+    mfp = np.zeros(shape + (num_grid_points, num_band, 3),
+                   dtype='double', order='C')
+    num_eigenvalues = np.zeros(shape, dtype='int_')
+
+    for k, t in enumerate(temperatures):
+        if t <= 0:
+            continue
+        w = collision_eigenvalues[k]
+        num_eigenvalues[:, k] = [(np.abs(w) > c).sum() for c in _pinv_cutoffs]
+        # X = v * sqrt(C_v / k_B) / 2T is equivalent to that by
+        # Conductivity_LBTE._get_X.
+        X = (gv * (weights * np.sqrt(cv[k].T / Kb)).T[:, :, None]
+             / (2 * t)).reshape(-1, 3)
+        if is_reducible_collision_matrix:
+            Ys = _get_Y_at_pinv_cutoffs(unitary_matrix[k], w, X,
+                                        _pinv_cutoffs, solver)
+        else:
+            Ys = _get_Y_at_pinv_cutoffs(unitary_matrix[k], w, X.ravel(),
+                                        _pinv_cutoffs, solver)
+        for i, Y in enumerate(Ys):
+            mode_kappa[i, k] = _get_mode_kappa(
+                X, Y.reshape(-1, 3), rotations_cartesian, num_band)
+            mode_kappa[i, k] *= conversion_factor * Kb * t ** 2
+            if is_reducible_collision_matrix:
+                mode_kappa[i, k] /= len(rotations_cartesian)
+            kappa[i, k] = mode_kappa[i, k].sum(axis=0).sum(axis=0) / N
+
+            # Same as Conductivity_LBTE._set_mean_free_path.
+            f_vectors = ((Y / 2).reshape(num_grid_points, num_band * 3).T
+                         / weights).T.reshape(num_grid_points, num_band, 3)
+            cv_k = cv[k][:, :, None]
+            mfp[i, k] = np.where(
+                cv_k < 1e-10, 0,
+                - 2 * t * np.sqrt(Kb / np.where(cv_k < 1e-10, 1, cv_k))
+                * f_vectors / (2 * np.pi))
+
+        if log_level:
+            print("Thermal conductivity (W/m-k) at %.1f K" % t)
+            print("%9s %9s" % ("cutoff", "num_eig") +
+                  ("%11s" * 6) % ("xx", "yy", "zz", "yz", "xz", "xy"))
+            for i, c in enumerate(_pinv_cutoffs):
+                print(("%9.1e %9d" + " %10.3f" * 6) %
+                      ((c, num_eigenvalues[i, k]) + tuple(kappa[i, k])))
+            sys.stdout.flush()
+
+    return {'temperature': temperatures,
+            'kappa': kappa,
+            'mode_kappa': mode_kappa,
+            'mean_free_path': mfp,
+            'num_eigenvalues': num_eigenvalues}
+
+
+def _get_Y_at_pinv_cutoffs(unitary_matrix, w, X, pinv_cutoffs, solver):
+    r"""Y = (\Omega^-1, X) for pinv cutoffs
+
+    Eigenvectors are stored in rows of unitary matrix with solvers 1, 2,
+    4, and 5, and in columns with solver 3. Contributions of each
+    eigenvector to Y differ between pinv cutoffs only by whether it is
+    included or not. Therefore Y for all cutoffs are accumulated from a
+    block of eigenvectors by a matrix product.
+
+    Returns
+    -------
+    ndarray
+        shape=(pinv_cutoffs, ) + X.shape, dtype='double'
+
+    """
+    size = len(w)
+    _X = X.reshape(size, -1)
+    Ys = np.zeros((len(pinv_cutoffs), ) + _X.shape, dtype='double')
+    num_columns = max(1, (1 << 22) // size)
+    for i in range(0, size, num_columns):
+        if solver in [1, 2, 4, 5]:
+            v = np.array(unitary_matrix[i:(i + num_columns)],
+                         dtype='double').T
+        else:
+            v = np.array(unitary_matrix[:, i:(i + num_columns)],
+                         dtype='double')
+        w_block = w[i:(i + num_columns)]
+        is_included = np.abs(w_block) > pinv_cutoffs[:, None]
+        e = np.where(is_included, 1 / np.where(is_included, w_block, 1), 0)
+        c = np.dot(v.T, _X)
+        for j in range(_X.shape[1]):
+            Ys[:, :, j] += np.dot(e * c[:, j], v.T)
+    return Ys.reshape((len(pinv_cutoffs), ) + X.shape)
+
+
+def _get_mode_kappa(X, Y, rotations_cartesian, num_band):
+    """Return mode kappa without unit conversion
+
+    This is vectorized Conductivity_LBTE._set_mode_kappa.
+
+    """
+    sum_k = np.einsum('rai,nij,rbj->nab',
+                      rotations_cartesian,
+                      np.einsum('ni,nj->nij', X, Y),
+                      rotations_cartesian)
+    sum_k = sum_k + sum_k.transpose(0, 2, 1)
+    # Do not consider three lowest modes at Gamma-point
+    sum_k[:3] = 0
+    elems = ((0, 0), (1, 1), (2, 2), (1, 2), (0, 2), (0, 1))
+    mode_kappa = np.array([sum_k[:, a, b] for a, b in elems]).T
+    return mode_kappa.reshape(-1, num_band, 6)
+
+
 def _write_collision(lbte,
                      interaction,
                      i=None,
                      is_reducible_collision_matrix=False,
                      is_one_gp_colmat=False,
+                     use_collision_store=False,
                      filename=None):
     grid_points = lbte.get_grid_points()
     temperatures = lbte.temperatures
@@ -200,7 +443,24 @@ def _write_collision(lbte,
                 igp = interaction.bz_grid.bzg2grg[gp]
             else:
                 igp = i
-        if all_bands_exist(interaction):
+        if use_collision_store:
+            for j, sigma in enumerate(sigmas):
+                if gamma_isotope is not None:
+                    gamma_isotope_at_sigma = gamma_isotope[j, igp]
+                else:
+                    gamma_isotope_at_sigma = None
+                write_collision_to_store(
+                    temperatures,
+                    mesh,
+                    gamma[j, :, igp],
+                    collision_matrix[j, :, igp],
+                    gp,
+                    interaction.band_indices,
+                    gamma_isotope=gamma_isotope_at_sigma,
+                    sigma=sigma,
+                    sigma_cutoff=sigma_cutoff,
+                    filename=filename)
+        elif all_bands_exist(interaction):
             for j, sigma in enumerate(sigmas):
                 if gamma_isotope is not None:
                     gamma_isotope_at_sigma = gamma_isotope[j, igp]
@@ -332,7 +592,7 @@ def _write_kappa(lbte,
                         write_unitary_matrix_to_hdf5(
                             temperatures,
                             mesh,
-                            unitary_matrix=unitary_matrix,
+                            unitary_matrix=unitary_matrix[i],
                             sigma=sigma,
                             sigma_cutoff=sigma_cutoff,
                             solver=solver,
@@ -387,6 +647,28 @@ def _set_collision_from_file(lbte,
                 collision_matrix.append(colmat_at_sigma)
                 gamma.append(gamma_at_sigma)
             read_from = "full_matrix"
+            continue
+
+        collisions = read_collision_from_store(
+            mesh,
+            _get_collision_store_rows(bz_grid,
+                                      grid_points,
+                                      is_reducible_collision_matrix),
+            _get_num_collision_matrix_rows(mesh,
+                                           grid_points,
+                                           is_reducible_collision_matrix),
+            indices=indices,
+            sigma=sigma,
+            sigma_cutoff=sigma_cutoff,
+            filename=filename,
+            verbose=(log_level > 0))
+        if log_level:
+            sys.stdout.flush()
+
+        if collisions:
+            (colmat_at_sigma,
+             gamma_at_sigma,
+             temperatures) = collisions
         else:
             vals = _allocate_collision(True,
                                        mesh,
@@ -418,46 +700,43 @@ def _set_collision_from_file(lbte,
                               "doesn't exist." % (grid_points[0], 1))
                     return False
 
-            for i, gp in enumerate(grid_points):
-                if not _collect_collision_gp(colmat_at_sigma,
-                                             gamma_at_sigma,
-                                             temperatures,
-                                             mesh,
-                                             sigma,
-                                             sigma_cutoff,
-                                             i,
-                                             gp,
-                                             bz_grid.bzg2grg,
-                                             indices,
-                                             is_reducible_collision_matrix,
-                                             filename,
-                                             log_level):
-                    num_band = colmat_at_sigma.shape[3]
-                    for j in range(num_band):
-                        if not _collect_collision_band(
-                                colmat_at_sigma,
-                                gamma_at_sigma,
-                                temperatures,
-                                mesh,
-                                sigma,
-                                sigma_cutoff,
-                                i,
-                                gp,
-                                bz_grid.bzg2grg,
-                                j,
-                                indices,
-                                is_reducible_collision_matrix,
-                                filename,
-                                log_level):
-                            return False
-
-            if len(sigmas) == 1:
-                gamma = gamma_at_sigma
-                collision_matrix = colmat_at_sigma
+            if is_reducible_collision_matrix:
+                rows = bz_grid.bzg2grg[grid_points]
             else:
-                gamma.append(gamma_at_sigma[0])
-                collision_matrix.append(colmat_at_sigma[0])
-            read_from = "grid_points"
+                rows = np.arange(len(grid_points))
+            kwargs_list = [{'colmat_at_sigma': colmat_at_sigma,
+                            'gamma_at_sigma': gamma_at_sigma,
+                            'mesh': mesh,
+                            'sigma': sigma,
+                            'sigma_cutoff': sigma_cutoff,
+                            'igp': igp,
+                            'gp': gp,
+                            'indices': indices,
+                            'filename': filename}
+                           for igp, gp in zip(rows, grid_points)]
+            prefetcher = FilePrefetcher(_read_collision_gp, kwargs_list)
+            try:
+                for i, gp in enumerate(grid_points):
+                    temps_at_gp = prefetcher.get(i)
+                    if temps_at_gp is None:
+                        if log_level:
+                            print("Collisions at grid point %d were not "
+                                  "found." % gp)
+                        return False
+                    temperatures[:] = temps_at_gp
+                    if log_level:
+                        print("Collisions at grid point %d were read." % gp)
+                        sys.stdout.flush()
+            finally:
+                prefetcher.shutdown()
+
+        if len(sigmas) == 1:
+            gamma = gamma_at_sigma
+            collision_matrix = colmat_at_sigma
+        else:
+            gamma.append(gamma_at_sigma[0])
+            collision_matrix.append(colmat_at_sigma[0])
+        read_from = "grid_points"
 
     if len(sigmas) > 1:
         temperatures = np.array(temperatures, dtype='double', order='C')
@@ -475,6 +754,31 @@ def _set_collision_from_file(lbte,
     return read_from
 
 
+def _get_collision_store_rows(bz_grid,
+                              grid_points,
+                              is_reducible_collision_matrix):
+    """Return rows of collision matrix of BZ grid points
+
+    -1 is set for grid points whose collisions are not read.
+
+    """
+    rows = np.full(len(bz_grid.addresses), -1, dtype='int_')
+    if is_reducible_collision_matrix:
+        rows[grid_points] = bz_grid.bzg2grg[grid_points]
+    else:
+        rows[grid_points] = np.arange(len(grid_points))
+    return rows
+
+
+def _get_num_collision_matrix_rows(mesh,
+                                   grid_points,
+                                   is_reducible_collision_matrix):
+    if is_reducible_collision_matrix:
+        return np.prod(mesh)
+    else:
+        return len(grid_points)
+
+
 def _allocate_collision(for_gps,
                         mesh,
                         sigma,
@@ -536,88 +840,51 @@ def _allocate_collision(for_gps,
     return colmat_at_sigma, gamma_at_sigma, temperatures
 
 
-def _collect_collision_gp(colmat_at_sigma,
-                          gamma_at_sigma,
-                          temperatures,
-                          mesh,
-                          sigma,
-                          sigma_cutoff,
-                          i,
-                          gp,
-                          bzg2grg,
-                          indices,
-                          is_reducible_collision_matrix,
-                          filename,
-                          log_level):
-    collision_gp = read_collision_from_hdf5(
-        mesh,
-        indices=indices,
-        grid_point=gp,
-        sigma=sigma,
-        sigma_cutoff=sigma_cutoff,
-        filename=filename,
-        verbose=(log_level > 0))
-    if log_level:
-        sys.stdout.flush()
-
-    if not collision_gp:
-        return False
-
-    (colmat_at_gp,
-     gamma_at_gp,
-     temperatures_at_gp) = collision_gp
-    if is_reducible_collision_matrix:
-        igp = bzg2grg[gp]
-    else:
-        igp = i
-    gamma_at_sigma[0, :, igp] = gamma_at_gp
-    colmat_at_sigma[0, :, igp] = colmat_at_gp[0]
-    temperatures[:] = temperatures_at_gp
-
-    return True
+def _read_collision_gp(colmat_at_sigma,
+                       gamma_at_sigma,
+                       mesh,
+                       sigma,
+                       sigma_cutoff,
+                       igp,
+                       gp,
+                       indices,
+                       filename):
+    """Read collisions at grid point from file of grid point or of bands
 
+    Returns
+    -------
+    ndarray or None
+        Temperatures. None is returned when any of the files is missing.
 
-def _collect_collision_band(colmat_at_sigma,
-                            gamma_at_sigma,
-                            temperatures,
-                            mesh,
-                            sigma,
-                            sigma_cutoff,
-                            i,
-                            gp,
-                            bzg2grg,
-                            j,
-                            indices,
-                            is_reducible_collision_matrix,
-                            filename,
-                            log_level):
-    collision_band = read_collision_from_hdf5(
-        mesh,
-        indices=indices,
-        grid_point=gp,
-        band_index=j,
-        sigma=sigma,
-        sigma_cutoff=sigma_cutoff,
-        filename=filename,
-        verbose=(log_level > 0))
-    if log_level:
-        sys.stdout.flush()
-
-    if collision_band is False:
-        return False
-
-    (colmat_at_band,
-     gamma_at_band,
-     temperatures_at_band) = collision_band
-    if is_reducible_collision_matrix:
-        igp = bzg2grg[gp]
-    else:
-        igp = i
-    gamma_at_sigma[0, :, igp, j] = gamma_at_band
-    colmat_at_sigma[0, :, igp, j] = colmat_at_band[0]
-    temperatures[:] = temperatures_at_band
+    """
+    temperatures = read_collision_into_arrays(colmat_at_sigma,
+                                              gamma_at_sigma,
+                                              np.s_[0, :, igp],
+                                              mesh,
+                                              indices=indices,
+                                              grid_point=gp,
+                                              sigma=sigma,
+                                              sigma_cutoff=sigma_cutoff,
+                                              filename=filename)
+    if temperatures is not None:
+        return temperatures
+
+    num_band = colmat_at_sigma.shape[3]
+    for j in range(num_band):
+        temperatures = read_collision_into_arrays(colmat_at_sigma,
+                                                  gamma_at_sigma,
+                                                  np.s_[0, :, igp, j],
+                                                  mesh,
+                                                  indices=indices,
+                                                  grid_point=gp,
+                                                  band_index=j,
+                                                  sigma=sigma,
+                                                  sigma_cutoff=sigma_cutoff,
+                                                  filename=filename)
+        if temperatures is None:
+            return None
 
-    return True
+    return temperatures
 
 
 def _select_solver(pinv_solver):
@@ -765,6 +1032,370 @@ def diagonalize_collision_matrix(collision_matrices,
     return w
 
 
+def diagonalize_collision_matrix_by_site_symmetry(
+        collision_matrices,
+        basis,
+        dims,
+        i_sigma=0,
+        i_temp=0,
+        pinv_solver=0,
+        log_level=0):
+    """Diagonalize ir collision matrix in symmetry adapted basis
+
+    At an ir-grid-point whose site-symmetry group G is not trivial, the
+    collision matrix only acts on the Cartesian subspace invariant under G,
+    i.e., the range of the projector sum_{R in G} R / |G|, and the rows
+    and columns of the other Cartesian directions decouple. The collision
+    matrix is transformed to the orthonormal basis given by the
+    eigenvectors of these projectors and only the block of the invariant
+    subspaces, which couples to group velocities, is diagonalized. The
+    eigenvectors are transformed back and the decoupled directions are
+    appended as eigenvectors of eigenvalue zero. Eigenvalues are sorted in
+    ascending order.
+
+    Note
+    ----
+    collision_matricies is overwritten by eigenvectors in the same layout
+    as that by ``diagonalize_collision_matrix`` with the same solver.
+
+    Parameters
+    ----------
+    collision_matrices : ndarray
+        Ir collision matrix.
+        shape=(sigmas, temperatures, ir_grid_points, num_band, 3,
+               ir_grid_points, num_band, 3), dtype='double', order='C'
+    basis : ndarray
+        Orthonormal basis of Cartesian coordinates at ir-grid-points as
+        column vectors. The first dims vectors span the invariant subspace.
+        shape=(ir_grid_points, 3, 3), dtype='double'
+    dims : ndarray
+        Dimensions of invariant subspaces at ir-grid-points.
+        shape=(ir_grid_points, ), dtype='int_'
+
+    Returns
+    -------
+    w : ndarray
+        Eigenvalues.
+        shape=(size_of_collision_matrix,), dtype='double'
+
+    """
+    shape = collision_matrices.shape
+    num_gp, num_band = shape[2:4]
+    size = num_gp * num_band * 3
+    col_mat = collision_matrices[i_sigma, i_temp].reshape(
+        num_gp, num_band, 3, size)
+
+    # Indices of invariant subspaces in symmetry adapted coordinates
+    is_inv = np.repeat(np.arange(3)[None, :] < np.array(dims)[:, None],
+                       num_band, axis=0).reshape(num_gp, num_band, 3)
+    sel = np.nonzero(is_inv.ravel())[0]
+    size_red = len(sel)
+
+    if log_level:
+        print("Size of collision matrix in symmetry adapted basis: "
+              "%d / %d" % (size_red, size))
+
+    colmat_red = np.zeros((size_red, size_red), dtype='double', order='C')
+    i_row = 0
+    for i in range(num_gp):
+        if dims[i] == 0:
+            continue
+        rows = np.einsum('ax,bak->bxk',
+                         basis[i, :, :dims[i]],
+                         col_mat[i]).reshape(-1, num_gp, num_band, 3)
+        rows = np.einsum('rjba,jay->rjby', rows, basis)
+        colmat_red[i_row:(i_row + len(rows))] = rows.reshape(
+            len(rows), -1)[:, sel]
+        i_row += len(rows)
+
+    w_red = diagonalize_collision_matrix(colmat_red,
+                                         pinv_solver=pinv_solver,
+                                         log_level=log_level)
+    solver = _select_solver(pinv_solver)
+    if solver in [1, 2, 4, 5]:
+        v_red = colmat_red.T
+    else:
+        v_red = colmat_red
+
+    # Eigenvectors in symmetry adapted coordinates are transformed back
+    # grid point by grid point. Columns are ordered by eigenvalues.
+    w = np.zeros(size, dtype='double')
+    w[:size_red] = w_red
+    order = np.argsort(w, kind='stable')
+    w = w[order]
+    cols = np.empty(size, dtype='int_')
+    cols[order] = np.arange(size)
+    cols_red = cols[:size_red]
+    cols_zero = cols[size_red:]
+
+    col_mat = collision_matrices[i_sigma, i_temp].reshape(size, size)
+    if solver in [1, 2, 4, 5]:
+        v = col_mat.T
+    else:
+        v = col_mat
+    v[:] = 0
+    i_row = 0
+    i_zero = 0
+    for i in range(num_gp):
+        for j in range(num_band):
+            adrs = (i * num_band + j) * 3
+            v[adrs:(adrs + 3), cols_red] = np.dot(
+                basis[i, :, :dims[i]], v_red[i_row:(i_row + dims[i])])
+            i_row += dims[i]
+            for k in range(dims[i], 3):
+                v[adrs:(adrs + 3), cols_zero[i_zero]] = basis[i, :, k]
+                i_zero += 1
+
+    return w
+
+
+def solve_collision_matrix_by_relaxons(collision_matrix,
+                                       X,
+                                       blocks,
+                                       num_relaxons,
+                                       tolerance=1.0e-5,
+                                       max_iterations=1000,
+                                       log_level=0):
+    """Solve (Omega, Y) = X by relaxons of the smallest eigenvalues
+
+    Eigenpairs of the smallest num_relaxons eigenvalues of ir collision
+    matrix are computed by LOBPCG with Jacobi preconditioner, and the
+    remainder is approximated by diagonal part of collision matrix in the
+    complement of the relaxons, i.e.,
+
+        Y = V W^-1 V^T X + Q D^-1 Q X,  Q = 1 - V V^T,
+
+    where V and W are the relaxons and their eigenvalues, and D is
+    diagonal part of collision matrix. This is exact when all relaxons are
+    included and is RTA-like when no relaxon is included. The problem is
+    solved in the orthonormal basis of ir-grid-points given by blocks,
+    which excludes null space of collision matrix from site-symmetries and
+    degeneracy averaging so that the smallest eigenvalues are non-zero.
+
+    Parameters
+    ----------
+    collision_matrix : ndarray
+        Ir collision matrix at a sigma and a temperature.
+        shape=(ir_grid_points, num_band, 3, ir_grid_points, num_band, 3),
+        dtype='double'
+    X : ndarray
+        shape=(ir_grid_points * num_band * 3, ), dtype='double'
+    blocks : list of ndarray
+        Orthonormal basis vectors at ir-grid-points as columns.
+        shape=(num_band * 3, basis vectors) for each ir-grid-point
+    num_relaxons : int
+        Number of relaxons.
+    tolerance : float, optional
+        Tolerance of residual norms of LOBPCG relative to the smallest
+        diagonal element of collision matrix in the basis.
+    max_iterations : int, optional
+        Maximum number of LOBPCG iterations.
+
+    Returns
+    -------
+    Y : ndarray
+        shape=(ir_grid_points * num_band * 3, ), dtype='double'
+    w : ndarray
+        Eigenvalues of relaxons in ascending order.
+        shape=(num_relaxons, ), dtype='double'
+    v : ndarray
+        Relaxons as column vectors.
+        shape=(ir_grid_points * num_band * 3, num_relaxons), dtype='double'
+
+    """
+    import scipy.sparse
+    import scipy.sparse.linalg
+
+    num_gp = collision_matrix.shape[0]
+    size = int(np.prod(collision_matrix.shape[:3]))
+    col_mat = collision_matrix.reshape(size, size)
+    P = scipy.sparse.block_diag(blocks, format='csr')
+    size_red = P.shape[1]
+
+    # Diagonal elements in the basis only need diagonal blocks of
+    # ir-grid-points.
+    block_size = size // num_gp
+    d = np.concatenate([
+        np.einsum('ij,ik,kj->j',
+                  b,
+                  col_mat[(i * block_size):((i + 1) * block_size),
+                          (i * block_size):((i + 1) * block_size)],
+                  b) for i, b in enumerate(blocks)])
+    _num_relaxons = min(num_relaxons, size_red)
+
+    start = time.time()
+    if _num_relaxons == 0:
+        w = np.zeros(0, dtype='double')
+        v = np.zeros((size_red, 0), dtype='double')
+    elif 5 * _num_relaxons > size_red:
+        # LOBPCG is not suitable for relatively many eigenpairs.
+        if log_level:
+            sys.stdout.write("Diagonalizing collision matrix in reduced "
+                             "basis (%d) by numpy.linalg.eigh... " %
+                             size_red)
+            sys.stdout.flush()
+        col_mat_red = P.T.dot(P.T.dot(col_mat.T).T)
+        w, v = np.linalg.eigh((col_mat_red + col_mat_red.T) / 2)
+        w = w[:_num_relaxons]
+        v = v[:, :_num_relaxons]
+    else:
+        if log_level:
+            sys.stdout.write("Computing %d relaxons in reduced basis (%d) by "
+                             "LOBPCG... " % (_num_relaxons, size_red))
+            sys.stdout.flush()
+
+        def apply_colmat(x):
+            return P.T.dot(np.dot(col_mat, P.dot(x)))
+
+        def apply_precond(x):
+            return (x.reshape(size_red, -1) / d[:, None]).reshape(x.shape)
+
+        A = scipy.sparse.linalg.LinearOperator(
+            (size_red, size_red), matvec=apply_colmat, matmat=apply_colmat,
+            dtype='double')
+        M = scipy.sparse.linalg.LinearOperator(
+            (size_red, size_red), matvec=apply_precond,
+            matmat=apply_precond, dtype='double')
+        v0 = np.random.default_rng(0).standard_normal(
+            (size_red, _num_relaxons))
+        w, v = scipy.sparse.linalg.lobpcg(A, v0, M=M,
+                                          largest=False,
+                                          tol=tolerance * d.min(),
+                                          maxiter=max_iterations)
+        order = np.argsort(w)
+        w = w[order]
+        v = v[:, order]
+    if log_level:
+        print("[%.3fs]" % (time.time() - start))
+        sys.stdout.flush()
+
+    X_red = P.T.dot(X)
+    c = np.dot(v.T, X_red)
+    R = X_red - np.dot(v, c)
+    R /= d
+    R -= np.dot(v, np.dot(v.T, R))
+    Y = P.dot(np.dot(v, c / w) + R)
+
+    return Y, w, P.dot(v)
+
+
+def solve_collision_matrix_by_iterative_refinement(collision_matrix,
+                                                   X,
+                                                   pinv_cutoff=1.0e-8,
+                                                   tolerance=1.0e-10,
+                                                   max_iterations=20,
+                                                   log_level=0):
+    """Solve (Omega, Y) = X in mixed precision
+
+    A copy of collision matrix in single precision is diagonalized in
+    place by ssyev, and the solution by its pseudo-inverse is refined by
+    residuals computed in double precision, where rows of collision matrix
+    are converted to double precision block by block. Since collision
+    matrix is kept to compute residuals, peak memory is that of two single
+    precision matrices, i.e., the same as diagonalizing collision matrix in
+    double precision in place by dsyev.
+
+    Parameters
+    ----------
+    collision_matrix : ndarray
+        Collision matrix. shape=(size, size), dtype='single'
+    X : ndarray
+        shape=(size, ) or (size, num_rhs), dtype='double'
+    pinv_cutoff : float, optional
+        Eigenvalues whose absolute values are smaller than this value are
+        excluded from pseudo-inverse.
+    tolerance : float, optional
+        Refinement stops when norm of correction becomes smaller than this
+        value times norm of solution, or when norm of correction is not
+        reduced to less than half of the previous one.
+    max_iterations : int, optional
+        Maximum number of refinement steps.
+
+    Returns
+    -------
+    Y : ndarray
+        Solution with the same shape as X, dtype='double'
+    w : ndarray
+        Eigenvalues. shape=(size, ), dtype='double'
+    num_iterations : int
+        Number of refinement steps.
+
+    """
+    import scipy.linalg
+
+    start = time.time()
+    if log_level:
+        sys.stdout.write("Diagonalizing by scipy.linalg.eigh in single "
+                         "precision... ")
+        sys.stdout.flush()
+    # Collision matrix is symmetric, so its transpose in Fortran order is
+    # passed to be overwritten by eigenvectors without further copy.
+    # ssyevd is avoided because its workspace is twice the matrix.
+    v = np.array(collision_matrix, dtype='single', order='C')
+    w, v = scipy.linalg.eigh(v.T, driver='ev', overwrite_a=True,
+                             check_finite=False)
+    w = np.array(w, dtype='double')
+    e = np.zeros_like(w)
+    e[np.abs(w) > pinv_cutoff] = 1 / w[np.abs(w) > pinv_cutoff]
+    e = e.astype('single')
+    if log_level:
+        print("[%.3fs]" % (time.time() - start))
+        sys.stdout.flush()
+
+    def apply_pinv(r):
+        vr = np.dot(v.T, r.astype('single'))
+        return np.dot(v, (e * vr.T).T).astype('double')
+
+    start = time.time()
+    if log_level:
+        sys.stdout.write("Refining solution by residuals in double "
+                         "precision... ")
+        sys.stdout.flush()
+    Y = apply_pinv(X)
+    num_rows = max(1, (1 << 22) // len(collision_matrix))
+    num_steps = 0
+    dY_norm_prev = None
+    for _ in range(max_iterations):
+        R = np.array(X, dtype='double')
+        for i in range(0, len(collision_matrix), num_rows):
+            R[i:(i + num_rows)] -= np.dot(
+                collision_matrix[i:(i + num_rows)].astype('double'), Y)
+        dY = apply_pinv(R)
+        dY_norm = np.linalg.norm(dY)
+        # Residual in null space of collision matrix is not reduced, and
+        # its leak through eigenvectors in single precision stops the
+        # corrections decreasing.
+        if dY_norm_prev is not None and dY_norm > 0.5 * dY_norm_prev:
+            break
+        Y += dY
+        num_steps += 1
+        if dY_norm <= tolerance * np.linalg.norm(Y):
+            break
+        dY_norm_prev = dY_norm
+    if log_level:
+        print("[%.3fs]" % (time.time() - start))
+        print("Number of refinement steps: %d" % num_steps)
+        sys.stdout.flush()
+
+    return Y, w, num_steps
+
+
+def _run_collision_matrix_worker(lbte, arrays, grid_point_indices):
+    """Compute collision matrix rows at grid points in worker process
+
+    arrays : dict
+        Attribute names of Conductivity_LBTE and file names, dtypes, and
+        shapes of arrays memory-mapped to the files to be written in.
+
+    """
+    for name, (filename, dtype, shape) in arrays.items():
+        setattr(lbte, name, np.memmap(filename, dtype=dtype, mode='r+',
+                                      shape=shape))
+    lbte._run_collision_matrix_at_grid_points(grid_point_indices)
+    for name in arrays:
+        getattr(lbte, name).flush()
+
+
 class Conductivity_LBTE(Conductivity):
     def __init__(self,
                  interaction,
@@ -784,7 +1415,63 @@ class Conductivity_LBTE(Conductivity):
                  pp_filename=None,
                  pinv_cutoff=1.0e-8,
                  pinv_solver=0,
+                 is_symmetry_adapted_basis=False,
+                 mpi_comm=None,
+                 num_processes=None,
+                 is_mixed_precision=False,
+                 num_relaxons=None,
                  log_level=0):
+        """Init method.
+
+        Parameters
+        ----------
+        is_symmetry_adapted_basis : bool, optional
+            With True, ir collision matrix is diagonalized in the basis
+            adapted to site-symmetries of ir-grid-points, where only the
+            block coupling to group velocities is diagonalized. See
+            diagonalize_collision_matrix_by_site_symmetry. This
+            is not supported by reducible collision matrix. Default is
+            False.
+        mpi_comm : mpi4py.MPI.Comm, optional
+            With MPI communicator, rows of ir collision matrix are
+            distributed over ranks in contiguous blocks of ir-grid-points.
+            Each rank computes collisions only at its grid points, and the
+            linearized BTE is solved by conjugate gradient method on the
+            distributed collision matrix, so that the full collision matrix
+            is never stored in a rank. Collision eigenvalues are not
+            computed in this mode, therefore pinv_cutoff is not applied and
+            has to be left at the default value. Instead, the conjugate
+            gradient solution has no component in the null space of the
+            collision matrix, which is the pseudo-inverse solution without
+            cutoff. Only log of rank 0 is shown. Default is None.
+        num_processes : int, optional
+            With number of processes, collision matrix rows at all grid
+            points are computed by this number of worker processes before
+            iterating over grid points. Each worker computes every
+            num_processes-th grid point and writes the rows and gamma into
+            arrays memory-mapped to temporary files in tempfile.gettempdir(),
+            which can be set by TMPDIR, e.g., to /dev/shm. Symmetrization
+            and solution are run by this process. Workers are spawned, so a
+            script has to be guarded by if __name__ == '__main__', and
+            number of OpenMP threads of each worker is given by
+            OMP_NUM_THREADS. Default is None.
+        is_mixed_precision : bool, optional
+            With True, ir collision matrix is stored in single precision,
+            and LBTE is solved by its eigensolution in single precision
+            with iterative refinement by residuals in double precision. See
+            solve_collision_matrix_by_iterative_refinement. Default is
+            False.
+        num_relaxons : int, optional
+            Only with solve_collective_phonon for ir collision matrix. When
+            given, instead of full diagonalization, only this number of
+            relaxons of the smallest non-zero eigenvalues are computed by
+            LOBPCG, and the rest is approximated by diagonal part of
+            collision matrix. See solve_collision_matrix_by_relaxons.
+            Eigenvalues and kappa contributions of the relaxons are
+            obtained by get_relaxon_eigenvalues and get_relaxon_kappa.
+            Default is None.
+
+        """
         self._pp = None
         self._temperatures = None
         self._sigmas = None
@@ -835,6 +1522,18 @@ class Conductivity_LBTE(Conductivity):
 
         self._collision_eigenvalues = None
 
+        self._comm = mpi_comm
+        self._num_processes = num_processes
+        self._is_mixed_precision = is_mixed_precision
+        self._num_relaxons = num_relaxons
+        self._relaxon_eigenvalues = None
+        self._relaxon_kappa = None
+        self._relaxon_basis_blocks = None
+        self._row_grid_point_ranges = None
+        self._colmat_row_offset = 0
+        if self._comm is not None and self._comm.Get_rank() > 0:
+            log_level = 0
+
         Conductivity.__init__(self,
                               interaction,
                               grid_points=grid_points,
@@ -858,12 +1557,58 @@ class Conductivity_LBTE(Conductivity):
         self._pp_filename = pp_filename
         self._pinv_cutoff = pinv_cutoff
         self._pinv_solver = pinv_solver
+        self._is_symmetry_adapted_basis = is_symmetry_adapted_basis
+        if (self._is_symmetry_adapted_basis and
+            self._is_reducible_collision_matrix):
+            raise RuntimeError(
+                "Symmetry adapted basis is not supported by reducible "
+                "collision matrix.")
 
         if grid_points is None:
             self._all_grid_points = True
         else:
             self._all_grid_points = False
 
+        if self._comm is not None:
+            if (self._is_reducible_collision_matrix or
+                not self._all_grid_points or
+                self._solve_collective_phonon or
+                self._is_symmetry_adapted_basis):
+                raise RuntimeError(
+                    "Only ir collision matrix at all grid points is "
+                    "supported with MPI.")
+            # Conjugate gradient method does not use eigenvalues, so
+            # pinv_cutoff can not be applied.
+            if self._pinv_cutoff != 1.0e-8:
+                raise RuntimeError(
+                    "pinv_cutoff can not be changed with MPI.")
+            self._row_grid_point_ranges = get_row_ranges(
+                len(self._ir_grid_points), self._comm.Get_size())
+            self._colmat_row_offset = self._row_grid_point_ranges[
+                self._comm.Get_rank()]
+
+        if self._is_mixed_precision:
+            if (self._is_reducible_collision_matrix or
+                self._comm is not None or
+                self._solve_collective_phonon or
+                self._is_symmetry_adapted_basis):
+                raise RuntimeError(
+                    "Mixed precision is supported only for ir collision "
+                    "matrix without MPI.")
+
+        if self._num_relaxons is not None:
+            if (self._is_reducible_collision_matrix or
+                not self._solve_collective_phonon):
+                raise RuntimeError(
+                    "num_relaxons is supported only with "
+                    "solve_collective_phonon for ir collision matrix.")
+
+        if self._num_processes is not None:
+            if self._comm is not None or not self._all_grid_points:
+                raise RuntimeError(
+                    "num_processes is supported only for collision matrix "
+                    "at all grid points without MPI.")
+
         if self._temperatures is not None:
             self._allocate_values()
 
@@ -873,11 +1618,15 @@ class Conductivity_LBTE(Conductivity):
             import sys
             sys.exit(1)
         else:
+            if self._comm is not None:
+                self._allreduce_local_values()
             weights = self._prepare_collision_matrix()
             self._set_kappa_at_sigmas(weights)
 
     def set_collision_matrix(self, collision_matrix):
-        self._collision_matrix = collision_matrix
+        self._collision_matrix = np.array(
+            collision_matrix, dtype=self._get_collision_matrix_dtype(),
+            order='C', copy=False)
 
     def get_f_vectors(self):
         return self._f_vectors
@@ -892,6 +1641,12 @@ class Conductivity_LBTE(Conductivity):
     def get_collision_eigenvalues(self):
         return self._collision_eigenvalues
 
+    def get_relaxon_eigenvalues(self):
+        return self._relaxon_eigenvalues
+
+    def get_relaxon_kappa(self):
+        return self._relaxon_kappa
+
     def get_mean_free_path(self):
         return self._mfp
 
@@ -918,7 +1673,10 @@ class Conductivity_LBTE(Conductivity):
         if not self._all_grid_points:
             self._collision_matrix[:] = 0
 
-        if not self._read_gamma:
+        if self._num_processes is not None and not self._read_gamma:
+            if i == 0:
+                self._run_collision_matrix_by_processes()
+        elif not self._read_gamma and self._is_local_grid_point(i):
             self._collision.set_grid_point(gp)
 
             if self._log_level:
@@ -941,6 +1699,85 @@ class Conductivity_LBTE(Conductivity):
         if self._log_level:
             self._show_log(i)
 
+    def _run_collision_matrix_by_processes(self):
+        """Compute collision matrix rows at all grid points by workers
+
+        Collision matrix, gamma, and averaged ph-ph interaction strength
+        are replaced by arrays memory-mapped to temporary files, which the
+        workers open and write into. The files are removed after the
+        workers finish, and the mappings stay valid in this process.
+
+        """
+        start = time.time()
+        if self._log_level:
+            print("Calculating collision matrix by %d processes..." %
+                  self._num_processes)
+            sys.stdout.flush()
+
+        names = ['_collision_matrix', '_gamma']
+        if self._averaged_pp_interaction is not None:
+            names.append('_averaged_pp_interaction')
+        lbte = copy.copy(self)
+        lbte._log_level = 0
+        arrays = {}
+        workers = []
+        try:
+            for name in names:
+                shape = getattr(self, name).shape
+                dtype = getattr(self, name).dtype.name
+                fd, filename = tempfile.mkstemp(prefix="phono3py-colmat-")
+                os.close(fd)
+                setattr(self, name, np.memmap(filename, dtype=dtype,
+                                              mode='w+', shape=shape))
+                setattr(lbte, name, None)
+                arrays[name] = (filename, dtype, shape)
+
+            ctx = multiprocessing.get_context('spawn')
+            workers = [
+                ctx.Process(target=_run_collision_matrix_worker,
+                            args=(lbte, arrays,
+                                  range(i, len(self._grid_points),
+                                        self._num_processes)))
+                for i in range(self._num_processes)]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+        finally:
+            for filename, _, _ in arrays.values():
+                os.remove(filename)
+
+        if any(worker.exitcode != 0 for worker in workers):
+            raise RuntimeError(
+                "Calculation of collision matrix by processes failed.")
+
+        if self._log_level:
+            print("Collision matrix was calculated by processes [%.3fs]" %
+                  (time.time() - start))
+            sys.stdout.flush()
+
+    def _run_collision_matrix_at_grid_points(self, grid_point_indices):
+        """Compute collision matrix rows in worker process"""
+        self._log_level = 0
+        for i in grid_point_indices:
+            self._collision.set_grid_point(self._grid_points[i])
+            self._set_collision_matrix_at_sigmas(i)
+            self.delete_gp_collision_and_pp()
+
+    def _get_collision_matrix_dtype(self):
+        if self._is_mixed_precision:
+            return 'single'
+        else:
+            return 'double'
+
+    def _is_local_grid_point(self, i):
+        """Return whether collision matrix row of grid point is in rank"""
+        if self._comm is None:
+            return True
+        rank = self._comm.Get_rank()
+        return (self._row_grid_point_ranges[rank] <= i <
+                self._row_grid_point_ranges[rank + 1])
+
     def _allocate_values(self):
         """Allocate arrays."""
         num_band0 = len(self._pp.band_indices)
@@ -1024,7 +1861,10 @@ class Conductivity_LBTE(Conductivity):
         """Allocate arrays for ir collision matrix."""
         num_ir_grid_points = len(self._ir_grid_points)
         num_grid_points = len(self._grid_points)
-        if self._all_grid_points:
+        if self._comm is not None:
+            num_stored_grid_points = np.diff(self._row_grid_point_ranges)[
+                self._comm.Get_rank()]
+        elif self._all_grid_points:
             num_stored_grid_points = num_grid_points
         else:
             num_stored_grid_points = 1
@@ -1048,13 +1888,20 @@ class Conductivity_LBTE(Conductivity):
                  num_temp,
                  num_stored_grid_points, num_band0, 3,
                  num_ir_grid_points, num_band, 3),
-                dtype='double', order='C')
+                dtype=self._get_collision_matrix_dtype(), order='C')
             self._collision_matrix[:] = 0
         self._collision_eigenvalues = np.zeros(
             (len(self._sigmas),
              num_temp,
              num_ir_grid_points * num_band * 3),
             dtype='double', order='C')
+        if self._num_relaxons is not None:
+            self._relaxon_eigenvalues = np.zeros(
+                (len(self._sigmas), num_temp, self._num_relaxons),
+                dtype='double', order='C')
+            self._relaxon_kappa = np.zeros(
+                (len(self._sigmas), num_temp, self._num_relaxons, 6),
+                dtype='double', order='C')
 
     def _set_collision_matrix_at_sigmas(self, i):
         """Calculate collision matrices at grid point
@@ -1081,13 +1928,7 @@ class Conductivity_LBTE(Conductivity):
             self._collision.set_integration_weights()
 
             if self._read_pp:
-                pp, _g_zero = read_pp_from_hdf5(
-                    self._pp.mesh_numbers,
-                    grid_point=self._grid_points[i],
-                    sigma=sigma,
-                    sigma_cutoff=self._sigma_cutoff,
-                    filename=self._pp_filename,
-                    verbose=(self._log_level > 0))
+                pp, _g_zero = self._read_pp_at_sigma(i, j)
                 _, g_zero = self._collision.get_integration_weights()
                 if self._log_level:
                     if len(self._sigmas) > 1:
@@ -1120,25 +1961,22 @@ class Conductivity_LBTE(Conductivity):
                     i_data = 0
                 self._gamma[j, k, i_data] = (
                     self._collision.get_imag_self_energy())
-                self._collision_matrix[j, k, i_data] = (
-                   self._collision.get_collision_matrix())
+                self._collision_matrix[
+                    j, k, i_data - self._colmat_row_offset] = (
+                        self._collision.get_collision_matrix())
 
     def _prepare_collision_matrix(self):
         """Prepare collision matrix to be solved."""
         if self._is_reducible_collision_matrix:
             if self._is_kappa_star:
                 self._average_collision_matrix_by_degeneracy()
-                num_mesh_points = np.prod(self._pp.mesh_numbers)
-                num_rot = len(self._point_operations)
-                rot_grid_points = np.zeros(
-                    (num_rot, num_mesh_points), dtype='int_')
                 # Ir-grid points and rot_grid_points in generalized regular grid
                 ir_gr_grid_points = np.array(
                     self._bz_grid.bzg2grg[self._ir_grid_points], dtype='int_')
-                for i in range(num_mesh_points):
-                    rot_grid_points[:, i] = self._bz_grid.bzg2grg[
-                        get_grid_points_by_rotations(self._bz_grid.grg2bzg[i],
-                                                     self._bz_grid)]
+                rot_grid_points = np.array(
+                    self._bz_grid.bzg2grg[get_grid_points_by_rotations(
+                        self._bz_grid.grg2bzg, self._bz_grid)].T,
+                    dtype='int_', order='C')
                 self._expand_collisions(ir_gr_grid_points, rot_grid_points)
                 self._expand_local_values(ir_gr_grid_points, rot_grid_points)
             self._combine_reducible_collisions()
@@ -1147,7 +1985,9 @@ class Conductivity_LBTE(Conductivity):
         else:
             self._combine_collisions()
             weights = self._get_weights()
-            for i, w_i in enumerate(weights):
+            num_rows = self._collision_matrix.shape[2]
+            row_weights = weights[self._colmat_row_offset:][:num_rows]
+            for i, w_i in enumerate(row_weights):
                 for j, w_j in enumerate(weights):
                     self._collision_matrix[:, :, i, :, :, j, :, :] *= w_i * w_j
             self._average_collision_matrix_by_degeneracy()
@@ -1157,6 +1997,7 @@ class Conductivity_LBTE(Conductivity):
 
     def _set_kappa_at_sigmas(self, weights):
         """Calculate thermal conductivity"""
+        basis = None
         for j, sigma in enumerate(self._sigmas):
             if self._log_level:
                 text = "----------- Thermal conductivity (W/m-k) "
@@ -1171,13 +2012,33 @@ class Conductivity_LBTE(Conductivity):
                 if t > 0:
                     self._set_kappa_RTA(j, k, weights)
 
-                    w = diagonalize_collision_matrix(
-                        self._collision_matrix,
-                        i_sigma=j,
-                        i_temp=k,
-                        pinv_solver=self._pinv_solver,
-                        log_level=self._log_level)
-                    self._collision_eigenvalues[j, k] = w
+                    # Collision matrix distributed over ranks is solved
+                    # without diagonalization, that in mixed precision is
+                    # diagonalized in _get_Y, and only relaxons are
+                    # computed with num_relaxons.
+                    if (self._comm is None and
+                        not self._is_mixed_precision and
+                        self._num_relaxons is None):
+                        if self._is_symmetry_adapted_basis:
+                            if basis is None:
+                                basis, dims = (
+                                    self._get_symmetry_adapted_basis())
+                            w = diagonalize_collision_matrix_by_site_symmetry(
+                                self._collision_matrix,
+                                basis,
+                                dims,
+                                i_sigma=j,
+                                i_temp=k,
+                                pinv_solver=self._pinv_solver,
+                                log_level=self._log_level)
+                        else:
+                            w = diagonalize_collision_matrix(
+                                self._collision_matrix,
+                                i_sigma=j,
+                                i_temp=k,
+                                pinv_solver=self._pinv_solver,
+                                log_level=self._log_level)
+                        self._collision_eigenvalues[j, k] = w
 
                     self._set_kappa(j, k, weights)
 
@@ -1194,6 +2055,37 @@ class Conductivity_LBTE(Conductivity):
         if self._log_level:
             print('')
 
+    def _get_symmetry_adapted_basis(self):
+        """Return Cartesian basis adapted to site-symmetries of ir-grid-points
+
+        Returns
+        -------
+        basis : ndarray
+            Orthonormal basis as column vectors, where the first dims
+            vectors span the subspace invariant under site-symmetry group.
+            shape=(ir_grid_points, 3, 3), dtype='double'
+        dims : ndarray
+            Dimensions of the invariant subspaces.
+            shape=(ir_grid_points, ), dtype='int_'
+
+        """
+        rot_grid_points = get_grid_points_by_rotations(
+            self._ir_grid_points,
+            self._bz_grid,
+            reciprocal_rotations=self._point_operations)
+        bzg2grg = self._bz_grid.bzg2grg
+        is_site_sym = (bzg2grg[rot_grid_points] ==
+                       bzg2grg[self._ir_grid_points][:, None])
+        projectors = np.einsum('ir,rjk->ijk',
+                               is_site_sym,
+                               self._rotations_cartesian)
+        projectors /= is_site_sym.sum(axis=1)[:, None, None]
+        vals, vecs = np.linalg.eigh(projectors)
+        # Eigenvalues of projectors are either 0 or 1.
+        basis = np.array(vecs[:, :, ::-1], dtype='double', order='C')
+        dims = np.array(np.rint(vals.sum(axis=1)), dtype='int_')
+        return basis, dims
+
     def _combine_collisions(self):
         """Include diagonal elements into collision matrix."""
 
@@ -1201,6 +2093,9 @@ class Conductivity_LBTE(Conductivity):
         for j, k in list(np.ndindex(
                 (len(self._sigmas), len(self._temperatures)))):
             for i, ir_gp in enumerate(self._ir_grid_points):
+                if not self._is_local_grid_point(i):
+                    continue
+                i_data = i - self._colmat_row_offset
                 for r, r_gp in zip(
                         self._rotations_cartesian, self._rot_grid_points[i]):
                     if ir_gp != r_gp:
@@ -1209,7 +2104,8 @@ class Conductivity_LBTE(Conductivity):
                     main_diagonal = self._get_main_diagonal(i, j, k)
                     for l in range(num_band):
                         self._collision_matrix[
-                            j, k, i, l, :, i, l, :] += main_diagonal[l] * r
+                            j, k, i_data, l, :, i, l, :] += (
+                                main_diagonal[l] * r)
 
     def _combine_reducible_collisions(self):
         """Include diagonal elements into collision matrix."""
@@ -1226,55 +2122,118 @@ class Conductivity_LBTE(Conductivity):
                         j, k, i, l, i, l] += main_diagonal[l]
 
     def _expand_collisions(self, ir_gr_grid_points, rot_grid_points):
-        """Fill elements of full collision matrix by symmetry"""
+        """Fill elements of full collision matrix by symmetry
+
+        Collision matrix is expanded in place, so that memory mapped
+        collision matrix is not copied.
+
+        """
         start = time.time()
-        if self._log_level:
-            sys.stdout.write("- Expanding properties to all grid points ")
-            sys.stdout.flush()
 
         try:
             import phono3py._phono3py as phono3c
+            if self._log_level:
+                sys.stdout.write("- Expanding properties to all grid points "
+                                 "(built-in) ")
+                sys.stdout.flush()
             phono3c.expand_collision_matrix(self._collision_matrix,
                                             ir_gr_grid_points,
                                             rot_grid_points)
         except ImportError:
-            print("Phono3py C-routine is not compiled correctly.")
-            for i, ir_gp in enumerate(ir_gr_grid_points):
-                multi = (rot_grid_points[:, ir_gp] == ir_gp).sum()
-                colmat_irgp = self._collision_matrix[:, :, ir_gp, :, :, :].copy()
-                colmat_irgp /= multi
-                self._collision_matrix[:, :, ir_gp, :, :, :] = 0
-                for j, r in enumerate(self._rotations_cartesian):
-                    gp_r = rot_grid_points[j, ir_gp]
-                    for k in range(num_mesh_points):
-                        gp_c = rot_grid_points[j, k]
-                        self._collision_matrix[:, :, gp_r, :, gp_c, :] += (
-                            colmat_irgp[:, :, :, k, :])
+            if self._log_level:
+                sys.stdout.write("- Expanding properties to all grid points "
+                                 "(numpy) ")
+                sys.stdout.flush()
+            self._py_expand_collisions(ir_gr_grid_points, rot_grid_points)
 
         if self._log_level:
             print("[%.3fs]" % (time.time() - start))
             sys.stdout.flush()
 
-    def _expand_local_values(self, ir_gr_grid_points, rot_grid_points):
-        """Fill elements of local properties at grid points"""
-        for i, ir_gp in enumerate(ir_gr_grid_points):
-            gv_irgp = self._gv[ir_gp].copy()
-            self._gv[ir_gp] = 0
-            cv_irgp = self._cv[:, ir_gp, :].copy()
-            self._cv[:, ir_gp, :] = 0
-            gamma_irgp = self._gamma[:, :, ir_gp, :].copy()
-            self._gamma[:, :, ir_gp, :] = 0
+    def _py_expand_collisions(self, ir_gr_grid_points, rot_grid_points):
+        """Fill elements of full collision matrix by symmetry using numpy
+
+        Each row of rot_grid_points is a permutation of grid points, by
+        which a row block of an ir-grid-point is scattered at once.
+
+        """
+        colmat = self._collision_matrix
+        for ir_gp in ir_gr_grid_points:
             multi = (rot_grid_points[:, ir_gp] == ir_gp).sum()
-            if self._gamma_iso is not None:
-                gamma_iso_irgp = self._gamma_iso[:, ir_gp, :].copy()
-                self._gamma_iso[:, ir_gp, :] = 0
-            for j, r in enumerate(self._rotations_cartesian):
-                gp_r = rot_grid_points[j, ir_gp]
-                self._gamma[:, :, gp_r, :] += gamma_irgp / multi
-                if self._gamma_iso is not None:
-                    self._gamma_iso[:, gp_r, :] += gamma_iso_irgp / multi
-                self._gv[gp_r] += np.dot(gv_irgp, r.T) / multi
-                self._cv[:, gp_r, :] += cv_irgp / multi
+            colmat_irgp = colmat[:, :, ir_gp].copy()
+            colmat_irgp /= multi
+            colmat[:, :, ir_gp] = 0
+            for r_gps in rot_grid_points:
+                colmat_r = colmat[:, :, r_gps[ir_gp]]
+                colmat_r[:, :, :, r_gps, :] += colmat_irgp
+
+    def _expand_local_values(self, ir_gr_grid_points, rot_grid_points):
+        """Fill elements of local properties at grid points
+
+        Values are viewed as (slices, grid_points, elements) without copy.
+        Group velocities are rotated as Cartesian vectors.
+
+        """
+        num_mesh_points = rot_grid_points.shape[1]
+        values = [(self._gamma, None),
+                  (self._cv, None),
+                  (self._gv, self._rotations_cartesian)]
+        if self._gamma_iso is not None:
+            values.append((self._gamma_iso, None))
+
+        try:
+            import phono3py._phono3py as phono3c
+            for v, rotations in values:
+                if rotations is None:
+                    v_view = v.reshape(-1, num_mesh_points, v.shape[-1])
+                else:
+                    v_view = v.reshape(1, num_mesh_points, -1)
+                phono3c.expand_local_values(v_view,
+                                            rotations,
+                                            ir_gr_grid_points,
+                                            rot_grid_points)
+        except ImportError:
+            for v, rotations in values:
+                self._py_expand_local_values(
+                    v, ir_gr_grid_points, rot_grid_points, rotations)
+
+    def _py_expand_local_values(self, values, ir_gr_grid_points,
+                                rot_grid_points, rotations=None):
+        """Fill elements of a local property at grid points using numpy
+
+        Parameters
+        ----------
+        values : ndarray
+            Grid point axis is the second last or, when rotations are given,
+            the third last axis, i.e., (..., grid_points, num_band) or
+            (grid_points, num_band, 3).
+        rotations : ndarray or None
+            Cartesian rotation matrices applied to vectors.
+            shape=(rotations, 3, 3)
+
+        """
+        num_mesh_points = rot_grid_points.shape[1]
+        if rotations is None:
+            v = values.reshape(-1, num_mesh_points, values.shape[-1])
+        else:
+            v = values.reshape(1, num_mesh_points, -1)
+        multi = (rot_grid_points[:, ir_gr_grid_points] ==
+                 ir_gr_grid_points).sum(axis=0)
+        v_irgp = v[:, ir_gr_grid_points, :] / multi[None, :, None]
+        v[:, ir_gr_grid_points, :] = 0
+        num_slice, num_ir_gp, num_elem = v_irgp.shape
+        num_rot = len(rot_grid_points)
+        if rotations is None:
+            v_irgp = np.broadcast_to(v_irgp[:, None],
+                                     (num_slice, num_rot) + v_irgp.shape[1:])
+        else:
+            v_irgp = np.einsum(
+                'rij,skbj->srkbi',
+                rotations,
+                v_irgp.reshape(num_slice, num_ir_gp, -1, 3)).reshape(
+                    num_slice, num_rot, num_ir_gp, num_elem)
+        np.add.at(v, (slice(None), rot_grid_points[:, ir_gr_grid_points]),
+                  v_irgp)
 
     def _get_weights(self):
         """Returns weights used for collision matrix and |X> and |f>
@@ -1315,6 +2274,25 @@ class Conductivity_LBTE(Conductivity):
 
         start = time.time()
 
+        if self._comm is not None:
+            if self._log_level:
+                sys.stdout.write("- Making collision matrix symmetric "
+                                 "(MPI) ")
+                sys.stdout.flush()
+            num_band = self._collision_matrix.shape[-2]
+            row_ranges = self._row_grid_point_ranges * num_band * 3
+            size = row_ranges[-1]
+            for i in range(self._collision_matrix.shape[0]):
+                for j in range(self._collision_matrix.shape[1]):
+                    symmetrize_distributed_collision_matrix(
+                        self._collision_matrix[i, j].reshape(-1, size),
+                        row_ranges,
+                        self._comm)
+            if self._log_level:
+                print("[%.3fs]" % (time.time() - start))
+                sys.stdout.flush()
+            return
+
         try:
             import phono3py._phono3py as phono3c
             if self._log_level:
@@ -1347,11 +2325,56 @@ class Conductivity_LBTE(Conductivity):
         start = time.time()
 
         # Average matrix elements belonging to degenerate bands
+        try:
+            import phono3py._phono3py as phono3c
+            if self._log_level:
+                sys.stdout.write("- Averaging collision matrix elements "
+                                 "by phonon degeneracy (built-in) ")
+                sys.stdout.flush()
+            phono3c.average_collision_matrix_by_degeneracy(
+                self._collision_matrix,
+                self._get_degenerate_bands(),
+                self._colmat_row_offset)
+        except ImportError:
+            if self._log_level:
+                sys.stdout.write("- Averaging collision matrix elements "
+                                 "by phonon degeneracy (numpy) ")
+                sys.stdout.flush()
+            self._py_average_collision_matrix_by_degeneracy()
+
         if self._log_level:
-            sys.stdout.write("- Averaging collision matrix elements "
-                             "by phonon degeneracy ")
+            print("[%.3fs]" % (time.time() - start))
             sys.stdout.flush()
 
+    def _get_degenerate_bands(self):
+        """Return table of degenerate sets at grid points of collision matrix
+
+        Each element is the smallest band index of the degenerate set that
+        the band belongs to. Bands at grid points that are not
+        ir-grid-points in reducible collision matrix are not averaged.
+
+        Returns
+        -------
+        ndarray
+            shape=(grid_points of collision matrix, num_band), dtype='int_'
+
+        """
+        if self._is_reducible_collision_matrix:
+            num_gp, num_band = self._collision_matrix.shape[-2:]
+        else:
+            num_gp, num_band = self._collision_matrix.shape[-3:-1]
+        degenerate_bands = np.tile(np.arange(num_band, dtype='int_'),
+                                   (num_gp, 1))
+        for i, gp in enumerate(self._ir_grid_points):
+            if self._is_reducible_collision_matrix:
+                i_data = self._bz_grid.bzg2grg[gp]
+            else:
+                i_data = i
+            for dset in degenerate_sets(self._frequencies[gp]):
+                degenerate_bands[i_data, dset] = min(dset)
+        return degenerate_bands
+
+    def _py_average_collision_matrix_by_degeneracy(self):
         col_mat = self._collision_matrix
         for i, gp in enumerate(self._ir_grid_points):
             freqs = self._frequencies[gp]
@@ -1396,10 +2419,6 @@ class Conductivity_LBTE(Conductivity):
                     for j in bi_set:
                         col_mat[:, :, :, :, :, i, j, :] = sum_col
 
-        if self._log_level:
-            print("[%.3fs]" % (time.time() - start))
-            sys.stdout.flush()
-
     def _get_X(self, i_temp, weights, gv):
         """Calculate X in Chaput's paper."""
         num_band = len(self._primitive) * 3
@@ -1437,6 +2456,23 @@ class Conductivity_LBTE(Conductivity):
         else:
             num_grid_points = len(self._ir_grid_points)
             size = num_grid_points * num_band * 3
+
+        if self._comm is not None:
+            Y = self._get_Y_by_distributed_solver(i_sigma, i_temp, X)
+            self._set_f_vectors(Y, num_grid_points, weights)
+            return Y
+
+        if self._is_mixed_precision:
+            Y, w, _ = solve_collision_matrix_by_iterative_refinement(
+                self._collision_matrix[i_sigma, i_temp].reshape(size, size),
+                X.ravel(),
+                pinv_cutoff=self._pinv_cutoff,
+                log_level=self._log_level)
+            self._collision_eigenvalues[i_sigma, i_temp] = w
+            Y = Y.reshape(-1, 3)
+            self._set_f_vectors(Y, num_grid_points, weights)
+            return Y
+
         v = self._collision_matrix[i_sigma, i_temp].reshape(size, size)
         # Transpose eigvecs because colmat was solved by column major order
         if solver in [1, 2, 4, 5]:
@@ -1485,6 +2521,42 @@ class Conductivity_LBTE(Conductivity):
 
         return Y
 
+    def _get_Y_by_distributed_solver(self, i_sigma, i_temp, X):
+        r"""Solve (\Omega, Y) = X on collision matrix distributed over ranks"""
+        start = time.time()
+        if self._log_level:
+            sys.stdout.write("Solving collision matrix by conjugate "
+                             "gradient (MPI) ")
+            sys.stdout.flush()
+
+        num_band = len(self._primitive) * 3
+        row_ranges = self._row_grid_point_ranges * num_band * 3
+        size = row_ranges[-1]
+        Y, num_iter, residual = solve_distributed_collision_matrix(
+            self._collision_matrix[i_sigma, i_temp].reshape(-1, size),
+            X.ravel(),
+            row_ranges,
+            self._comm)
+
+        if self._log_level:
+            print("[%.3fs]" % (time.time() - start))
+            print("Number of iterations: %d, relative residual: %.1e" %
+                  (num_iter, residual))
+            sys.stdout.flush()
+
+        return Y.reshape(-1, 3)
+
+    def _allreduce_local_values(self):
+        """Sum up values computed at grid points distributed over ranks
+
+        Values at grid points of other ranks are zero.
+
+        """
+        self._comm.Allreduce(self._gamma.copy(), self._gamma)
+        if self._averaged_pp_interaction is not None:
+            self._comm.Allreduce(self._averaged_pp_interaction.copy(),
+                                 self._averaged_pp_interaction)
+
     def _set_f_vectors(self, Y, num_grid_points, weights):
         """Calculate f-vectors
 
@@ -1545,10 +2617,12 @@ class Conductivity_LBTE(Conductivity):
 
     def _set_kappa_ir_colmat(self, i_sigma, i_temp, weights):
         """Calculate direct solution thermal conductivity of ir colmat"""
-        if self._solve_collective_phonon:
+        N = self._num_sampling_grid_points
+        if self._num_relaxons is not None:
+            self._set_mode_kappa_by_relaxons(i_sigma, i_temp, weights)
+        elif self._solve_collective_phonon:
             self._set_mode_kappa_Chaput(i_sigma, i_temp, weights)
         else:
-            N = self._num_sampling_grid_points
             X = self._get_X(i_temp, weights, self._gv)
             num_ir_grid_points = len(self._ir_grid_points)
             Y = self._get_Y(i_sigma, i_temp, weights, X)
@@ -1763,6 +2837,82 @@ class Conductivity_LBTE(Conductivity):
         factor = self._conversion_factor * Kb * t ** 2
         self._mode_kappa[i_sigma, i_temp] *= factor
 
+    def _set_mode_kappa_by_relaxons(self, i_sigma, i_temp, weights):
+        """Calculate mode kappa from relaxons of the smallest eigenvalues
+
+        Kappa contributions of relaxons are stored in self._relaxon_kappa.
+
+        """
+        if self._relaxon_basis_blocks is None:
+            self._relaxon_basis_blocks = self._get_relaxon_basis_blocks()
+        X = self._get_X(i_temp, weights, self._gv)
+        num_ir_grid_points = len(self._ir_grid_points)
+        num_band = len(self._primitive) * 3
+        Y, w, v = solve_collision_matrix_by_relaxons(
+            self._collision_matrix[i_sigma, i_temp],
+            X.ravel(),
+            self._relaxon_basis_blocks,
+            self._num_relaxons,
+            log_level=self._log_level)
+        Y = Y.reshape(-1, 3)
+        self._set_f_vectors(Y, num_ir_grid_points, weights)
+        self._set_mean_free_path(i_sigma, i_temp, weights, Y)
+        self._set_mode_kappa(self._mode_kappa,
+                             X,
+                             Y,
+                             num_ir_grid_points,
+                             self._rotations_cartesian,
+                             i_sigma,
+                             i_temp)
+
+        t = self._temperatures[i_temp]
+        factor = (self._conversion_factor * Kb * t ** 2 /
+                  self._num_sampling_grid_points)
+        self._relaxon_eigenvalues[i_sigma, i_temp] = 0
+        self._relaxon_eigenvalues[i_sigma, i_temp, :len(w)] = w
+        self._relaxon_kappa[i_sigma, i_temp] = 0
+        for l, (w_l, v_l) in enumerate(zip(w, v.T)):
+            Y_l = v_l * np.dot(v_l, X.ravel()) / w_l
+            self._relaxon_kappa[i_sigma, i_temp, l] = _get_mode_kappa(
+                X, Y_l.reshape(-1, 3), self._rotations_cartesian,
+                num_band).sum(axis=0).sum(axis=0) * factor
+
+        if self._log_level:
+            print("Kappa contributions of relaxons of the smallest "
+                  "eigenvalues:")
+            print("%5s %12s" % ("", "eigenvalue") +
+                  ("%11s" * 6) % ("xx", "yy", "zz", "yz", "xz", "xy"))
+            for l, w_l in enumerate(w):
+                print(("%5d %12.5e" + " %10.3f" * 6) %
+                      ((l + 1, w_l) +
+                       tuple(self._relaxon_kappa[i_sigma, i_temp, l])))
+            sys.stdout.flush()
+
+    def _get_relaxon_basis_blocks(self):
+        """Return orthonormal basis at ir-grid-points for relaxons
+
+        Collision matrix at an ir-grid-point acts only on the Cartesian
+        subspace invariant under its site-symmetry group and on the
+        average over degenerate bands after averaging by degeneracy. The
+        basis vectors are the products of those of the two subspaces.
+
+        Returns
+        -------
+        list of ndarray
+            shape=(num_band * 3, basis vectors) for each ir-grid-point
+
+        """
+        basis, dims = self._get_symmetry_adapted_basis()
+        degenerate_bands = self._get_degenerate_bands()
+        blocks = []
+        for i, deg in enumerate(degenerate_bands):
+            labels = np.unique(deg)
+            averaging = np.array(deg[:, None] == labels[None, :],
+                                 dtype='double')
+            averaging /= np.sqrt(averaging.sum(axis=0))
+            blocks.append(np.kron(averaging, basis[i, :, :dims[i]]))
+        return blocks
+
     def _set_mode_kappa_from_mfp(self,
                                  weights,
                                  num_grid_points,
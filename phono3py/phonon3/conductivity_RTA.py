@@ -34,14 +34,17 @@
 
 import sys
 import numpy as np
-from phonopy.structure.tetrahedron_method import TetrahedronMethod
+from phonopy.units import Angstrom
 from phono3py.file_IO import (write_kappa_to_hdf5, read_gamma_from_hdf5,
-                              write_gamma_detail_to_hdf5, read_pp_from_hdf5)
+                              read_kappa_from_hdf5,
+                              write_gamma_detail_to_hdf5)
 from phono3py.phonon3.conductivity import (Conductivity, all_bands_exist,
                                            unit_to_WmK)
 from phono3py.phonon3.conductivity import write_pp as _write_pp
-from phono3py.phonon3.imag_self_energy import (ImagSelfEnergy,
-                                               average_by_degeneracy)
+from phono3py.phonon3.imag_self_energy import (
+    ImagSelfEnergy, get_imag_self_energy_from_collision_kernels)
+from phono3py.phonon3.gamma_interpolation import (
+    get_sub_mesh_divisors, is_on_sub_mesh, get_interpolated_gamma)
 from phono3py.phonon3.triplets import get_all_triplets
 from phono3py.phonon.grid import get_grid_points_by_rotations
 
@@ -67,10 +70,48 @@ def get_thermal_conductivity_RTA(
         write_pp=False,
         read_pp=False,
         write_gamma_detail=False,
+        gamma_interpolation_mesh=None,
+        num_verification_points=3,
+        num_sampled_triplets=None,
+        kappa_target_error=None,
+        random_seed=None,
+        num_collision_kernel_bins=None,
+        adaptive_sigma_scale=None,
         compression="gzip",
         input_filename=None,
         output_filename=None,
         log_level=0):
+    """Run RTA thermal conductivity calculation
+
+    When gamma_interpolation_mesh is given, gamma is computed only at the
+    grid points on this sub-mesh of the grid and in the sub-mesh cells
+    touching Gamma point, and is interpolated onto the other grid points,
+    whereas group velocities and heat capacities are computed at all grid
+    points. Interpolation errors are estimated at
+    num_verification_points grid points not on the sub-mesh, where gamma
+    is also computed explicitly.
+
+    When num_sampled_triplets is given, gamma at each grid point is
+    estimated from this number of triplets drawn by importance sampling,
+    and standard errors of gamma and kappa are obtained by
+    Conductivity_RTA.get_gamma_error and get_kappa_error.
+
+    When kappa_target_error is given, kappa is estimated from gamma at
+    importance-sampled ir-grid-points until the relative half width of its
+    95% confidence interval becomes smaller than this value. See
+    Conductivity_RTA.run_importance_sampling.
+
+    When num_collision_kernel_bins is given with write_gamma, ph-ph
+    collisions binned by frequencies of phonon pairs are written with gamma
+    at each grid point. With read_gamma, gamma at temperatures different
+    from those in the files is computed from these collision kernels without
+    ph-ph interaction calculation.
+
+    When adaptive_sigma_scale is given, smearing widths of each triplet and
+    band pair are estimated from group velocities for sigmas that are not
+    None, and these sigmas are used as the lower bounds of the widths.
+
+    """
 
     if temperatures is None:
         _temperatures = np.arange(0, 1001, 10, dtype='double')
@@ -99,12 +140,42 @@ def get_thermal_conductivity_RTA(
         pp_filename=input_filename,
         is_N_U=is_N_U,
         is_gamma_detail=write_gamma_detail,
+        num_sampled_triplets=num_sampled_triplets,
+        random_seed=random_seed,
+        num_collision_kernel_bins=num_collision_kernel_bins,
+        adaptive_sigma_scale=adaptive_sigma_scale,
         log_level=log_level)
 
+    if kappa_target_error is not None:
+        if (grid_points is not None or
+            read_gamma or
+            gamma_interpolation_mesh is not None or
+            not all_bands_exist(interaction)):
+            raise RuntimeError(
+                "kappa_target_error works only with gamma computed at "
+                "all bands at ir-grid-points.")
+        br.run_importance_sampling(
+            target_relative_error=kappa_target_error,
+            rng=np.random.default_rng(random_seed))
+        if log_level:
+            print("Gamma was computed at %d of %d grid points." %
+                  (len(br.get_computed_grid_points()),
+                   len(br.get_grid_points())))
+            _show_kappa(br, log_level)
+        return br
+
     if read_gamma:
         if not _set_gamma_from_file(br, filename=input_filename):
             print("Reading collisions failed.")
             return False
+    elif gamma_interpolation_mesh is not None:
+        _set_interpolated_gamma(br,
+                                interaction,
+                                gamma_interpolation_mesh,
+                                is_full_pp=is_full_pp,
+                                is_N_U=is_N_U,
+                                num_verification_points=num_verification_points,
+                                log_level=log_level)
 
     for i in br:
         if write_pp:
@@ -142,6 +213,138 @@ def get_thermal_conductivity_RTA(
     return br
 
 
+def get_kappa_RTA_at_scattering_parameters(mesh,
+                                           sigmas=None,
+                                           sigma_cutoff=None,
+                                           boundary_mfps=None,
+                                           isotope_factors=None,
+                                           cutoff_frequency=1e-4,
+                                           filename=None,
+                                           log_level=0):
+    """Re-evaluate kappa-RTA for many boundary and isotope scattering settings
+
+    Gamma, gamma_isotope, group velocities, and mode heat capacities are
+    read from kappa-*.hdf5 written by get_thermal_conductivity_RTA, and
+    kappa is evaluated for each pair of boundary mean free path and
+    scaling factor of gamma_isotope without any phonon calculation.
+
+    Parameters
+    ----------
+    mesh : array_like
+        Mesh numbers used to find kappa-*.hdf5.
+    sigmas : list, optional
+        Sigma values where None means tetrahedron method. Default is
+        [None, ].
+    boundary_mfps : array_like, optional
+        Boundary mean free paths in micrometre. None as an element means
+        no boundary scattering.
+    isotope_factors : array_like, optional
+        Scaling factors multiplied to gamma_isotope, e.g., ratios of mass
+        variances. gamma_isotope has to be found in kappa-*.hdf5 unless
+        all factors are zero.
+    cutoff_frequency : float, optional
+        Phonon modes below this frequency are ignored.
+
+    When both of boundary_mfps and isotope_factors are given, they have to
+    have the same length and are paired element-wise. When isotope_factors
+    is not given, gamma_isotope is included as it is if found in
+    kappa-*.hdf5 and is ignored otherwise.
+
+    Returns
+    -------
+    kappa : ndarray
+        shape=(params, sigmas, temperatures, 6), dtype='double'
+
+    """
+
+    if sigmas is None:
+        _sigmas = [None, ]
+    else:
+        _sigmas = sigmas
+
+    data_at_sigmas = []
+    for sigma in _sigmas:
+        data = read_kappa_from_hdf5(
+            mesh,
+            sigma=sigma,
+            sigma_cutoff=sigma_cutoff,
+            filename=filename,
+            keys=('temperature', 'frequency', 'weight', 'gamma',
+                  'gamma_isotope', 'group_velocity', 'gv_by_gv',
+                  'heat_capacity', 'kappa_unit_conversion'),
+            verbose=log_level)
+        if data is None:
+            raise RuntimeError("kappa-*.hdf5 for sigma=%s not found." % sigma)
+        data_at_sigmas.append(data)
+
+    return get_kappa_RTA_from_data(data_at_sigmas,
+                                   boundary_mfps=boundary_mfps,
+                                   isotope_factors=isotope_factors,
+                                   cutoff_frequency=cutoff_frequency)
+
+
+def get_kappa_RTA_from_data(data_at_sigmas,
+                            boundary_mfps=None,
+                            isotope_factors=None,
+                            cutoff_frequency=1e-4):
+    """Evaluate kappa-RTA for scattering settings from kappa data sets
+
+    data_at_sigmas is a list of dicts returned by read_kappa_from_hdf5.
+    See get_kappa_RTA_at_scattering_parameters for the other parameters.
+
+    """
+
+    # None as an isotope factor means 1 if gamma_isotope exists else 0.
+    if boundary_mfps is None and isotope_factors is None:
+        _boundary_mfps = [None, ]
+        _isotope_factors = [None, ]
+    elif boundary_mfps is None:
+        _isotope_factors = list(isotope_factors)
+        _boundary_mfps = [None, ] * len(_isotope_factors)
+    elif isotope_factors is None:
+        _boundary_mfps = list(boundary_mfps)
+        _isotope_factors = [None, ] * len(_boundary_mfps)
+    else:
+        _boundary_mfps = list(boundary_mfps)
+        _isotope_factors = list(isotope_factors)
+        if len(_boundary_mfps) != len(_isotope_factors):
+            raise RuntimeError("boundary_mfps and isotope_factors have to "
+                               "have the same length.")
+
+    num_temp = len(data_at_sigmas[0]['temperature'])
+    kappa = np.zeros((len(_boundary_mfps), len(data_at_sigmas), num_temp, 6),
+                     dtype='double', order='C')
+
+    for j, data in enumerate(data_at_sigmas):
+        gamma = data['gamma']
+        gv_by_gv = data['gv_by_gv']
+        cv = data['heat_capacity']
+        num_sampling_grid_points = data['weight'].sum()
+        is_valid = data['frequency'] > cutoff_frequency
+        gv_norm = np.linalg.norm(data['group_velocity'], axis=2)
+        # cv / (2 * gamma) is summed up over modes with gv_by_gv for each
+        # set of parameters. Broadcast over (temps, gps, bands).
+        for i, (mfp, factor) in enumerate(zip(_boundary_mfps,
+                                              _isotope_factors)):
+            g_sum = gamma.copy()
+            if factor is None:
+                factor = 1 if 'gamma_isotope' in data else 0
+            if factor:
+                if 'gamma_isotope' not in data:
+                    raise RuntimeError("gamma_isotope is not found in data.")
+                g_sum += factor * data['gamma_isotope']
+            if mfp is not None:
+                g_sum += gv_norm * Angstrom * 1e6 / (4 * np.pi * mfp)
+            cv_g = np.zeros_like(g_sum)
+            is_finite = np.logical_and(is_valid, g_sum > 0)
+            cv_g[is_finite] = cv[is_finite] / (2 * g_sum[is_finite])
+            kappa[i, j] = (np.einsum('tgb,gbk->tk', cv_g, gv_by_gv)
+                           * data['kappa_unit_conversion']
+                           / num_sampling_grid_points)
+
+    return kappa
+
+
 def _write_gamma_detail(br, interaction, i, compression="gzip", filename=None,
                         verbose=True):
     gamma_detail = br.get_gamma_detail_at_q()
@@ -202,6 +405,8 @@ def _write_gamma(br, interaction, i, compression="gzip", filename=None,
     sigma_cutoff = br.get_sigma_cutoff_width()
     volume = interaction.get_primitive().get_volume()
     gamma_N, gamma_U = br.get_gamma_N_U()
+    collision_kernels = br.get_collision_kernels_at_q()
+    kernel_bins = br.get_collision_kernel_frequency_bins()
 
     gp = grid_points[i]
     if all_bands_exist(interaction):
@@ -223,6 +428,10 @@ def _write_gamma(br, interaction, i, compression="gzip", filename=None,
                 gamma_U_at_sigma = None
             else:
                 gamma_U_at_sigma = gamma_U[j, :, i]
+            if collision_kernels is None:
+                kernel_at_sigma = None
+            else:
+                kernel_at_sigma = collision_kernels[j]
 
             write_kappa_to_hdf5(temperatures,
                                 mesh,
@@ -239,6 +448,8 @@ def _write_gamma(br, interaction, i, compression="gzip", filename=None,
                                 sigma=sigma,
                                 sigma_cutoff=sigma_cutoff,
                                 kappa_unit_conversion=unit_to_WmK / volume,
+                                collision_kernel=kernel_at_sigma,
+                                collision_kernel_frequency_bins=kernel_bins,
                                 compression=compression,
                                 filename=filename,
                                 verbose=verbose)
@@ -262,6 +473,10 @@ def _write_gamma(br, interaction, i, compression="gzip", filename=None,
                     gamma_U_at_sigma = None
                 else:
                     gamma_U_at_sigma = gamma_U[j, :, i, k]
+                if collision_kernels is None:
+                    kernel_at_sigma = None
+                else:
+                    kernel_at_sigma = collision_kernels[j][:, k:(k + 1)]
                 write_kappa_to_hdf5(
                     temperatures,
                     mesh,
@@ -279,6 +494,8 @@ def _write_gamma(br, interaction, i, compression="gzip", filename=None,
                     sigma=sigma,
                     sigma_cutoff=sigma_cutoff,
                     kappa_unit_conversion=unit_to_WmK / volume,
+                    collision_kernel=kernel_at_sigma,
+                    collision_kernel_frequency_bins=kernel_bins,
                     compression=compression,
                     filename=filename,
                     verbose=verbose)
@@ -420,10 +637,12 @@ def _set_gamma_from_file(br, filename=None, verbose=True):
                     filename=filename,
                     verbose=verbose)
                 if data_gp:
-                    gamma[j, :, i] = data_gp['gamma']
+                    gamma[j, :, i] = _get_gamma_at_temperatures(
+                        data_gp, temperatures)
                     if 'gamma_iso' in data_gp:
                         gamma_iso[j, i] = data_gp['gamma_iso']
-                    if 'gamma_N' in data_gp:
+                    if ('gamma_N' in data_gp and
+                        data_gp['gamma_N'].shape == gamma_N[j, :, i].shape):
                         is_gamma_N_U_in = True
                         gamma_N[j, :, i] = data_gp['gamma_N']
                         gamma_U[j, :, i] = data_gp['gamma_U']
@@ -441,10 +660,13 @@ def _set_gamma_from_file(br, filename=None, verbose=True):
                             filename=filename,
                             verbose=verbose)
                         if data_band:
-                            gamma[j, :, i, bi] = data_band['gamma']
+                            gamma[j, :, i, bi] = _get_gamma_at_temperatures(
+                                data_band, temperatures)[:, 0]
                             if 'gamma_iso' in data_band:
                                 gamma_iso[j, i, bi] = data_band['gamma_iso']
-                            if 'gamma_N' in data_band:
+                            if ('gamma_N' in data_band and
+                                len(data_band['gamma_N']) ==
+                                len(temperatures)):
                                 is_gamma_N_U_in = True
                                 gamma_N[j, :, i, bi] = data_band['gamma_N']
                                 gamma_U[j, :, i, bi] = data_band['gamma_U']
@@ -465,6 +687,139 @@ def _set_gamma_from_file(br, filename=None, verbose=True):
         return False
 
 
+def _get_gamma_at_temperatures(data, temperatures):
+    """Return gamma read from file at temperatures
+
+    When temperatures are different from those in file, gamma is computed
+    from collision kernels in file.
+
+    """
+    gamma = data['gamma'].reshape(len(data['temperature']), -1)
+    if (len(data['temperature']) == len(temperatures) and
+        np.allclose(data['temperature'], temperatures)):
+        return gamma
+    if 'collision_kernel' not in data:
+        raise RuntimeError(
+            "Temperatures are inconsistent with those in file, and "
+            "collision kernels to compute gamma are not found.")
+    return get_imag_self_energy_from_collision_kernels(
+        data['collision_kernel'],
+        data['collision_kernel_frequency_bins'],
+        temperatures)
+
+
+def _set_interpolated_gamma(br,
+                            interaction,
+                            gamma_interpolation_mesh,
+                            is_full_pp=False,
+                            is_N_U=False,
+                            num_verification_points=3,
+                            log_level=0):
+    """Set gamma interpolated from that computed on sub-mesh
+
+    With is_N_U, gamma of normal and umklapp processes are interpolated in
+    the same way as gamma. Gamma computed at verification grid points
+    replaces interpolated one after the errors are estimated.
+
+    """
+    temperatures = br.get_temperatures()
+    sigmas = br.get_sigmas()
+    sigma_cutoff = br.get_sigma_cutoff_width()
+    bz_grid = interaction.bz_grid
+    grid_points = br.get_grid_points()
+
+    divisors = get_sub_mesh_divisors(bz_grid, gamma_interpolation_mesh)
+    is_sub = is_on_sub_mesh(grid_points, bz_grid, divisors)
+    sub_indices = np.where(is_sub)[0]
+    # Linear interpolation is poor for acoustic modes around Gamma point.
+    # Grid points in the sub-mesh cells touching Gamma point are computed
+    # explicitly.
+    is_near_gamma = np.logical_and(
+        (np.abs(bz_grid.addresses[grid_points]) <= divisors).all(axis=1),
+        np.logical_not(is_sub))
+    near_gamma_indices = np.where(is_near_gamma)[0]
+    off_indices = np.where(
+        np.logical_not(np.logical_or(is_sub, is_near_gamma)))[0]
+    if num_verification_points and len(off_indices) > 0:
+        verify_indices = off_indices[np.unique(np.linspace(
+            0, len(off_indices) - 1, num_verification_points).astype(int))]
+    else:
+        verify_indices = np.array([], dtype='int_')
+
+    if log_level:
+        print("Calculating gamma at %d grid points on %s sub-mesh, "
+              "%d grid points around Gamma point, and %d grid points for "
+              "verification" %
+              (len(sub_indices),
+               "x".join(["%d" % x for x in gamma_interpolation_mesh]),
+               len(near_gamma_indices),
+               len(verify_indices)))
+
+    num_sub = len(sub_indices)
+    num_near = len(near_gamma_indices)
+    br_sub = Conductivity_RTA(
+        interaction,
+        grid_points=grid_points[
+            np.r_[sub_indices, near_gamma_indices, verify_indices]],
+        temperatures=temperatures,
+        sigmas=sigmas,
+        sigma_cutoff=sigma_cutoff,
+        is_full_pp=is_full_pp,
+        is_N_U=is_N_U,
+        log_level=0)
+    for i in br_sub:
+        pass
+
+    # gamma, gamma_N, and gamma_U are stacked along sigma axis to be
+    # interpolated at once.
+    if is_N_U:
+        gammas_computed = np.concatenate(
+            (br_sub.get_gamma(),) + br_sub.get_gamma_N_U(), axis=0)
+    else:
+        gammas_computed = br_sub.get_gamma()
+    gammas = get_interpolated_gamma(gammas_computed[:, :, :num_sub],
+                                    grid_points[sub_indices],
+                                    grid_points,
+                                    interaction,
+                                    divisors)
+    gammas[:, :, near_gamma_indices] = gammas_computed[
+        :, :, num_sub:(num_sub + num_near)]
+    gammas_verify = gammas_computed[:, :, (num_sub + num_near):]
+    num_sigma = len(sigmas)
+    gamma = gammas[:num_sigma]
+    gamma_verify = gammas_verify[:num_sigma]
+    br.set_gamma(gamma)
+    if is_N_U:
+        br.set_gamma_N_U(gammas[num_sigma:(2 * num_sigma)],
+                         gammas[(2 * num_sigma):])
+
+    if len(verify_indices) == 0:
+        return
+
+    frequencies = br.get_frequencies()[verify_indices]
+    errors = np.zeros(gamma_verify.shape[:3], dtype='double')
+    for i, freqs in enumerate(frequencies):
+        is_valid = freqs > interaction.cutoff_frequency
+        g = gamma_verify[:, :, i, is_valid]
+        diff = np.abs(gamma[:, :, verify_indices[i], is_valid] - g)
+        errors[:, :, i] = np.max(
+            np.where(g > 0, diff / np.where(g > 0, g, 1), 0), axis=2)
+    br.set_gamma_interpolation_errors(grid_points[verify_indices], errors)
+    gammas[:, :, verify_indices] = gammas_verify
+
+    if log_level:
+        print("Maximum relative errors of interpolated gamma over bands at "
+              "verification grid points:")
+        for j, sigma in enumerate(sigmas):
+            if sigma:
+                print("  sigma=%s" % sigma)
+            else:
+                print("  tetrahedron method")
+            for k, gp in enumerate(grid_points[verify_indices]):
+                print("    gp=%d: %s" % (gp, " ".join(
+                    ["%.3f" % x for x in errors[j, :, k]])))
+
+
 class Conductivity_RTA(Conductivity):
     def __init__(self,
                  interaction,
@@ -486,7 +841,37 @@ class Conductivity_RTA(Conductivity):
                  is_N_U=False,
                  is_gamma_detail=False,
                  is_frequency_shift_by_bubble=False,
+                 num_sampled_triplets=None,
+                 random_seed=None,
+                 num_collision_kernel_bins=None,
+                 adaptive_sigma_scale=None,
                  log_level=0):
+        """Init method.
+
+        Parameters
+        ----------
+        num_sampled_triplets : int, optional
+            With this number, ph-ph linewidths are estimated from triplets
+            drawn by importance sampling at each grid point, and their
+            standard errors are propagated to kappa. See
+            ImagSelfEnergy.run_lowmem_sampled. This works only with the
+            default low memory mode of ph-ph interaction calculation.
+            Default is None.
+        random_seed : int, optional
+            Seed of random number generator used with
+            num_sampled_triplets.
+        num_collision_kernel_bins : int, optional
+            With this number, ph-ph collisions at each grid point are
+            binned on this number times this number frequency bins of
+            phonon pairs from zero to the maximum phonon frequency. See
+            ImagSelfEnergy.get_binned_collision_kernels. Default is None.
+        adaptive_sigma_scale : float, optional
+            With this scale factor, smearing widths are estimated from
+            group velocities at each triplet and band pair with sigmas as
+            their lower bounds. See ImagSelfEnergy.set_adaptive_sigma_scale.
+            Default is None.
+
+        """
         self._pp = None
         self._temperatures = None
         self._sigmas = None
@@ -529,6 +914,16 @@ class Conductivity_RTA(Conductivity):
         self._averaged_pp_interaction = None
         self._num_ignored_phonon_modes = None
         self._num_sampling_grid_points = None
+        self._gamma_interpolation_errors = None
+        self._num_sampled_triplets = num_sampled_triplets
+        self._rng = None
+        self._gamma_error = None
+        self._kappa_error = None
+        self._kappa_confidence_interval = None
+        self._computed_grid_points = None
+        self._collision_kernels_at_q = None
+        self._collision_kernel_frequency_bins = None
+        self._adaptive_sigma_scale = adaptive_sigma_scale
 
         self._conversion_factor = None
 
@@ -556,11 +951,35 @@ class Conductivity_RTA(Conductivity):
         self._store_pp = store_pp
         self._pp_filename = pp_filename
 
+        if self._num_sampled_triplets is not None:
+            if (self._is_full_pp or
+                self._read_pp or
+                self._store_pp or
+                self._use_ave_pp or
+                self._use_const_ave_pp or
+                self._is_gamma_detail or
+                self._is_N_U):
+                raise RuntimeError(
+                    "Sampling of triplets works only in low memory mode.")
+            self._rng = np.random.default_rng(random_seed)
+
+        if num_collision_kernel_bins is not None:
+            if (self._use_ave_pp or
+                self._use_const_ave_pp or
+                self._num_sampled_triplets is not None):
+                raise RuntimeError(
+                    "Collision kernels require ph-ph interaction strength.")
+            self._collision_kernel_frequency_bins = np.linspace(
+                0, self._frequencies.max() * (1 + 1e-5),
+                num_collision_kernel_bins + 1)
+
         if self._temperatures is not None:
             self._allocate_values()
 
     def set_kappa_at_sigmas(self):
         num_band = len(self._primitive) * 3
+        if self._gamma_error is not None:
+            kappa_variance = np.zeros_like(self._kappa)
         for i, grid_point in enumerate(self._grid_points):
             cv = self._cv[:, i, :]
             gp = self._grid_points[i]
@@ -592,16 +1011,227 @@ class Conductivity_RTA(Conductivity):
                             print("=" * 61)
                         np.seterr(**old_settings)
 
+                    if self._gamma_error is not None:
+                        # Errors of gamma at modes are assumed to be
+                        # independent.
+                        rel_error = np.zeros(num_band, dtype='double')
+                        is_finite = np.logical_and(
+                            frequencies >= self._cutoff_frequency,
+                            g_sum > 0)
+                        rel_error[is_finite] = (
+                            self._gamma_error[j, k, i, is_finite]
+                            / g_sum[is_finite])
+                        kappa_variance[j, k] += (
+                            (self._mode_kappa[j, k, i]
+                             * rel_error[:, None]) ** 2).sum(axis=0)
+
         N = self._num_sampling_grid_points
         self._kappa = self._mode_kappa.sum(axis=2).sum(axis=2) / N
+        if self._gamma_error is not None:
+            self._kappa_error = np.sqrt(kappa_variance) / N
 
     def get_gamma_N_U(self):
         return (self._gamma_N, self._gamma_U)
 
+    def get_gamma_error(self):
+        """Return standard errors of gamma by sampling of triplets
+
+        shape=(sigmas, temperatures, grid_points, band_indices)
+
+        """
+        return self._gamma_error
+
+    def get_kappa_error(self):
+        """Return standard errors of kappa propagated from gamma errors
+
+        shape=(sigmas, temperatures, 6)
+
+        """
+        return self._kappa_error
+
+    def get_kappa_confidence_interval(self):
+        """Return half widths of confidence interval of kappa
+
+        This is set by run_importance_sampling.
+
+        shape=(sigmas, temperatures, 6)
+
+        """
+        return self._kappa_confidence_interval
+
+    def get_collision_kernels_at_q(self):
+        """Return collision kernels at the last computed grid point
+
+        shape=(sigmas, 2, band_indices, num_bins, num_bins)
+
+        """
+        return self._collision_kernels_at_q
+
+    def get_collision_kernel_frequency_bins(self):
+        """Return edges of frequency bins of collision kernels"""
+        return self._collision_kernel_frequency_bins
+
+    def get_computed_grid_points(self):
+        """Return grid points where gamma was computed
+
+        This is set by run_importance_sampling.
+
+        """
+        return self._computed_grid_points
+
+    def run_importance_sampling(self,
+                                target_relative_error=0.05,
+                                top_fraction=0.5,
+                                batch_size=None,
+                                confidence=0.95,
+                                rng=None):
+        """Estimate kappa from gamma at importance-sampled grid points
+
+        Instead of iterating over all grid points, ir-grid-points are
+        ranked by the proxy of their contributions to kappa,
+        w * sum_b(cv * |v|^2 / freq^2) summed over temperatures, where w is
+        the weight of ir-grid-point. 1 / freq^2 follows the lifetimes of
+        low frequency acoustic modes. Gamma is computed at the top-ranked
+        grid points whose proxies amount to top_fraction of the total, and
+        their contribution to kappa is summed exactly. The contribution of
+        the remaining grid points is estimated by drawing grid points with
+        replacement with probabilities proportional to the proxy, mixed with
+        those proportional to w so that any grid point can be drawn. Draws
+        continue in batches, at least two, until the half width of
+        confidence interval of xx + yy + zz becomes smaller than
+        target_relative_error of it at all sigmas and temperatures, or until
+        gamma is computed at all grid points where kappa becomes exact.
+
+        Gamma and mode kappa are zero at grid points not computed, which
+        are obtained by get_computed_grid_points. kappa, its standard error,
+        and the half width of confidence interval are obtained by
+        get_kappa, get_kappa_error, and get_kappa_confidence_interval.
+
+        Parameters
+        ----------
+        target_relative_error : float, optional
+            Target relative half width of confidence interval. Default is
+            0.05.
+        top_fraction : float, optional
+            Fraction of sum of proxies taken by the top-ranked grid points.
+            Default is 0.5.
+        batch_size : int, optional
+            Number of draws per batch. Default is None, which gives 5% of
+            the number of ir-grid-points, but at least 4.
+        confidence : float, optional
+            Confidence level. Default is 0.95.
+        rng : numpy.random.Generator, optional
+            Random number generator. Default is None, which gives
+            ``numpy.random.default_rng()``.
+
+        """
+        from scipy.stats import norm
+
+        if self._grid_weights is None:
+            raise RuntimeError(
+                "Importance sampling requires all ir-grid-points.")
+        if rng is None:
+            _rng = np.random.default_rng()
+        else:
+            _rng = rng
+        num_gp = len(self._grid_points)
+        if batch_size is None:
+            _batch_size = max(4, num_gp // 20)
+        else:
+            _batch_size = batch_size
+        z = norm.ppf(0.5 + confidence / 2)
+
+        proxy = self._get_kappa_proxy()
+        order = np.argsort(-proxy, kind='stable')
+        cum_proxy = np.cumsum(proxy[order])
+        num_top = np.searchsorted(cum_proxy, top_fraction * cum_proxy[-1]) + 1
+        num_top = min(num_top, num_gp)
+        is_top = np.zeros(num_gp, dtype=bool)
+        is_top[order[:num_top]] = True
+        rest = np.nonzero(~is_top)[0]
+        if len(rest) > 0:
+            prob = np.array(self._grid_weights[rest], dtype='double')
+            prob *= 0.1 / prob.sum()
+            if proxy[rest].sum() > 0:
+                prob += proxy[rest] / proxy[rest].sum() * 0.9
+            prob /= prob.sum()
+
+        is_computed = np.zeros(num_gp, dtype=bool)
+        draws = np.zeros(0, dtype='int_')
+        num_batches = 0
+        while True:
+            num_batches += 1
+            if len(rest) > 0 and not is_computed[rest].all():
+                draws = np.r_[draws, _rng.choice(len(rest),
+                                                 size=_batch_size,
+                                                 p=prob)]
+            to_compute = np.r_[np.nonzero(is_top)[0], rest[draws]]
+            for i in np.unique(to_compute[~is_computed[to_compute]]):
+                self._grid_point_count = i
+                self._run_at_grid_point()
+                is_computed[i] = True
+
+            # Contributions to kappa of grid points, sum_b mode_kappa
+            self._mode_kappa[:] = 0
+            self._num_ignored_phonon_modes[:] = 0
+            self.set_kappa_at_sigmas()
+            kappa_gp = self._mode_kappa.sum(axis=3)
+            kappa_top = kappa_gp[:, :, is_top].sum(axis=2)
+            if is_computed.all() or len(rest) == 0:
+                kappa = kappa_gp.sum(axis=2)
+                kappa_error = np.zeros_like(kappa)
+                break
+            estimates = kappa_gp[:, :, rest[draws]] / prob[draws][:, None]
+            kappa = kappa_top + estimates.mean(axis=2)
+            kappa_error = estimates.std(axis=2, ddof=1) / np.sqrt(len(draws))
+            trace = np.abs(kappa[:, :, :3].sum(axis=2))
+            # Estimates of xx, yy, and zz by a draw are correlated, so
+            # the trace is taken for each draw.
+            trace_error = estimates[:, :, :, :3].sum(axis=3).std(
+                axis=2, ddof=1) / np.sqrt(len(draws))
+            if num_batches < 2:
+                continue
+            if (z * trace_error <= target_relative_error * trace).all():
+                break
+
+        N = self._grid_weights.sum()
+        self._num_sampling_grid_points = N
+        self._kappa = kappa / N
+        self._kappa_error = kappa_error / N
+        self._kappa_confidence_interval = z * self._kappa_error
+        self._computed_grid_points = self._grid_points[is_computed]
+        self._grid_point_count = num_gp
+
+    def _get_kappa_proxy(self):
+        """Return proxy of contributions of ir-grid-points to kappa"""
+        if self._gv_at_grid_points is None:
+            self._set_harmonic_properties_at_grid_points()
+        freqs = self._frequencies[self._grid_points][:, self._pp.band_indices]
+        is_valid = freqs > self._cutoff_frequency
+        inv_freqs = np.where(is_valid, 1 / np.where(is_valid, freqs, 1), 0)
+        gv2 = (self._gv_at_grid_points ** 2).sum(axis=2)
+        cv = self._cv_at_grid_points.sum(axis=0)
+        return (cv * gv2 * inv_freqs ** 2).sum(axis=1) * self._grid_weights
+
     def set_gamma_N_U(self, gamma_N, gamma_U):
         self._gamma_N = gamma_N
         self._gamma_U = gamma_U
 
+    def get_gamma_interpolation_errors(self):
+        """Return errors of interpolated gamma at verification grid points
+
+        Returns
+        -------
+        tuple
+            (grid_points, errors). errors are maximum relative errors of
+            gamma over bands with shape=(sigmas, temperatures, grid_points).
+
+        """
+        return self._gamma_interpolation_errors
+
+    def set_gamma_interpolation_errors(self, grid_points, errors):
+        self._gamma_interpolation_errors = (grid_points, errors)
+
     def get_gamma_detail_at_q(self):
         return self._gamma_detail_at_q
 
@@ -636,8 +1266,11 @@ class Conductivity_RTA(Conductivity):
                 self._store_pp or
                 self._use_ave_pp or
                 self._use_const_ave_pp or
-                self._is_gamma_detail):
+                self._is_gamma_detail or
+                self._collision_kernel_frequency_bins is not None):
                 self._set_gamma_at_sigmas(i)
+            elif self._num_sampled_triplets is not None:
+                self._set_gamma_at_sigmas_sampled(i)
             else:  # can save memory space
                 self._set_gamma_at_sigmas_lowmem(i)
 
@@ -669,6 +1302,8 @@ class Conductivity_RTA(Conductivity):
             if self._is_gamma_detail or self._is_N_U:
                 self._gamma_N = np.zeros_like(self._gamma)
                 self._gamma_U = np.zeros_like(self._gamma)
+            if self._num_sampled_triplets is not None:
+                self._gamma_error = np.zeros_like(self._gamma)
         self._gv = np.zeros((num_grid_points, num_band0, 3),
                             order='C', dtype='double')
         self._gv_sum2 = np.zeros((num_grid_points, num_band0, 6),
@@ -689,8 +1324,17 @@ class Conductivity_RTA(Conductivity):
             self._pp,
             with_detail=(self._is_gamma_detail or self._is_N_U),
             unit_conversion=self._gamma_unit_conversion)
+        self._collision.set_adaptive_sigma_scale(self._adaptive_sigma_scale)
 
     def _set_gamma_at_sigmas(self, i):
+        g_zero = None
+        if (len(self._sigmas) > 1 and
+            not self._is_full_pp and
+            not self._read_pp and
+            not self._use_ave_pp and
+            not self._use_const_ave_pp):
+            g_zero = self._get_g_zero_at_sigmas()
+
         for j, sigma in enumerate(self._sigmas):
             self._collision.set_sigma(sigma, sigma_cutoff=self._sigma_cutoff)
             self._collision.set_integration_weights()
@@ -701,6 +1345,9 @@ class Conductivity_RTA(Conductivity):
                     text += "tetrahedron method."
                 else:
                     text += "sigma=%s" % sigma
+                    if self._adaptive_sigma_scale is not None:
+                        text += " (adaptive, scale=%s)" % (
+                            self._adaptive_sigma_scale)
                     if self._sigma_cutoff is None:
                         text += "."
                     else:
@@ -708,13 +1355,7 @@ class Conductivity_RTA(Conductivity):
                 print(text)
 
             if self._read_pp:
-                pp, _g_zero = read_pp_from_hdf5(
-                    self._pp.mesh_numbers,
-                    grid_point=self._grid_points[i],
-                    sigma=sigma,
-                    sigma_cutoff=self._sigma_cutoff,
-                    filename=self._pp_filename,
-                    verbose=(self._log_level > 0))
+                pp, _g_zero = self._read_pp_at_sigma(i, j)
                 _, g_zero = self._collision.get_integration_weights()
                 if self._log_level:
                     if len(self._sigmas) > 1:
@@ -733,17 +1374,30 @@ class Conductivity_RTA(Conductivity):
                 self._collision.run_interaction()
                 self._averaged_pp_interaction[i] = (
                     self._pp.get_averaged_interaction())
-            elif j != 0 and (self._is_full_pp or self._sigma_cutoff is None):
+            elif j != 0:
                 if self._log_level:
                     print("Existing ph-ph interaction is used.")
+                self._collision.set_interaction_strength(
+                    self._pp.interaction_strength)
             else:
                 if self._log_level:
                     print("Calculating ph-ph interaction...")
-                self._collision.run_interaction(is_full_pp=self._is_full_pp)
+                self._collision.run_interaction(is_full_pp=self._is_full_pp,
+                                                g_zero=g_zero)
                 if self._is_full_pp:
                     self._averaged_pp_interaction[i] = (
                         self._pp.get_averaged_interaction())
 
+            if self._collision_kernel_frequency_bins is not None:
+                if j == 0:
+                    num_bins = len(self._collision_kernel_frequency_bins) - 1
+                    self._collision_kernels_at_q = np.zeros(
+                        (len(self._sigmas), 2, len(self._pp.band_indices),
+                         num_bins, num_bins), dtype='double', order='C')
+                self._collision_kernels_at_q[j] = (
+                    self._collision.get_binned_collision_kernels(
+                        self._collision_kernel_frequency_bins))
+
             # Number of triplets depends on q-point.
             # So this is allocated each time.
             if self._is_gamma_detail:
@@ -767,105 +1421,63 @@ class Conductivity_RTA(Conductivity):
                     self._gamma_detail_at_q[k] = (
                         self._collision.get_detailed_imag_self_energy())
 
+    def _get_g_zero_at_sigmas(self):
+        """Return positions where ph-ph interaction is unnecessary
+
+        Elements of interaction strength are skipped only when they are
+        unnecessary for all sigmas. Thereby the interaction strength
+        computed once can be used for all sigmas. Smearing without cutoff
+        gives all-False g_zero, i.e., no element is skipped.
+
+        Integration weights are not kept here but recomputed for each
+        sigma, so that only those of one sigma are held at a time.
+
+        Returns
+        -------
+        g_zero : ndarray
+            shape=(triplets, band0, band, band), dtype='byte'
+
+        """
+        g_zero = None
+        for sigma in self._sigmas:
+            self._collision.set_sigma(sigma, sigma_cutoff=self._sigma_cutoff)
+            self._collision.set_integration_weights()
+            _, _g_zero = self._collision.get_integration_weights()
+            if g_zero is None:
+                g_zero = _g_zero.copy()
+            else:
+                g_zero &= _g_zero
+        return g_zero
+
     def _set_gamma_at_sigmas_lowmem(self, i):
-        band_indices = self._pp.band_indices
-        (svecs,
-         multiplicity,
-         p2s,
-         s2p,
-         masses) = self._pp.get_primitive_and_supercell_correspondence()
-        fc3 = self._pp.fc3
-        triplets_at_q, weights_at_q, _, _ = self._pp.get_triplets_at_q()
-        symmetrize_fc3_q = 0
-
-        if None in self._sigmas:
-            thm = TetrahedronMethod(self._bz_grid.microzone_lattice)
-
-        # It is assumed that self._sigmas = [None].
+        """Calculate gamma at sigmas without storing interaction strength
+
+        Interaction strength is computed inside the C routine triplet by
+        triplet and is discarded after use. Therefore it is recomputed for
+        each sigma and the cost grows linearly with the number of sigmas.
+        With multiple sigmas, store_pp=True computes it only once at the
+        price of holding it in memory.
+
+        """
         for j, sigma in enumerate(self._sigmas):
-            self._collision.set_sigma(sigma)
-            if self._is_N_U:
-                collisions = np.zeros((2, len(self._temperatures),
-                                       len(band_indices)),
-                                      dtype='double', order='C')
-            else:
-                collisions = np.zeros((len(self._temperatures),
-                                       len(band_indices)),
-                                      dtype='double', order='C')
-            import phono3py._phono3py as phono3c
-            if sigma is None:
-                phono3c.pp_collision(
-                    collisions,
-                    np.array(np.dot(thm.get_tetrahedra(), self._bz_grid.P.T),
-                             dtype='int_', order='C'),
-                    self._frequencies,
-                    self._eigenvectors,
-                    triplets_at_q,
-                    weights_at_q,
-                    self._bz_grid.addresses,
-                    self._bz_grid.gp_map,
-                    self._bz_grid.is_dense_gp_map * 1 + 1,
-                    self._bz_grid.D_diag,
-                    self._bz_grid.Q,
-                    fc3,
-                    svecs,
-                    multiplicity,
-                    masses,
-                    p2s,
-                    s2p,
-                    band_indices,
-                    self._temperatures,
-                    self._is_N_U * 1,
-                    symmetrize_fc3_q,
-                    self._cutoff_frequency)
-            else:
-                if self._sigma_cutoff is None:
-                    sigma_cutoff = -1
-                else:
-                    sigma_cutoff = float(self._sigma_cutoff)
-                phono3c.pp_collision_with_sigma(collisions,
-                                                sigma,
-                                                sigma_cutoff,
-                                                self._frequencies,
-                                                self._eigenvectors,
-                                                triplets_at_q,
-                                                weights_at_q,
-                                                self._bz_grid.addresses,
-                                                self._bz_grid.D_diag,
-                                                self._bz_grid.Q,
-                                                fc3,
-                                                svecs,
-                                                multiplicity,
-                                                masses,
-                                                p2s,
-                                                s2p,
-                                                band_indices,
-                                                self._temperatures,
-                                                self._is_N_U * 1,
-                                                symmetrize_fc3_q,
-                                                self._cutoff_frequency)
-            col_unit_conv = self._collision.get_unit_conversion_factor()
-            pp_unit_conv = self._pp.get_unit_conversion_factor()
+            self._collision.set_sigma(sigma, sigma_cutoff=self._sigma_cutoff)
+            self._collision.run_lowmem(self._temperatures,
+                                       is_N_U=self._is_N_U)
+            self._gamma[j, :, i] = self._collision.get_imag_self_energy()
             if self._is_N_U:
-                col = collisions.sum(axis=0)
-                col_N = collisions[0]
-                col_U = collisions[1]
-            else:
-                col = collisions
-            for k in range(len(self._temperatures)):
-                self._gamma[j, k, i, :] = average_by_degeneracy(
-                    col[k] * col_unit_conv * pp_unit_conv,
-                    band_indices,
-                    self._frequencies[self._grid_points[i]])
-                if self._is_N_U:
-                    self._gamma_N[j, k, i, :] = average_by_degeneracy(
-                        col_N[k] * col_unit_conv * pp_unit_conv,
-                        band_indices,
-                        self._frequencies[self._grid_points[i]])
-                    self._gamma_U[j, k, i, :] = average_by_degeneracy(
-                        col_U[k] * col_unit_conv * pp_unit_conv,
-                        band_indices,
-                        self._frequencies[self._grid_points[i]])
+                g_N, g_U = self._collision.get_imag_self_energy_N_and_U()
+                self._gamma_N[j, :, i] = g_N
+                self._gamma_U[j, :, i] = g_U
+
+    def _set_gamma_at_sigmas_sampled(self, i):
+        for j, sigma in enumerate(self._sigmas):
+            self._collision.set_sigma(sigma, sigma_cutoff=self._sigma_cutoff)
+            self._collision.run_lowmem_sampled(self._temperatures,
+                                               self._num_sampled_triplets,
+                                               rng=self._rng)
+            self._gamma[j, :, i] = self._collision.get_imag_self_energy()
+            self._gamma_error[j, :, i] = (
+                self._collision.get_imag_self_energy_error())
 
     def _show_log(self, q, i):
         gp = self._grid_points[i]
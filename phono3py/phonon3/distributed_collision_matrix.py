@@ -0,0 +1,174 @@
+# Copyright (C) 2021 Atsushi Togo
+# All rights reserved.
+#
+# This file is part of phono3py.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in
+#   the documentation and/or other materials provided with the
+#   distribution.
+#
+# * Neither the name of the phonopy project nor the names of its
+#   contributors may be used to endorse or promote products derived
+#   from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+import numpy as np
+
+
+def get_row_ranges(num_rows, num_ranks):
+    """Return boundaries of contiguous row blocks distributed over ranks
+
+    Parameters
+    ----------
+    num_rows : int
+        Number of rows to be distributed.
+    num_ranks : int
+        Number of MPI ranks.
+
+    Returns
+    -------
+    ndarray
+        Row block of rank i is [row_ranges[i], row_ranges[i + 1]).
+        shape=(num_ranks + 1, ), dtype='int_'
+
+    """
+    counts = np.full(num_ranks, num_rows // num_ranks, dtype='int_')
+    counts[:num_rows % num_ranks] += 1
+    return np.array(np.r_[0, np.cumsum(counts)], dtype='int_')
+
+
+def symmetrize_distributed_collision_matrix(collision_matrix,
+                                            row_ranges,
+                                            comm):
+    """Symmetrize collision matrix distributed in row blocks
+
+    Collision matrix is replaced by (Omega + Omega^T) / 2 in-place. Block
+    (r, s) of rank r is exchanged with block (s, r) of rank s at step
+    k = r + s (mod number of ranks), so every pair of blocks is
+    exchanged once and the original values are used.
+
+    Parameters
+    ----------
+    collision_matrix : ndarray
+        Local rows of collision matrix.
+        shape=(num_local_rows, num_rows), dtype='double'
+    row_ranges : ndarray
+        See get_row_ranges.
+    comm : mpi4py.MPI.Comm
+        MPI communicator.
+
+    """
+    rank = comm.Get_rank()
+    size = comm.Get_size()
+    start, end = row_ranges[rank], row_ranges[rank + 1]
+    for k in range(size):
+        peer = (k - rank) % size
+        p_start, p_end = row_ranges[peer], row_ranges[peer + 1]
+        block = collision_matrix[:, p_start:p_end]
+        if peer == rank:
+            block[:] = (block + block.T) / 2
+        else:
+            recv = np.zeros((p_end - p_start, end - start), dtype='double')
+            comm.Sendrecv(np.ascontiguousarray(block), dest=peer,
+                          recvbuf=recv, source=peer)
+            block[:] = (block + recv.T) / 2
+
+
+def solve_distributed_collision_matrix(collision_matrix,
+                                       b,
+                                       row_ranges,
+                                       comm,
+                                       tolerance=1e-12,
+                                       max_iterations=None):
+    """Solve Omega x = b by conjugate gradient method
+
+    Collision matrix is distributed over ranks in row blocks. Vectors are
+    also distributed in the same way, and only the search direction is
+    gathered to all ranks at each iteration to compute matrix-vector
+    product. The iteration starts from x = 0, therefore components of
+    x in the null space of the collision matrix stay zero when b is
+    orthogonal to it, which gives the same solution as pseudo-inverse.
+    Unlike pseudo-inverse by eigendecomposition, small non-zero
+    eigenvalues can not be cut off, i.e., this corresponds to
+    pseudo-inverse with zero cutoff.
+
+    Parameters
+    ----------
+    collision_matrix : ndarray
+        Local rows of symmetric positive semi-definite collision matrix.
+        shape=(num_local_rows, num_rows), dtype='double'
+    b : ndarray
+        Right hand side. shape=(num_rows, ), dtype='double'
+    row_ranges : ndarray
+        See get_row_ranges.
+    comm : mpi4py.MPI.Comm
+        MPI communicator.
+    tolerance : float, optional
+        Iteration stops when |b - Omega x| < tolerance * |b|.
+    max_iterations : int, optional
+        Maximum number of iterations. Default is number of rows.
+
+    Returns
+    -------
+    x : ndarray
+        Solution gathered to all ranks. shape=(num_rows, ), dtype='double'
+    num_iterations : int
+        Number of iterations.
+    residual : float
+        Relative residual |b - Omega x| / |b|.
+
+    """
+    rank = comm.Get_rank()
+    start, end = row_ranges[rank], row_ranges[rank + 1]
+    counts = np.diff(row_ranges)
+    num_rows = row_ranges[-1]
+    if max_iterations is None:
+        max_iterations = num_rows
+
+    x = np.zeros(end - start, dtype='double')
+    r = np.array(b[start:end], dtype='double')
+    p = np.zeros(num_rows, dtype='double')
+    p_local = r.copy()
+    rr = comm.allreduce(np.dot(r, r))
+    b_norm = np.sqrt(rr)
+    if b_norm == 0:
+        return np.zeros(num_rows, dtype='double'), 0, 0.0
+
+    n = 0
+    while n < max_iterations and np.sqrt(rr) > tolerance * b_norm:
+        comm.Allgatherv(p_local, [p, counts])
+        Ap = np.dot(collision_matrix, p)
+        pAp = comm.allreduce(np.dot(p_local, Ap))
+        if pAp <= 0:
+            break
+        alpha = rr / pAp
+        x += alpha * p_local
+        r -= alpha * Ap
+        rr_new = comm.allreduce(np.dot(r, r))
+        p_local = r + (rr_new / rr) * p_local
+        rr = rr_new
+        n += 1
+
+    x_all = np.zeros(num_rows, dtype='double')
+    comm.Allgatherv(x, [x_all, counts])
+    return x_all, n, np.sqrt(rr) / b_norm
@@ -0,0 +1,184 @@
+# Copyright (C) 2021 Atsushi Togo
+# All rights reserved.
+#
+# This file is part of phono3py.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in
+#   the documentation and/or other materials provided with the
+#   distribution.
+#
+# * Neither the name of the phonopy project nor the names of its
+#   contributors may be used to endorse or promote products derived
+#   from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+from phonopy.phonon.degeneracy import degenerate_sets
+from phono3py.phonon.grid import (get_grid_point_from_address,
+                                  get_ir_grid_points)
+
+
+def get_sub_mesh_divisors(bz_grid, sub_mesh):
+    """Return divisors of grid to give sub-mesh
+
+    Parameters
+    ----------
+    bz_grid : BZGrid
+        Fine grid. Only grid without generalized regular grid is supported.
+    sub_mesh : array_like
+        Mesh numbers of sub-mesh. Each of them has to divide that of
+        bz_grid.
+
+    Returns
+    -------
+    ndarray
+        shape=(3,), dtype='int_'
+
+    """
+    D_diag = bz_grid.D_diag
+    if not (bz_grid.P == np.eye(3, dtype='int_')).all():
+        raise RuntimeError("Sub-mesh of generalized regular grid is not "
+                           "supported.")
+    divisors = np.array(D_diag // np.array(sub_mesh), dtype='int_')
+    if (divisors * np.array(sub_mesh) != D_diag).any():
+        raise RuntimeError("Sub-mesh has to divide mesh of grid.")
+    return divisors
+
+
+def is_on_sub_mesh(grid_points, bz_grid, divisors):
+    """Return whether grid points are on sub-mesh"""
+    return (bz_grid.addresses[grid_points] % divisors == 0).all(axis=1)
+
+
+def get_interpolated_gamma(gamma,
+                           sub_grid_points,
+                           grid_points,
+                           interaction,
+                           divisors):
+    """Interpolate gamma on sub-mesh onto grid points of BZ grid
+
+    Gamma at a grid point is linearly interpolated from those at the eight
+    grid points of sub-mesh surrounding it in the coordinates of grid
+    addresses. Since band indices are sorted by frequency, band orders at
+    the corners can differ from that at the grid point near band
+    crossings. Bands at each corner are therefore matched to bands at the
+    grid point by maximizing overlaps of their phonon eigenvectors. Gamma
+    divided by squared phonon frequency is interpolated and then multiplied
+    by squared frequency at the grid point, which follows the low frequency
+    behaviour of acoustic modes. Modes below cutoff frequency at the corners
+    are excluded from the interpolation. Interpolated gamma is finally
+    averaged over degenerate bands.
+
+    Parameters
+    ----------
+    gamma : ndarray
+        Gamma at sub_grid_points.
+        shape=(sigmas, temperatures, sub_grid_points, num_band)
+    sub_grid_points : array_like
+        Grid points on sub-mesh where gamma is given. Grid points of
+        sub-mesh not in this list have to be symmetrically equivalent to
+        one of them.
+    grid_points : array_like
+        Grid points where gamma is interpolated.
+    interaction : Interaction
+        Interaction instance. Its BZ grid and phonons are used.
+    divisors : array_like
+        Divisors of grid to give sub-mesh. See get_sub_mesh_divisors.
+
+    Returns
+    -------
+    ndarray
+        shape=(sigmas, temperatures, grid_points, num_band)
+
+    """
+    bz_grid = interaction.bz_grid
+    freqs, eigvecs, phonon_done = interaction.get_phonons()
+    if (phonon_done == 0).any():
+        interaction.run_phonon_solver()
+    num_band = freqs.shape[1]
+    if gamma.shape[-1] != num_band:
+        raise RuntimeError("Gamma of all bands is necessary.")
+
+    gp_indices = _get_sub_grid_point_indices(sub_grid_points, bz_grid)
+    positions = interaction.primitive.scaled_positions
+    divisors = np.array(divisors, dtype='int_')
+    cutoff_frequency = interaction.cutoff_frequency
+
+    gamma_interp = np.zeros(gamma.shape[:2] + (len(grid_points), num_band),
+                            dtype='double', order='C')
+    corner_shifts = np.array([[i, j, k] for i in (0, 1) for j in (0, 1)
+                              for k in (0, 1)], dtype='int_')
+
+    for i, gp in enumerate(grid_points):
+        address = bz_grid.addresses[gp]
+        base = (address // divisors) * divisors
+        t = (address - base) / divisors.astype('double')
+        weights = np.zeros(num_band, dtype='double')
+        for shift in corner_shifts:
+            w = np.prod(np.where(shift, t, 1 - t))
+            if w < 1e-8:
+                continue
+            corner = base + shift * divisors
+            c_gp = bz_grid.grg2bzg[
+                get_grid_point_from_address(corner, bz_grid.D_diag)]
+            if gp_indices[c_gp] < 0:
+                raise RuntimeError("Gamma at grid point %d is missing." % c_gp)
+            G = (corner - bz_grid.addresses[c_gp]) // bz_grid.D_diag
+            # Phase factor relating eigenvectors at q and q + G.
+            phase = np.repeat(np.exp(-2j * np.pi * np.dot(positions, G)), 3)
+            overlap = np.abs(np.dot(eigvecs[gp].T.conj(),
+                                    phase[:, None] * eigvecs[c_gp]))
+            _, band_map = linear_sum_assignment(-overlap ** 2)
+            # Gamma divided by squared frequency is interpolated to follow
+            # the low frequency behaviour of acoustic modes.
+            f_c = freqs[c_gp, band_map]
+            w_c = np.where(f_c > cutoff_frequency, w, 0)
+            gamma_interp[:, :, i, :] += w_c * (
+                gamma[:, :, gp_indices[c_gp], band_map]
+                / np.where(f_c > cutoff_frequency, f_c, 1) ** 2)
+            weights += w_c
+        gamma_interp[:, :, i, :] *= np.where(
+            weights > 0, freqs[gp] ** 2 / np.where(weights > 0, weights, 1),
+            0)
+
+        for deg in degenerate_sets(freqs[gp]):
+            gamma_interp[:, :, i, deg] = gamma_interp[
+                :, :, i, deg].mean(axis=2)[:, :, None]
+
+    return gamma_interp
+
+
+def _get_sub_grid_point_indices(sub_grid_points, bz_grid):
+    """Return indices in sub_grid_points of all BZ grid points
+
+    -1 is set for grid points not on the sub-mesh.
+
+    """
+    num_gr = np.prod(bz_grid.D_diag)
+    gr_indices = np.full(num_gr, -1, dtype='int_')
+    gr_indices[bz_grid.bzg2grg[sub_grid_points]] = np.arange(
+        len(sub_grid_points))
+    _, _, ir_grid_map = get_ir_grid_points(bz_grid)
+    gr_indices = np.where(gr_indices < 0, gr_indices[ir_grid_map], gr_indices)
+    return gr_indices[bz_grid.bzg2grg]
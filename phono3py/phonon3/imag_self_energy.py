@@ -35,8 +35,11 @@
 import sys
 import numpy as np
 from phonopy.units import Hbar, EV, THz
+from phonopy.structure.tetrahedron_method import TetrahedronMethod
 from phonopy.phonon.degeneracy import degenerate_sets
-from phono3py.phonon3.triplets import get_triplets_integration_weights
+from phono3py.phonon3.triplets import (get_triplets_integration_weights,
+                                       get_triplets_adaptive_sigmas,
+                                       get_triplets_sorted_freq_vertices)
 from phono3py.phonon.func import bose_einstein
 from phono3py.file_IO import (write_gamma_detail_to_hdf5,
                               write_imag_self_energy_at_grid_point)
@@ -52,6 +55,7 @@ def get_imag_self_energy(interaction,
                          frequency_points_at_bands=False,
                          num_points_in_batch=None,
                          scattering_event_class=None,  # class 1 or 2
+                         is_lowmem=False,
                          write_gamma_detail=False,
                          return_gamma_detail=False,
                          output_filename=None,
@@ -102,6 +106,13 @@ def get_imag_self_energy(interaction,
         1 or 2, respectively. The result is stored in gammas. Therefore
         usual gammas are not stored in the variable. Default is None, which
         doesn't specify scattering_event_class.
+    is_lowmem : bool, optional
+        With True, ph-ph interaction strength is computed and consumed
+        triplet by triplet without being stored, which reduces memory
+        consumption largely. In the frequency sampling mode, all frequency
+        points are computed at once and num_points_in_batch is ignored.
+        This is disabled when detailed gammas are requested. Default is
+        False.
     write_gamma_detail : bool, optional
         Detailed gammas are written into a file in hdf5. Default is False.
     return_gamma_detail : bool, optional
@@ -170,6 +181,8 @@ def get_imag_self_energy(interaction,
              num_band0, _num_frequency_points), dtype='double', order='C')
 
     detailed_gamma = []
+    _is_lowmem = (is_lowmem and
+                  not (write_gamma_detail or return_gamma_detail))
 
     ise = ImagSelfEnergy(
         interaction, with_detail=(write_gamma_detail or return_gamma_detail))
@@ -189,7 +202,8 @@ def get_imag_self_energy(interaction,
             print("Number of ir-triplets: "
                   "%d / %d" % (len(weights), weights.sum()))
 
-        ise.run_interaction()
+        if not _is_lowmem:
+            ise.run_interaction()
         frequencies = interaction.get_phonons()[0][gp]
 
         if log_level:
@@ -210,6 +224,7 @@ def get_imag_self_energy(interaction,
                                     _num_frequency_points,
                                     scattering_event_class,
                                     num_points_in_batch,
+                                    _is_lowmem,
                                     interaction,
                                     ise,
                                     write_gamma_detail,
@@ -233,6 +248,7 @@ def _get_imag_self_energy_at_gp(gamma,
                                 _num_frequency_points,
                                 scattering_event_class,
                                 num_points_in_batch,
+                                is_lowmem,
                                 interaction,
                                 ise,
                                 write_gamma_detail,
@@ -275,6 +291,7 @@ def _get_imag_self_energy_at_gp(gamma,
                                        _frequency_points,
                                        scattering_event_class,
                                        num_points_in_batch,
+                                       is_lowmem,
                                        ise,
                                        write_gamma_detail,
                                        return_gamma_detail,
@@ -308,6 +325,7 @@ def _get_imag_self_energy_at_sigma(gamma,
                                    _frequency_points,
                                    scattering_event_class,
                                    num_points_in_batch,
+                                   is_lowmem,
                                    ise,
                                    write_gamma_detail,
                                    return_gamma_detail,
@@ -318,7 +336,17 @@ def _get_imag_self_energy_at_sigma(gamma,
     else:
         detailed_gamma_at_gp_at_j = detailed_gamma_at_gp[j]
 
-    if _frequency_points is None:
+    if is_lowmem:
+        # Interaction strength is not stored but computed with
+        # imag-self-energies at all temperatures and frequency points.
+        ise.set_frequency_points(_frequency_points)
+        ise.run_lowmem(temperatures,
+                       scattering_event_class=scattering_event_class)
+        if _frequency_points is None:
+            gamma[j, :, i] = ise.get_imag_self_energy()
+        else:
+            gamma[j, :, i] = ise.get_imag_self_energy().swapaxes(1, 2)
+    elif _frequency_points is None:
         ise.set_integration_weights(
             scattering_event_class=scattering_event_class)
         for k, t in enumerate(temperatures):
@@ -432,16 +460,54 @@ def average_by_degeneracy(imag_self_energy, band_indices, freqs_at_gp):
             if bi in dset:
                 bi_set.append(i)
         for i in bi_set:
-            if imag_self_energy.ndim == 1:
-                imag_se[i] = (imag_self_energy[bi_set].sum() /
-                              len(bi_set))
-            else:
-                imag_se[:, i] = (
-                    imag_self_energy[:, bi_set].sum(axis=1) /
-                    len(bi_set))
+            imag_se[..., i] = (imag_self_energy[..., bi_set].sum(axis=-1) /
+                               len(bi_set))
     return imag_se
 
 
+def get_imag_self_energy_from_collision_kernels(collision_kernels,
+                                                frequency_bin_edges,
+                                                temperatures):
+    """Return imag-self-energies at temperatures from collision kernels
+
+    Imag-self-energy is given by contraction of the collision kernels with
+    occupation numbers at centers of frequency bins,
+
+        sum_{ij} [(n_i + n_j + 1) K1_ij + (n_i - n_j) K2_ij],
+
+    where K1 and K2 are the kernels of class-1 and class-2 events. See
+    ImagSelfEnergy.get_binned_collision_kernels.
+
+    Parameters
+    ----------
+    collision_kernels : ndarray
+        shape=(2, num_band0, num_bins, num_bins), dtype='double'
+    frequency_bin_edges : ndarray
+        shape=(num_bins + 1, ), dtype='double'
+    temperatures : array_like
+        Temperatures in K.
+
+    Returns
+    -------
+    ndarray
+        shape=(temperatures, num_band0), dtype='double'
+
+    """
+    centers = (frequency_bin_edges[1:] + frequency_bin_edges[:-1]) / 2
+    gamma = np.zeros((len(temperatures), collision_kernels.shape[1]),
+                     dtype='double', order='C')
+    for i, t in enumerate(temperatures):
+        if t > 0:
+            n = bose_einstein(centers, t)
+        else:
+            n = np.zeros_like(centers)
+        occ_1 = n[:, None] + n[None, :] + 1
+        occ_2 = n[:, None] - n[None, :]
+        gamma[i] = (np.einsum('bij,ij->b', collision_kernels[0], occ_1) +
+                    np.einsum('bij,ij->b', collision_kernels[1], occ_2))
+    return gamma
+
+
 class ImagSelfEnergy(object):
     def __init__(self,
                  interaction,
@@ -451,10 +517,12 @@ class ImagSelfEnergy(object):
                  sigma_cutoff=None,
                  with_detail=False,
                  unit_conversion=None,
+                 max_sorted_freq_vertices_memory=2 ** 28,
                  lang='C'):
         self._pp = interaction
         self._sigma = None
         self.set_sigma(sigma, sigma_cutoff=sigma_cutoff)
+        self._adaptive_sigma_scale = None
         self._temperature = None
         self.set_temperature(temperature)
         self._frequency_points = None
@@ -463,6 +531,7 @@ class ImagSelfEnergy(object):
 
         self._lang = lang
         self._imag_self_energy = None
+        self._imag_self_energy_error = None
         self._detailed_imag_self_energy = None
         self._pp_strength = None
         self._frequencies = None
@@ -476,6 +545,12 @@ class ImagSelfEnergy(object):
         self._g_zero = None  # Necessary elements of interaction strength
         self._g_zero_frequency_points = None
         self._g_zero_zeros = None   # always zeros for frequency sampling mode
+        # Sorted frequencies at tetrahedra vertices reused among batches
+        # of frequency points. They are stored only when they fit in
+        # max_sorted_freq_vertices_memory (bytes). None disables it.
+        self._sorted_freq_vertices = None
+        self._max_sorted_freq_vertices_memory = (
+            max_sorted_freq_vertices_memory)
         self._is_collision_matrix = False
 
         # Unit to THz of Gamma
@@ -513,26 +588,350 @@ class ImagSelfEnergy(object):
                 self._ise_U = np.zeros_like(self._imag_self_energy)
             self._run_with_frequency_points()
 
-    def run_interaction(self, is_full_pp=True):
+    def run_interaction(self, is_full_pp=True, g_zero=None):
+        """Run ph-ph interaction calculation
+
+        Parameters
+        ----------
+        is_full_pp : bool, optional
+            With True, all elements of interaction strength are computed.
+            Default is True.
+        g_zero : ndarray, optional
+            Positions of elements of interaction strength that are not
+            computed. When None, g_zero of the current integration weights
+            is used. This is used to share one interaction strength among
+            multiple integration weights, e.g., with different sigmas.
+            shape=(triplets, band0, band, band), dtype='byte'
+
+        """
         if is_full_pp or self._frequency_points is not None:
             self._pp.run(lang=self._lang)
-        else:
+        elif g_zero is None:
             self._pp.run(lang=self._lang, g_zero=self._g_zero)
+        else:
+            self._pp.run(lang=self._lang, g_zero=g_zero)
         self._pp_strength = self._pp.interaction_strength
 
+    def run_lowmem(self, temperatures, is_N_U=False,
+                   scattering_event_class=None):
+        """Run ph-ph interaction and self-energy calculations together
+
+        Interaction strength is computed triplet by triplet and is not
+        stored, so the memory consumption is much smaller than that of
+        ``run_interaction`` followed by ``run``. Integration weights are
+        also computed in the same loop, therefore it is unnecessary to
+        call ``set_integration_weights``.
+
+        Parameters
+        ----------
+        temperatures : array_like
+            Temperatures where imag-self-energies are calculated.
+            dtype=float, shape=(temperatures,)
+        is_N_U : bool, optional
+            With True, imag-self-energies of normal and umklapp processes
+            are also computed. Default is False.
+        scattering_event_class : int, optional
+            Specific choice of scattering event class, 1 or 2. Default is
+            None, which doesn't specify scattering_event_class.
+
+        Results are obtained by ``get_imag_self_energy`` and
+        ``get_imag_self_energy_N_and_U`` with the shapes of
+        (temperatures, band_indices) in the band-indices mode and
+        (temperatures, frequency_points, band_indices) in the frequency
+        sampling mode.
+
+        """
+        collisions = self._run_pp_collision(
+            temperatures,
+            is_N_U=is_N_U,
+            scattering_event_class=scattering_event_class)
+        if is_N_U:
+            self._ise_N, self._ise_U = collisions
+            self._imag_self_energy = self._ise_N + self._ise_U
+        else:
+            self._imag_self_energy = collisions
+
+    def run_lowmem_sampled(self, temperatures, num_samples, rng=None):
+        """Run run_lowmem with importance sampling of triplets
+
+        ``num_samples`` triplets are drawn with replacement with
+        probabilities proportional to triplet weights times a phase-space
+        proxy, i.e., numbers of pairs of phonons at each triplet satisfying
+        energy conservation within a frequency window, mixed with pure
+        triplet weights so that all triplets can be drawn. Imag-self-energy
+        is estimated without bias from the sampled triplets and its
+        standard error is estimated from their variance. When
+        ``num_samples`` is not smaller than the number of triplets, all
+        triplets are computed and the error is zero. ``num_samples`` has to
+        be at least two.
+
+        Parameters
+        ----------
+        temperatures : array_like
+            Temperatures where imag-self-energies are calculated.
+        num_samples : int
+            Number of triplets drawn.
+        rng : numpy.random.Generator, optional
+            Random number generator. Default is None, which gives
+            ``numpy.random.default_rng()``.
+
+        Results are obtained by ``get_imag_self_energy`` and
+        ``get_imag_self_energy_error`` with the same shapes as those of
+        ``run_lowmem``.
+
+        """
+        if num_samples < 2:
+            raise RuntimeError("At least two triplets have to be sampled to "
+                               "estimate the error.")
+        triplets = self._triplets_at_q
+        weights = self._weights_at_q
+        if num_samples >= len(triplets):
+            self.run_lowmem(temperatures)
+            self._imag_self_energy_error = np.zeros_like(
+                self._imag_self_energy)
+            return
+
+        if rng is None:
+            _rng = np.random.default_rng()
+        else:
+            _rng = rng
+        prob = self._get_triplets_sampling_probabilities()
+        indices, counts = np.unique(
+            _rng.choice(len(triplets), size=num_samples, p=prob),
+            return_counts=True)
+
+        # Estimates by individual draws, weight * ise_at_triplet / prob.
+        # Drawn triplets are computed in one pp_collision call.
+        self._triplets_at_q = triplets[indices]
+        self._weights_at_q = weights[indices]
+        try:
+            collisions = self._run_pp_collision(temperatures,
+                                                is_per_triplet=True)
+        finally:
+            self._triplets_at_q = triplets
+            self._weights_at_q = weights
+
+        estimates = (collisions.T / prob[indices]).T
+        counts_shape = (-1,) + (1,) * (estimates.ndim - 1)
+        _counts = counts.reshape(counts_shape)
+        mean = (_counts * estimates).sum(axis=0) / num_samples
+        variance = (_counts * (estimates - mean) ** 2).sum(axis=0) / (
+            num_samples - 1)
+        self._imag_self_energy = mean
+        self._imag_self_energy_error = np.sqrt(variance / num_samples)
+
+    def _run_pp_collision(self,
+                          temperatures,
+                          is_N_U=False,
+                          scattering_event_class=None,
+                          is_per_triplet=False):
+        """Return imag-self-energies computed by pp_collision
+
+        With is_per_triplet, those of triplets multiplied by triplet
+        weights are returned separately with the leading triplet axis, and
+        is_N_U is ignored.
+
+        """
+        import phono3py._phono3py as phono3c
+
+        (svecs,
+         multiplicity,
+         p2s,
+         s2p,
+         masses) = self._pp.get_primitive_and_supercell_correspondence()
+        bz_grid = self._pp.bz_grid
+        _temperatures = np.array(temperatures, dtype='double')
+        num_band0 = len(self._pp.band_indices)
+        if self._frequency_points is None:
+            shape = (len(_temperatures), num_band0)
+        else:
+            shape = (len(_temperatures), len(self._frequency_points),
+                     num_band0)
+        if is_per_triplet:
+            shape = (len(self._triplets_at_q),) + shape
+        elif is_N_U:
+            shape = (2,) + shape
+        collisions = np.zeros(shape, dtype='double', order='C')
+        if scattering_event_class is None:
+            _scattering_event_class = 0
+        else:
+            _scattering_event_class = scattering_event_class
+        symmetrize_fc3_q = 0
+
+        if self._sigma is None:
+            thm = TetrahedronMethod(bz_grid.microzone_lattice)
+            phono3c.pp_collision(
+                collisions,
+                np.array(np.dot(thm.get_tetrahedra(), bz_grid.P.T),
+                         dtype='int_', order='C'),
+                self._frequencies,
+                self._eigenvectors,
+                self._triplets_at_q,
+                self._weights_at_q,
+                bz_grid.addresses,
+                bz_grid.gp_map,
+                bz_grid.is_dense_gp_map * 1 + 1,
+                bz_grid.D_diag,
+                bz_grid.Q,
+                self._pp.fc3,
+                svecs,
+                multiplicity,
+                masses,
+                p2s,
+                s2p,
+                self._pp.band_indices,
+                _temperatures,
+                self._frequency_points,
+                is_N_U * 1,
+                _scattering_event_class,
+                symmetrize_fc3_q,
+                self._cutoff_frequency,
+                is_per_triplet * 1)
+        else:
+            if self._sigma_cutoff is None:
+                sigma_cutoff = -1
+            else:
+                sigma_cutoff = float(self._sigma_cutoff)
+            phono3c.pp_collision_with_sigma(
+                collisions,
+                self._sigma,
+                sigma_cutoff,
+                self._frequencies,
+                self._eigenvectors,
+                self._triplets_at_q,
+                self._weights_at_q,
+                bz_grid.addresses,
+                bz_grid.D_diag,
+                bz_grid.Q,
+                self._pp.fc3,
+                svecs,
+                multiplicity,
+                masses,
+                p2s,
+                s2p,
+                self._pp.band_indices,
+                _temperatures,
+                self._frequency_points,
+                is_N_U * 1,
+                _scattering_event_class,
+                symmetrize_fc3_q,
+                self._cutoff_frequency,
+                self._get_adaptive_sigmas(),
+                is_per_triplet * 1)
+
+        collisions *= (self._unit_conversion *
+                       self._pp.get_unit_conversion_factor())
+        return collisions
+
+    def _get_triplets_sampling_probabilities(self, mixing=0.1):
+        """Return probabilities of drawing triplets
+
+        Phase-space proxy is the number of (j, k) pairs satisfying
+        |f0 - f1_j - f2_k| < df or ||f1_j - f2_k| - f0| < df over band
+        indices.
+
+        """
+        freqs = self._frequencies
+        if self._frequency_points is None:
+            f0 = freqs[self._grid_point][self._pp.band_indices]
+        else:
+            f0 = self._frequency_points
+        if self._sigma:
+            df = self._sigma
+        else:
+            df = np.max(freqs) / 50
+        weights = np.array(self._weights_at_q, dtype='double')
+        phase_space = np.zeros(len(self._triplets_at_q), dtype='double')
+        for i, tp in enumerate(self._triplets_at_q):
+            f1 = freqs[tp[1]][freqs[tp[1]] > self._cutoff_frequency]
+            f2 = freqs[tp[2]][freqs[tp[2]] > self._cutoff_frequency]
+            for fsum in (np.sort(np.add.outer(f1, f2).ravel()),
+                         np.sort(np.abs(np.subtract.outer(f1, f2)).ravel())):
+                phase_space[i] += (np.searchsorted(fsum, f0 + df)
+                                   - np.searchsorted(fsum, f0 - df)).sum()
+        prob = weights / weights.sum() * mixing
+        if phase_space.sum() > 0:
+            prob += (weights * phase_space
+                     / np.dot(weights, phase_space)) * (1 - mixing)
+        else:
+            prob /= mixing
+        return prob / prob.sum()
+
+    def get_binned_collision_kernels(self, frequency_bin_edges):
+        """Return ph-ph collisions binned by frequencies of phonon pairs
+
+        Interaction strength multiplied by integration weights and triplet
+        weights is accumulated on two dimensional frequency bins of the
+        second and third phonons for class-1 and class-2 events, i.e.,
+        with the weights of delta(f - f1 - f2) and
+        delta(f + f1 - f2) - delta(f - f1 + f2), respectively. Since
+        occupation numbers depend only on f1 and f2, imag-self-energy at any
+        temperature is obtained from these kernels by
+        get_imag_self_energy_from_collision_kernels. Interaction strength
+        and integration weights have to be computed before calling this
+        method. Only available when frequency points are not specified.
+
+        Parameters
+        ----------
+        frequency_bin_edges : array_like
+            Edges of frequency bins in THz in ascending order. Phonons out
+            of the bins are counted in the first or last bin.
+
+        Returns
+        -------
+        ndarray
+            Kernels averaged over degenerate bands.
+            shape=(2, num_band0, num_bins, num_bins), dtype='double'
+
+        """
+        edges = np.array(frequency_bin_edges, dtype='double')
+        num_bins = len(edges) - 1
+        pp = self._pp_strength
+        num_band0 = pp.shape[1]
+        freqs = self._frequencies[self._triplets_at_q[:, [1, 2]]]
+        bins = np.clip(np.searchsorted(edges, freqs, side='right') - 1,
+                       0, num_bins - 1)
+        is_valid = freqs > self._cutoff_frequency
+        cells = bins[:, 0, :, None] * num_bins + bins[:, 1, None, :]
+        mask = np.logical_and(is_valid[:, 0, :, None],
+                              is_valid[:, 1, None, :])
+        weights = np.array(self._weights_at_q, dtype='double')
+        kernels = np.zeros((2, num_band0, num_bins * num_bins),
+                           dtype='double', order='C')
+        for i in range(2):
+            for j in range(num_band0):
+                values = self._g[i, :, j] * pp[:, j] * weights[:, None, None]
+                kernels[i, j] = np.bincount(cells[mask],
+                                            weights=values[mask],
+                                            minlength=num_bins * num_bins)
+        kernels *= self._unit_conversion
+        kernels = kernels.reshape(2, num_band0, num_bins, num_bins)
+        return np.array(
+            np.moveaxis(self._average_by_degeneracy(
+                np.moveaxis(kernels, 1, -1)), -1, 1),
+            dtype='double', order='C')
+
     def set_integration_weights(self, scattering_event_class=None):
         if self._frequency_points is None:
             bi = self._pp.band_indices
             f_points = self._frequencies[self._grid_point][bi]
         else:
             f_points = self._frequency_points
+            if (self._sigma is None and
+                self._lang == 'C' and
+                self._sorted_freq_vertices is None and
+                self._sorted_freq_vertices_fit_in_memory()):
+                self._sorted_freq_vertices = (
+                    get_triplets_sorted_freq_vertices(self._pp))
 
         self._g, _g_zero = get_triplets_integration_weights(
             self._pp,
             np.array(f_points, dtype='double'),
             self._sigma,
             self._sigma_cutoff,
-            is_collision_matrix=self._is_collision_matrix)
+            is_collision_matrix=self._is_collision_matrix,
+            sorted_freq_vertices=self._sorted_freq_vertices,
+            adaptive_sigmas=self._get_adaptive_sigmas())
         if self._frequency_points is None:
             self._g_zero = _g_zero
         else:
@@ -560,6 +959,13 @@ class ImagSelfEnergy(object):
             return (self._average_by_degeneracy(self._ise_N),
                     self._average_by_degeneracy(self._ise_U))
 
+    def get_imag_self_energy_error(self):
+        """Return standard error of imag-self-energy by run_lowmem_sampled"""
+        if self._cutoff_frequency is None:
+            return self._imag_self_energy_error
+        else:
+            return self._average_by_degeneracy(self._imag_self_energy_error)
+
     def get_detailed_imag_self_energy(self):
         return self._detailed_imag_self_energy
 
@@ -575,6 +981,7 @@ class ImagSelfEnergy(object):
         else:
             self._pp.set_grid_point(grid_point)
             self._pp_strength = None
+            self._sorted_freq_vertices = None
             (self._triplets_at_q,
              self._weights_at_q) = self._pp.get_triplets_at_q()[:2]
             self._grid_point = grid_point
@@ -593,6 +1000,22 @@ class ImagSelfEnergy(object):
 
         self.delete_integration_weights()
 
+    def set_adaptive_sigma_scale(self, adaptive_sigma_scale):
+        """Set scale factor of adaptive smearing widths
+
+        When this is given with sigma, smearing widths of each triplet and
+        band pair are estimated from group velocities and grid spacing,
+        see ``get_triplets_adaptive_sigmas``, and sigma is used as the
+        lower bound of them. None disables adaptive smearing.
+
+        """
+        if adaptive_sigma_scale is None:
+            self._adaptive_sigma_scale = None
+        else:
+            self._adaptive_sigma_scale = float(adaptive_sigma_scale)
+
+        self.delete_integration_weights()
+
     def set_frequency_points(self, frequency_points):
         if frequency_points is None:
             self._frequency_points = None
@@ -620,11 +1043,33 @@ class ImagSelfEnergy(object):
         self._pp_strength = pp_strength
         self._pp.set_interaction_strength(pp_strength, g_zero=self._g_zero)
 
+    def _sorted_freq_vertices_fit_in_memory(self):
+        """Return whether data by get_triplets_sorted_freq_vertices fit
+
+        Per triplet and band pair, 3 x 24 x 4 doubles of frequencies,
+        3 x 24 bytes of vertex indices, and 3 x 2 doubles of spans.
+
+        """
+        if self._max_sorted_freq_vertices_memory is None:
+            return False
+        num_band = self._frequencies.shape[1]
+        memory = (len(self._triplets_at_q) * num_band ** 2 *
+                  (3 * 24 * 4 * 8 + 3 * 24 + 3 * 2 * 8))
+        return memory <= self._max_sorted_freq_vertices_memory
+
     def delete_integration_weights(self):
         self._g = None
         self._g_zero = None
         self._pp_strength = None
 
+    def _get_adaptive_sigmas(self):
+        if self._sigma is None or self._adaptive_sigma_scale is None:
+            return None
+        return get_triplets_adaptive_sigmas(self._pp,
+                                            self._adaptive_sigma_scale,
+                                            self._sigma,
+                                            triplets=self._triplets_at_q)
+
     def _run_with_band_indices(self):
         if self._g is not None:
             if self._lang == 'C':
@@ -35,6 +35,7 @@
 import warnings
 import numpy as np
 from phonopy.harmonic.dynamical_matrix import get_dynamical_matrix
+from phonopy.phonon.group_velocity import GroupVelocity
 from phonopy.units import VaspToTHz, Hbar, EV, Angstrom, THz, AMU
 from phono3py.phonon.solver import run_phonon_solver_c, run_phonon_solver_py
 from phono3py.phonon3.real_to_reciprocal import RealToReciprocal
@@ -103,6 +104,8 @@ class Interaction(object):
         self._phonon_done = None
         self._frequencies = None
         self._eigenvectors = None
+        self._group_velocities = None
+        self._gv_done = None
         self._dm = None
         self._nac_params = None
         self._nac_q_direction = None
@@ -356,17 +359,31 @@ class Interaction(object):
                               primitive,
                               nac_params=None,
                               solve_dynamical_matrices=True,
-                              decimals=None):
+                              decimals=None,
+                              dynamical_matrix=None):
+        """Initialize dynamical matrix
+
+        dynamical_matrix : DynamicalMatrix, optional
+            Dynamical matrix instance made from the same fc2, cells, and
+            nac_params, e.g., that of Interaction instance of another
+            mesh. When given, this is reused rather than made from fc2,
+            which avoids the preparation of non-analytical term
+            correction. Default is None.
+
+        """
         self._allocate_phonon()
         self._nac_params = nac_params
-        self._dm = get_dynamical_matrix(
-            fc2,
-            supercell,
-            primitive,
-            nac_params=nac_params,
-            frequency_scale_factor=self._frequency_scale_factor,
-            decimals=decimals,
-            symprec=self._symprec)
+        if dynamical_matrix is None:
+            self._dm = get_dynamical_matrix(
+                fc2,
+                supercell,
+                primitive,
+                nac_params=nac_params,
+                frequency_scale_factor=self._frequency_scale_factor,
+                decimals=decimals,
+                symprec=self._symprec)
+        else:
+            self._dm = dynamical_matrix
 
         self._phonon_done[0] = 0
         if solve_dynamical_matrices:
@@ -402,6 +419,56 @@ class Interaction(object):
             self._frequencies[:] = frequencies
             self._eigenvectors[:] = eigenvectors
 
+    def get_group_velocities(self, grid_points):
+        """Return group velocities at BZ grid points
+
+        Group velocities are computed only at grid points where they are
+        not yet computed and are kept for later calls. These are not
+        symmetrized by site-symmetries of q-points.
+
+        Returns
+        -------
+        ndarray
+            shape=(grid_points, num_band, 3), dtype='double'
+
+        """
+        if self._group_velocities is None:
+            num_band = len(self._primitive) * 3
+            num_grid = len(self._bz_grid.addresses)
+            self._group_velocities = np.zeros((num_grid, num_band, 3),
+                                              dtype='double', order='C')
+            self._gv_done = np.zeros(num_grid, dtype='byte')
+
+        _grid_points = np.array(grid_points, dtype='int_')
+        is_done = self._gv_done[_grid_points] == 1
+        gps = np.array(np.unique(_grid_points[~is_done]), dtype='int_')
+        if len(gps) > 0:
+            if self._dm.is_nac() and self._dm.nac_method == 'gonze':
+                gv_obj = GroupVelocity(
+                    self._dm,
+                    q_length=1e-5,
+                    frequency_factor_to_THz=self._frequency_factor_to_THz)
+                gv_obj.run(np.dot(self._bz_grid.addresses[gps],
+                                  self._bz_grid.QDinv.T))
+                gv = gv_obj.group_velocities
+            else:
+                gv = np.zeros((len(gps),) + self._group_velocities.shape[1:],
+                              dtype='double', order='C')
+                run_phonon_solver_c(self._dm,
+                                    self._frequencies,
+                                    self._eigenvectors,
+                                    self._phonon_done,
+                                    gps,
+                                    self._bz_grid.addresses,
+                                    self._bz_grid.QDinv,
+                                    self._frequency_factor_to_THz,
+                                    self._nac_q_direction,
+                                    self._lapack_zheev_uplo,
+                                    group_velocities=gv)
+            self._group_velocities[gps] = gv
+            self._gv_done[gps] = 1
+        return self._group_velocities[_grid_points]
+
     def run_phonon_solver(self, grid_points=None):
         if grid_points is None:
             _grid_points = np.arange(len(self._bz_grid.addresses), dtype='int_')
@@ -512,6 +579,8 @@ class Interaction(object):
         num_band = len(self._primitive) * 3
         num_grid = len(self._bz_grid.addresses)
         self._phonon_done = np.zeros(num_grid, dtype='byte')
+        self._group_velocities = None
+        self._gv_done = None
         self._frequencies = np.zeros((num_grid, num_band), dtype='double')
         itemsize = self._frequencies.itemsize
         self._eigenvectors = np.zeros((num_grid, num_band, num_band),
@@ -117,6 +117,97 @@ class JointDos(object):
             print("Joint density of states in python is not implemented.")
             return None, None
 
+    def run_at_grid_points(self, grid_points):
+        """Calculate joint-DOS at many grid points in one sweep
+
+        Phonons are solved once on all grid points and shared among grid
+        points. Integration weights and joint-DOS at all frequency points
+        (and all temperatures) are computed in a single C call that is
+        parallelized over grid points.
+
+        Results are obtained by ``joint_dos`` and ``frequency_points``.
+        The shape of ``joint_dos`` is (grid_points, frequency_points, 2)
+        without temperatures and (grid_points, temperatures,
+        frequency_points, 2) with temperatures.
+
+        Parameters
+        ----------
+        grid_points : array_like
+            Grid point indices in BZ grid.
+            dtype=int, shape=(grid_points,)
+
+        """
+        import phono3py._phono3py as phono3c
+
+        if self._phonon_done is None:
+            self._allocate_phonons()
+        self.run_phonon_solver(
+            np.arange(len(self._bz_grid.addresses), dtype='int_'))
+
+        triplets = []
+        weights = []
+        offsets = [0, ]
+        for gp in grid_points:
+            if self._is_mesh_symmetry:
+                triplets_at_q, weights_at_q, _, _ = get_triplets_at_q(
+                    gp, self._bz_grid)
+            else:
+                triplets_at_q, weights_at_q, _, _ = get_nosym_triplets_at_q(
+                    gp, self._bz_grid)
+            triplets.append(triplets_at_q)
+            weights.append(weights_at_q)
+            offsets.append(offsets[-1] + len(weights_at_q))
+        triplets = np.array(np.vstack(triplets), dtype='int_', order='C')
+        weights = np.array(np.hstack(weights), dtype='int_')
+        offsets = np.array(offsets, dtype='int_')
+
+        self._frequency_points = get_frequency_points(
+            max_phonon_freq=np.max(self._frequencies),
+            sigmas=[self._sigma, ],
+            frequency_points=None,
+            frequency_step=self._frequency_step,
+            num_frequency_points=self._num_frequency_points)
+        if self._temperatures is None:
+            temperatures = np.zeros(0, dtype='double')
+            shape = (len(grid_points), len(self._frequency_points), 2)
+        else:
+            temperatures = np.array(self._temperatures, dtype='double')
+            shape = (len(grid_points), len(temperatures),
+                     len(self._frequency_points), 2)
+        jdos = np.zeros(shape, dtype='double', order='C')
+
+        if self._sigma is None:
+            thm = TetrahedronMethod(self._bz_grid.microzone_lattice)
+            phono3c.joint_dos(
+                jdos,
+                self._frequency_points,
+                temperatures,
+                np.array(np.dot(thm.get_tetrahedra(), self._bz_grid.P.T),
+                         dtype='int_', order='C'),
+                triplets,
+                weights,
+                offsets,
+                self._bz_grid.addresses,
+                self._bz_grid.gp_map,
+                self._bz_grid.is_dense_gp_map * 1 + 1,
+                self._bz_grid.D_diag,
+                self._frequencies,
+                self._cutoff_frequency)
+        else:
+            phono3c.joint_dos_with_sigma(
+                jdos,
+                self._sigma,
+                -1,
+                self._frequency_points,
+                temperatures,
+                triplets,
+                weights,
+                offsets,
+                self._frequencies,
+                self._cutoff_frequency)
+
+        self._joint_dos = jdos / np.prod(self._bz_grid.D_diag)
+
     @property
     def dynamical_matrix(self):
         return self._dm
@@ -0,0 +1,144 @@
+# Copyright (C) 2021 Atsushi Togo
+# All rights reserved.
+#
+# This file is part of phono3py.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in
+#   the documentation and/or other materials provided with the
+#   distribution.
+#
+# * Neither the name of the phonopy project nor the names of its
+#   contributors may be used to endorse or promote products derived
+#   from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+
+import numpy as np
+from phono3py.phonon.grid import get_grid_point_from_address
+
+
+def copy_phonons_on_shared_grid_points(interaction_from, interaction_to):
+    """Copy phonons at grid points shared by grids of two interactions
+
+    A grid point of interaction_from whose q-point is also on the grid of
+    interaction_to, e.g., any grid point of 10x10x10 mesh on 20x20x20 mesh,
+    is mapped to that BZ grid point of interaction_to having exactly the
+    same q-point. Phonons already calculated at such grid points are copied
+    and marked as done in interaction_to. Since these q-points are identical
+    including reciprocal lattice translation and the dynamical matrix is the
+    same, the copied phonons are identical to those to be calculated.
+
+    Returns
+    -------
+    int
+        Number of grid points where phonons are copied.
+
+    """
+    bz_grid_from = interaction_from.bz_grid
+    bz_grid_to = interaction_to.bz_grid
+    if (bz_grid_from.P != bz_grid_to.P).any():
+        return 0
+
+    freqs_from, eigvecs_from, done_from = interaction_from.get_phonons()
+    freqs_to, eigvecs_to, done_to = interaction_to.get_phonons()
+    if freqs_from.shape[1] != freqs_to.shape[1]:
+        return 0
+
+    D_from = np.array(bz_grid_from.D_diag, dtype='int_')
+    D_to = np.array(bz_grid_to.D_diag, dtype='int_')
+    gps_from = np.nonzero(done_from)[0]
+    scaled = bz_grid_from.addresses[gps_from] * D_to
+    is_shared = (scaled % D_from == 0).all(axis=1)
+    gps_from = gps_from[is_shared]
+    if len(gps_from) == 0:
+        return 0
+    addresses = scaled[is_shared] // D_from
+    gps_to = bz_grid_to.grg2bzg[
+        get_grid_point_from_address(addresses, D_to)]
+    # Grid points on BZ surface can be represented by other addresses
+    # that differ by reciprocal lattice vectors. Those are left to solver.
+    is_same = (bz_grid_to.addresses[gps_to] == addresses).all(axis=1)
+    gps_from = gps_from[is_same]
+    gps_to = gps_to[is_same]
+
+    freqs_to[gps_to] = freqs_from[gps_from]
+    eigvecs_to[gps_to] = eigvecs_from[gps_from]
+    done_to[gps_to] = 1
+    return len(gps_to)
+
+
+def get_kappa_relative_change(kappa, kappa_prev):
+    """Return relative change of diagonal elements of kappa
+
+    Change is measured by the maximum absolute difference of xx, yy, zz
+    elements relative to the largest of them over sigmas and temperatures
+    where kappa is finite.
+
+    Parameters
+    ----------
+    kappa, kappa_prev : ndarray
+        shape=(sigmas, temperatures, 6)
+
+    """
+    diff = np.abs(kappa[..., :3] - kappa_prev[..., :3]).max(axis=-1)
+    scale = np.abs(kappa[..., :3]).max(axis=-1)
+    is_finite = scale > 1e-8
+    if not is_finite.any():
+        return 0.0
+    return (diff[is_finite] / scale[is_finite]).max()
+
+
+def get_extrapolated_kappa(mesh_numbers, kappas, num_points=2, order=2):
+    """Extrapolate kappa to infinitely dense mesh
+
+    kappa is fitted by a linear function of h^order, where h = 1 / N^(1/3)
+    and N is the number of grid points of mesh, by least squares using the
+    last num_points meshes, and the value at h = 0 is returned.
+
+    Parameters
+    ----------
+    mesh_numbers : array_like
+        Mesh numbers of meshes in ascending order of density.
+        shape=(meshes, 3)
+    kappas : array_like
+        shape=(meshes, sigmas, temperatures, 6)
+    num_points : int, optional
+        Number of the densest meshes used for fitting. Default is 2.
+    order : int, optional
+        Order of the leading error term in h. Default is 2.
+
+    Returns
+    -------
+    ndarray or None
+        Extrapolated kappa. None is returned when fewer than two meshes
+        are given.
+        shape=(sigmas, temperatures, 6)
+
+    """
+    if len(kappas) < 2:
+        return None
+    h = 1.0 / np.cbrt(np.prod(mesh_numbers[-num_points:], axis=1))
+    k = np.array(kappas[-num_points:], dtype='double')
+    A = np.array([np.ones_like(h), h ** order]).T
+    coef = np.linalg.lstsq(A, k.reshape(len(h), -1), rcond=None)[0]
+    return coef[0].reshape(k.shape[1:])
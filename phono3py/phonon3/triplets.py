@@ -138,9 +138,25 @@ def get_triplets_integration_weights(interaction,
                                      sigma_cutoff=None,
                                      is_collision_matrix=False,
                                      neighboring_phonons=False,
+                                     sorted_freq_vertices=None,
+                                     adaptive_sigmas=None,
                                      lang='C'):
     """Calculate triplets integration weights
 
+    Parameters
+    ----------
+    adaptive_sigmas : ndarray, optional
+        Smearing widths of each triplet and band pair returned by
+        ``get_triplets_adaptive_sigmas``, which are used instead of sigma
+        when sigma is given. Default is None.
+    sorted_freq_vertices : tuple, optional
+        Sorted frequencies at tetrahedra vertices returned by
+        ``get_triplets_sorted_freq_vertices``. When this is given and
+        tetrahedron method is used, integration weights are evaluated
+        from it without sorting tetrahedra vertices again. This is useful
+        when integration weights are computed at many frequency points
+        for the same triplets. Default is None.
+
     Returns
     -------
     g : ndarray
@@ -183,7 +199,8 @@ def get_triplets_integration_weights(interaction,
                 triplets,
                 frequencies,
                 sigma,
-                cutoff)
+                cutoff,
+                adaptive_sigmas)
         else:
             for i, tp in enumerate(triplets):
                 f1s = frequencies[tp[1]]
@@ -191,22 +208,37 @@ def get_triplets_integration_weights(interaction,
                 for j, k in list(np.ndindex((num_band, num_band))):
                     f1 = f1s[j]
                     f2 = f2s[k]
-                    g0 = gaussian(frequency_points - f1 - f2, sigma)
+                    if adaptive_sigmas is None:
+                        sigma_1 = sigma_2 = sigma
+                    else:
+                        sigma_1, sigma_2 = adaptive_sigmas[i, j, k]
+                    g0 = gaussian(frequency_points - f1 - f2, sigma_1)
                     g[0, i, :, j, k] = g0
-                    g1 = gaussian(frequency_points + f1 - f2, sigma)
-                    g2 = gaussian(frequency_points - f1 + f2, sigma)
+                    g1 = gaussian(frequency_points + f1 - f2, sigma_2)
+                    g2 = gaussian(frequency_points - f1 + f2, sigma_2)
                     g[1, i, :, j, k] = g1 - g2
                     if len(g) == 3:
                         g[2, i, :, j, k] = g0 + g1 + g2
     else:
         if lang == 'C':
             g_zero = np.zeros(g.shape[1:], dtype='byte', order='C')
-            _set_triplets_integration_weights_c(
-                g,
-                g_zero,
-                interaction,
-                frequency_points,
-                neighboring_phonons=neighboring_phonons)
+            if sorted_freq_vertices is None:
+                _set_triplets_integration_weights_c(
+                    g,
+                    g_zero,
+                    interaction,
+                    frequency_points,
+                    neighboring_phonons=neighboring_phonons)
+            else:
+                import phono3py._phono3py as phono3c
+                phono3c.triplets_integration_weights_at_sorted_freq_vertices(
+                    g,
+                    g_zero,
+                    frequency_points,
+                    sorted_freq_vertices[0],
+                    sorted_freq_vertices[1],
+                    sorted_freq_vertices[2],
+                    g.shape[0])
         else:
             _set_triplets_integration_weights_py(
                 g, interaction, frequency_points)
@@ -214,6 +246,62 @@ def get_triplets_integration_weights(interaction,
     return g, g_zero
 
 
+def get_triplets_adaptive_sigmas(interaction,
+                                 scale_factor,
+                                 min_sigma,
+                                 triplets=None):
+    """Return smearing widths of triplets from group velocities
+
+    Smearing width of delta function of a triplet and band pair is
+    estimated from the change of the phonon frequency sum or difference
+    across one grid step, where q1 is moved with q0 fixed, i.e.,
+    q2 = -q0 - q1 is moved oppositely. Therefore the width of
+    delta(f0 - f1 - f2) is given by v1 - v2, and that of
+    delta(f0 -+ (f1 - f2)) by v1 + v2 as
+
+        sigma = scale_factor * sqrt(sum_i (dv . s_i)^2 / 12)
+
+    where s_i are the Cartesian vectors of the grid steps. Widths smaller
+    than min_sigma are replaced by min_sigma.
+
+    Parameters
+    ----------
+    interaction : Interaction
+        Interaction instance whose grid point has been set.
+    scale_factor : float
+        Scale factor of smearing widths.
+    min_sigma : float
+        Lower bound of smearing widths in THz.
+    triplets : ndarray, optional
+        Triplets of grid points. Default is None, which gives triplets at
+        the grid point of interaction.
+
+    Returns
+    -------
+    ndarray
+        shape=(triplets, num_band, num_band, 2), dtype='double'
+        The last index is for delta(f0 - f1 - f2) and delta(f0 -+ (f1 - f2)).
+
+    """
+    bz_grid = interaction.bz_grid
+    if triplets is None:
+        _triplets = interaction.get_triplets_at_q()[0]
+    else:
+        _triplets = triplets
+    gv1 = interaction.get_group_velocities(_triplets[:, 1])
+    gv2 = interaction.get_group_velocities(_triplets[:, 2])
+    rec_lat = np.linalg.inv(interaction.primitive.cell)
+    # Columns are Cartesian vectors of grid steps.
+    steps = np.dot(rec_lat, bz_grid.QDinv)
+    sigmas = np.zeros(gv1.shape[:2] + (gv2.shape[1], 2),
+                      dtype='double', order='C')
+    for i, dv in enumerate((gv1[:, :, None, :] - gv2[:, None, :, :],
+                            gv1[:, :, None, :] + gv2[:, None, :, :])):
+        sigmas[..., i] = scale_factor * np.sqrt(
+            (np.dot(dv, steps) ** 2).sum(axis=-1) / 12)
+    return np.maximum(sigmas, min_sigma)
+
+
 def get_tetrahedra_vertices(relative_address,
                             mesh,
                             triplets_at_q,
@@ -352,6 +440,59 @@ def _get_BZ_triplets_at_q(grid_point, bz_grid, map_triplets):
     return triplets, np.array(ir_weights, dtype='int_')
 
 
+def get_triplets_sorted_freq_vertices(interaction,
+                                      neighboring_phonons=False):
+    """Sort frequencies at tetrahedra vertices of triplets
+
+    Sums and differences of frequencies of the second and third phonons
+    at vertices of 24 tetrahedra are sorted for all ir-triplets and band
+    pairs. Integration weights of tetrahedron method at any set of
+    frequency points are computed from these by
+    ``get_triplets_integration_weights`` with ``sorted_freq_vertices``.
+
+    Returns
+    -------
+    tuple
+        sorted_freq_vertices : ndarray
+            shape=(triplets, bands, bands, 3, 24, 4), dtype='double'
+        vertex_indices : ndarray
+            Positions of the first vertices of tetrahedra after sorting.
+            shape=(triplets, bands, bands, 3, 24), dtype='byte'
+        freq_spans : ndarray
+            Minimum and maximum frequencies over 24 tetrahedra.
+            shape=(triplets, bands, bands, 3, 2), dtype='double'
+
+    """
+    import phono3py._phono3py as phono3c
+
+    thm = TetrahedronMethod(interaction.bz_grid.microzone_lattice)
+    triplets_at_q = interaction.get_triplets_at_q()[0]
+    if neighboring_phonons:
+        _run_phonon_solver_at_neighboring_grid_points(interaction, thm)
+    frequencies = interaction.get_phonons()[0]
+    num_band = frequencies.shape[1]
+    shape = (len(triplets_at_q), num_band, num_band, 3)
+    sorted_freq_vertices = np.zeros(shape + (24, 4), dtype='double',
+                                    order='C')
+    vertex_indices = np.zeros(shape + (24, ), dtype='byte', order='C')
+    freq_spans = np.zeros(shape + (2, ), dtype='double', order='C')
+    phono3c.triplets_sorted_freq_vertices(
+        sorted_freq_vertices,
+        vertex_indices,
+        freq_spans,
+        np.array(np.dot(thm.get_tetrahedra(), interaction.bz_grid.P.T),
+                 dtype='int_', order='C'),
+        interaction.bz_grid.D_diag,
+        triplets_at_q,
+        frequencies,  # f1
+        frequencies,  # f2
+        interaction.bz_grid.addresses,
+        interaction.bz_grid.gp_map,
+        interaction.bz_grid.is_dense_gp_map * 1 + 1,
+        3)
+    return sorted_freq_vertices, vertex_indices, freq_spans
+
+
 def _set_triplets_integration_weights_c(g,
                                         g_zero,
                                         pp,
@@ -363,21 +504,7 @@ def _set_triplets_integration_weights_c(g,
     triplets_at_q = pp.get_triplets_at_q()[0]
 
     if neighboring_phonons:
-        unique_vertices = np.dot(
-            thm.get_unique_tetrahedra_vertices(), pp.bz_grid.P.T)
-        for i, j in zip((1, 2), (1, -1)):
-            neighboring_grid_points = np.zeros(
-                len(unique_vertices) * len(triplets_at_q), dtype='int_')
-            phono3c.neighboring_grid_points(
-                neighboring_grid_points,
-                np.array(triplets_at_q[:, i], dtype='int_').ravel(),
-                np.array(j * unique_vertices, dtype='int_', order='C'),
-                pp.bz_grid.D_diag,
-                pp.bz_grid.addresses,
-                pp.bz_grid.gp_map,
-                pp.bz_grid.is_dense_gp_map * 1 + 1)
-            pp.run_phonon_solver(
-                np.array(np.unique(neighboring_grid_points), dtype='int_'))
+        _run_phonon_solver_at_neighboring_grid_points(pp, thm)
 
     frequencies = pp.get_phonons()[0]
     phono3c.triplets_integration_weights(
@@ -396,6 +523,27 @@ def _set_triplets_integration_weights_c(g,
         g.shape[0])
 
 
+def _run_phonon_solver_at_neighboring_grid_points(pp, thm):
+    import phono3py._phono3py as phono3c
+
+    triplets_at_q = pp.get_triplets_at_q()[0]
+    unique_vertices = np.dot(
+        thm.get_unique_tetrahedra_vertices(), pp.bz_grid.P.T)
+    for i, j in zip((1, 2), (1, -1)):
+        neighboring_grid_points = np.zeros(
+            len(unique_vertices) * len(triplets_at_q), dtype='int_')
+        phono3c.neighboring_grid_points(
+            neighboring_grid_points,
+            np.array(triplets_at_q[:, i], dtype='int_').ravel(),
+            np.array(j * unique_vertices, dtype='int_', order='C'),
+            pp.bz_grid.D_diag,
+            pp.bz_grid.addresses,
+            pp.bz_grid.gp_map,
+            pp.bz_grid.is_dense_gp_map * 1 + 1)
+        pp.run_phonon_solver(
+            np.array(np.unique(neighboring_grid_points), dtype='int_'))
+
+
 def _set_triplets_integration_weights_py(g, pp, frequency_points):
     thm = TetrahedronMethod(pp.bz_grid.microzone_lattice)
     triplets_at_q = pp.get_triplets_at_q()[0]
@@ -1,5 +1,6 @@
 import numpy as np
 from phono3py import Phono3pyIsotope
+from phono3py.other.isotope import Isotope
 
 si_pbesol_iso = [
     [8.32325038e-07, 9.45389739e-07, 1.57942189e-05, 1.28121297e-03,
@@ -44,3 +45,26 @@ def test_Phono3pyIsotope_with_sigma(si_pbesol):
     iso.run([23, 103])
     # print(iso.gamma[0])
     np.testing.assert_allclose(si_pbesol_iso_sigma, iso.gamma[0], atol=3e-4)
+
+
+def test_Isotope_run_all(si_pbesol):
+    si_pbesol.mesh_numbers = [21, 21, 21]
+    iso = Isotope(
+        si_pbesol.mesh_numbers,
+        si_pbesol.phonon_primitive,
+        symprec=si_pbesol.symmetry.tolerance)
+    iso.init_dynamical_matrix(
+        si_pbesol.fc2,
+        si_pbesol.phonon_supercell,
+        si_pbesol.phonon_primitive,
+        nac_params=si_pbesol.nac_params)
+    iso.run_all([23, 103], sigmas=[None, 0.1])
+    np.testing.assert_allclose(si_pbesol_iso, iso.gamma[0], atol=3e-4)
+    np.testing.assert_allclose(si_pbesol_iso_sigma, iso.gamma[1], atol=3e-4)
+    gamma = iso.gamma.copy()
+    for i, gp in enumerate([23, 103]):
+        iso.set_grid_point(gp)
+        for j, sigma in enumerate([None, 0.1]):
+            iso.sigma = sigma
+            iso.run()
+            np.testing.assert_allclose(gamma[j, i], iso.gamma, atol=1e-12)
@@ -0,0 +1,118 @@
+import numpy as np
+from phono3py.other.kaccum import (run_kappa_dos_from_hdf5,
+                                   run_mfp_dos_from_hdf5, get_mfp)
+
+# Output of phono3py-kaccum --mfp --nsp 5 --temperature 600 before it was
+# rewritten: mean free path, kappa_xx (cumulative), kappa_xx (spectral).
+si_pbesol_kaccum_mfp_600K = [
+    [0.000000, 0.000000, 0.000000],
+    [205.085853, 10.501746, 0.049401],
+    [410.171706, 16.997873, 0.021279],
+    [615.257559, 19.921192, 0.006751],
+    [820.343411, 20.233981, 0.000000]]
+
+
+def test_kappa_dos(si_pbesol, tmp_path, monkeypatch):
+    """Cumulative kappa at maximum frequency and mean free path is kappa."""
+    import h5py
+
+    monkeypatch.chdir(tmp_path)
+    ph3 = si_pbesol
+    ph3.mesh_numbers = [4, 4, 4]
+    ph3.init_phph_interaction()
+    ph3.run_thermal_conductivity(temperatures=[300, 600], write_kappa=True)
+    kappa = ph3.thermal_conductivity.kappa[0]
+
+    with h5py.File("kappa-m444.hdf5", 'r') as f:
+        freq_points, kdos_thm = run_kappa_dos_from_hdf5(
+            f, bz_grid=ph3.grid, num_sampling_points=51, chunk_size=3)
+        np.testing.assert_allclose(kappa, kdos_thm[:, -1, 0], atol=1e-5)
+        _, kdos_hist = run_kappa_dos_from_hdf5(
+            f, sampling_points=freq_points, chunk_size=3)
+        np.testing.assert_allclose(kappa, kdos_hist[:, -1, 0], atol=1e-5)
+        np.testing.assert_allclose(
+            kappa, np.trapz(kdos_hist[:, :, 1], freq_points, axis=1),
+            atol=1e-5)
+        _, kdos_mfp = run_kappa_dos_from_hdf5(f, mfp=True, chunk_size=3)
+        np.testing.assert_allclose(kappa, kdos_mfp[:, -1, 0], atol=1e-5)
+        mfp_points, kdos_mfp_thm = run_mfp_dos_from_hdf5(
+            f, ph3.grid, num_sampling_points=11, chunk_size=3)
+        np.testing.assert_allclose(kappa, kdos_mfp_thm[:, -1, 0], atol=1e-5)
+
+        # Stored mean free path is used instead of that from gamma.
+        data = {key: f[key][()] for key in f}
+        data['mean_free_path'] = np.zeros(data['gamma'].shape + (3, ))
+        data['mean_free_path'][..., 2] = get_mfp(data['gamma'],
+                                                 data['group_velocity'])
+        data['gamma'][:] = 0
+        mfp_points_2, kdos_mfp_thm_2 = run_mfp_dos_from_hdf5(
+            data, ph3.grid, num_sampling_points=11, chunk_size=3)
+        np.testing.assert_allclose(mfp_points, mfp_points_2)
+        np.testing.assert_allclose(kdos_mfp_thm, kdos_mfp_thm_2)
+
+    assert kdos_thm.shape == (2, 51, 2, 6)
+    # Cumulative kappa is monotonically increasing.
+    assert (np.diff(kdos_thm[:, :, 0, 0], axis=1) > -1e-8).all()
+
+
+def test_kaccum_main(si_pbesol, tmp_path, monkeypatch, capsys):
+    """phono3py-kaccum shows cumulative kappa at maximum frequency."""
+    import sys
+    from phonopy.interface.calculator import write_crystal_structure
+    from phono3py.other.kaccum import main
+
+    monkeypatch.chdir(tmp_path)
+    ph3 = si_pbesol
+    ph3.mesh_numbers = [4, 4, 4]
+    ph3.init_phph_interaction()
+    ph3.run_thermal_conductivity(temperatures=[300, 600], write_kappa=True)
+    kappa = ph3.thermal_conductivity.kappa[0]
+    write_crystal_structure("POSCAR-unitcell", ph3.unitcell)
+    capsys.readouterr()
+
+    monkeypatch.setattr(sys, 'argv', [
+        'phono3py-kaccum', '--pa', '0 1/2 1/2 1/2 0 1/2 1/2 1/2 0',
+        '--temperature', '600', 'POSCAR-unitcell', 'kappa-m444.hdf5'])
+    main()
+    lines = [line for line in capsys.readouterr().out.splitlines()
+             if line.strip()]
+    assert lines[0] == "# 600 K"
+    np.testing.assert_allclose(
+        kappa[1], [float(x) for x in lines[-1].split()[1:7]], atol=1e-5)
+
+
+def test_kaccum_main_mfp(si_pbesol, tmp_path, monkeypatch, capsys):
+    """phono3py-kaccum --mfp agrees with the former script.
+
+    Cumulative kappa is compared only at the end points, because the former
+    script used integration weights of phonopy's tetrahedron method, whose
+    J function deviates from the integral of the I function in between.
+
+    """
+    import sys
+    from phonopy.interface.calculator import write_crystal_structure
+    from phono3py.other.kaccum import main
+
+    monkeypatch.chdir(tmp_path)
+    ph3 = si_pbesol
+    ph3.mesh_numbers = [4, 4, 4]
+    ph3.init_phph_interaction()
+    ph3.run_thermal_conductivity(temperatures=[300, 600], write_kappa=True)
+    write_crystal_structure("POSCAR-unitcell", ph3.unitcell)
+    capsys.readouterr()
+
+    monkeypatch.setattr(sys, 'argv', [
+        'phono3py-kaccum', '--pa', '0 1/2 1/2 1/2 0 1/2 1/2 1/2 0',
+        '--mfp', '--nsp', '5', '--temperature', '600',
+        'POSCAR-unitcell', 'kappa-m444.hdf5'])
+    main()
+    lines = [line for line in capsys.readouterr().out.splitlines()
+             if line.strip()]
+    assert lines[0] == "# 600 K"
+    values = np.array([[float(x) for x in line.split()]
+                       for line in lines[1:]])
+    ref = np.array(si_pbesol_kaccum_mfp_600K)
+    np.testing.assert_allclose(ref[:, 0], values[:, 0], rtol=1e-4)
+    np.testing.assert_allclose(ref[:, 2], values[:, 7], atol=1e-4)
+    np.testing.assert_allclose(ref[[0, -1], 1], values[[0, -1], 1],
+                               atol=1e-4)
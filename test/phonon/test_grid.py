@@ -1,7 +1,9 @@
 import numpy as np
 from phonopy.structure.tetrahedron_method import TetrahedronMethod
+from phonopy.structure.symmetry import Symmetry
 from phono3py.phonon.grid import (get_grid_point_from_address,
-                                  get_grid_point_from_address_py, BZGrid)
+                                  get_grid_point_from_address_py,
+                                  get_grid_points_by_rotations, BZGrid)
 
 
 def test_get_grid_point_from_address(agno2_cell):
@@ -70,6 +72,26 @@ def test_BZGrid_bzg2grg(si_pbesol_111):
     for i in range(len(bzgrid2.addresses)):
         grg.append(get_grid_point_from_address(bzgrid2.addresses[i], mesh))
     np.testing.assert_equal(grg, bzgrid2.bzg2grg)
+    np.testing.assert_equal(
+        get_grid_point_from_address(bzgrid2.addresses, mesh), bzgrid2.bzg2grg)
+
+
+def test_get_grid_points_by_rotations(si_pbesol_111):
+    """Rotation maps at many grid points are obtained at once"""
+
+    lat = si_pbesol_111.primitive.cell
+    mesh = [4, 4, 4]
+    symmetry = Symmetry(si_pbesol_111.primitive)
+    for is_dense_gp_map in (False, True):
+        bzgrid = BZGrid(mesh,
+                        lattice=lat,
+                        primitive_symmetry=symmetry,
+                        is_dense_gp_map=is_dense_gp_map)
+        gps = np.arange(len(bzgrid.addresses), dtype='int_')
+        rot_maps = get_grid_points_by_rotations(gps, bzgrid)
+        for gp, rot_map in zip(gps, rot_maps):
+            np.testing.assert_equal(
+                rot_map, get_grid_points_by_rotations(gp, bzgrid))
 
 
 def test_BZGrid_SNF(si_pbesol_111):
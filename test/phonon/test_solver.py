@@ -0,0 +1,53 @@
+import numpy as np
+from phonopy.harmonic.dynamical_matrix import get_dynamical_matrix
+from phonopy.phonon.group_velocity import GroupVelocity
+from phonopy.units import VaspToTHz
+from phono3py.phonon.grid import BZGrid
+from phono3py.phonon.solver import run_phonon_solver_c
+
+
+def test_run_phonon_solver_c_with_group_velocities(si_pbesol_compact_fc):
+    """Group velocities by phonon solver (compact fc)"""
+    ph3 = si_pbesol_compact_fc
+    dm = get_dynamical_matrix(ph3.fc2,
+                              ph3.phonon_supercell,
+                              ph3.phonon_primitive)
+    _compare_with_GroupVelocity(dm, ph3.phonon_primitive.cell)
+
+
+def test_run_phonon_solver_c_with_group_velocities_nac(nacl_pbe):
+    """Group velocities by phonon solver with Wang's NAC"""
+    ph3 = nacl_pbe
+    nac_params = ph3.nac_params.copy()
+    nac_params['method'] = 'wang'
+    dm = get_dynamical_matrix(ph3.fc2,
+                              ph3.phonon_supercell,
+                              ph3.phonon_primitive,
+                              nac_params=nac_params)
+    _compare_with_GroupVelocity(dm, ph3.phonon_primitive.cell)
+
+
+def _compare_with_GroupVelocity(dm, lattice):
+    bz_grid = BZGrid([5, 5, 5], lattice=lattice)
+    num_gp = len(bz_grid.addresses)
+    num_band = len(dm.primitive) * 3
+    frequencies = np.zeros((num_gp, num_band), dtype='double')
+    eigenvectors = np.zeros((num_gp, num_band, num_band),
+                            dtype=("c%d" % (frequencies.itemsize * 2)))
+    phonon_done = np.zeros(num_gp, dtype='byte')
+    grid_points = np.arange(num_gp, dtype='int_')
+    gv = np.zeros((num_gp, num_band, 3), dtype='double')
+    run_phonon_solver_c(dm,
+                        frequencies,
+                        eigenvectors,
+                        phonon_done,
+                        grid_points,
+                        bz_grid.addresses,
+                        bz_grid.QDinv,
+                        VaspToTHz,
+                        None,
+                        'L',
+                        group_velocities=gv)
+    gv_obj = GroupVelocity(dm, frequency_factor_to_THz=VaspToTHz)
+    gv_obj.run(np.dot(bz_grid.addresses, bz_grid.QDinv.T))
+    np.testing.assert_allclose(gv, gv_obj.group_velocities, atol=1e-8)
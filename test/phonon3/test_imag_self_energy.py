@@ -220,6 +220,27 @@ def test_imag_self_energy_freq_points(si_pbesol):
         freq_points, _fpoints.ravel(), atol=1e-5)
 
 
+def test_imag_self_energy_sorted_freq_vertices_memory(si_pbesol):
+    """Sorted tetrahedra vertices are stored only within memory bound"""
+    from phono3py.phonon3.imag_self_energy import ImagSelfEnergy
+
+    si_pbesol.mesh_numbers = [9, 9, 9]
+    si_pbesol.init_phph_interaction()
+    gammas_at_memory = []
+    for max_memory in (2 ** 28, None):
+        ise = ImagSelfEnergy(si_pbesol.phph_interaction,
+                             frequency_points=freq_points,
+                             temperature=300,
+                             max_sorted_freq_vertices_memory=max_memory)
+        ise.set_grid_point(103)
+        ise.run_interaction()
+        ise.set_integration_weights()
+        assert (ise._sorted_freq_vertices is None) == (max_memory is None)
+        ise.run()
+        gammas_at_memory.append(ise.get_imag_self_energy())
+    np.testing.assert_allclose(*gammas_at_memory, atol=1e-12)
+
+
 def test_imag_self_energy_detailed(si_pbesol):
     si_pbesol.mesh_numbers = [9, 9, 9]
     si_pbesol.init_phph_interaction()
@@ -262,6 +283,63 @@ def test_imag_self_energy_scat_class2(si_pbesol):
         gammas_class2, np.swapaxes(_gammas, -1, -2).ravel(), atol=1e-2)
 
 
+def test_imag_self_energy_at_bands_lowmem(si_pbesol):
+    si_pbesol.mesh_numbers = [9, 9, 9]
+    si_pbesol.init_phph_interaction()
+    _fpoints, _gammas = si_pbesol.run_imag_self_energy(
+        [1, 103],
+        [300, ],
+        frequency_points_at_bands=True,
+        is_lowmem=True)
+    gammas_ref = [
+        0.00021553, 0.00021553, 0.00084329, 0.04693498, 0.04388354, 0.04388354,
+        0.00383646, 0.00494357, 0.02741665, 0.01407101, 0.04133322, 0.03013125]
+    np.testing.assert_allclose(_gammas.ravel(), gammas_ref, atol=1e-2)
+
+
+def test_imag_self_energy_npoints_with_sigma_lowmem(si_pbesol):
+    si_pbesol.sigmas = [0.1, ]
+    si_pbesol.mesh_numbers = [9, 9, 9]
+    si_pbesol.init_phph_interaction()
+    _fpoints, _gammas = si_pbesol.run_imag_self_energy(
+        [1, 103],
+        [300, ],
+        num_frequency_points=10,
+        is_lowmem=True)
+    np.testing.assert_allclose(
+        gammas_sigma, np.swapaxes(_gammas, -1, -2).ravel(), atol=1e-2)
+    np.testing.assert_allclose(
+        freq_points_sigma, _fpoints.ravel(), atol=1e-5)
+    si_pbesol.sigmas = None
+
+
+def test_imag_self_energy_freq_points_lowmem(si_pbesol):
+    si_pbesol.mesh_numbers = [9, 9, 9]
+    si_pbesol.init_phph_interaction()
+    _fpoints, _gammas = si_pbesol.run_imag_self_energy(
+        [1, 103],
+        [300, ],
+        frequency_points=freq_points,
+        is_lowmem=True)
+    np.testing.assert_allclose(
+        gammas, np.swapaxes(_gammas, -1, -2).ravel(), atol=1e-2)
+
+
+def test_imag_self_energy_scat_class_lowmem(si_pbesol):
+    si_pbesol.mesh_numbers = [9, 9, 9]
+    si_pbesol.init_phph_interaction()
+    for scattering_event_class, gammas_ref in zip(
+            (1, 2), (gammas_class1, gammas_class2)):
+        _fpoints, _gammas = si_pbesol.run_imag_self_energy(
+            [1, 103],
+            [300, ],
+            frequency_points=freq_points,
+            scattering_event_class=scattering_event_class,
+            is_lowmem=True)
+        np.testing.assert_allclose(
+            gammas_ref, np.swapaxes(_gammas, -1, -2).ravel(), atol=1e-2)
+
+
 def test_imag_self_energy_nacl_npoints(nacl_pbe):
     nacl_pbe.mesh_numbers = [9, 9, 9]
     nacl_pbe.init_phph_interaction()
@@ -162,3 +162,64 @@ def test_jdos_nacl_at_300K(nacl_pbe):
     np.testing.assert_allclose(
         nacl_jdos_12_at_300K[2:], jdos.joint_dos.ravel()[2:],
         rtol=1e-2, atol=1e-5)
+
+
+def test_jdos_si_at_grid_points(si_pbesol):
+    si_pbesol.mesh_numbers = [9, 9, 9]
+    jdos = Phono3pyJointDos(
+        si_pbesol.phonon_supercell,
+        si_pbesol.phonon_primitive,
+        si_pbesol.fc2,
+        mesh=si_pbesol.mesh_numbers,
+        num_frequency_points=10,
+        log_level=1)
+    jdos.run_at_grid_points([1, 103])
+    np.testing.assert_allclose(si_freq_points, jdos.frequency_points,
+                               atol=1e-5)
+    assert jdos.joint_dos.shape == (2, 10, 2)
+    np.testing.assert_allclose(si_jdos_12[2:], jdos.joint_dos[1].ravel()[2:],
+                               rtol=1e-2, atol=1e-5)
+    jdos_at_gps = jdos.joint_dos
+    jdos.run([1])
+    np.testing.assert_allclose(jdos.joint_dos, jdos_at_gps[0], atol=1e-8)
+
+
+def test_jdos_si_at_grid_points_with_sigma(si_pbesol):
+    si_pbesol.mesh_numbers = [9, 9, 9]
+    jdos = Phono3pyJointDos(
+        si_pbesol.phonon_supercell,
+        si_pbesol.phonon_primitive,
+        si_pbesol.fc2,
+        mesh=si_pbesol.mesh_numbers,
+        num_frequency_points=10,
+        sigmas=[0.1, ],
+        temperatures=[0, 300],
+        log_level=1)
+    jdos.run_at_grid_points([1, 103])
+    assert jdos.joint_dos.shape == (2, 2, 10, 2)
+    jdos_at_gps = jdos.joint_dos
+    for i, gp in enumerate([1, 103]):
+        jdos.run([gp])
+        np.testing.assert_allclose(jdos.joint_dos, jdos_at_gps[i], atol=1e-8)
+
+
+def test_jdos_nacl_at_grid_points_at_300K(nacl_pbe):
+    nacl_pbe.mesh_numbers = [9, 9, 9]
+    jdos = Phono3pyJointDos(
+        nacl_pbe.phonon_supercell,
+        nacl_pbe.phonon_primitive,
+        nacl_pbe.fc2,
+        mesh=nacl_pbe.mesh_numbers,
+        nac_params=nacl_pbe.nac_params,
+        num_frequency_points=10,
+        temperatures=[300, ],
+        log_level=1)
+    jdos.run_at_grid_points()
+    assert jdos.joint_dos.shape[1:] == (1, 10, 2)
+    np.testing.assert_allclose(
+        nacl_freq_points_at_300K, jdos.frequency_points,
+        atol=1e-5)
+    i = list(jdos.grid_points).index(103)
+    np.testing.assert_allclose(
+        nacl_jdos_12_at_300K[2:], jdos.joint_dos[i].ravel()[2:],
+        rtol=1e-2, atol=1e-5)
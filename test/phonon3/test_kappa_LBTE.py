@@ -1,4 +1,5 @@
 import numpy as np
+import pytest
 
 si_pbesol_kappa_LBTE = [111.802, 111.802, 111.802, 0, 0, 0]
 si_pbesol_kappa_LBTE_redcol = [61.3504328, 61.3504328, 61.3504328, 0, 0, 0]
@@ -12,6 +13,62 @@ def test_kappa_LBTE(si_pbesol):
     np.testing.assert_allclose(si_pbesol_kappa_LBTE, kappa, atol=0.5)
 
 
+def test_kappa_LBTE_symmetry_adapted_basis(si_pbesol):
+    si_pbesol.mesh_numbers = [9, 9, 9]
+    si_pbesol.init_phph_interaction()
+    si_pbesol.run_thermal_conductivity(is_LBTE=True,
+                                       temperatures=[300, ],
+                                       is_symmetry_adapted_basis=True)
+    kappa = si_pbesol.thermal_conductivity.kappa.ravel()
+    np.testing.assert_allclose(si_pbesol_kappa_LBTE, kappa, atol=0.5)
+
+
+def test_kappa_LBTE_mpi(si_pbesol):
+    """Also runs with mpirun, where collision matrix is distributed"""
+    MPI = pytest.importorskip("mpi4py.MPI")
+    si_pbesol.mesh_numbers = [9, 9, 9]
+    si_pbesol.init_phph_interaction()
+    si_pbesol.run_thermal_conductivity(is_LBTE=True,
+                                       temperatures=[300, ],
+                                       mpi_comm=MPI.COMM_WORLD)
+    kappa = si_pbesol.thermal_conductivity.kappa.ravel()
+    np.testing.assert_allclose(si_pbesol_kappa_LBTE, kappa, atol=0.5)
+
+    # Conjugate gradient method has no cutoff of eigenvalues.
+    with pytest.raises(RuntimeError):
+        si_pbesol.run_thermal_conductivity(is_LBTE=True,
+                                           temperatures=[300, ],
+                                           pinv_cutoff=1e-6,
+                                           mpi_comm=MPI.COMM_WORLD)
+
+
+def test_kappa_LBTE_num_processes(si_pbesol):
+    si_pbesol.mesh_numbers = [9, 9, 9]
+    si_pbesol.init_phph_interaction()
+    si_pbesol.run_thermal_conductivity(is_LBTE=True,
+                                       temperatures=[300, ],
+                                       num_processes=3)
+    kappa = si_pbesol.thermal_conductivity.kappa.ravel()
+    np.testing.assert_allclose(si_pbesol_kappa_LBTE, kappa, atol=0.5)
+
+
+def test_kappa_LBTE_mixed_precision(si_pbesol):
+    """Kappa in mixed precision agrees with that in double precision"""
+    si_pbesol.mesh_numbers = [5, 5, 5]
+    si_pbesol.init_phph_interaction()
+    si_pbesol.run_thermal_conductivity(is_LBTE=True,
+                                       temperatures=[100, 300, 1000])
+    kappa = si_pbesol.thermal_conductivity.kappa
+    si_pbesol.run_thermal_conductivity(is_LBTE=True,
+                                       temperatures=[100, 300, 1000],
+                                       is_mixed_precision=True)
+    lbte = si_pbesol.thermal_conductivity
+    assert lbte.get_collision_matrix().dtype == np.dtype('single')
+    np.testing.assert_allclose(kappa[..., :3], lbte.kappa[..., :3],
+                               rtol=1e-6)
+    np.testing.assert_allclose(kappa, lbte.kappa, atol=1e-6)
+
+
 def test_kappa_LBTE_full_colmat(si_pbesol):
     si_pbesol.mesh_numbers = [5, 5, 5]
     si_pbesol.init_phph_interaction()
@@ -21,3 +78,168 @@ def test_kappa_LBTE_full_colmat(si_pbesol):
         is_reducible_collision_matrix=True)
     kappa = si_pbesol.thermal_conductivity.kappa.ravel()
     np.testing.assert_allclose(si_pbesol_kappa_LBTE_redcol, kappa, atol=0.5)
+
+
+def test_kappa_LBTE_average_by_degeneracy(si_pbesol):
+    """Built-in averaging by degeneracy agrees with that by numpy"""
+    si_pbesol.mesh_numbers = [5, 5, 5]
+    si_pbesol.init_phph_interaction()
+    si_pbesol.run_thermal_conductivity(is_LBTE=True, temperatures=[300, ])
+    lbte = si_pbesol.thermal_conductivity
+    shape = lbte.get_collision_matrix().shape
+    col_mat = np.random.default_rng(0).random(shape)
+    lbte._collision_matrix[:] = col_mat
+    lbte._average_collision_matrix_by_degeneracy()
+    col_mat_c = lbte._collision_matrix.copy()
+    lbte._collision_matrix[:] = col_mat
+    lbte._py_average_collision_matrix_by_degeneracy()
+    np.testing.assert_allclose(lbte._collision_matrix, col_mat_c, atol=1e-12)
+    assert np.abs(col_mat_c - col_mat).max() > 0.1
+
+
+def test_kappa_LBTE_expand_collisions(si_pbesol):
+    """Built-in expansion to all grid points agrees with that by numpy"""
+    from phono3py.phonon.grid import get_grid_points_by_rotations
+
+    si_pbesol.mesh_numbers = [5, 5, 5]
+    si_pbesol.init_phph_interaction()
+    si_pbesol.run_thermal_conductivity(
+        is_LBTE=True,
+        temperatures=[300, ],
+        is_reducible_collision_matrix=True)
+    lbte = si_pbesol.thermal_conductivity
+    bz_grid = lbte._bz_grid
+    ir_gr_grid_points = bz_grid.bzg2grg[lbte.get_grid_points()]
+    rot_grid_points = np.array(
+        bz_grid.bzg2grg[get_grid_points_by_rotations(
+            bz_grid.grg2bzg, bz_grid)].T, dtype='int_', order='C')
+    rng = np.random.default_rng(0)
+    names = ('_collision_matrix', '_gamma', '_cv', '_gv')
+    values = [rng.random(getattr(lbte, name).shape) for name in names]
+    for name, v in zip(names, values):
+        getattr(lbte, name)[:] = v
+    lbte._expand_collisions(ir_gr_grid_points, rot_grid_points)
+    lbte._expand_local_values(ir_gr_grid_points, rot_grid_points)
+    values_c = [getattr(lbte, name).copy() for name in names]
+    for name, v in zip(names, values):
+        getattr(lbte, name)[:] = v
+    lbte._py_expand_collisions(ir_gr_grid_points, rot_grid_points)
+    for name in names[1:3]:
+        lbte._py_expand_local_values(
+            getattr(lbte, name), ir_gr_grid_points, rot_grid_points)
+    lbte._py_expand_local_values(lbte._gv, ir_gr_grid_points,
+                                 rot_grid_points, lbte._rotations_cartesian)
+    for name, v, v_c in zip(names, values, values_c):
+        np.testing.assert_allclose(getattr(lbte, name), v_c, atol=1e-12)
+        assert np.abs(v_c - v).max() > 0.1
+
+
+@pytest.mark.parametrize("use_collision_store", [False, True])
+def test_kappa_LBTE_collision_store(si_pbesol, tmp_path, monkeypatch,
+                                    use_collision_store):
+    """Collisions of grid points written in two runs are read"""
+    monkeypatch.chdir(tmp_path)
+    si_pbesol.mesh_numbers = [5, 5, 5]
+    si_pbesol.init_phph_interaction()
+    si_pbesol.run_thermal_conductivity(is_LBTE=True, temperatures=[300, ])
+    kappa = si_pbesol.thermal_conductivity.kappa
+    grid_points = si_pbesol.thermal_conductivity.get_grid_points()
+    for gps in (grid_points[::2], grid_points[1::2]):
+        si_pbesol.run_thermal_conductivity(is_LBTE=True,
+                                           temperatures=[300, ],
+                                           grid_points=gps,
+                                           write_collision=True,
+                                           use_collision_store=(
+                                               use_collision_store))
+    si_pbesol.run_thermal_conductivity(is_LBTE=True,
+                                       read_collision='all')
+    np.testing.assert_allclose(kappa, si_pbesol.thermal_conductivity.kappa,
+                               atol=1e-8)
+
+
+def test_kappa_LBTE_at_pinv_cutoffs(si_pbesol, tmp_path, monkeypatch):
+    """Kappa from written LBTE solution agrees with that by pinv_cutoff"""
+    monkeypatch.chdir(tmp_path)
+    si_pbesol.mesh_numbers = [5, 5, 5]
+    si_pbesol.init_phph_interaction()
+    si_pbesol.run_thermal_conductivity(is_LBTE=True,
+                                       temperatures=[100, 300],
+                                       write_kappa=True,
+                                       write_LBTE_solution=True)
+    pinv_cutoffs = [1e-8, 1e-3]
+    data = si_pbesol.run_thermal_conductivity_at_pinv_cutoffs(pinv_cutoffs)
+    for i, pinv_cutoff in enumerate(pinv_cutoffs):
+        si_pbesol.run_thermal_conductivity(is_LBTE=True,
+                                           temperatures=[100, 300],
+                                           pinv_cutoff=pinv_cutoff)
+        lbte = si_pbesol.thermal_conductivity
+        np.testing.assert_allclose(lbte.kappa, data['kappa'][:, i],
+                                   atol=1e-8)
+        np.testing.assert_allclose(lbte.get_mode_kappa(),
+                                   data['mode_kappa'][:, i], atol=1e-6)
+
+
+def test_kappa_LBTE_at_pinv_cutoffs_old_unitary(si_pbesol, tmp_path,
+                                               monkeypatch):
+    """unitary-*.hdf5 having leading sigma axis is read at sigma_index"""
+    import h5py
+    from phono3py.file_IO import read_unitary_matrix_from_hdf5
+
+    monkeypatch.chdir(tmp_path)
+    si_pbesol.mesh_numbers = [5, 5, 5]
+    si_pbesol.init_phph_interaction()
+    si_pbesol.run_thermal_conductivity(is_LBTE=True,
+                                       temperatures=[300, ],
+                                       write_kappa=True,
+                                       write_LBTE_solution=True)
+    kappa = si_pbesol.thermal_conductivity.kappa
+    filename = "unitary-m555.hdf5"
+    with h5py.File(filename, 'r') as f:
+        unitary_matrix = f['unitary_matrix'][:]
+        solver = f['solver'][()]
+        temperature = f['temperature'][:]
+
+    with h5py.File(filename, 'w') as w:
+        w.create_dataset('temperature', data=temperature)
+        w.create_dataset('unitary_matrix', data=[unitary_matrix])
+        w.create_dataset('solver', data=solver)
+    data = si_pbesol.run_thermal_conductivity_at_pinv_cutoffs([1e-8, ])
+    np.testing.assert_allclose(kappa, data['kappa'][:, 0], atol=1e-8)
+
+    with h5py.File(filename, 'w') as w:
+        w.create_dataset('temperature', data=temperature)
+        w.create_dataset('unitary_matrix',
+                         data=[np.zeros_like(unitary_matrix),
+                               unitary_matrix])
+        w.create_dataset('solver', data=solver)
+    with pytest.raises(RuntimeError):
+        read_unitary_matrix_from_hdf5([5, 5, 5], verbose=False)
+    u, _, _ = read_unitary_matrix_from_hdf5([5, 5, 5], sigma_index=1,
+                                            verbose=False)
+    np.testing.assert_array_equal(unitary_matrix, u)
+
+
+def test_kappa_LBTE_relaxons(si_pbesol):
+    """Kappa by all relaxons agrees with direct solution"""
+    si_pbesol.mesh_numbers = [5, 5, 5]
+    si_pbesol.init_phph_interaction()
+    si_pbesol.run_thermal_conductivity(is_LBTE=True, temperatures=[300, ])
+    kappa = si_pbesol.thermal_conductivity.kappa
+    si_pbesol.run_thermal_conductivity(is_LBTE=True,
+                                       temperatures=[300, ],
+                                       solve_collective_phonon=True,
+                                       num_relaxons=1000)
+    lbte = si_pbesol.thermal_conductivity
+    np.testing.assert_allclose(kappa, lbte.kappa, atol=1e-8)
+    np.testing.assert_allclose(kappa[0, 0],
+                               lbte.get_relaxon_kappa()[0, 0].sum(axis=0),
+                               atol=1e-8)
+    eigvals = lbte.get_relaxon_eigenvalues()[0, 0, :5]
+    si_pbesol.run_thermal_conductivity(is_LBTE=True,
+                                       temperatures=[300, ],
+                                       solve_collective_phonon=True,
+                                       num_relaxons=5)
+    np.testing.assert_allclose(
+        eigvals,
+        si_pbesol.thermal_conductivity.get_relaxon_eigenvalues()[0, 0],
+        rtol=1e-6)
@@ -1,4 +1,6 @@
 import numpy as np
+import pytest
+from phono3py.phonon3.conductivity_RTA import Conductivity_RTA
 
 si_pbesol_kappa_RTA = [107.991, 107.991, 107.991, 0, 0, 0]
 si_pbesol_kappa_RTA_with_sigmas = [109.6985, 109.6985, 109.6985, 0, 0, 0]
@@ -7,6 +9,9 @@ si_pbesol_kappa_RTA_with_sigmas_iso = [96.03248, 96.03248, 96.03248, 0, 0, 0]
 si_pbesol_kappa_RTA_si_nosym = [38.242347, 38.700219, 39.198018,
                                 0.3216, 0.207731, 0.283]
 si_pbesol_kappa_RTA_si_nomeshsym = [38.90918, 38.90918, 38.90918, 0, 0, 0]
+si_pbesol_kappa_RTA_m888_interp = [102.5619, 102.5619, 102.5619, 0, 0, 0]
+si_pbesol_kappa_RTA_m777_adaptive_sigma = [83.0609, 83.0609, 83.0609,
+                                           0, 0, 0]
 nacl_pbe_kappa_RTA = [7.72798252, 7.72798252, 7.72798252, 0, 0, 0]
 nacl_pbe_kappa_RTA_with_sigma = [7.71913708, 7.71913708, 7.71913708, 0, 0, 0]
 
@@ -55,11 +60,102 @@ def test_kappa_RTA_si_with_sigma_iso(si_pbesol):
     si_pbesol.sigmas = None
 
 
+def test_kappa_RTA_si_with_adaptive_sigma(si_pbesol):
+    """Adaptive smearing in low memory and full-pp modes"""
+    si_pbesol.sigmas = [0.02, ]
+    si_pbesol.mesh_numbers = [7, 7, 7]
+    si_pbesol.init_phph_interaction()
+    for is_full_pp in (False, True):
+        si_pbesol.run_thermal_conductivity(temperatures=[300, ],
+                                           is_full_pp=is_full_pp,
+                                           adaptive_sigma_scale=1.0)
+        kappa = si_pbesol.thermal_conductivity.kappa.ravel()
+        np.testing.assert_allclose(
+            si_pbesol_kappa_RTA_m777_adaptive_sigma, kappa, atol=0.5)
+    si_pbesol.sigmas = None
+
+
 def test_kappa_RTA_si_compact_fc(si_pbesol_compact_fc):
     kappa = _get_kappa(si_pbesol_compact_fc, [9, 9, 9]).ravel()
     np.testing.assert_allclose(si_pbesol_kappa_RTA, kappa, atol=0.5)
 
 
+def test_kappa_RTA_si_gamma_interpolation(si_pbesol):
+    """Gamma on 4x4x4 sub-mesh is interpolated onto 8x8x8 mesh."""
+    ph3 = si_pbesol
+    ph3.mesh_numbers = [8, 8, 8]
+    ph3.init_phph_interaction()
+    ph3.run_thermal_conductivity(temperatures=[300, ],
+                                 gamma_interpolation_mesh=[4, 4, 4],
+                                 is_N_U=True)
+    kappa = ph3.thermal_conductivity.kappa.ravel()
+    np.testing.assert_allclose(si_pbesol_kappa_RTA_m888_interp, kappa,
+                               atol=0.5)
+    grid_points, errors = (
+        ph3.thermal_conductivity.get_gamma_interpolation_errors())
+    assert len(grid_points) == 3
+    assert errors.shape == (1, 1, 3)
+
+    # Gamma of normal and umklapp processes are interpolated as well.
+    gamma = ph3.thermal_conductivity.gamma
+    gamma_N, gamma_U = ph3.thermal_conductivity.get_gamma_N_U()
+    np.testing.assert_allclose(gamma, gamma_N + gamma_U, atol=1e-8)
+    assert (gamma_N[:, :, :, 3:] > 0).all()
+
+
+def test_kappa_RTA_si_sampled_triplets(si_pbesol):
+    """Gamma estimated by sampling of triplets with error bars."""
+    ph3 = si_pbesol
+    ph3.mesh_numbers = [9, 9, 9]
+    ph3.init_phph_interaction()
+
+    # All triplets are computed when the number of samples is large enough.
+    ph3.run_thermal_conductivity(temperatures=[300, ],
+                                 num_sampled_triplets=1000)
+    kappa = ph3.thermal_conductivity.kappa.ravel()
+    np.testing.assert_allclose(si_pbesol_kappa_RTA, kappa, atol=0.5)
+    np.testing.assert_allclose(
+        ph3.thermal_conductivity.get_kappa_error(), 0, atol=1e-8)
+
+    ph3.run_thermal_conductivity(temperatures=[300, ],
+                                 num_sampled_triplets=30,
+                                 random_seed=1)
+    kappa = ph3.thermal_conductivity.kappa.ravel()
+    kappa_error = ph3.thermal_conductivity.get_kappa_error().ravel()
+    assert (kappa_error[:3] > 0).all()
+    assert (np.abs(kappa - si_pbesol_kappa_RTA)
+            < 5 * kappa_error + 0.5).all()
+
+    # Error can not be estimated from a single sample.
+    with pytest.raises(RuntimeError):
+        ph3.run_thermal_conductivity(temperatures=[300, ],
+                                     num_sampled_triplets=1)
+
+
+def test_kappa_RTA_si_importance_sampling(si_pbesol):
+    """kappa estimated from gamma at importance-sampled grid points."""
+    ph3 = si_pbesol
+    ph3.mesh_numbers = [9, 9, 9]
+    ph3.init_phph_interaction()
+
+    ph3.run_thermal_conductivity(temperatures=[300, ],
+                                 kappa_target_error=0.1)
+    tc = ph3.thermal_conductivity
+    kappa = tc.kappa.ravel()
+    assert len(tc.get_computed_grid_points()) < len(tc.get_grid_points())
+    assert (tc.get_kappa_confidence_interval().ravel()[:3] > 0).all()
+    np.testing.assert_allclose(si_pbesol_kappa_RTA, kappa, atol=10)
+
+    # Gamma is computed at all grid points to reach tiny target error.
+    ph3.run_thermal_conductivity(temperatures=[300, ],
+                                 kappa_target_error=1e-5)
+    tc = ph3.thermal_conductivity
+    np.testing.assert_allclose(si_pbesol_kappa_RTA, tc.kappa.ravel(),
+                               atol=0.5)
+    np.testing.assert_allclose(tc.get_kappa_confidence_interval(), 0,
+                               atol=1e-8)
+
+
 def test_kappa_RTA_si_nosym(si_pbesol, si_pbesol_nosym):
     si_pbesol_nosym.fc2 = si_pbesol.fc2
     si_pbesol_nosym.fc3 = si_pbesol.fc3
@@ -124,6 +220,71 @@ def test_kappa_RTA_nacl_with_sigma(nacl_pbe):
     nacl_pbe.sigma_cutoff = None
 
 
+def test_kappa_RTA_nacl_with_sigmas_cutoff(nacl_pbe):
+    """Interaction strength computed once is shared among sigmas."""
+    nacl_pbe.sigma_cutoff = 3
+    nacl_pbe.sigmas = [0.1, ]
+    kappa_1 = _get_kappa(nacl_pbe, [4, 4, 4])[0].ravel()
+    nacl_pbe.sigmas = [0.2, ]
+    kappa_2 = _get_kappa(nacl_pbe, [4, 4, 4])[0].ravel()
+    nacl_pbe.sigmas = [0.1, 0.2]
+    for is_full_pp in (False, True):
+        if is_full_pp:
+            kappa = _get_kappa(nacl_pbe, [4, 4, 4], is_full_pp=True)
+        else:
+            ph3 = nacl_pbe
+            br = Conductivity_RTA(ph3.phph_interaction,
+                                  temperatures=[300, ],
+                                  sigmas=ph3.sigmas,
+                                  sigma_cutoff=ph3.sigma_cutoff,
+                                  store_pp=True)
+            for i in br:
+                pass
+            br.set_kappa_at_sigmas()
+            kappa = br.kappa
+        np.testing.assert_allclose(kappa_1, kappa[0].ravel(), atol=1e-5)
+        np.testing.assert_allclose(kappa_2, kappa[1].ravel(), atol=1e-5)
+    nacl_pbe.sigmas = None
+    nacl_pbe.sigma_cutoff = None
+
+
+def test_kappa_RTA_nacl_with_tetrahedron_and_sigma(nacl_pbe):
+    """Smearing without cutoff does not reuse tetrahedron g_zero."""
+    nacl_pbe.sigmas = [None, ]
+    kappa_1 = _get_kappa(nacl_pbe, [4, 4, 4])[0].ravel()
+    nacl_pbe.sigmas = [0.1, ]
+    kappa_2 = _get_kappa(nacl_pbe, [4, 4, 4])[0].ravel()
+    ph3 = nacl_pbe
+    br = Conductivity_RTA(ph3.phph_interaction,
+                          temperatures=[300, ],
+                          sigmas=[None, 0.1],
+                          store_pp=True)
+    for i in br:
+        pass
+    br.set_kappa_at_sigmas()
+    np.testing.assert_allclose(kappa_1, br.kappa[0].ravel(), atol=1e-5)
+    np.testing.assert_allclose(kappa_2, br.kappa[1].ravel(), atol=1e-5)
+    nacl_pbe.sigmas = None
+
+
+def test_kappa_RTA_nacl_with_tetrahedron_and_sigma_lowmem(nacl_pbe):
+    """Multiple sigmas in low memory mode equal those run one by one."""
+    nacl_pbe.sigmas = [None, ]
+    kappa_1 = _get_kappa(nacl_pbe, [4, 4, 4])[0].ravel()
+    nacl_pbe.sigmas = [0.1, ]
+    kappa_2 = _get_kappa(nacl_pbe, [4, 4, 4])[0].ravel()
+    ph3 = nacl_pbe
+    br = Conductivity_RTA(ph3.phph_interaction,
+                          temperatures=[300, ],
+                          sigmas=[None, 0.1])
+    for i in br:
+        pass
+    br.set_kappa_at_sigmas()
+    np.testing.assert_allclose(kappa_1, br.kappa[0].ravel(), atol=1e-5)
+    np.testing.assert_allclose(kappa_2, br.kappa[1].ravel(), atol=1e-5)
+    nacl_pbe.sigmas = None
+
+
 def test_kappa_RTA_aln(aln_lda):
     kappa = _get_kappa(aln_lda, [7, 7, 5]).ravel()
     np.testing.assert_allclose(aln_lda_kappa_RTA, kappa, atol=0.5)
@@ -145,3 +306,85 @@ def _get_kappa(ph3, mesh, is_isotope=False, is_full_pp=False):
                                  is_isotope=is_isotope,
                                  is_full_pp=is_full_pp)
     return ph3.thermal_conductivity.kappa
+
+
+def test_kappa_RTA_si_at_scattering_parameters(si_pbesol, tmp_path,
+                                               monkeypatch):
+    """kappa re-evaluated from kappa-*.hdf5 for boundary and isotope."""
+    from phono3py.phonon3.conductivity_RTA import (
+        get_kappa_RTA_at_scattering_parameters)
+
+    monkeypatch.chdir(tmp_path)
+    mesh = [4, 4, 4]
+    ph3 = si_pbesol
+    ph3.mesh_numbers = mesh
+    ph3.init_phph_interaction()
+    ph3.run_thermal_conductivity(temperatures=[300, ], write_kappa=True)
+    kappa = ph3.thermal_conductivity.kappa
+    ph3.run_thermal_conductivity(temperatures=[300, ], is_isotope=True)
+    kappa_iso = ph3.thermal_conductivity.kappa
+    ph3.run_thermal_conductivity(temperatures=[300, ], is_isotope=True,
+                                 boundary_mfp=0.1, write_kappa=True)
+    kappa_iso_bd = ph3.thermal_conductivity.kappa
+
+    kappas = get_kappa_RTA_at_scattering_parameters(
+        mesh,
+        boundary_mfps=[None, None, 0.1],
+        isotope_factors=[0, 1, 1])
+    assert kappas.shape == (3, 1, 1, 6)
+    np.testing.assert_allclose(kappa, kappas[0], atol=1e-5)
+    np.testing.assert_allclose(kappa_iso, kappas[1], atol=1e-5)
+    np.testing.assert_allclose(kappa_iso_bd, kappas[2], atol=1e-5)
+
+
+def test_kappa_RTA_si_at_boundary_mfps(si_pbesol, tmp_path, monkeypatch):
+    """kappa re-evaluated for boundary only from data without isotope."""
+    from phono3py.phonon3.conductivity_RTA import (
+        get_kappa_RTA_at_scattering_parameters)
+
+    monkeypatch.chdir(tmp_path)
+    mesh = [4, 4, 4]
+    ph3 = si_pbesol
+    ph3.mesh_numbers = mesh
+    ph3.init_phph_interaction()
+    ph3.run_thermal_conductivity(temperatures=[300, ], write_kappa=True)
+    kappa = ph3.thermal_conductivity.kappa
+    ph3.run_thermal_conductivity(temperatures=[300, ], boundary_mfp=0.1)
+    kappa_bd = ph3.thermal_conductivity.kappa
+
+    kappas = get_kappa_RTA_at_scattering_parameters(
+        mesh, boundary_mfps=[None, 0.1])
+    np.testing.assert_allclose(kappa, kappas[0], atol=1e-5)
+    np.testing.assert_allclose(kappa_bd, kappas[1], atol=1e-5)
+    kappas = get_kappa_RTA_at_scattering_parameters(mesh)
+    np.testing.assert_allclose(kappa, kappas[0], atol=1e-5)
+
+
+def test_kappa_RTA_si_collision_kernels(si_pbesol, tmp_path, monkeypatch):
+    """Gamma at new temperatures from collision kernels written in files."""
+    monkeypatch.chdir(tmp_path)
+    ph3 = si_pbesol
+    ph3.mesh_numbers = [5, 5, 5]
+    ph3.init_phph_interaction()
+    ph3.run_thermal_conductivity(temperatures=[300, ],
+                                 write_gamma=True,
+                                 num_collision_kernel_bins=100)
+    ph3.run_thermal_conductivity(temperatures=[200, 300, 400])
+    kappa = ph3.thermal_conductivity.kappa
+    ph3.run_thermal_conductivity(temperatures=[200, 300, 400],
+                                 read_gamma=True)
+    np.testing.assert_allclose(kappa, ph3.thermal_conductivity.kappa,
+                               atol=0.5)
+
+
+def test_kappa_RTA_si_read_pp(si_pbesol, tmp_path, monkeypatch):
+    """Ph-ph interaction strength written in files is read ahead"""
+    monkeypatch.chdir(tmp_path)
+    ph3 = si_pbesol
+    ph3.mesh_numbers = [5, 5, 5]
+    ph3.init_phph_interaction()
+    ph3.run_thermal_conductivity(temperatures=[300, ], write_pp=True)
+    kappa = ph3.thermal_conductivity.kappa
+    ph3.run_thermal_conductivity(temperatures=[300, ], read_pp=True)
+    np.testing.assert_allclose(kappa, ph3.thermal_conductivity.kappa,
+                               atol=1e-8)
@@ -0,0 +1,34 @@
+import numpy as np
+
+si_pbesol_kappa_RTA_m444 = [38.51808, 38.51808, 38.51808, 0, 0, 0]
+si_pbesol_kappa_RTA_m888 = [100.3925, 100.3925, 100.3925, 0, 0, 0]
+
+
+def test_mesh_convergence_si(si_pbesol):
+    """Phonons on 4x4x4 mesh are reused on 8x8x8 mesh."""
+    ph3 = si_pbesol
+    results = ph3.run_mesh_convergence([[4, 4, 4], [8, 8, 8]],
+                                       tolerance=0.01,
+                                       temperatures=[300, ])
+    np.testing.assert_array_equal(results['mesh_numbers'],
+                                  [[4, 4, 4], [8, 8, 8]])
+    np.testing.assert_allclose(si_pbesol_kappa_RTA_m444,
+                               results['kappa'][0].ravel(), atol=0.5)
+    np.testing.assert_allclose(si_pbesol_kappa_RTA_m888,
+                               results['kappa'][1].ravel(), atol=0.5)
+    np.testing.assert_array_equal(results['mesh_numbers'][-1],
+                                  ph3.mesh_numbers)
+    assert results['num_reused_phonons'][1] > 0
+    assert not results['is_converged']
+    assert results['extrapolated_kappa'].shape == (1, 1, 6)
+    assert len(results['time']) == 2
+
+
+def test_mesh_convergence_si_converged(si_pbesol):
+    """Stepping stops when kappa changes less than tolerance."""
+    ph3 = si_pbesol
+    results = ph3.run_mesh_convergence([[4, 4, 4], [8, 8, 8], [12, 12, 12]],
+                                       tolerance=1,
+                                       temperatures=[300, ])
+    assert results['is_converged']
+    assert len(results['kappa']) == 2
@@ -1,6 +1,8 @@
 import numpy as np
 
-from phono3py.phonon3.triplets import get_triplets_at_q
+from phono3py.phonon3.triplets import (get_triplets_at_q,
+                                       get_triplets_integration_weights,
+                                       get_triplets_sorted_freq_vertices)
 from phono3py.phonon.grid import BZGrid
 
 
@@ -51,6 +53,23 @@ def test_get_triplets_at_q_type2(si_pbesol_111):
     np.testing.assert_equal(weights, weights_ref)
 
 
+def test_get_triplets_integration_weights_sorted(si_pbesol):
+    si_pbesol.mesh_numbers = [9, 9, 9]
+    si_pbesol.init_phph_interaction()
+    pp = si_pbesol.phph_interaction
+    pp.set_grid_point(23)
+    freq_points = np.linspace(0, 35, 50)
+    sorted_freq_vertices = get_triplets_sorted_freq_vertices(pp)
+    for is_collision_matrix in (False, True):
+        g_ref, g_zero_ref = get_triplets_integration_weights(
+            pp, freq_points, None, is_collision_matrix=is_collision_matrix)
+        g, g_zero = get_triplets_integration_weights(
+            pp, freq_points, None, is_collision_matrix=is_collision_matrix,
+            sorted_freq_vertices=sorted_freq_vertices)
+        np.testing.assert_allclose(g_ref, g, atol=1e-12)
+        np.testing.assert_equal(g_zero_ref, g_zero)
+
+
 def _show_triplets_info(mesh, bz_grid, triplets, reclat, bztype=2):
     if bztype == 2:
         for i in range(np.prod(mesh)):